@@ -0,0 +1,200 @@
+"""
+Caches used by the Keycloak auth verifier on the request path.
+
+Validating a token used to fetch the realm public key from Keycloak and authorizing a
+request used to call the UMA endpoint, on every API request. The realm JWKS is now cached
+(and refreshed when a token is signed with an unknown key) so tokens are validated locally,
+and UMA decisions are cached per (token, resource, scope) until the token expires or
+KEYCLOAK_UMA_CACHE_TTL seconds passed, whichever comes first. Decisions are dropped
+whenever roles, permissions, groups or users are changed through the identity manager,
+in any process (see invalidates_authorization).
+"""
+
+import base64
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from jwcrypto import jwk
+from jwcrypto.common import JWKeyNotFound
+
+from keep.api.core.cache_invalidation import (
+    CacheEntity,
+    cache_invalidation_bus,
+    publish_invalidation,
+)
+from keep.api.core.config import config
+from keycloak import KeycloakOpenID
+
+KEYCLOAK_AUTH_CACHE_ENABLED = config(
+    "KEYCLOAK_AUTH_CACHE_ENABLED", cast=bool, default=True
+)
+KEYCLOAK_UMA_CACHE_TTL = config("KEYCLOAK_UMA_CACHE_TTL", cast=int, default=60)
+KEYCLOAK_UMA_CACHE_SIZE = config("KEYCLOAK_UMA_CACHE_SIZE", cast=int, default=10000)
+KEYCLOAK_JWKS_CACHE_TTL = config("KEYCLOAK_JWKS_CACHE_TTL", cast=int, default=3600)
+# tokens signed with an unknown key can't make us fetch the JWKS more often than this
+KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL = config(
+    "KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL", cast=int, default=30
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _token_expires_at(token: str) -> float | None:
+    # the token was validated by the verifier already, only its exp claim is read here
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except Exception:
+        return None
+
+
+class UmaDecisionCache:
+    def __init__(
+        self, ttl: int = KEYCLOAK_UMA_CACHE_TTL, max_size: int = KEYCLOAK_UMA_CACHE_SIZE
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stats = defaultdict(int)
+        self._decisions: OrderedDict[tuple, tuple[bool, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str, resource: str | None, scope: str | None) -> tuple:
+        # the digest identifies the token, so the subject and its session, exactly
+        return (hashlib.sha256(token.encode()).hexdigest(), resource, scope)
+
+    def get(self, token: str, resource: str | None, scope: str | None) -> bool | None:
+        """
+        Get the cached UMA decision, None if there is none or it expired.
+        """
+        cache_invalidation_bus.poll()
+        key = self._key(token, resource, scope)
+        with self._lock:
+            decision = self._decisions.get(key)
+            if decision is None:
+                self.stats["miss"] += 1
+                return None
+            allowed, expires_at = decision
+            if time.time() >= expires_at:
+                del self._decisions[key]
+                self.stats["miss"] += 1
+                return None
+            self._decisions.move_to_end(key)
+            self.stats["hit"] += 1
+            return allowed
+
+    def set(self, token: str, resource: str | None, scope: str | None, allowed: bool):
+        expires_at = time.time() + self.ttl
+        token_expires_at = _token_expires_at(token)
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        key = self._key(token, resource, scope)
+        with self._lock:
+            self._decisions[key] = (bool(allowed), expires_at)
+            self._decisions.move_to_end(key)
+            while len(self._decisions) > self.max_size:
+                self._decisions.popitem(last=False)
+
+    def invalidate(self, tenant_id: str | None = None):
+        # decisions are per token, and single tenant
+        with self._lock:
+            self._decisions.clear()
+
+
+class _RealmKeys:
+    def __init__(self, keys: jwk.JWKSet):
+        self.keys = keys
+        self.loaded_at = time.monotonic()
+
+
+class JwksCache:
+    def __init__(
+        self,
+        ttl: int = KEYCLOAK_JWKS_CACHE_TTL,
+        min_refresh_interval: int = KEYCLOAK_JWKS_MIN_REFRESH_INTERVAL,
+    ):
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._realms: dict[str, _RealmKeys] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _realm(keycloak_client: KeycloakOpenID) -> str:
+        base_url = keycloak_client.connection.base_url.rstrip("/")
+        return f"{base_url}/realms/{keycloak_client.realm_name}"
+
+    def get_keys(
+        self, keycloak_client: KeycloakOpenID, refresh: bool = False
+    ) -> jwk.JWKSet:
+        """
+        Get the signing keys of the realm, fetched from its JWKS endpoint once per TTL.
+
+        Args:
+            keycloak_client (KeycloakOpenID): The client of the realm.
+            refresh (bool): Fetch the keys again, e.g. because a token is signed with
+                an unknown key, unless they were fetched in the last seconds.
+        """
+        realm = self._realm(keycloak_client)
+        realm_keys = self._realms.get(realm)
+        if realm_keys and not self._is_stale(realm_keys, refresh):
+            return realm_keys.keys
+        with self._lock:
+            realm_keys = self._realms.get(realm)
+            if realm_keys is None or self._is_stale(realm_keys, refresh):
+                logger.info("Loading Keycloak realm keys", extra={"realm": realm})
+                realm_keys = _RealmKeys(
+                    jwk.JWKSet.from_json(json.dumps(keycloak_client.certs()))
+                )
+                self._realms[realm] = realm_keys
+        return realm_keys.keys
+
+    def _is_stale(self, realm_keys: _RealmKeys, refresh: bool) -> bool:
+        age = time.monotonic() - realm_keys.loaded_at
+        if refresh:
+            return age >= self.min_refresh_interval
+        return age >= self.ttl
+
+    def decode_token(self, keycloak_client: KeycloakOpenID, token: str) -> dict:
+        """
+        Validate the token against the cached realm keys and return its claims.
+        """
+        try:
+            return keycloak_client.decode_token(
+                token, validate=True, key=self.get_keys(keycloak_client)
+            )
+        except JWKeyNotFound:
+            # the realm keys were probably rotated
+            return keycloak_client.decode_token(
+                token, validate=True, key=self.get_keys(keycloak_client, refresh=True)
+            )
+
+    def invalidate(self):
+        with self._lock:
+            self._realms.clear()
+
+
+uma_decision_cache = UmaDecisionCache()
+jwks_cache = JwksCache()
+cache_invalidation_bus.subscribe(CacheEntity.AUTHORIZATION, uma_decision_cache.invalidate)
+
+
+def invalidates_authorization(func):
+    """
+    Drop the cached UMA decisions once the decorated identity manager method changed
+    roles, permissions, groups or users, even if it failed half way.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            publish_invalidation(CacheEntity.AUTHORIZATION)
+
+    return wrapper
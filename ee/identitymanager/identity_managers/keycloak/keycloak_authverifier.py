@@ -3,6 +3,11 @@ import os
 
 from fastapi import Depends, HTTPException
 
+from ee.identitymanager.identity_managers.keycloak.keycloak_auth_cache import (
+    KEYCLOAK_AUTH_CACHE_ENABLED,
+    jwks_cache,
+    uma_decision_cache,
+)
 from keep.api.core.config import config
 from keep.api.core.db import create_tenant, get_tenants
 from keep.identitymanager.authenticatedentity import AuthenticatedEntity
@@ -191,6 +196,27 @@ class KeycloakAuthVerifier(AuthVerifierBase):
                     return keep_role.value
         return None
 
+    def _decode_token(self, token: str) -> dict:
+        if not KEYCLOAK_AUTH_CACHE_ENABLED:
+            return self.keycloak_client.decode_token(token, validate=True)
+        # validate locally against the cached realm keys
+        return jwks_cache.decode_token(self.keycloak_client, token)
+
+    def _permissions_check(
+        self, token: str, resource: str | None, scope: str | None = None
+    ) -> bool:
+        if KEYCLOAK_AUTH_CACHE_ENABLED:
+            allowed = uma_decision_cache.get(token, resource, scope)
+            if allowed is not None:
+                return allowed
+        allowed = self.keycloak_uma.permissions_check(
+            token=token,
+            permissions=[UMAPermission(resource=resource, scope=scope or "")],
+        )
+        if KEYCLOAK_AUTH_CACHE_ENABLED:
+            uma_decision_cache.set(token, resource, scope, allowed)
+        return allowed
+
     def _verify_bearer_token(
         self, token: str = Depends(oauth2_scheme)
     ) -> AuthenticatedEntity:
@@ -202,7 +228,7 @@ class KeycloakAuthVerifier(AuthVerifierBase):
                 active_tenant = active_tenant.split("=")[1]
             else:
                 active_tenant = None
-            payload = self.keycloak_client.decode_token(token, validate=True)
+            payload = self._decode_token(token)
         except Exception as e:
             if "Expired" in str(e):
                 raise HTTPException(status_code=401, detail="Expired Keycloak token")
@@ -352,13 +378,13 @@ class KeycloakAuthVerifier(AuthVerifierBase):
 
         # for single tenant Keycloaks, use Keycloak's UMA to authorize
         try:
-            permission = UMAPermission(
-                resource=self.protected_resource,
-                scope=self.scopes[0],  # todo: handle multiple scopes per resource
+            # todo: handle multiple scopes per resource
+            scope = self.scopes[0]
+            self.logger.info(
+                f"Checking permission {self.protected_resource}#{scope}"
             )
-            self.logger.info(f"Checking permission {permission}")
-            allowed = self.keycloak_uma.permissions_check(
-                token=authenticated_entity.token, permissions=[permission]
+            allowed = self._permissions_check(
+                authenticated_entity.token, self.protected_resource, scope
             )
             self.logger.info(f"Permission check result: {allowed}")
             if not allowed:
@@ -379,12 +405,7 @@ class KeycloakAuthVerifier(AuthVerifierBase):
 
         # use Keycloak's UMA to authorize
         try:
-            permission = UMAPermission(
-                resource=resource_id,
-            )
-            allowed = self.keycloak_uma.permissions_check(
-                token=authenticated_entity.token, permissions=[permission]
-            )
+            allowed = self._permissions_check(authenticated_entity.token, resource_id)
             if not allowed:
                 raise HTTPException(status_code=401, detail="Permission check failed")
         # secure fallback
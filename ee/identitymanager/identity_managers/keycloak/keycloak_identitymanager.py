@@ -6,6 +6,9 @@ from fastapi import HTTPException
 from fastapi.routing import APIRoute
 from starlette.routing import Route
 
+from ee.identitymanager.identity_managers.keycloak.keycloak_auth_cache import (
+    invalidates_authorization,
+)
 from ee.identitymanager.identity_managers.keycloak.keycloak_authverifier import (
     KeycloakAuthVerifier,
 )
@@ -292,6 +295,7 @@ class KeycloakIdentityManager(BaseIdentityManager):
             self.logger.error("Failed to create scopes in Keycloak: %s", str(e))
             raise HTTPException(status_code=500, detail="Failed to create scopes")
 
+    @invalidates_authorization
     def create_role(self, role: Role, predefined=False) -> str:
         try:
             role_name = self.keycloak_admin.create_client_role(
@@ -321,6 +325,7 @@ class KeycloakIdentityManager(BaseIdentityManager):
                 self.logger.error("Failed to create roles in Keycloak: %s", str(e))
                 raise HTTPException(status_code=500, detail="Failed to create roles")
 
+    @invalidates_authorization
     def update_role(self, role_id: str, role: Role) -> str:
         # just update the policy
         role_id = self.keycloak_admin.get_client_role_id(self.client_id, role.name)
@@ -533,6 +538,7 @@ class KeycloakIdentityManager(BaseIdentityManager):
         )
         resp.raise_for_status()
 
+    @invalidates_authorization
     def update_user(self, user_email: str, update_data: dict) -> dict:
         try:
             user_id = self.get_user_id_by_email(user_email)
@@ -588,6 +594,7 @@ class KeycloakIdentityManager(BaseIdentityManager):
             self.logger.error("Failed to update user in Keycloak: %s", str(e))
             raise HTTPException(status_code=500, detail="Failed to update user")
 
+    @invalidates_authorization
     def delete_user(self, user_email: str) -> dict:
         try:
             user_id = self.get_user_id_by_email(user_email)
@@ -625,6 +632,7 @@ class KeycloakIdentityManager(BaseIdentityManager):
                 self.logger.error("Failed to create resource in Keycloak: %s", str(e))
                 raise HTTPException(status_code=500, detail="Failed to create resource")
 
+    @invalidates_authorization
     def delete_resource(self, resource_id: str) -> None:
         try:
             resources = self.keycloak_admin.get_client_authz_resources(
@@ -746,6 +754,7 @@ class KeycloakIdentityManager(BaseIdentityManager):
         policy_id = resp.json().get("id")
         return policy_id
 
+    @invalidates_authorization
     def create_permissions(self, permissions: list[ResourcePermission]) -> None:
         # create or update
         try:
@@ -1067,6 +1076,7 @@ class KeycloakIdentityManager(BaseIdentityManager):
             raise HTTPException(status_code=404, detail="Role not found")
         return role
 
+    @invalidates_authorization
     def delete_role(self, role_id: str) -> None:
         try:
             # delete the role
@@ -1095,6 +1105,7 @@ class KeycloakIdentityManager(BaseIdentityManager):
             self.logger.error("Failed to delete role from Keycloak: %s", str(e))
             raise HTTPException(status_code=500, detail="Failed to delete role")
 
+    @invalidates_authorization
     def create_group(
         self, group_name: str, members: list[str], roles: list[str]
     ) -> None:
@@ -1125,6 +1136,7 @@ class KeycloakIdentityManager(BaseIdentityManager):
                 self.logger.error("Failed to create group in Keycloak: %s", str(e))
                 raise HTTPException(status_code=500, detail="Failed to create group")
 
+    @invalidates_authorization
     def update_group(
         self, group_name: str, members: list[str], roles: list[str]
     ) -> None:
@@ -1186,6 +1198,7 @@ class KeycloakIdentityManager(BaseIdentityManager):
             self.logger.error("Failed to update group in Keycloak: %s", str(e))
             raise HTTPException(status_code=500, detail="Failed to update group")
 
+    @invalidates_authorization
     def delete_group(self, group_name: str) -> None:
         try:
             groups = self.keycloak_admin.get_groups(query={"search": group_name})
@@ -31,6 +31,8 @@ from keep.api.core.config import config
 from keep.api.core.db import dispose_session
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
 from keep.api.core.limiter import limiter
+from keep.api.core.alert_partitions import ALERT_PARTITIONING_ENABLED
+from keep.api.core.retention import RETENTION_ENABLED
 from keep.api.logging import CONFIG as logging_config
 from keep.api.middlewares import LoggingMiddleware
 from keep.api.routes import (
@@ -161,7 +163,12 @@ async def startup():
         except Exception:
             logger.exception("Failed to start the topology processor")
 
-    if WATCHER or (MAINTENANCE_WINDOWS and MAINTENANCE_WINDOW_ALERT_STRATEGY == "recover_previous_status"):
+    if (
+        WATCHER
+        or RETENTION_ENABLED
+        or ALERT_PARTITIONING_ENABLED
+        or (MAINTENANCE_WINDOWS and MAINTENANCE_WINDOW_ALERT_STRATEGY == "recover_previous_status")
+    ):
         if REDIS:
             try:
                 logger.info("Starting the watcher process")
@@ -7,12 +7,13 @@ from uuid import uuid4
 
 import redis
 from arq import Worker, cron
-from arq.worker import create_worker
+from arq.worker import create_worker, func
 from dotenv import find_dotenv, load_dotenv
 from pydantic.utils import import_string
 from starlette.datastructures import CommaSeparatedStrings
 
 import keep.api.logging
+from keep.api.bl.batch_enrichment_bl import BATCH_ENRICH_JOB_TTL
 from keep.api.consts import (
     KEEP_ARQ_QUEUE_BASIC,
     KEEP_ARQ_TASK_POOL,
@@ -22,6 +23,7 @@ from keep.api.consts import (
 )
 from keep.api.core.config import config
 from keep.api.redis_settings import get_redis_settings
+from keep.api.tasks.process_batch_enrich_task import async_batch_enrich
 from keep.api.tasks.process_event_task import process_event
 
 # Load environment variables
@@ -120,6 +122,10 @@ async def process_event_in_worker(
 
 FUNCTIONS.append(process_event_in_worker)
 
+if KEEP_ARQ_TASK_POOL in [KEEP_ARQ_TASK_POOL_ALL, KEEP_ARQ_TASK_POOL_BASIC_PROCESSING]:
+    # a batch enrichment outlasts the worker's timeout, bound it by its progress' TTL
+    FUNCTIONS.append(func(async_batch_enrich, timeout=BATCH_ENRICH_JOB_TTL))
+
 
 
 async def startup(ctx):
@@ -0,0 +1,436 @@
+"""
+Chunked enrichment of many alerts at once, behind POST /alerts/batch_enrich.
+
+The selected fingerprints are enriched KEEP_BATCH_ENRICH_CHUNK_SIZE at a time. Every
+chunk is one transaction for the enrichments and their audit, one bulk request to
+Elasticsearch, one insertion of its alerts into the workflow manager and one query for
+the incidents that got all their alerts resolved, so a bulk acknowledge of thousands of
+alerts never holds one huge transaction or request.
+
+Jobs started in the background return their id right away. With REDIS=true they are
+enqueued to the ARQ basic processing queue and their progress is kept in Redis, so that
+any API process can answer GET /alerts/batch_enrich/{job_id}. Otherwise they run in a
+thread of the API process and their progress is kept in its memory. The progress is kept
+for KEEP_BATCH_ENRICH_JOB_TTL seconds. A running job whose process is gone, or that did
+not save its progress for KEEP_BATCH_ENRICH_JOB_STALE_SECONDS, is reported as failed.
+Synchronous enrichments keep no job record.
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from copy import deepcopy
+from typing import Optional
+
+from sqlalchemy_utils import UUIDType
+from sqlmodel import Session
+
+from keep.api.arq_pool import get_pool
+from keep.api.bl.enrichments_bl import EnrichmentsBl
+from keep.api.consts import KEEP_ARQ_QUEUE_BASIC, REDIS
+from keep.api.core.alerts import query_last_alerts
+from keep.api.core.config import config
+from keep.api.core.db import (
+    get_alerts_by_ids,
+    get_last_alerts_by_fingerprints,
+    get_session_sync,
+    resolve_incidents_with_all_alerts_resolved,
+)
+from keep.api.core.elastic import ElasticClient
+from keep.api.core.notification_dispatcher import get_notification_dispatcher
+from keep.api.models.alert import BatchEnrichJobDto, BatchEnrichJobStatus
+from keep.api.models.query import QueryDto
+from keep.api.redis_settings import get_redis_client
+from keep.api.utils.enrichment_helpers import convert_db_alerts_to_dto_alerts
+from keep.identitymanager.authenticatedentity import AuthenticatedEntity
+from keep.workflowmanager.workflowmanager import WorkflowManager
+
+BATCH_ENRICH_CHUNK_SIZE = config("KEEP_BATCH_ENRICH_CHUNK_SIZE", cast=int, default=500)
+BATCH_ENRICH_JOB_TTL = config("KEEP_BATCH_ENRICH_JOB_TTL", cast=int, default=3600)
+BATCH_ENRICH_JOB_STALE_SECONDS = config(
+    "KEEP_BATCH_ENRICH_JOB_STALE_SECONDS", cast=int, default=600
+)
+
+
+def _current_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _is_owner_gone(job: BatchEnrichJobDto) -> bool:
+    """
+    Whether the process running the job is gone: it is a dead process of this host, or it
+    did not save its progress for KEEP_BATCH_ENRICH_JOB_STALE_SECONDS.
+    """
+    heartbeat = job.updated or job.started
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    if (now - heartbeat).total_seconds() > BATCH_ENRICH_JOB_STALE_SECONDS:
+        return True
+    if not job.owner:
+        # still waiting in the queue
+        return False
+    host, _, pid = job.owner.rpartition(":")
+    if host != socket.gethostname():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except (PermissionError, ValueError):
+        pass
+    return False
+
+
+class BatchEnrichJobStore:
+    """The progress of the batch enrichment jobs, expired after the TTL."""
+
+    KEY_PREFIX = "keep:batch-enrich"
+
+    def __init__(self, ttl: int = BATCH_ENRICH_JOB_TTL, use_redis: bool = REDIS):
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self._jobs: dict[tuple[str, str], tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, tenant_id: str, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}:{tenant_id}:{job_id}"
+
+    def save(self, job: BatchEnrichJobDto):
+        if self.use_redis:
+            get_redis_client().set(
+                self._key(job.tenant_id, job.job_id), job.json(), ex=self.ttl
+            )
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._jobs[(job.tenant_id, job.job_id)] = (now + self.ttl, job.json())
+            for key, (expires_at, _) in list(self._jobs.items()):
+                if expires_at < now:
+                    del self._jobs[key]
+
+    def get(self, tenant_id: str, job_id: str) -> Optional[BatchEnrichJobDto]:
+        if self.use_redis:
+            job = get_redis_client().get(self._key(tenant_id, job_id))
+        else:
+            with self._lock:
+                expires_at, job = self._jobs.get((tenant_id, job_id), (0, None))
+            if expires_at < time.monotonic():
+                job = None
+        if not job:
+            return None
+        job = BatchEnrichJobDto.parse_raw(job)
+        if job.status == BatchEnrichJobStatus.RUNNING and _is_owner_gone(job):
+            job.status = BatchEnrichJobStatus.FAILED
+            job.error = "The process running the job is gone"
+            job.finished = datetime.datetime.now(tz=datetime.timezone.utc)
+            self.save(job)
+        return job
+
+
+_job_store: Optional[BatchEnrichJobStore] = None
+_job_store_lock = threading.Lock()
+
+
+def get_batch_enrich_job_store() -> BatchEnrichJobStore:
+    global _job_store
+    if _job_store is None:
+        with _job_store_lock:
+            if _job_store is None:
+                _job_store = BatchEnrichJobStore()
+    return _job_store
+
+
+class BatchEnrichmentBl:
+    def __init__(
+        self,
+        tenant_id: str,
+        authenticated_entity: AuthenticatedEntity,
+        chunk_size: Optional[int] = None,
+        session: Optional[Session] = None,
+    ):
+        self.tenant_id = tenant_id
+        self.authenticated_entity = authenticated_entity
+        self.chunk_size = chunk_size or BATCH_ENRICH_CHUNK_SIZE
+        self.session = session
+        self.logger = logging.getLogger(__name__)
+
+    def select_fingerprints(self, cel: str) -> list[str]:
+        """
+        The fingerprints of all the last alerts matching the CEL expression.
+
+        Read page by page and before any enrichment, so enriching the selected alerts
+        out of the expression can't shift the pages.
+        """
+        fingerprints = []
+        offset = 0
+        while True:
+            db_alerts, total_count = query_last_alerts(
+                tenant_id=self.tenant_id,
+                query=QueryDto(cel=cel, limit=self.chunk_size, offset=offset),
+            )
+            fingerprints.extend(alert.fingerprint for alert in db_alerts)
+            offset += self.chunk_size
+            if not db_alerts or offset >= total_count:
+                break
+        # dict keeps the order of the first occurrence
+        return list(dict.fromkeys(fingerprints))
+
+    def start_job(
+        self,
+        fingerprints: list[str],
+        enrichments: dict,
+        dispose_on_new_alert: bool = False,
+    ) -> BatchEnrichJobDto:
+        """
+        Enrich the fingerprints in the background, with a session of its own.
+
+        Enqueued to the ARQ workers with REDIS=true, run in a thread of this process
+        otherwise.
+        """
+        job = self._new_job(fingerprints)
+        store = get_batch_enrich_job_store()
+        store.save(job)
+        if not REDIS:
+            threading.Thread(
+                target=self.run_job,
+                args=(job.job_id, fingerprints, enrichments, dispose_on_new_alert),
+                name=f"batch-enrich-{job.job_id}",
+                daemon=True,
+            ).start()
+            return job
+
+        try:
+            # called from the route's threadpool, there is no running event loop
+            asyncio.run(
+                self._enqueue_job(job, fingerprints, enrichments, dispose_on_new_alert)
+            )
+        except Exception as e:
+            job.status = BatchEnrichJobStatus.FAILED
+            job.error = str(e)
+            job.finished = datetime.datetime.now(tz=datetime.timezone.utc)
+            store.save(job)
+            raise
+        return job
+
+    async def _enqueue_job(
+        self,
+        job: BatchEnrichJobDto,
+        fingerprints: list[str],
+        enrichments: dict,
+        dispose_on_new_alert: bool,
+    ):
+        # a pool per call, it can't outlive the event loop of asyncio.run
+        redis = await get_pool()
+        try:
+            arq_job = await redis.enqueue_job(
+                "async_batch_enrich",
+                self.tenant_id,
+                job.job_id,
+                self.authenticated_entity.email,
+                self.authenticated_entity.api_key_name,
+                fingerprints,
+                enrichments,
+                dispose_on_new_alert,
+                _queue_name=KEEP_ARQ_QUEUE_BASIC,
+            )
+        finally:
+            await redis.close(close_connection_pool=True)
+        self.logger.info(
+            "Enqueued job",
+            extra={
+                "job_id": arq_job.job_id,
+                "batch_enrich_job_id": job.job_id,
+                "tenant_id": self.tenant_id,
+                "queue": KEEP_ARQ_QUEUE_BASIC,
+            },
+        )
+
+    def run_job(
+        self,
+        job_id: str,
+        fingerprints: list[str],
+        enrichments: dict,
+        dispose_on_new_alert: bool = False,
+    ) -> Optional[BatchEnrichJobDto]:
+        """Run a job started by start_job, unless it expired or was failed meanwhile."""
+        job = get_batch_enrich_job_store().get(self.tenant_id, job_id)
+        if not job or job.status != BatchEnrichJobStatus.RUNNING:
+            self.logger.warning(
+                "Batch enrichment job is not running anymore, skipping it",
+                extra={"tenant_id": self.tenant_id, "job_id": job_id},
+            )
+            return job
+        session = get_session_sync()
+        try:
+            return BatchEnrichmentBl(
+                self.tenant_id,
+                self.authenticated_entity,
+                chunk_size=self.chunk_size,
+                session=session,
+            ).enrich(fingerprints, enrichments, dispose_on_new_alert, job=job)
+        finally:
+            session.close()
+
+    def _new_job(self, fingerprints: list[str]) -> BatchEnrichJobDto:
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        return BatchEnrichJobDto(
+            job_id=str(uuid.uuid4()),
+            tenant_id=self.tenant_id,
+            total=len(fingerprints),
+            started=now,
+            updated=now,
+        )
+
+    def enrich(
+        self,
+        fingerprints: list[str],
+        enrichments: dict,
+        dispose_on_new_alert: bool = False,
+        job: Optional[BatchEnrichJobDto] = None,
+    ) -> BatchEnrichJobDto:
+        """
+        Enrich the fingerprints chunk by chunk. The progress of a background job is saved
+        after every chunk, a synchronous enrichment (no job) keeps no record.
+
+        A failed chunk fails the job, the chunks before it stay enriched.
+        """
+        store = get_batch_enrich_job_store() if job else None
+        job = job or self._new_job(fingerprints)
+        if store:
+            job.owner = _current_owner()
+            self._save_progress(store, job)
+        enrichments_bl = EnrichmentsBl(self.tenant_id, db=self.session)
+        (
+            action_type,
+            action_description,
+            should_run_workflow,
+            should_check_incidents_resolution,
+        ) = enrichments_bl.get_enrichment_metadata(
+            enrichments, self.authenticated_entity
+        )
+        elastic_client = ElasticClient(self.tenant_id)
+        workflow_manager = (
+            WorkflowManager.get_instance() if should_run_workflow else None
+        )
+
+        try:
+            for start in range(0, len(fingerprints), self.chunk_size):
+                chunk = fingerprints[start : start + self.chunk_size]
+                self._enrich_chunk(
+                    enrichments_bl,
+                    elastic_client,
+                    workflow_manager,
+                    chunk,
+                    deepcopy(enrichments),
+                    action_type,
+                    action_description,
+                    dispose_on_new_alert,
+                    should_check_incidents_resolution,
+                )
+                job.processed += len(chunk)
+                job.chunks += 1
+                if store:
+                    self._save_progress(store, job)
+                # coalesced by the dispatcher, the UI polls as the chunks land
+                get_notification_dispatcher().notify(self.tenant_id, "poll-alerts")
+            job.status = BatchEnrichJobStatus.COMPLETED
+        except Exception as e:
+            self.logger.exception(
+                "Failed to enrich alerts batch",
+                extra={
+                    "tenant_id": self.tenant_id,
+                    "job_id": job.job_id,
+                    "processed": job.processed,
+                },
+            )
+            if self.session is not None:
+                self.session.rollback()
+            job.status = BatchEnrichJobStatus.FAILED
+            job.error = str(e)
+        job.finished = datetime.datetime.now(tz=datetime.timezone.utc)
+        if store:
+            self._save_progress(store, job)
+        self.logger.info(
+            "Alerts batch enriched",
+            extra={
+                "tenant_id": self.tenant_id,
+                "job_id": job.job_id,
+                "status": job.status.value,
+                "processed": job.processed,
+                "chunks": job.chunks,
+            },
+        )
+        return job
+
+    @staticmethod
+    def _save_progress(store: BatchEnrichJobStore, job: BatchEnrichJobDto):
+        job.updated = datetime.datetime.now(tz=datetime.timezone.utc)
+        store.save(job)
+
+    def _enrich_chunk(
+        self,
+        enrichments_bl: EnrichmentsBl,
+        elastic_client: ElasticClient,
+        workflow_manager: Optional[WorkflowManager],
+        fingerprints: list[str],
+        enrichments: dict,
+        action_type,
+        action_description: str,
+        dispose_on_new_alert: bool,
+        should_check_incidents_resolution: bool,
+    ):
+        session = self.session or enrichments_bl.db_session
+        enrichments_bl.batch_enrich(
+            fingerprints=fingerprints,
+            enrichments=enrichments,
+            action_type=action_type,
+            action_callee=self.authenticated_entity.email,
+            action_description=action_description,
+            dispose_on_new_alert=dispose_on_new_alert,
+        )
+
+        last_alerts = get_last_alerts_by_fingerprints(
+            self.tenant_id, fingerprints, session=session
+        )
+        alert_ids = [last_alert.alert_id for last_alert in last_alerts]
+
+        if dispose_on_new_alert:
+            # Create instance-wide enrichment for history
+
+            # For better database-native UUID support
+            formatted_alert_ids = [
+                UUIDType(binary=False).process_bind_param(
+                    alert_id, session.bind.dialect
+                )
+                for alert_id in alert_ids
+            ]
+            enrichments_bl.batch_enrich(
+                fingerprints=formatted_alert_ids,
+                enrichments=enrichments,
+                action_type=action_type,
+                action_callee=self.authenticated_entity.email,
+                action_description=action_description,
+                audit_enabled=False,
+            )
+
+        alerts = get_alerts_by_ids(self.tenant_id, alert_ids, session=session)
+        enriched_alerts_dto = convert_db_alerts_to_dto_alerts(alerts, session=session)
+
+        try:
+            elastic_client.index_alerts(alerts=enriched_alerts_dto)
+        except Exception:
+            self.logger.exception("Failed to push alerts to elasticsearch")
+
+        if workflow_manager:
+            workflow_manager.insert_events(
+                tenant_id=self.tenant_id, events=enriched_alerts_dto
+            )
+
+        if should_check_incidents_resolution:
+            resolve_incidents_with_all_alerts_resolved(
+                self.tenant_id, fingerprints, session=session
+            )
@@ -15,6 +15,7 @@ from sqlalchemy import func
 from sqlalchemy_utils import UUIDType
 from sqlmodel import Session, select
 
+from keep.api.core.alert_activation_cache import alert_activation_cache
 from keep.api.core.config import config
 from keep.api.core.db import batch_enrich
 from keep.api.core.db import enrich_entity as enrich_alert_db
@@ -26,7 +27,6 @@ from keep.api.core.db import (
     get_last_alert_by_fingerprint,
     get_mapping_rule_by_id,
     get_session_sync,
-    get_topology_data_by_dynamic_matcher,
     is_all_alerts_resolved,
 )
 from keep.api.core.elastic import ElasticClient
@@ -44,6 +44,7 @@ from keep.api.models.db.incident import IncidentStatus
 from keep.api.models.db.mapping import MappingRule
 from keep.api.models.db.rule import ResolveOn
 from keep.identitymanager.authenticatedentity import AuthenticatedEntity
+from keep.topologies.topology_index import get_topology_data_by_dynamic_matcher
 
 
 def is_valid_uuid(uuid_str):
@@ -679,6 +680,7 @@ class EnrichmentsBl:
             audit_enabled=audit_enabled,
             session=self.db_session,
         )
+        alert_activation_cache.discard(self.tenant_id, fingerprints)
 
     def disposable_enrich_entity(
         self,
@@ -776,6 +778,7 @@ class EnrichmentsBl:
             force=force,
             audit_enabled=audit_enabled,
         )
+        alert_activation_cache.discard(self.tenant_id, [fingerprint])
 
         self.logger.debug(
             "alert enriched in db, enriching elastic",
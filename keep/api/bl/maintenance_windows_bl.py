@@ -1,48 +1,52 @@
+import bisect
 import datetime
 import json
 import logging
+from collections import defaultdict
 
 import celpy
 from sqlmodel import Session
 
 from keep.api.consts import KEEP_CORRELATION_ENABLED, MAINTENANCE_WINDOW_ALERT_STRATEGY
 from opentelemetry import trace
+from keep.api.core.config import config
 from keep.api.core.db import (
-    add_audit,
-    get_alert_by_event_id,
-    get_alerts_by_status,
+    get_alerts_by_ids,
+    get_alerts_by_status_batched,
     get_all_presets_dtos,
-    get_last_alert_by_fingerprint,
+    get_last_alerts_by_fingerprints,
     get_maintenance_windows_started,
     get_session_sync,
-    recover_prev_alert_status,
-    set_maintenance_windows_trace,
+    update_alerts_events,
 )
-from keep.api.core.dependencies import get_pusher_client
+from keep.api.core.maintenance_windows_cache import (
+    CachedMaintenanceWindow,
+    get_cel_program,
+    maintenance_windows_cache,
+)
+from keep.api.core.notification_dispatcher import get_notification_dispatcher
 from keep.api.models.action_type import ActionType
 from keep.api.models.alert import AlertDto, AlertStatus
 from keep.api.models.db.alert import Alert, AlertAudit
 from keep.api.models.db.maintenance_window import MaintenanceWindowRule
-from keep.api.tasks.notification_cache import get_notification_cache
-from keep.api.utils.cel_utils import preprocess_cel_expression
+from keep.rulesengine.batch_cel import AlertBatch
 from keep.rulesengine.rulesengine import RulesEngine
 from keep.workflowmanager.workflowmanager import WorkflowManager
 
 tracer = trace.get_tracer(__name__)
 
+MAINTENANCE_WINDOW_RECOVER_BATCH_SIZE = config(
+    "KEEP_MAINTENANCE_WINDOW_RECOVER_BATCH_SIZE", cast=int, default=1000
+)
+
 class MaintenanceWindowsBl:
 
     def __init__(self, tenant_id: str, session: Session | None) -> None:
         self.logger = logging.getLogger(__name__)
         self.tenant_id = tenant_id
         self.session = session if session else get_session_sync()
-        self.maintenance_rules: list[MaintenanceWindowRule] = (
-            self.session.query(MaintenanceWindowRule)
-            .filter(MaintenanceWindowRule.tenant_id == tenant_id)
-            .filter(MaintenanceWindowRule.enabled == True)
-            .filter(MaintenanceWindowRule.end_time >= datetime.datetime.now(datetime.UTC))
-            .filter(MaintenanceWindowRule.start_time <= datetime.datetime.now(datetime.UTC))
-            .all()
+        self.maintenance_rules: list[CachedMaintenanceWindow] = (
+            maintenance_windows_cache.get_windows(tenant_id, self.session)
         )
 
     def check_if_alert_in_maintenance_windows(self, alert: AlertDto) -> bool:
@@ -56,7 +60,8 @@ class MaintenanceWindowsBl:
             return False
 
         self.logger.info("Checking maintenance window for alert", extra=extra)
-        env = celpy.Environment()
+        # built lazily, once per alert, and shared by all the windows
+        activation = None
 
         for maintenance_rule in self.maintenance_rules:
             if alert.status in maintenance_rule.ignore_statuses:
@@ -66,14 +71,19 @@ class MaintenanceWindowsBl:
                 )
                 continue
 
-            if maintenance_rule.end_time.replace(tzinfo=datetime.UTC) <= datetime.datetime.now(datetime.UTC):
-                # this is wtf error, should not happen because of query in init
-                self.logger.error(
-                    "Fetched maintenance window which already ended by mistake, should not happen!"
+            if not maintenance_rule.is_active(datetime.datetime.now(datetime.UTC)):
+                # the window ended after the rules were fetched
+                self.logger.debug(
+                    "Maintenance window is not active anymore",
+                    extra={**extra, "maintenance_rule_id": maintenance_rule.id},
                 )
                 continue
 
-            cel_result = MaintenanceWindowsBl.evaluate_cel(maintenance_rule, alert, env, self.logger, extra)
+            if activation is None:
+                activation = MaintenanceWindowsBl.get_cel_activation(alert)
+            cel_result = MaintenanceWindowsBl.evaluate_cel(
+                maintenance_rule, alert, None, self.logger, extra, activation=activation
+            )
 
             if cel_result:
                 self.logger.info(
@@ -117,21 +127,30 @@ class MaintenanceWindowsBl:
         self.logger.info("Alert is not in maintenance window", extra=extra)
         return False
 
-    @staticmethod
-    def evaluate_cel(maintenance_window: MaintenanceWindowRule, alert: AlertDto | Alert, environment: celpy.Environment, logger, logger_extra_info: dict) -> bool:
-
-        cel = preprocess_cel_expression(maintenance_window.cel_query)
-        ast = environment.compile(cel)
-        prgm = environment.program(ast)
 
+    @staticmethod
+    def get_cel_activation(alert: AlertDto | Alert):
         if isinstance(alert, AlertDto):
             payload = alert.dict()
         else:
-            payload = alert.event
+            payload = dict(alert.event)
         # todo: fix this in the future
-        payload["source"] = payload["source"][0]
+        if isinstance(payload.get("source"), list):
+            payload["source"] = payload["source"][0]
+        return celpy.json_to_cel(json.loads(json.dumps(payload, default=str)))
 
-        activation = celpy.json_to_cel(json.loads(json.dumps(payload, default=str)))
+    @staticmethod
+    def evaluate_cel(
+        maintenance_window: MaintenanceWindowRule | CachedMaintenanceWindow,
+        alert: AlertDto | Alert,
+        environment: celpy.Environment | None,
+        logger,
+        logger_extra_info: dict,
+        activation=None,
+    ) -> bool:
+        prgm = get_cel_program(maintenance_window.cel_query)
+        if activation is None:
+            activation = MaintenanceWindowsBl.get_cel_activation(alert)
 
         try:
             cel_result = prgm.evaluate(activation)
@@ -155,6 +174,7 @@ class MaintenanceWindowsBl:
     def recover_strategy(
         logger: logging.Logger,
         session: Session | None = None,
+        batch_size: int = MAINTENANCE_WINDOW_RECOVER_BATCH_SIZE,
     ):
         """
 
@@ -172,152 +192,213 @@ class MaintenanceWindowsBl:
         Once the status is recovered, Workflows, Correlations/Incidents and Presets will be launched, in the
         same way that a new alert.
 
+        Alerts are read in batches of `batch_size`, every batch is updated and audited in bulk, and
+        the recovered alerts are launched once per tenant at the end.
+
 
         Args:
             logger (logging.Logger): The logger to use.
             session (Session | None): The SQLAlchemy session to use. If None, a new session will be created.
+            batch_size (int): The number of alerts to process at once.
         """
         logger.info("Starting recover strategy for maintenance windows review.")
-        env = celpy.Environment()
         if session is None:
             session = get_session_sync()
-        windows = get_maintenance_windows_started(session)
-        alerts_in_maint = get_alerts_by_status(AlertStatus.MAINTENANCE, session)
-        fingerprints_to_check: set = set()
-        for alert in alerts_in_maint:
-            active = False
-            for window in windows:
-                w_start = window.start_time
-                w_end = window.end_time
-                is_enable = window.enabled
-                if window.tenant_id != alert.tenant_id:
+        windows_index = MaintenanceWindowsIndex(
+            get_maintenance_windows_started(session), datetime.datetime.utcnow()
+        )
+        fingerprints_to_check: dict[str, set[str]] = defaultdict(set)
+        for alerts_in_maint in get_alerts_by_status_batched(
+            AlertStatus.MAINTENANCE, batch_size, session
+        ):
+            events_to_update = []
+            audits = []
+            for alert in alerts_in_maint:
+                window = windows_index.get_blocking_window(alert, logger)
+                if window:
+                    logger.info("Alert %s is blocked due to the maintenance window: %s.", alert.id, window.id)
+                    trace = alert.event.get("maintenance_windows_trace", [])
+                    if str(window.id) not in trace:
+                        events_to_update.append(
+                            (alert, {**alert.event, "maintenance_windows_trace": [*trace, str(window.id)]})
+                        )
                     continue
-                # Check active windows
-                if (
-                    w_start < alert.timestamp
-                    and alert.timestamp < w_end
-                    and w_end > datetime.datetime.utcnow()
-                    and is_enable
-                ):
-                    logger.info("Checking alert %s in maintenance window %s", alert.id, window.id)
-                    is_in_cel = MaintenanceWindowsBl.evaluate_cel(
-                        window, alert, env, logger, {"tenant_id": alert.tenant_id, "alert_id": alert.id}
+
+                event = {
+                    **alert.event,
+                    "status": alert.event.get("previous_status"),
+                    "previous_status": alert.event.get("status"),
+                }
+                events_to_update.append((alert, event))
+                fingerprints_to_check[alert.tenant_id].add(alert.fingerprint)
+                audits.append(
+                    AlertAudit(
+                        tenant_id=alert.tenant_id,
+                        fingerprint=alert.fingerprint,
+                        user_id="system",
+                        action=ActionType.MAINTENANCE_EXPIRED.value,
+                        description=(
+                            f"Alert {alert.id} has recover its previous status, "
+                            f"from {event.get('previous_status')} to {event.get('status')}"
+                        ),
                     )
-                    # Recover source structure
-                    if not isinstance(alert.event.get("source"), list):
-                        alert.event["source"] = [alert.event["source"]]
-                    if is_in_cel:
-                        active = True
-                        set_maintenance_windows_trace(alert, window, session)
-                        logger.info("Alert %s is blocked due to the maintenance window: %s.", alert.id, window.id)
-                        break
-            if not active:
-                recover_prev_alert_status(alert, session)
-                fingerprints_to_check.add((alert.tenant_id, alert.fingerprint))
-                add_audit(
-                    tenant_id=alert.tenant_id,
-                    fingerprint=alert.fingerprint,
-                    user_id="system",
-                    action=ActionType.MAINTENANCE_EXPIRED,
-                    description=(
-                        f"Alert {alert.id} has recover its previous status, "
-                        f"from {alert.event.get('previous_status')} to {alert.event.get('status')}"
-                    ),
                 )
+            update_alerts_events(events_to_update, session)
+            session.add_all(audits)
+            session.commit()
+            logger.info(
+                "Reviewed batch of alerts in maintenance",
+                extra={"alerts_count": len(alerts_in_maint), "recovered_count": len(audits)},
+            )
+
+        for tenant, fingerprints in fingerprints_to_check.items():
+            fingerprints = list(fingerprints)
+            for i in range(0, len(fingerprints), batch_size):
+                MaintenanceWindowsBl._push_recovered_alerts(
+                    tenant, fingerprints[i : i + batch_size], session, logger
+                )
+        logger.info("Finished recover strategy for maintenance windows review.")
 
-        for (tenant, fp) in fingerprints_to_check:
-            last_alert = get_last_alert_by_fingerprint(tenant, fp, session)
-            alert = get_alert_by_event_id(tenant, str(last_alert.alert_id), session)
+    @staticmethod
+    def _push_recovered_alerts(
+        tenant: str,
+        fingerprints: list[str],
+        session: Session,
+        logger: logging.Logger,
+    ):
+        last_alerts = get_last_alerts_by_fingerprints(tenant, fingerprints, session)
+        alerts = get_alerts_by_ids(
+            tenant, [last_alert.alert_id for last_alert in last_alerts], session
+        )
+        alert_dtos = []
+        for alert in alerts:
             if "previous_status" not in alert.event:
                 logger.info(
                     f"Alert {alert.id} does not have previous status, cannot proceed with recover strategy",
-                    extra={"tenant_id": tenant, "fingerprint": fp, "alert_id": alert.id, "alert.status": alert.event.get("status")},
+                    extra={"tenant_id": tenant, "fingerprint": alert.fingerprint, "alert_id": alert.id, "alert.status": alert.event.get("status")},
                 )
                 continue
-            if not isinstance(alert.event.get("source"), list):
-                alert.event["source"] = [alert.event["source"]]
-            alert_dto = AlertDto(**alert.event)
-            with tracer.start_as_current_span("mw_recover_strategy_push_to_workflows"):
-                try:
-                    # Now run any workflow that should run based on this alert
-                    # TODO: this should publish event
-                    workflow_manager = WorkflowManager.get_instance()
-                    # insert the events to the workflow manager process queue
-                    logger.info("Adding event to the workflow manager queue")
-                    workflow_manager.insert_events(tenant, [alert_dto])
-                    logger.info("Added event to the workflow manager queue")
-                except Exception:
-                    logger.exception(
-                        "Failed to run workflows based on alerts",
-                        extra={
-                            "provider_type": alert_dto.providerType,
-                            "provider_id": alert_dto.providerId,
-                            "tenant_id": tenant,
-                        },
-                    )
+            event = dict(alert.event)
+            if not isinstance(event.get("source"), list):
+                event["source"] = [event["source"]]
+            alert_dtos.append(AlertDto(**event))
+        if not alert_dtos:
+            return
 
-            with tracer.start_as_current_span("mw_recover_strategy_run_rules_engine"):
-                # Now we need to run the rules engine
-                if KEEP_CORRELATION_ENABLED:
-                    incidents = []
-                    try:
-                        rules_engine = RulesEngine(tenant_id=tenant)
-                        # handle incidents, also handle workflow execution as
-                        incidents = rules_engine.run_rules(
-                            [alert_dto], session=session
-                        )
-                    except Exception:
-                        logger.exception(
-                            "Failed to run rules engine",
-                            extra={
-                                "provider_type": alert_dto.providerType,
-                                "provider_id": alert_dto.providerId,
-                                "tenant_id": tenant,
-                            },
-                        )
-                    pusher_cache = get_notification_cache()
-                    if incidents and pusher_cache.should_notify(tenant, "incident-change"):
-                        pusher_client = get_pusher_client()
-                        try:
-                            pusher_client.trigger(
-                                f"private-{tenant}",
-                                "incident-change",
-                                {},
-                            )
-                        except Exception:
-                            logger.exception("Failed to tell the client to pull incidents")
+        with tracer.start_as_current_span("mw_recover_strategy_push_to_workflows"):
+            try:
+                # Now run any workflow that should run based on this alert
+                # TODO: this should publish event
+                workflow_manager = WorkflowManager.get_instance()
+                # insert the events to the workflow manager process queue
+                logger.info("Adding events to the workflow manager queue")
+                workflow_manager.insert_events(tenant, alert_dtos)
+                logger.info("Added events to the workflow manager queue")
+            except Exception:
+                logger.exception(
+                    "Failed to run workflows based on alerts",
+                    extra={"tenant_id": tenant},
+                )
 
+        with tracer.start_as_current_span("mw_recover_strategy_run_rules_engine"):
+            dispatcher = get_notification_dispatcher()
+            # Now we need to run the rules engine
+            if KEEP_CORRELATION_ENABLED:
+                incidents = []
                 try:
-                    presets = get_all_presets_dtos(tenant)
                     rules_engine = RulesEngine(tenant_id=tenant)
-                    presets_do_update = []
-                    for preset_dto in presets:
-                        # filter the alerts based on the search query
-                        filtered_alerts = rules_engine.filter_alerts(
-                            [alert_dto], preset_dto.cel_query
-                        )
-                        # if not related alerts, no need to update
-                        if not filtered_alerts:
-                            continue
-                        presets_do_update.append(preset_dto)
-                    if pusher_cache.should_notify(tenant, "poll-presets"):
-                        try:
-                            pusher_client.trigger(
-                                f"private-{tenant}",
-                                "poll-presets",
-                                json.dumps(
-                                    [p.name.lower() for p in presets_do_update], default=str
-                                ),
-                            )
-                        except Exception:
-                            logger.exception("Failed to send presets via pusher")
+                    # handle incidents, also handle workflow execution as
+                    incidents = rules_engine.run_rules(alert_dtos, session=session)
                 except Exception:
                     logger.exception(
-                        "Failed to send presets via pusher",
-                        extra={
-                            "provider_type": alert_dto.providerType,
-                            "provider_id": alert_dto.providerId,
-                            "tenant_id": tenant,
-                        },
+                        "Failed to run rules engine",
+                        extra={"tenant_id": tenant},
                     )
-        logger.info("Finished recover strategy for maintenance windows review.")
\ No newline at end of file
+                if incidents:
+                    dispatcher.notify(tenant, "incident-change")
+
+            if not dispatcher.enabled:
+                return
+            try:
+                presets = get_all_presets_dtos(tenant)
+                rules_engine = RulesEngine(tenant_id=tenant)
+                presets_do_update = []
+                # built once for all the presets
+                alerts_batch = AlertBatch(
+                    rules_engine.get_alerts_activation(alert_dtos) if presets else []
+                )
+                for preset_dto in presets:
+                    # filter the alerts based on the search query
+                    filtered_alerts = rules_engine.filter_alerts(
+                        alert_dtos,
+                        preset_dto.cel_query,
+                        alerts_batch.activations,
+                        alerts_batch,
+                    )
+                    # if not related alerts, no need to update
+                    if not filtered_alerts:
+                        continue
+                    presets_do_update.append(preset_dto)
+                dispatcher.notify(
+                    tenant,
+                    "poll-presets",
+                    [p.name.lower() for p in presets_do_update],
+                )
+            except Exception:
+                logger.exception(
+                    "Failed to send presets via pusher",
+                    extra={"tenant_id": tenant},
+                )
+
+
+class MaintenanceWindowsIndex:
+    """
+    Started maintenance windows grouped by tenant and sorted by start time, so only the
+    windows of the alert tenant which contain the alert timestamp are evaluated.
+    """
+
+    def __init__(self, windows: list[MaintenanceWindowRule], now: datetime.datetime):
+        tenants_windows = defaultdict(list)
+        for window in windows:
+            if window.enabled and window.end_time > now:
+                tenants_windows[window.tenant_id].append(window)
+        self._tenants: dict[str, tuple[list, list[MaintenanceWindowRule]]] = {}
+        for tenant_id, tenant_windows in tenants_windows.items():
+            tenant_windows.sort(key=lambda window: window.start_time)
+            self._tenants[tenant_id] = (
+                [window.start_time for window in tenant_windows],
+                tenant_windows,
+            )
+
+    def get_windows(
+        self, tenant_id: str, timestamp: datetime.datetime
+    ) -> list[MaintenanceWindowRule]:
+        if tenant_id not in self._tenants:
+            return []
+        starts, windows = self._tenants[tenant_id]
+        return [
+            window
+            for window in windows[: bisect.bisect_left(starts, timestamp)]
+            if timestamp < window.end_time
+        ]
+
+    def get_blocking_window(
+        self, alert: Alert, logger: logging.Logger
+    ) -> MaintenanceWindowRule | None:
+        windows = self.get_windows(alert.tenant_id, alert.timestamp)
+        if not windows:
+            return None
+        activation = MaintenanceWindowsBl.get_cel_activation(alert)
+        for window in windows:
+            logger.info("Checking alert %s in maintenance window %s", alert.id, window.id)
+            if MaintenanceWindowsBl.evaluate_cel(
+                window,
+                alert,
+                None,
+                logger,
+                {"tenant_id": alert.tenant_id, "alert_id": alert.id},
+                activation=activation,
+            ):
+                return window
+        return None
+
@@ -9,6 +9,16 @@ RUNNING_IN_CLOUD_RUN = os.environ.get("K_SERVICE") is not None
 PROVIDER_PULL_INTERVAL_MINUTE = int(
     os.environ.get("KEEP_PULL_INTERVAL", 10080)
 )  # maximum once a week
+# Pulling scheduler: providers are pulled concurrently, each pull is bounded by a timeout
+# and providers of the same type are rate limited by a per process concurrency limit
+PROVIDER_PULL_MAX_WORKERS = int(os.environ.get("KEEP_PULL_MAX_WORKERS", 5))
+PROVIDER_PULL_TIMEOUT_SECONDS = int(os.environ.get("KEEP_PULL_TIMEOUT_SECONDS", 300))
+PROVIDER_PULL_MAX_CONCURRENT_PER_TYPE = int(
+    os.environ.get("KEEP_PULL_MAX_CONCURRENT_PER_TYPE", 2)
+)
+PROVIDER_PULL_PROCESS_BATCH_SIZE = int(
+    os.environ.get("KEEP_PULL_PROCESS_BATCH_SIZE", 100)
+)
 STATIC_PRESETS = {
     "feed": PresetDto(
         id=StaticPresetsId.FEED_PRESET_ID.value,
@@ -0,0 +1,161 @@
+"""
+Per-process cache of the CEL activations of the last alerts, shared by the preset searches.
+
+SearchEngine.search_preset_alerts (internal search mode) evaluates the CEL of every preset
+against the last alerts of the tenant, on every /preset call of every user. Building the
+activation of an alert (dict(), a JSON round trip and json_to_cel) cost more than
+evaluating the presets. The activations are now cached per (tenant, fingerprint), with
+the version of the alert they were built from: its id, its event and its enrichments
+(see get_alert_activation_version). A new occurrence, an enrichment or an event updated in
+place (e.g. the status recovered after a maintenance window) changes the version, so only
+the alerts changed since the previous search are built again, in any process, without
+relying on invalidation. Ingestion and enrichment also drop the superseded
+entries right away (see discard) so they don't wait for the LRU to go.
+
+At most KEEP_ALERT_ACTIVATION_CACHE_SIZE activations are kept, the least recently used
+are dropped first.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Iterable
+
+from keep.api.core.config import config
+from keep.api.models.alert import AlertDto
+
+ALERT_ACTIVATION_CACHE_ENABLED = config(
+    "KEEP_ALERT_ACTIVATION_CACHE_ENABLED", cast=bool, default=True
+)
+ALERT_ACTIVATION_CACHE_SIZE = config(
+    "KEEP_ALERT_ACTIVATION_CACHE_SIZE", cast=int, default=50000
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_alert_activation_version(alert) -> str:
+    """
+    The version of the activation of a last alert (as returned by get_last_alerts).
+
+    Must be taken before convert_db_alerts_to_dto_alerts, which merges the enrichments
+    into the event of the alert. The whole event is part of it since some paths update it
+    in place, keeping the id (see recover_prev_alert_status and update_alerts_events).
+    """
+    enrichments = alert.alert_enrichment.enrichments if alert.alert_enrichment else None
+    return hashlib.blake2b(
+        json.dumps(
+            [str(alert.id), alert.event, enrichments],
+            sort_keys=True,
+            default=str,
+        ).encode(),
+        digest_size=16,
+    ).hexdigest()
+
+
+class AlertActivationCache:
+    def __init__(
+        self,
+        max_size: int = ALERT_ACTIVATION_CACHE_SIZE,
+        enabled: bool = ALERT_ACTIVATION_CACHE_ENABLED,
+    ):
+        self.max_size = max_size
+        self.enabled = enabled
+        self.stats = defaultdict(int)
+        self._entries: OrderedDict[tuple[str, str], tuple[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version(alert: AlertDto, versions: dict[str, str]) -> str | None:
+        version = versions.get(alert.event_id)
+        if version is None:
+            return None
+        # dismissUntil expires with time, not with a new version
+        return f"{version}:{int(alert.dismissed)}"
+
+    def get_activations(
+        self,
+        tenant_id: str,
+        alerts: list[AlertDto],
+        versions: dict[str, str],
+        build_activations: Callable[[list[AlertDto]], list],
+    ) -> list:
+        """
+        Get the activations of the alerts, building only the missing or outdated ones.
+
+        Args:
+            tenant_id (str): The tenant of the alerts.
+            alerts (list[AlertDto]): The alerts, one per fingerprint.
+            versions (dict[str, str]): The version of every alert by event_id, alerts
+                without a version are built and not cached.
+            build_activations (Callable): Builds the activations of a list of alerts,
+                e.g. RulesEngine.get_alerts_activation.
+
+        Returns:
+            list: The activations, in the order of the alerts.
+        """
+        if not self.enabled:
+            return build_activations(alerts)
+
+        activations = [None] * len(alerts)
+        missing = []
+        with self._lock:
+            for i, alert in enumerate(alerts):
+                version = self._version(alert, versions)
+                key = (tenant_id, alert.fingerprint)
+                entry = self._entries.get(key) if version else None
+                if entry is not None and entry[0] == version:
+                    self._entries.move_to_end(key)
+                    activations[i] = entry[1]
+                else:
+                    missing.append(i)
+            self.stats["hits"] += len(alerts) - len(missing)
+            self.stats["misses"] += len(missing)
+        if not missing:
+            return activations
+
+        built = build_activations([alerts[i] for i in missing])
+        with self._lock:
+            for i, activation in zip(missing, built):
+                activations[i] = activation
+                version = self._version(alerts[i], versions)
+                if version is None:
+                    continue
+                key = (tenant_id, alerts[i].fingerprint)
+                self._entries[key] = (version, activation)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        logger.debug(
+            "Built alert activations",
+            extra={
+                "tenant_id": tenant_id,
+                "built": len(missing),
+                "cached": len(alerts) - len(missing),
+            },
+        )
+        return activations
+
+    def discard(self, tenant_id: str, fingerprints: Iterable[str]):
+        """Drop the activations of fingerprints that got a new occurrence or enrichment."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for fingerprint in fingerprints:
+                self._entries.pop((tenant_id, fingerprint), None)
+
+    def invalidate(self, tenant_id: str | None = None):
+        with self._lock:
+            if tenant_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == tenant_id]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+alert_activation_cache = AlertActivationCache()
@@ -0,0 +1,351 @@
+"""
+Compact storage of the alert history (opt-in, KEEP_ALERT_HISTORY_COMPACTION_ENABLED).
+
+Every occurrence of an alert is an Alert row holding the whole event, although most
+occurrences only differ from the previous ones of the same fingerprint by a few fields
+(lastReceived, status, counters...). In compact mode, an event is stored once in the
+alertpayload table, addressed by the hash of its content, and the occurrences of the
+fingerprint are stored as a delta of it, keeping:
+- the fields that differ from the payload,
+- the COMPACTED_ALERT_FIELDS, so that the SQL filters over the history (status,
+  severity...) keep working.
+Alert.payload_hash is then set to the hash of the payload the event is a delta of. When
+an occurrence drifted too far from the payload of its fingerprint, its own event becomes
+the payload of the next ones.
+
+Only the superseded occurrences are compacted, by set_last_alert once an alert is
+replaced by a newer one, the last alert of every fingerprint keeps its whole event for
+the alerts queries. `keep compact-alert-history` compacts the existing history.
+
+expand_alert_payloads rebuilds the events of the compacted rows, it's called by the
+functions loading the history (get_alerts_by_fingerprint...) or alerts by id
+(get_alert_by_event_id, get_alerts_by_ids...) and by convert_db_alerts_to_dto_alerts. Payloads are immutable, so they're cached per process.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Iterable
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import Session, select
+
+from keep.api.core.config import config
+from keep.api.models.db.alert import Alert, AlertPayload, LastAlert
+
+ALERT_HISTORY_COMPACTION_ENABLED = config(
+    "KEEP_ALERT_HISTORY_COMPACTION_ENABLED", cast=bool, default=False
+)
+COMPACTED_ALERT_FIELDS = [
+    field.strip()
+    for field in config(
+        "KEEP_ALERT_HISTORY_COMPACTED_FIELDS",
+        default="id,name,status,severity,service,source,lastReceived",
+    ).split(",")
+    if field.strip()
+]
+ALERT_PAYLOADS_CACHE_SIZE = config(
+    "KEEP_ALERT_PAYLOADS_CACHE_SIZE", cast=int, default=10000
+)
+# beyond this share of the event, the delta becomes the next payload of the fingerprint
+MAX_DELTA_RATIO = 0.5
+SUPPORTED_DIALECTS = ("postgresql", "mysql", "sqlite")
+
+logger = logging.getLogger(__name__)
+
+
+class AlertPayloadsCache:
+    """
+    LRU of the payloads read by the process, as JSON so that every reader gets its own
+    copy of the event.
+    """
+
+    def __init__(self, max_size: int = ALERT_PAYLOADS_CACHE_SIZE):
+        self.max_size = max_size
+        self._payloads: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, str]) -> dict | None:
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is None:
+                return None
+            self._payloads.move_to_end(key)
+        return json.loads(payload)
+
+    def set(self, key: tuple[str, str], event: dict):
+        payload = json.dumps(event, default=str)
+        with self._lock:
+            self._payloads[key] = payload
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.max_size:
+                self._payloads.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._payloads.clear()
+
+
+alert_payloads_cache = AlertPayloadsCache()
+
+
+def get_alert_payloads(
+    session: Session, keys: Iterable[tuple[str, str]]
+) -> dict[tuple[str, str], dict]:
+    """
+    Get the payloads of the (tenant_id, payload_hash) keys, from the cache when possible.
+    """
+    payloads = {}
+    missing_per_tenant = defaultdict(set)
+    for key in set(keys):
+        payload = alert_payloads_cache.get(key)
+        if payload is None:
+            missing_per_tenant[key[0]].add(key[1])
+        else:
+            payloads[key] = payload
+    for tenant_id, payload_hashes in missing_per_tenant.items():
+        rows = session.exec(
+            select(AlertPayload.payload_hash, AlertPayload.event).where(
+                AlertPayload.tenant_id == tenant_id,
+                AlertPayload.payload_hash.in_(payload_hashes),
+            )
+        ).all()
+        for payload_hash, event in rows:
+            alert_payloads_cache.set((tenant_id, payload_hash), event)
+            payloads[(tenant_id, payload_hash)] = event
+    return payloads
+
+
+def expand_alert_payloads(session: Session, alerts: Iterable[Alert]) -> None:
+    """
+    Rebuild the whole event of the compacted alerts, in place.
+    """
+    compacted = [alert for alert in alerts if alert.payload_hash]
+    if not compacted:
+        return
+    payloads = get_alert_payloads(
+        session, [(alert.tenant_id, alert.payload_hash) for alert in compacted]
+    )
+    for alert in compacted:
+        payload = payloads.get((alert.tenant_id, alert.payload_hash))
+        if payload is None:
+            logger.warning(
+                "Payload of a compacted alert not found",
+                extra={
+                    "tenant_id": alert.tenant_id,
+                    "alert_id": alert.id,
+                    "payload_hash": alert.payload_hash,
+                },
+            )
+            continue
+        # committed, the expanded event must not be written back by a flush
+        set_committed_value(alert, "event", {**payload, **alert.event})
+
+
+def _payload_hash(event: dict) -> str:
+    return hashlib.sha256(
+        json.dumps(event, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def _delta(event: dict, payload: dict) -> dict | None:
+    if payload.keys() - event.keys():
+        # the event doesn't have every field of the payload
+        return None
+    delta = {
+        field: value
+        for field, value in event.items()
+        if field in COMPACTED_ALERT_FIELDS
+        or field not in payload
+        or payload[field] != value
+    }
+    if len(json.dumps(delta, default=str)) > MAX_DELTA_RATIO * len(
+        json.dumps(event, default=str)
+    ):
+        return None
+    return delta
+
+
+def _insert_payloads_statement(dialect_name: str, payloads: list[dict]):
+    table = AlertPayload.__table__
+    if dialect_name == "mysql":
+        return mysql_insert(table).values(payloads).prefix_with("IGNORE")
+    insert = pg_insert if dialect_name == "postgresql" else sqlite_insert
+    return insert(table).values(payloads).on_conflict_do_nothing()
+
+
+def _latest_payload_hash(session: Session, tenant_id: str, fingerprint: str):
+    return session.exec(
+        select(Alert.payload_hash)
+        .where(
+            Alert.tenant_id == tenant_id,
+            Alert.fingerprint == fingerprint,
+            Alert.payload_hash.isnot(None),
+        )
+        .order_by(Alert.timestamp.desc())
+        .limit(1)
+    ).first()
+
+
+def _compact_rows(
+    session: Session,
+    rows: list[tuple],
+    latest_payloads: dict[tuple[str, str], tuple[str, dict]] | None = None,
+) -> int:
+    """
+    Compact the (id, tenant_id, fingerprint, event) alert rows, in timestamp order,
+    returns how many were.
+
+    latest_payloads maps the (tenant_id, fingerprint) to the (payload_hash, payload)
+    their next occurrences are a delta of, it's updated along.
+    """
+    latest_payloads = {} if latest_payloads is None else latest_payloads
+    missing = {
+        (tenant_id, fingerprint)
+        for _, tenant_id, fingerprint, _ in rows
+        if (tenant_id, fingerprint) not in latest_payloads
+    }
+    latest_hashes = {
+        key: payload_hash
+        for key in missing
+        if (payload_hash := _latest_payload_hash(session, *key))
+    }
+    payloads = get_alert_payloads(
+        session,
+        [
+            (tenant_id, payload_hash)
+            for (tenant_id, _), payload_hash in latest_hashes.items()
+        ],
+    )
+    for (tenant_id, fingerprint), payload_hash in latest_hashes.items():
+        payload = payloads.get((tenant_id, payload_hash))
+        if payload is not None:
+            latest_payloads[(tenant_id, fingerprint)] = (payload_hash, payload)
+
+    new_payloads = {}
+    updates = []
+    for alert_id, tenant_id, fingerprint, event in rows:
+        key = (tenant_id, fingerprint)
+        delta = None
+        if key in latest_payloads:
+            payload_hash, payload = latest_payloads[key]
+            delta = _delta(event, payload)
+        if delta is None:
+            # the occurrence becomes the payload of the fingerprint
+            payload_hash, payload = _payload_hash(event), event
+            latest_payloads[key] = (payload_hash, payload)
+            new_payloads[(tenant_id, payload_hash)] = payload
+            delta = {
+                field: value
+                for field, value in event.items()
+                if field in COMPACTED_ALERT_FIELDS
+            }
+        updates.append((alert_id, payload_hash, delta))
+
+    if new_payloads:
+        # content addressed, an existing payload is the same event
+        session.execute(
+            _insert_payloads_statement(
+                session.bind.dialect.name,
+                [
+                    {
+                        "tenant_id": tenant_id,
+                        "payload_hash": payload_hash,
+                        "event": event,
+                    }
+                    for (tenant_id, payload_hash), event in new_payloads.items()
+                ],
+            )
+        )
+    for alert_id, payload_hash, delta in updates:
+        session.execute(
+            update(Alert)
+            .where(Alert.id == alert_id)
+            .values(event=delta, payload_hash=payload_hash)
+        )
+    return len(updates)
+
+
+def _compactable_alerts_query(*columns):
+    return select(
+        Alert.id, Alert.tenant_id, Alert.fingerprint, Alert.event, *columns
+    ).where(Alert.payload_hash.is_(None))
+
+
+def compact_alerts(session: Session, tenant_id: str, alert_ids: list) -> int:
+    """
+    Compact the superseded occurrences, never raises since it's an optimization of the
+    ingestion.
+    """
+    if session.bind.dialect.name not in SUPPORTED_DIALECTS:
+        return 0
+    try:
+        rows = session.exec(
+            _compactable_alerts_query()
+            .where(Alert.tenant_id == tenant_id, Alert.id.in_(alert_ids))
+            .order_by(Alert.timestamp)
+        ).all()
+        if not rows:
+            return 0
+        compacted = _compact_rows(session, rows)
+        session.commit()
+        return compacted
+    except Exception:
+        logger.exception(
+            "Failed to compact alert history",
+            extra={"tenant_id": tenant_id, "alert_ids": alert_ids},
+        )
+        session.rollback()
+        return 0
+
+
+def compact_alert_history(
+    session: Session, tenant_id: str | None = None, batch_size: int = 1000
+) -> int:
+    """
+    Compact every superseded occurrence of the history, returns how many were.
+    """
+    if session.bind.dialect.name not in SUPPORTED_DIALECTS:
+        raise ValueError(
+            f"Alert history compaction isn't supported on {session.bind.dialect.name}"
+        )
+    query = (
+        _compactable_alerts_query(Alert.timestamp)
+        .where(Alert.id.not_in(select(LastAlert.alert_id)))
+        .order_by(Alert.timestamp, Alert.id)
+    )
+    if tenant_id:
+        query = query.where(Alert.tenant_id == tenant_id)
+
+    compacted = 0
+    latest_payloads = {}
+    last_row = None
+    while True:
+        batch_query = query
+        if last_row:
+            batch_query = batch_query.where(
+                or_(
+                    Alert.timestamp > last_row.timestamp,
+                    and_(Alert.timestamp == last_row.timestamp, Alert.id > last_row.id),
+                )
+            )
+        rows = session.exec(batch_query.limit(batch_size)).all()
+        if not rows:
+            break
+        compacted += _compact_rows(session, [row[:4] for row in rows], latest_payloads)
+        session.commit()
+        if len(latest_payloads) > ALERT_PAYLOADS_CACHE_SIZE:
+            # the next batches look the payloads of their fingerprints up again
+            latest_payloads.clear()
+        last_row = rows[-1]
+        logger.info(
+            "Compacted alert history batch",
+            extra={"tenant_id": tenant_id, "compacted": compacted},
+        )
+    return compacted
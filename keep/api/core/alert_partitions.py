@@ -0,0 +1,507 @@
+"""
+Range partitioning of the alert table by timestamp (opt-in, PostgreSQL and MySQL).
+
+`keep partition-alerts` converts the alert table once, monthly or daily partitions:
+- PostgreSQL: the table is renamed to alert_unpartitioned, a partitioned alert table
+  (alert_pYYYYMM[DD] partitions and a default one) is created and filled partition by
+  partition, the indexes are created once the rows are copied.
+- MySQL: the table is altered in place (a copy), with a pfuture MAXVALUE partition.
+The primary key becomes (id, timestamp) and the foreign keys referencing alert.id
+(lastalert, alerttoincident) are dropped, MySQL doesn't support foreign keys on
+partitioned tables at all. It locks the alert table, run it in a maintenance window.
+
+Once converted, KEEP_ALERT_PARTITIONING_ENABLED:
+- makes the watcher create the partitions KEEP_ALERT_PARTITIONS_AHEAD intervals ahead,
+- bounds the alerts queries by timestamp so that the partitions are pruned,
+- makes the retention drop the partitions all the tenants' alert policies expired.
+"""
+
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, inspect, or_, text
+from sqlmodel import Session, select
+
+from keep.api.core.config import config
+from keep.api.models.db.alert import (
+    Alert,
+    AlertPayload,
+    AlertToIncident,
+    LastAlert,
+    LastAlertToIncident,
+)
+from keep.api.models.db.helpers import NULL_FOR_DELETED_AT
+from keep.api.models.db.incident import Incident, IncidentStatus
+
+ALERT_PARTITIONING_ENABLED = config(
+    "KEEP_ALERT_PARTITIONING_ENABLED", cast=bool, default=False
+)
+ALERT_PARTITION_INTERVAL = config("KEEP_ALERT_PARTITION_INTERVAL", default="month")
+ALERT_PARTITIONS_AHEAD = config("KEEP_ALERT_PARTITIONS_AHEAD", cast=int, default=3)
+# seconds between two checks of the future partitions by the watcher
+ALERT_PARTITIONS_CHECK_INTERVAL = 3600
+SUPPORTED_DIALECTS = ("postgresql", "mysql")
+INTERVALS = ("month", "day")
+
+logger = logging.getLogger(__name__)
+
+_LABEL_FORMATS = {"month": "%Y%m", "day": "%Y%m%d"}
+_PARTITION_NAME = re.compile(r"^(?:alert_)?p(\d{6}|\d{8})$")
+
+
+def _check_interval(interval: str):
+    if interval not in INTERVALS:
+        raise ValueError(f"Partition interval must be one of {INTERVALS}")
+
+
+def _partition_start(timestamp: datetime, interval: str) -> datetime:
+    start = timestamp.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    return start.replace(day=1) if interval == "month" else start
+
+
+def _next_partition_start(start: datetime, interval: str) -> datetime:
+    if interval == "day":
+        return start + timedelta(days=1)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def partition_ranges(
+    first: datetime, last: datetime, interval: str
+) -> list[tuple[datetime, datetime]]:
+    """
+    The [lower, upper) ranges of the partitions covering first to last.
+    """
+    _check_interval(interval)
+    ranges = []
+    lower = _partition_start(first, interval)
+    while lower <= last:
+        upper = _next_partition_start(lower, interval)
+        ranges.append((lower, upper))
+        lower = upper
+    return ranges
+
+
+def partition_name(lower: datetime, interval: str, dialect_name: str) -> str:
+    label = lower.strftime(_LABEL_FORMATS[interval])
+    # PostgreSQL partitions are tables, MySQL ones are named within the table
+    return f"alert_p{label}" if dialect_name == "postgresql" else f"p{label}"
+
+
+def parse_partition_name(name: str) -> tuple[datetime, datetime] | None:
+    """
+    The [lower, upper) range of a partition, None for the default/future partitions.
+    """
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    label = match.group(1)
+    interval = "month" if len(label) == 6 else "day"
+    lower = datetime.strptime(label, _LABEL_FORMATS[interval])
+    return lower, _next_partition_start(lower, interval)
+
+
+def _bound(timestamp: datetime) -> str:
+    return f"'{timestamp:%Y-%m-%d %H:%M:%S}'"
+
+
+def _in_range(lower: datetime, upper: datetime) -> str:
+    return f'"timestamp" >= {_bound(lower)} AND "timestamp" < {_bound(upper)}'
+
+
+def _postgresql_partition_statement(lower: datetime, upper: datetime, interval: str):
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(lower, interval, 'postgresql')} "
+        f"PARTITION OF alert FOR VALUES FROM ({_bound(lower)}) TO ({_bound(upper)})"
+    )
+
+
+def postgresql_default_split_statements(
+    lower: datetime, upper: datetime, interval: str
+) -> list[str]:
+    """
+    Create the [lower, upper) partition while alert_pdefault holds rows in the range,
+    PostgreSQL refuses to create it then: the rows are moved out of the detached
+    default partition.
+    """
+    in_range = _in_range(lower, upper)
+    return [
+        "ALTER TABLE alert DETACH PARTITION alert_pdefault",
+        _postgresql_partition_statement(lower, upper, interval),
+        f"INSERT INTO alert SELECT * FROM alert_pdefault WHERE {in_range}",
+        f"DELETE FROM alert_pdefault WHERE {in_range}",
+        "ALTER TABLE alert ATTACH PARTITION alert_pdefault DEFAULT",
+    ]
+
+
+def _mysql_partition_clause(lower: datetime, upper: datetime, interval: str):
+    return (
+        f"PARTITION {partition_name(lower, interval, 'mysql')} "
+        f"VALUES LESS THAN ({_bound(upper)})"
+    )
+
+
+def postgresql_partitioning_statements(
+    ranges: list[tuple[datetime, datetime]],
+    interval: str,
+    referencing_foreign_keys: list[tuple[str, str]],
+    indexes: list[dict],
+) -> list[str]:
+    """
+    referencing_foreign_keys are the (table, constraint) referencing alert.id, indexes
+    the inspected indexes of the alert table.
+    """
+    statements = [
+        f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS "{constraint}"'
+        for table, constraint in referencing_foreign_keys
+    ]
+    statements += [
+        "ALTER TABLE alert RENAME TO alert_unpartitioned",
+        "ALTER TABLE alert_unpartitioned RENAME CONSTRAINT alert_pkey "
+        "TO alert_unpartitioned_pkey",
+    ]
+    # index names are unique per schema
+    statements += [
+        f'ALTER INDEX "{index["name"]}" RENAME TO "{index["name"][:50]}_unpartitioned"'
+        for index in indexes
+    ]
+    statements += [
+        "CREATE TABLE alert (LIKE alert_unpartitioned INCLUDING DEFAULTS) "
+        'PARTITION BY RANGE ("timestamp")',
+        'ALTER TABLE alert ADD CONSTRAINT alert_pkey PRIMARY KEY (id, "timestamp")',
+        "ALTER TABLE alert ADD FOREIGN KEY (tenant_id) REFERENCES tenant (id)",
+    ]
+    statements += [
+        _postgresql_partition_statement(lower, upper, interval)
+        for lower, upper in ranges
+    ]
+    statements.append(
+        "CREATE TABLE IF NOT EXISTS alert_pdefault PARTITION OF alert DEFAULT"
+    )
+    # the rows are copied partition by partition, then indexed
+    statements += [
+        "INSERT INTO alert SELECT * FROM alert_unpartitioned "
+        f'WHERE "timestamp" >= {_bound(lower)} AND "timestamp" < {_bound(upper)}'
+        for lower, upper in ranges
+    ]
+    # into the default partition
+    statements.append(
+        "INSERT INTO alert SELECT * FROM alert_unpartitioned "
+        f'WHERE "timestamp" >= {_bound(ranges[-1][1])}'
+    )
+    statements += [
+        'CREATE {unique}INDEX "{name}" ON alert ({columns})'.format(
+            unique="UNIQUE " if index.get("unique") else "",
+            name=index["name"],
+            columns=", ".join(f'"{column}"' for column in index["column_names"]),
+        )
+        for index in indexes
+    ]
+    # the last alerts are joined on their timestamp too (see get_last_alerts)
+    statements.append(
+        'UPDATE lastalert SET "timestamp" = alert."timestamp" FROM alert '
+        "WHERE lastalert.alert_id = alert.id "
+        'AND lastalert."timestamp" <> alert."timestamp"'
+    )
+    return statements
+
+
+def mysql_partitioning_statements(
+    ranges: list[tuple[datetime, datetime]],
+    interval: str,
+    referencing_foreign_keys: list[tuple[str, str]],
+    alert_foreign_keys: list[str],
+) -> list[str]:
+    """
+    referencing_foreign_keys are the (table, constraint) referencing alert.id,
+    alert_foreign_keys the constraints of the alert table itself.
+    """
+    statements = [
+        f"ALTER TABLE {table} DROP FOREIGN KEY `{constraint}`"
+        for table, constraint in referencing_foreign_keys
+    ]
+    statements += [
+        f"ALTER TABLE alert DROP FOREIGN KEY `{constraint}`"
+        for constraint in alert_foreign_keys
+    ]
+    statements.append(
+        "ALTER TABLE alert DROP PRIMARY KEY, ADD PRIMARY KEY (id, `timestamp`)"
+    )
+    partitions = [
+        _mysql_partition_clause(lower, upper, interval) for lower, upper in ranges
+    ]
+    partitions.append("PARTITION pfuture VALUES LESS THAN (MAXVALUE)")
+    statements.append(
+        "ALTER TABLE alert PARTITION BY RANGE COLUMNS(`timestamp`) ("
+        + ", ".join(partitions)
+        + ")"
+    )
+    statements.append(
+        "UPDATE lastalert JOIN alert ON lastalert.alert_id = alert.id "
+        "SET lastalert.timestamp = alert.timestamp "
+        "WHERE lastalert.timestamp <> alert.timestamp"
+    )
+    return statements
+
+
+def _referencing_foreign_keys(session: Session) -> list[tuple[str, str]]:
+    inspector = inspect(session.connection())
+    return [
+        (table, foreign_key["name"])
+        for table in (LastAlert.__tablename__, AlertToIncident.__tablename__)
+        for foreign_key in inspector.get_foreign_keys(table)
+        if foreign_key["referred_table"] == Alert.__tablename__ and foreign_key["name"]
+    ]
+
+
+def partition_alert_table(
+    session: Session,
+    interval: str = ALERT_PARTITION_INTERVAL,
+    ahead: int = ALERT_PARTITIONS_AHEAD,
+    dry_run: bool = False,
+) -> list[str]:
+    """
+    Convert the alert table to a partitioned one, returns the statements run (or that
+    would be with dry_run).
+    """
+    _check_interval(interval)
+    dialect_name = session.bind.dialect.name
+    if dialect_name not in SUPPORTED_DIALECTS:
+        raise ValueError(f"Alert partitioning isn't supported on {dialect_name}")
+    if list_alert_partitions(session):
+        raise ValueError("The alert table is already partitioned")
+
+    now = datetime.utcnow()
+    first = session.exec(select(func.min(Alert.timestamp))).one() or now
+    last = _future_partitions_end(now, interval, ahead)
+    ranges = partition_ranges(first, last, interval)
+    referencing_foreign_keys = _referencing_foreign_keys(session)
+    inspector = inspect(session.connection())
+    if dialect_name == "postgresql":
+        statements = postgresql_partitioning_statements(
+            ranges,
+            interval,
+            referencing_foreign_keys,
+            inspector.get_indexes(Alert.__tablename__),
+        )
+    else:
+        statements = mysql_partitioning_statements(
+            ranges,
+            interval,
+            referencing_foreign_keys,
+            [
+                foreign_key["name"]
+                for foreign_key in inspector.get_foreign_keys(Alert.__tablename__)
+                if foreign_key["name"]
+            ],
+        )
+    if dry_run:
+        return statements
+
+    for statement in statements:
+        start = time.perf_counter()
+        session.execute(text(statement))
+        # each copied partition is its own transaction
+        if statement.startswith("INSERT"):
+            session.commit()
+        logger.info(
+            "Alert partitioning statement executed",
+            extra={
+                "statement": statement,
+                "duration": round(time.perf_counter() - start, 3),
+            },
+        )
+    session.commit()
+    return statements
+
+
+def list_alert_partitions(session: Session) -> list[str]:
+    dialect_name = session.bind.dialect.name
+    if dialect_name == "postgresql":
+        query = text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'alert' AND pg_table_is_visible(parent.oid)"
+        )
+    elif dialect_name == "mysql":
+        query = text(
+            "SELECT partition_name FROM information_schema.partitions "
+            "WHERE table_schema = DATABASE() AND table_name = 'alert' "
+            "AND partition_name IS NOT NULL"
+        )
+    else:
+        return []
+    return sorted(row[0] for row in session.execute(query).all())
+
+
+def _future_partitions_end(now: datetime, interval: str, ahead: int) -> datetime:
+    end = _partition_start(now, interval)
+    for _ in range(ahead):
+        end = _next_partition_start(end, interval)
+    return end
+
+
+def ensure_alert_partitions(
+    session: Session,
+    interval: str = ALERT_PARTITION_INTERVAL,
+    ahead: int = ALERT_PARTITIONS_AHEAD,
+) -> list[str]:
+    """
+    Create the missing partitions up to `ahead` intervals from now, returns their names.
+    """
+    _check_interval(interval)
+    partitions = set(list_alert_partitions(session))
+    if not partitions:
+        return []
+    dialect_name = session.bind.dialect.name
+    now = datetime.utcnow()
+    ranges = [
+        (lower, upper)
+        for lower, upper in partition_ranges(
+            now, _future_partitions_end(now, interval, ahead), interval
+        )
+        if partition_name(lower, interval, dialect_name) not in partitions
+    ]
+    if not ranges:
+        return []
+    if dialect_name == "postgresql":
+        for lower, upper in ranges:
+            # the alerts timestamped ahead of the partitions (clock skew) went there
+            in_default = session.execute(
+                text(
+                    "SELECT 1 FROM alert_pdefault "
+                    f"WHERE {_in_range(lower, upper)} LIMIT 1"
+                )
+            ).first()
+            statements = (
+                postgresql_default_split_statements(lower, upper, interval)
+                if in_default
+                else [_postgresql_partition_statement(lower, upper, interval)]
+            )
+            for statement in statements:
+                session.execute(text(statement))
+    else:
+        # split the MAXVALUE partition
+        session.execute(
+            text(
+                "ALTER TABLE alert REORGANIZE PARTITION pfuture INTO ("
+                + ", ".join(
+                    _mysql_partition_clause(lower, upper, interval)
+                    for lower, upper in ranges
+                )
+                + ", PARTITION pfuture VALUES LESS THAN (MAXVALUE))"
+            )
+        )
+    session.commit()
+    created = [partition_name(lower, interval, dialect_name) for lower, _ in ranges]
+    logger.info("Alert partitions created", extra={"partitions": created})
+    return created
+
+
+def _protected_alerts_count(session: Session, lower: datetime, upper: datetime) -> int:
+    in_range = [Alert.timestamp >= lower, Alert.timestamp < upper]
+    open_fingerprints = (
+        select(LastAlertToIncident.tenant_id, LastAlertToIncident.fingerprint)
+        .join(Incident, Incident.id == LastAlertToIncident.incident_id)
+        .where(
+            LastAlertToIncident.deleted_at == NULL_FOR_DELETED_AT,
+            Incident.status.in_(IncidentStatus.get_active(return_values=True)),
+        )
+        .subquery()
+    )
+    return session.exec(
+        select(func.count())
+        .select_from(Alert)
+        .outerjoin(
+            open_fingerprints,
+            (open_fingerprints.c.tenant_id == Alert.tenant_id)
+            & (open_fingerprints.c.fingerprint == Alert.fingerprint),
+        )
+        .where(
+            *in_range,
+            or_(
+                Alert.id.in_(select(LastAlert.alert_id)),
+                Alert.id.in_(select(AlertToIncident.alert_id)),
+                open_fingerprints.c.fingerprint.isnot(None),
+            ),
+        )
+    ).one()
+
+
+def drop_expired_alert_partitions(session: Session, cutoff: datetime) -> int:
+    """
+    Drop the partitions entirely before the cutoff, unless they hold alerts the
+    retention must keep (last alerts, alerts of open incidents), returns the number of
+    alerts dropped.
+    """
+    dropped = 0
+    for name in list_alert_partitions(session):
+        bounds = parse_partition_name(name)
+        if not bounds or bounds[1] > cutoff:
+            continue
+        lower, upper = bounds
+        if _protected_alerts_count(session, lower, upper):
+            logger.info(
+                "Alert partition holds alerts to keep, not dropped",
+                extra={"partition": name},
+            )
+            continue
+        rows = session.exec(
+            select(func.count())
+            .select_from(Alert)
+            .where(Alert.timestamp >= lower, Alert.timestamp < upper)
+        ).one()
+        if session.bind.dialect.name == "postgresql":
+            session.execute(text(f"ALTER TABLE alert DETACH PARTITION {name}"))
+            session.execute(text(f"DROP TABLE {name}"))
+        else:
+            session.execute(text(f"ALTER TABLE alert DROP PARTITION {name}"))
+        # the payloads only the dropped alerts were a delta of
+        session.execute(
+            delete(AlertPayload).where(
+                ~select(Alert.id)
+                .where(
+                    Alert.tenant_id == AlertPayload.tenant_id,
+                    Alert.payload_hash == AlertPayload.payload_hash,
+                )
+                .exists()
+            )
+        )
+        session.commit()
+        dropped += rows
+        logger.info("Alert partition dropped", extra={"partition": name, "rows": rows})
+    return dropped
+
+
+_last_check: float | None = None
+_last_check_lock = threading.Lock()
+
+
+def run_scheduled_partitions_check(logger: logging.Logger):
+    """
+    Run by the watcher, creates the future partitions at most every hour.
+    """
+    global _last_check
+    if not ALERT_PARTITIONING_ENABLED:
+        return []
+    with _last_check_lock:
+        if (
+            _last_check is not None
+            and time.monotonic() - _last_check < ALERT_PARTITIONS_CHECK_INTERVAL
+        ):
+            return []
+        _last_check = time.monotonic()
+
+    from keep.api.core.db import get_session_sync
+
+    session = get_session_sync()
+    try:
+        return ensure_alert_partitions(session)
+    except Exception:
+        logger.exception("Failed to create the alert partitions")
+        return []
+    finally:
+        session.close()
@@ -475,9 +475,24 @@ def get_alert_facets_data(
         facets=facets,
         facet_options_query=facet_options_query,
         properties_metadata=properties_metadata,
+        cache_scope=(tenant_id, "alert", get_alerts_data_version(tenant_id)),
     )
 
 
+def get_alerts_data_version(tenant_id: str) -> tuple:
+    """
+    Returns a cheap version of the tenant's last alerts, used to key facet caches.
+    It changes whenever an alert is received, enrichment-only changes are bounded by the cache TTL.
+    """
+    with Session(engine) as session:
+        count, last_timestamp = session.exec(
+            select(func.count(LastAlert.fingerprint), func.max(LastAlert.timestamp))
+            .select_from(LastAlert)
+            .where(LastAlert.tenant_id == tenant_id)
+        ).one()
+    return count, str(last_timestamp)
+
+
 def get_alert_facets(
     tenant_id: str, facet_ids_to_load: list[str] = None
 ) -> list[FacetDto]:
@@ -0,0 +1,250 @@
+"""
+Invalidation of the in-process caches across the API and ARQ worker processes.
+
+Caches subscribe a callback per entity and CRUD routes publish "tenant X, entity Y changed"
+once the change is committed. The callbacks of the publishing process run right away, the
+other processes learn about the change:
+- with REDIS=true, from a Redis pub/sub channel listened to by a daemon thread per process.
+- otherwise, from the version counter of the (tenant, entity) in the cacheversion table,
+  polled at most every KEEP_CACHE_INVALIDATION_POLL_INTERVAL seconds.
+
+Caches call poll() before serving an entry, which starts the listener in the current
+process (including forked workers) or polls the counters when the interval is over.
+Caches must keep a TTL, a missed change is then only served until the entry expires.
+"""
+
+import enum
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from typing import Callable
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from keep.api.consts import REDIS
+from keep.api.core.config import config
+from keep.api.models.db.system import CacheVersion
+from keep.api.redis_settings import get_redis_client
+
+CACHE_INVALIDATION_ENABLED = config(
+    "KEEP_CACHE_INVALIDATION_ENABLED", cast=bool, default=True
+)
+# "redis" or "db"
+CACHE_INVALIDATION_BACKEND = config(
+    "KEEP_CACHE_INVALIDATION_BACKEND", default="redis" if REDIS else "db"
+).lower()
+CACHE_INVALIDATION_POLL_INTERVAL = config(
+    "KEEP_CACHE_INVALIDATION_POLL_INTERVAL", cast=float, default=5
+)
+CACHE_INVALIDATION_CHANNEL = "keep:cache-invalidation"
+
+ALL_TENANTS = "*"
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntity(str, enum.Enum):
+    PROVIDERS = "providers"
+    WORKFLOWS = "workflows"
+    RULES = "rules"
+    PRESETS = "presets"
+    MAINTENANCE_WINDOWS = "maintenance_windows"
+    TOPOLOGY = "topology"
+    AUTHORIZATION = "authorization"
+
+
+class CacheInvalidationBus:
+    def __init__(
+        self,
+        backend: str = CACHE_INVALIDATION_BACKEND,
+        poll_interval: float = CACHE_INVALIDATION_POLL_INTERVAL,
+        enabled: bool = CACHE_INVALIDATION_ENABLED,
+    ):
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.enabled = enabled
+        self.stats = defaultdict(int)
+        self._subscribers: dict[CacheEntity, list[Callable[[str | None], None]]] = (
+            defaultdict(list)
+        )
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+        self._versions = None
+        self._polled_at = float("-inf")
+
+    @property
+    def origin(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def subscribe(self, entity: CacheEntity, callback: Callable[[str | None], None]):
+        """
+        Call back with the tenant id, or None for every tenant, whenever the entity changes.
+        """
+        self._subscribers[entity].append(callback)
+
+    def publish(self, entity: CacheEntity, tenant_id: str | None = None):
+        """
+        Tell every process that the entity of the tenant (or of every tenant) changed.
+
+        Never raises, the caches expire anyway when the change can't be broadcast.
+        """
+        self._invalidate(entity, tenant_id)
+        if not self.enabled:
+            return
+        try:
+            if self.backend == "redis":
+                get_redis_client().publish(
+                    CACHE_INVALIDATION_CHANNEL,
+                    json.dumps(
+                        {
+                            "origin": self.origin,
+                            "entity": entity.value,
+                            "tenant_id": tenant_id or ALL_TENANTS,
+                        }
+                    ),
+                )
+            else:
+                self._bump_version(entity, tenant_id or ALL_TENANTS)
+            self.stats["published"] += 1
+        except Exception:
+            logger.exception(
+                "Failed to publish cache invalidation",
+                extra={"entity": entity.value, "tenant_id": tenant_id},
+            )
+            self.stats["failed"] += 1
+
+    def poll(self):
+        """
+        Apply the changes published by other processes, cheap enough for every cache read.
+        """
+        if not self.enabled:
+            return
+        if self.backend == "redis":
+            self._ensure_listening()
+        elif time.monotonic() - self._polled_at >= self.poll_interval:
+            self._poll_versions()
+
+    def _invalidate(self, entity: CacheEntity, tenant_id: str | None):
+        self.stats["invalidated"] += 1
+        for callback in self._subscribers[entity]:
+            try:
+                callback(tenant_id)
+            except Exception:
+                logger.exception(
+                    "Failed to invalidate cache",
+                    extra={"entity": entity.value, "tenant_id": tenant_id},
+                )
+
+    def _invalidate_all(self):
+        for entity in list(self._subscribers):
+            self._invalidate(entity, None)
+
+    def _bump_version(self, entity: CacheEntity, tenant_id: str):
+        # avoid circular import
+        from keep.api.core.db import engine
+
+        statement = (
+            update(CacheVersion)
+            .where(CacheVersion.tenant_id == tenant_id)
+            .where(CacheVersion.entity == entity.value)
+            .values(version=CacheVersion.version + 1)
+        )
+        with Session(engine) as session:
+            if not session.execute(statement).rowcount:
+                session.add(
+                    CacheVersion(tenant_id=tenant_id, entity=entity.value, version=1)
+                )
+                try:
+                    session.commit()
+                    return
+                except IntegrityError:
+                    # another process inserted it meanwhile
+                    session.rollback()
+                    session.execute(statement)
+            session.commit()
+
+    def _poll_versions(self):
+        # avoid circular import
+        from keep.api.core.db import engine
+
+        if not self._lock.acquire(blocking=False):
+            # another thread is polling
+            return
+        try:
+            with Session(engine) as session:
+                versions = {
+                    (row.tenant_id, row.entity): row.version
+                    for row in session.exec(select(CacheVersion)).all()
+                }
+        except Exception:
+            logger.exception("Failed to poll cache versions")
+            return
+        finally:
+            self._polled_at = time.monotonic()
+            self._lock.release()
+
+        previous_versions, self._versions = self._versions, versions
+        if previous_versions is None:
+            # nothing was cached before the first poll
+            return
+        for (tenant_id, entity), version in versions.items():
+            if previous_versions.get((tenant_id, entity)) == version:
+                continue
+            try:
+                entity = CacheEntity(entity)
+            except ValueError:
+                continue
+            self._invalidate(entity, None if tenant_id == ALL_TENANTS else tenant_id)
+
+    def _ensure_listening(self):
+        # the thread doesn't survive a fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._thread = threading.Thread(
+                target=self._listen, name="keep-cache-invalidation", daemon=True
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = get_redis_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    self._on_message(message)
+            except Exception:
+                logger.exception("Cache invalidation listener disconnected")
+            # changes may have been published while disconnected
+            self._invalidate_all()
+            time.sleep(self.poll_interval)
+
+    def _on_message(self, message: dict):
+        try:
+            data = json.loads(message["data"])
+            entity = CacheEntity(data["entity"])
+        except Exception:
+            logger.warning("Ignoring invalid cache invalidation message")
+            return
+        if data.get("origin") == self.origin:
+            # already invalidated when published
+            return
+        tenant_id = data.get("tenant_id")
+        self._invalidate(entity, None if tenant_id == ALL_TENANTS else tenant_id)
+
+
+cache_invalidation_bus = CacheInvalidationBus()
+
+
+def publish_invalidation(entity: CacheEntity, tenant_id: str | None = None):
+    cache_invalidation_bus.publish(entity, tenant_id)
@@ -44,9 +44,15 @@ from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.sql import exists, expression
 from sqlalchemy.sql.functions import count
 from sqlmodel import Session, SQLModel, col, or_, select, text
-from sqlalchemy.orm.attributes import flag_modified
+from sqlalchemy.orm.attributes import flag_modified, set_committed_value
 
 from keep.api.consts import STATIC_PRESETS
+from keep.api.core.alert_history import (
+    ALERT_HISTORY_COMPACTION_ENABLED,
+    compact_alerts,
+    expand_alert_payloads,
+)
+from keep.api.core.alert_partitions import ALERT_PARTITIONING_ENABLED
 from keep.api.core.config import config
 from keep.api.core.db_utils import (
     create_db_engine,
@@ -55,6 +61,15 @@ from keep.api.core.db_utils import (
     get_or_create,
 )
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.core.stats_rollups import (
+    RollupMetric,
+    get_deduplication_counts,
+    get_deduplication_hourly_counts,
+    get_hourly_counts,
+    get_rollups,
+    stats_rollups_enabled,
+    track_incident_update,
+)
 
 # This import is required to create the tables
 from keep.api.models.action_type import ActionType
@@ -66,6 +81,7 @@ from keep.api.models.alert import AlertStatus
 from keep.api.models.db.action import Action
 from keep.api.models.db.ai_external import *  # pylint: disable=unused-wildcard-import
 from keep.api.models.db.alert import *  # pylint: disable=unused-wildcard-import
+from keep.api.models.db.alert import sync_dismissal_expiries
 from keep.api.models.db.dashboard import *  # pylint: disable=unused-wildcard-import
 from keep.api.models.db.enrichment_event import *  # pylint: disable=unused-wildcard-import
 from keep.api.models.db.extraction import *  # pylint: disable=unused-wildcard-import
@@ -104,6 +120,13 @@ ALLOWED_INCIDENT_FILTERS = [
 ]
 KEEP_AUDIT_EVENTS_ENABLED = config("KEEP_AUDIT_EVENTS_ENABLED", cast=bool, default=True)
 
+# Executions logging more lines than this within a single flush get their lines
+# stored as one row (0 disables it)
+WORKFLOW_LOGS_COMPACT_THRESHOLD = config(
+    "KEEP_WORKFLOW_LOGS_COMPACT_THRESHOLD", cast=int, default=0
+)
+COMPACTED_LOGS_CONTEXT_KEY = "compacted_logs"
+
 INTERVAL_WORKFLOWS_RELAUNCH_TIMEOUT = timedelta(minutes=60)
 WORKFLOWS_TIMEOUT = timedelta(minutes=120)
 
@@ -1121,64 +1144,125 @@ def get_workflow_id(tenant_id, workflow_name):
             return workflow.id
 
 
-def push_logs_to_db(log_entries):
+def _workflow_log_row(log_entry: dict) -> dict:
     # avoid circular import
     from keep.api.logging import LOG_FORMAT, LOG_FORMAT_OPEN_TELEMETRY
 
-    db_log_entries = []
+    try:
+        # after formatting
+        message = log_entry["message"][0:255]
+    except Exception:
+        # before formatting, fallback
+        message = log_entry["msg"][0:255]
+
+    timestamp = None
     if LOG_FORMAT == LOG_FORMAT_OPEN_TELEMETRY:
-        for log_entry in log_entries:
-            try:
-                try:
-                    # after formatting
-                    message = log_entry["message"][0:255]
-                except Exception:
-                    # before formatting, fallback
-                    message = log_entry["msg"][0:255]
+        try:
+            timestamp = datetime.strptime(log_entry["asctime"], "%Y-%m-%d %H:%M:%S,%f")
+        except Exception:
+            pass
+    if timestamp is None:
+        timestamp = datetime.fromtimestamp(log_entry["created"])
+
+    return {
+        "workflow_execution_id": log_entry["workflow_execution_id"],
+        "timestamp": timestamp,
+        "message": message,
+        # workaround to serialize any object
+        "context": json.loads(json.dumps(log_entry.get("context", {}), default=str)),
+    }
 
-                try:
-                    timestamp = datetime.strptime(
-                        log_entry["asctime"], "%Y-%m-%d %H:%M:%S,%f"
-                    )
-                except Exception:
-                    timestamp = log_entry["created"]
-
-                log_entry = WorkflowExecutionLog(
-                    workflow_execution_id=log_entry["workflow_execution_id"],
-                    timestamp=timestamp,
-                    message=message,
-                    context=json.loads(
-                        json.dumps(log_entry.get("context", {}), default=str)
-                    ),  # workaround to serialize any object
-                )
-                db_log_entries.append(log_entry)
-            except Exception:
-                print("Failed to parse log entry - ", log_entry)
 
-    else:
-        for log_entry in log_entries:
-            try:
-                try:
-                    # after formatting
-                    message = log_entry["message"][0:255]
-                except Exception:
-                    # before formatting, fallback
-                    message = log_entry["msg"][0:255]
-                log_entry = WorkflowExecutionLog(
-                    workflow_execution_id=log_entry["workflow_execution_id"],
-                    timestamp=log_entry["created"],
-                    message=message,  # limit the message to 255 chars
-                    context=json.loads(
-                        json.dumps(log_entry.get("context", {}), default=str)
-                    ),  # workaround to serialize any object
+def _compact_workflow_log_rows(rows: list[dict], threshold: int) -> list[dict]:
+    """
+    Fold the rows of executions with more than `threshold` rows in this batch
+    into a single row per execution, see expand_compacted_workflow_logs.
+    """
+    rows_by_execution = defaultdict(list)
+    for row in rows:
+        rows_by_execution[row["workflow_execution_id"]].append(row)
+
+    compacted_rows = []
+    for workflow_execution_id, execution_rows in rows_by_execution.items():
+        if len(execution_rows) <= threshold:
+            compacted_rows.extend(execution_rows)
+            continue
+        compacted_rows.append(
+            {
+                "workflow_execution_id": workflow_execution_id,
+                "timestamp": execution_rows[0]["timestamp"],
+                "message": f"{len(execution_rows)} log lines",
+                "context": {
+                    COMPACTED_LOGS_CONTEXT_KEY: [
+                        {
+                            "timestamp": row["timestamp"].isoformat(),
+                            "message": row["message"],
+                            "context": row["context"],
+                        }
+                        for row in execution_rows
+                    ]
+                },
+            }
+        )
+    return compacted_rows
+
+
+def expand_compacted_workflow_logs(
+    logs: list[WorkflowExecutionLog],
+) -> list[WorkflowExecutionLog]:
+    """
+    Expand compacted rows back into one (detached) log per line,
+    expanded lines keep the id of the row they were stored in.
+    """
+    if not any(
+        log.context and COMPACTED_LOGS_CONTEXT_KEY in log.context for log in logs
+    ):
+        return logs
+
+    expanded_logs = []
+    for log in logs:
+        if not log.context or COMPACTED_LOGS_CONTEXT_KEY not in log.context:
+            expanded_logs.append(log)
+            continue
+        for line in log.context[COMPACTED_LOGS_CONTEXT_KEY]:
+            expanded_logs.append(
+                WorkflowExecutionLog(
+                    id=log.id,
+                    workflow_execution_id=log.workflow_execution_id,
+                    timestamp=datetime.fromisoformat(line["timestamp"]),
+                    message=line["message"],
+                    context=line["context"],
                 )
-                db_log_entries.append(log_entry)
-            except Exception:
-                print("Failed to parse log entry - ", log_entry)
+            )
+    # sort is stable, lines of a compacted row keep their order
+    return sorted(expanded_logs, key=lambda log: log.timestamp)
+
+
+def push_logs_to_db(log_entries):
+    rows = []
+    for log_entry in log_entries:
+        try:
+            rows.append(_workflow_log_row(log_entry))
+        except Exception:
+            print("Failed to parse log entry - ", log_entry)
+
+    if not rows:
+        return
+
+    if WORKFLOW_LOGS_COMPACT_THRESHOLD:
+        rows = _compact_workflow_log_rows(rows, WORKFLOW_LOGS_COMPACT_THRESHOLD)
+
+    # bulk insert, a single executemany instead of an ORM flush per row
+    with Session(engine) as session:
+        session.execute(WorkflowExecutionLog.__table__.insert(), rows)
+        session.commit()
+
 
-    # Add the LogEntry instances to the database session
+def push_provider_logs_to_db(log_entries: list[dict]):
+    if not log_entries:
+        return
     with Session(engine) as session:
-        session.add_all(db_log_entries)
+        session.execute(ProviderExecutionLog.__table__.insert(), log_entries)
         session.commit()
 
 
@@ -1218,7 +1302,7 @@ def get_workflow_execution_with_logs(
             .where(WorkflowExecutionLog.workflow_execution_id == workflow_execution_id)
             .order_by(WorkflowExecutionLog.timestamp.asc())
         ).all()
-        return execution, logs
+        return execution, expand_compacted_workflow_logs(logs)
 
 
 def get_last_workflow_executions(tenant_id: str, limit=20):
@@ -1309,6 +1393,10 @@ def _enrich_entity(
             .values(enrichments=new_enrichment_data)
         )
         session.execute(stmt)
+        if force or "dismissed" in enrichments or "dismissUntil" in enrichments:
+            sync_dismissal_expiries(
+                session.connection(), tenant_id, {fingerprint: new_enrichment_data}
+            )
         if audit_enabled:
             # add audit event
             audit = AlertAudit(
@@ -1425,14 +1513,22 @@ def batch_enrich(
 
         # Merge per fingerprint, matching _enrich_entity pattern
         if existing_enrichments:
-            for fingerprint, existing in existing_enrichments.items():
-                merged = {**existing.enrichments, **enrichments}
-                stmt = (
-                    update(AlertEnrichment)
-                    .where(AlertEnrichment.id == existing.id)
-                    .values(enrichments=merged)
+            merged_enrichments = {
+                fingerprint: {**existing.enrichments, **enrichments}
+                for fingerprint, existing in existing_enrichments.items()
+            }
+            # one executemany UPDATE by primary key for the whole batch
+            session.execute(
+                update(AlertEnrichment),
+                [
+                    {"id": existing.id, "enrichments": merged_enrichments[fingerprint]}
+                    for fingerprint, existing in existing_enrichments.items()
+                ],
+            )
+            if "dismissed" in enrichments or "dismissUntil" in enrichments:
+                sync_dismissal_expiries(
+                    session.connection(), tenant_id, merged_enrichments
                 )
-                session.execute(stmt)
 
         # Bulk insert new enrichments
         if to_create:
@@ -1734,6 +1830,7 @@ def query_alerts(
 
         # Execute the query
         alerts = query.all()
+        expand_alert_payloads(session, alerts)
 
     return alerts
 
@@ -1766,29 +1863,46 @@ def get_last_alerts(
     with Session(engine) as session:
         dialect_name = session.bind.dialect.name
 
+        # On a partitioned alert table, the last alerts are also joined on their
+        # timestamp (always the one of their alert) so that the partitions are pruned
+        timestamp_columns = [LastAlert.timestamp]
+        join_condition = LastAlert.alert_id == Alert.id
+        if ALERT_PARTITIONING_ENABLED:
+            timestamp_columns.append(Alert.timestamp)
+            join_condition = and_(join_condition, Alert.timestamp == LastAlert.timestamp)
+
         # Build the base query using select()
         stmt = (
             select(Alert, LastAlert.first_timestamp.label("startedAt"))
             .select_from(LastAlert)
-            .join(Alert, LastAlert.alert_id == Alert.id)
+            .join(Alert, join_condition)
             .where(LastAlert.tenant_id == tenant_id)
             .where(Alert.tenant_id == tenant_id)
         )
 
         if timeframe:
             stmt = stmt.where(
-                LastAlert.timestamp
-                >= datetime.now(tz=timezone.utc) - timedelta(days=timeframe)
+                *[
+                    timestamp_column
+                    >= datetime.now(tz=timezone.utc) - timedelta(days=timeframe)
+                    for timestamp_column in timestamp_columns
+                ]
             )
 
         # Apply additional filters
         filter_conditions = []
 
         if upper_timestamp is not None:
-            filter_conditions.append(LastAlert.timestamp < upper_timestamp)
+            filter_conditions += [
+                timestamp_column < upper_timestamp
+                for timestamp_column in timestamp_columns
+            ]
 
         if lower_timestamp is not None:
-            filter_conditions.append(LastAlert.timestamp >= lower_timestamp)
+            filter_conditions += [
+                timestamp_column >= lower_timestamp
+                for timestamp_column in timestamp_columns
+            ]
 
         if fingerprints:
             filter_conditions.append(LastAlert.fingerprint.in_(tuple(fingerprints)))
@@ -1930,6 +2044,18 @@ def get_alerts_by_fingerprint(
 
         query = query.filter(Alert.fingerprint == fingerprint)
 
+        if ALERT_PARTITIONING_ENABLED:
+            # bound by the first occurrence so that the older partitions are pruned,
+            # the real one: lastalert's misses the occurrences processed out of order
+            first_timestamp = session.exec(
+                select(func.min(Alert.timestamp)).where(
+                    Alert.tenant_id == tenant_id,
+                    Alert.fingerprint == fingerprint,
+                )
+            ).one()
+            if first_timestamp:
+                query = query.filter(Alert.timestamp >= first_timestamp)
+
         query = query.order_by(Alert.timestamp.desc())
 
         if status:
@@ -1939,6 +2065,7 @@ def get_alerts_by_fingerprint(
             query = query.limit(limit)
         # Execute the query
         alerts = query.all()
+        expand_alert_payloads(session, alerts)
 
     return alerts
 
@@ -1953,7 +2080,9 @@ def get_all_alerts_by_fingerprints(
             .filter(Alert.fingerprint.in_(fingerprints))
             .order_by(Alert.timestamp.desc())
         )
-        return session.exec(query).all()
+        alerts = session.exec(query).all()
+        expand_alert_payloads(session, alerts)
+        return alerts
 
 
 def get_alert_by_fingerprint_and_event_id(
@@ -1967,6 +2096,8 @@ def get_alert_by_fingerprint_and_event_id(
             .filter(Alert.id == uuid.UUID(event_id))
             .first()
         )
+        if alert:
+            expand_alert_payloads(session, [alert])
     return alert
 
 
@@ -1981,6 +2112,8 @@ def get_alert_by_event_id(
         )
         query = query.options(subqueryload(Alert.alert_enrichment))
         alert = session.exec(query).first()
+        if alert:
+            expand_alert_payloads(session, [alert])
     return alert
 
 
@@ -1994,7 +2127,9 @@ def get_alerts_by_ids(
             .filter(Alert.id.in_(alert_ids))
         )
         query = query.options(subqueryload(Alert.alert_enrichment))
-        return session.exec(query).all()
+        alerts = session.exec(query).all()
+        expand_alert_payloads(session, alerts)
+        return alerts
 
 
 def get_previous_alert_by_fingerprint(tenant_id: str, fingerprint: str) -> Alert:
@@ -2008,6 +2143,8 @@ def get_previous_alert_by_fingerprint(tenant_id: str, fingerprint: str) -> Alert
             .limit(2)
             .all()
         )
+        # the previous alert is a superseded, maybe compacted, occurrence
+        expand_alert_payloads(session, alert[1:])
     if len(alert) > 1:
         return alert[1]
     else:
@@ -2024,7 +2161,9 @@ def get_alerts_by_status(
             select(Alert).
             where(status_field == status.value)
         )
-        return session.exec(query).all()
+        alerts = session.exec(query).all()
+        expand_alert_payloads(session, alerts)
+        return alerts
 
 
 def get_api_key(api_key: str, include_deleted: bool = False) -> TenantApiKey:
@@ -2718,49 +2857,64 @@ def create_deduplication_event(
         )
 
 
-def get_all_deduplication_stats(tenant_id):
-    with Session(engine) as session:
-        # Query to get all-time deduplication stats
-        all_time_query = (
-            select(
-                AlertDeduplicationEvent.deduplication_rule_id,
-                AlertDeduplicationEvent.provider_id,
-                AlertDeduplicationEvent.provider_type,
-                AlertDeduplicationEvent.deduplication_type,
-                func.count(AlertDeduplicationEvent.id).label("dedup_count"),
-            )
-            .where(AlertDeduplicationEvent.tenant_id == tenant_id)
-            .group_by(
-                AlertDeduplicationEvent.deduplication_rule_id,
-                AlertDeduplicationEvent.provider_id,
-                AlertDeduplicationEvent.provider_type,
-                AlertDeduplicationEvent.deduplication_type,
-            )
+def _get_raw_deduplication_stats(
+    session: Session, tenant_id: str, twenty_four_hours_ago: datetime
+):
+    # Query to get all-time deduplication stats
+    all_time_query = (
+        select(
+            AlertDeduplicationEvent.deduplication_rule_id,
+            AlertDeduplicationEvent.provider_id,
+            AlertDeduplicationEvent.provider_type,
+            AlertDeduplicationEvent.deduplication_type,
+            func.count(AlertDeduplicationEvent.id).label("dedup_count"),
+        )
+        .where(AlertDeduplicationEvent.tenant_id == tenant_id)
+        .group_by(
+            AlertDeduplicationEvent.deduplication_rule_id,
+            AlertDeduplicationEvent.provider_id,
+            AlertDeduplicationEvent.provider_type,
+            AlertDeduplicationEvent.deduplication_type,
+        )
+    )
+
+    all_time_results = session.exec(all_time_query).all()
+
+    # Query to get alerts distribution in the last 24 hours
+    alerts_last_24_hours_query = (
+        select(
+            AlertDeduplicationEvent.deduplication_rule_id,
+            AlertDeduplicationEvent.provider_id,
+            AlertDeduplicationEvent.provider_type,
+            AlertDeduplicationEvent.date_hour,
+            func.count(AlertDeduplicationEvent.id).label("hourly_count"),
+        )
+        .where(AlertDeduplicationEvent.tenant_id == tenant_id)
+        .where(AlertDeduplicationEvent.date_hour >= twenty_four_hours_ago)
+        .group_by(
+            AlertDeduplicationEvent.deduplication_rule_id,
+            AlertDeduplicationEvent.provider_id,
+            AlertDeduplicationEvent.provider_type,
+            AlertDeduplicationEvent.date_hour,
         )
+    )
+
+    alerts_last_24_hours_results = session.exec(alerts_last_24_hours_query).all()
+    return all_time_results, alerts_last_24_hours_results
 
-        all_time_results = session.exec(all_time_query).all()
 
-        # Query to get alerts distribution in the last 24 hours
+def get_all_deduplication_stats(tenant_id):
+    with Session(engine) as session:
         twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
-        alerts_last_24_hours_query = (
-            select(
-                AlertDeduplicationEvent.deduplication_rule_id,
-                AlertDeduplicationEvent.provider_id,
-                AlertDeduplicationEvent.provider_type,
-                AlertDeduplicationEvent.date_hour,
-                func.count(AlertDeduplicationEvent.id).label("hourly_count"),
-            )
-            .where(AlertDeduplicationEvent.tenant_id == tenant_id)
-            .where(AlertDeduplicationEvent.date_hour >= twenty_four_hours_ago)
-            .group_by(
-                AlertDeduplicationEvent.deduplication_rule_id,
-                AlertDeduplicationEvent.provider_id,
-                AlertDeduplicationEvent.provider_type,
-                AlertDeduplicationEvent.date_hour,
+        if stats_rollups_enabled(session):
+            all_time_results = get_deduplication_counts(session, tenant_id)
+            alerts_last_24_hours_results = get_deduplication_hourly_counts(
+                session, tenant_id, twenty_four_hours_ago
+            )
+        else:
+            all_time_results, alerts_last_24_hours_results = (
+                _get_raw_deduplication_stats(session, tenant_id, twenty_four_hours_ago)
             )
-        )
-
-        alerts_last_24_hours_results = session.exec(alerts_last_24_hours_query).all()
 
         # Create a dictionary with deduplication stats for each rule
         stats = {}
@@ -2813,7 +2967,7 @@ def get_all_deduplication_stats(tenant_id):
                 if 0 <= hours_ago < 24:
                     stats[key]["alerts_last_24_hours"][23 - hours_ago][
                         "number"
-                    ] = hourly_count
+                    ] += hourly_count
 
     return stats
 
@@ -2990,20 +3144,34 @@ def get_provider_distribution(
         elif session.bind.dialect.name == "sqlite":
             timestamp_format = func.strftime(time_format, Alert.timestamp)
 
+        if timestamp_filter:
+            lower = timestamp_filter.lower_timestamp
+            upper = timestamp_filter.upper_timestamp
+        else:
+            lower, upper = twenty_four_hours_ago, None
+
         if aggregate_all:
-            # Query for combined alert distribution across all providers
-            query = (
-                session.query(
-                    timestamp_format.label("time"), func.count().label("hits")
+            if stats_rollups_enabled(session):
+                results = {
+                    time: hits
+                    for time, (hits, _) in get_hourly_counts(
+                        session, tenant_id, RollupMetric.ALERTS, lower, upper
+                    ).items()
+                }
+            else:
+                # Query for combined alert distribution across all providers
+                query = (
+                    session.query(
+                        timestamp_format.label("time"), func.count().label("hits")
+                    )
+                    .filter(*filters)
+                    .group_by("time")
+                    .order_by("time")
                 )
-                .filter(*filters)
-                .group_by("time")
-                .order_by("time")
-            )
 
-            results = query.all()
+                results = query.all()
 
-            results = {str(time): hits for time, hits in results}
+                results = {str(time): hits for time, hits in results}
 
             # Create a complete list of timestamps within the specified range
             distribution = []
@@ -3022,21 +3190,31 @@ def get_provider_distribution(
             return distribution
 
         else:
-            # Query for alert distribution grouped by provider
-            query = (
-                session.query(
-                    Alert.provider_id,
-                    Alert.provider_type,
-                    timestamp_format.label("time"),
-                    func.count().label("hits"),
-                    func.max(Alert.timestamp).label("last_alert_timestamp"),
+            if stats_rollups_enabled(session):
+                results = [
+                    (provider_id, provider_type, hour.strftime(time_format), hits, last)
+                    for (provider_id, provider_type), hour, hits, last in get_rollups(
+                        session, tenant_id, RollupMetric.ALERTS, lower, upper
+                    )
+                    # the first hour may only have alerts from before lower
+                    if last is None or last >= lower
+                ]
+            else:
+                # Query for alert distribution grouped by provider
+                query = (
+                    session.query(
+                        Alert.provider_id,
+                        Alert.provider_type,
+                        timestamp_format.label("time"),
+                        func.count().label("hits"),
+                        func.max(Alert.timestamp).label("last_alert_timestamp"),
+                    )
+                    .filter(*filters)
+                    .group_by(Alert.provider_id, Alert.provider_type, "time")
+                    .order_by(Alert.provider_id, Alert.provider_type, "time")
                 )
-                .filter(*filters)
-                .group_by(Alert.provider_id, Alert.provider_type, "time")
-                .order_by(Alert.provider_id, Alert.provider_type, "time")
-            )
 
-            results = query.all()
+                results = query.all()
 
             provider_distribution = {}
 
@@ -3123,18 +3301,30 @@ def get_combined_workflow_execution_distribution(
         elif session.bind.dialect.name == "sqlite":
             timestamp_format = func.strftime(time_format, WorkflowExecution.started)
 
-        # Query for combined execution count across all workflows
-        query = (
-            session.query(
-                timestamp_format.label("time"),
-                func.count().label("executions"),
+        if stats_rollups_enabled(session):
+            results = {
+                time: executions
+                for time, (executions, _) in get_hourly_counts(
+                    session,
+                    tenant_id,
+                    RollupMetric.WORKFLOW_EXECUTIONS,
+                    timestamp_filter.lower_timestamp,
+                    timestamp_filter.upper_timestamp,
+                ).items()
+            }
+        else:
+            # Query for combined execution count across all workflows
+            query = (
+                session.query(
+                    timestamp_format.label("time"),
+                    func.count().label("executions"),
+                )
+                .filter(*filters)
+                .group_by("time")
+                .order_by("time")
             )
-            .filter(*filters)
-            .group_by("time")
-            .order_by("time")
-        )
 
-        results = {str(time): executions for time, executions in query.all()}
+            results = {str(time): executions for time, executions in query.all()}
 
         distribution = []
         current_time = timestamp_filter.lower_timestamp.replace(
@@ -3201,16 +3391,28 @@ def get_incidents_created_distribution(
         elif session.bind.dialect.name == "sqlite":
             timestamp_format = func.strftime(time_format, Incident.creation_time)
 
-        query = (
-            session.query(
-                timestamp_format.label("time"), func.count().label("incidents")
+        if stats_rollups_enabled(session):
+            results = {
+                time: incidents
+                for time, (incidents, _) in get_hourly_counts(
+                    session,
+                    tenant_id,
+                    RollupMetric.INCIDENTS_CREATED,
+                    timestamp_filter.lower_timestamp,
+                    timestamp_filter.upper_timestamp,
+                ).items()
+            }
+        else:
+            query = (
+                session.query(
+                    timestamp_format.label("time"), func.count().label("incidents")
+                )
+                .filter(*filters)
+                .group_by("time")
+                .order_by("time")
             )
-            .filter(*filters)
-            .group_by("time")
-            .order_by("time")
-        )
 
-        results = {str(time): incidents for time, incidents in query.all()}
+            results = {str(time): incidents for time, incidents in query.all()}
 
         distribution = []
         current_time = timestamp_filter.lower_timestamp.replace(
@@ -3278,29 +3480,41 @@ def calc_incidents_mttr(tenant_id: str, timestamp_filter: TimeStampFilter = None
         elif session.bind.dialect.name == "sqlite":
             timestamp_format = func.strftime(time_format, Incident.creation_time)
 
-        query = (
-            session.query(
-                timestamp_format.label("time"),
-                Incident.start_time,
-                Incident.end_time,
-                func.count().label("incidents"),
+        if stats_rollups_enabled(session):
+            results = {
+                time: {"number": incidents, "mttr": resolution_time}
+                for time, (incidents, resolution_time) in get_hourly_counts(
+                    session,
+                    tenant_id,
+                    RollupMetric.INCIDENTS_RESOLVED,
+                    timestamp_filter.lower_timestamp,
+                    timestamp_filter.upper_timestamp,
+                ).items()
+            }
+        else:
+            query = (
+                session.query(
+                    timestamp_format.label("time"),
+                    Incident.start_time,
+                    Incident.end_time,
+                    func.count().label("incidents"),
+                )
+                .filter(*filters)
+                .group_by("time", Incident.start_time, Incident.end_time)
+                .order_by("time")
             )
-            .filter(*filters)
-            .group_by("time", Incident.start_time, Incident.end_time)
-            .order_by("time")
-        )
-        results = {}
-        for time, start_time, end_time, incidents in query.all():
-            if start_time and end_time:
-                resolution_time = (
-                    end_time - start_time
-                ).total_seconds() / 3600  # in hours
-                time_str = str(time)
-                if time_str not in results:
-                    results[time_str] = {"number": 0, "mttr": 0}
-
-                results[time_str]["number"] += incidents
-                results[time_str]["mttr"] += resolution_time * incidents
+            results = {}
+            for time, start_time, end_time, incidents in query.all():
+                if start_time and end_time:
+                    resolution_time = (
+                        end_time - start_time
+                    ).total_seconds() / 3600  # in hours
+                    time_str = str(time)
+                    if time_str not in results:
+                        results[time_str] = {"number": 0, "mttr": 0}
+
+                    results[time_str]["number"] += incidents
+                    results[time_str]["mttr"] += resolution_time * incidents
 
         distribution = []
         current_time = timestamp_filter.lower_timestamp.replace(
@@ -4170,6 +4384,7 @@ def delete_incident_by_id(
             )
         ).first()
 
+        track_incident_update(session, incident, status=IncidentStatus.DELETED.value)
         session.execute(
             update(Incident)
             .where(
@@ -4500,6 +4715,8 @@ def add_alerts_to_incident(
 
             for attempt in range(max_retries):
                 try:
+                    # a rollback discards the tracked update, tracked on every attempt
+                    track_incident_update(session, incident, start_time=started_at)
                     session.exec(
                         update(Incident)
                         .where(
@@ -4754,6 +4971,7 @@ def remove_alerts_to_incident_by_incident_id(
             )
         ).subquery()
 
+        track_incident_update(session, incident, start_time=started_at)
         session.exec(
             update(Incident)
             .where(
@@ -5187,6 +5405,16 @@ def change_incident_status_by_id(
     if isinstance(incident_id, str):
         incident_id = __convert_to_uuid(incident_id)
     with Session(engine) as session:
+        if stats_rollups_enabled(session):
+            incident = session.exec(
+                select(Incident).where(
+                    Incident.tenant_id == tenant_id,
+                    Incident.id == incident_id,
+                )
+            ).first()
+            track_incident_update(
+                session, incident, status=status.value, end_time=end_time
+            )
         stmt = (
             update(Incident)
             .where(
@@ -5363,6 +5591,91 @@ def is_all_alerts_in_status(
         return not not_in_status_exists
 
 
+def resolve_incidents_with_all_alerts_resolved(
+    tenant_id: str,
+    fingerprints: List[str],
+    session: Optional[Session] = None,
+) -> List[Incident]:
+    """
+    Resolve the "resolve on all" incidents of the given fingerprints whose alerts
+    are all resolved.
+
+    The same check as is_all_alerts_resolved(incident=...), for all the incidents
+    of the fingerprints in one grouped query instead of one query per incident.
+
+    Returns:
+        List[Incident]: The incidents that were resolved.
+    """
+    with existed_or_new_session(session) as session:
+        enriched_status_field = get_json_extract_field(
+            session, AlertEnrichment.enrichments, "status"
+        )
+        status_field = get_json_extract_field(session, Alert.event, "status")
+        not_resolved = case(
+            (
+                or_(
+                    enriched_status_field != AlertStatus.RESOLVED.value,
+                    and_(
+                        enriched_status_field.is_(None),
+                        status_field != AlertStatus.RESOLVED.value,
+                    ),
+                ),
+                1,
+            ),
+            else_=0,
+        )
+
+        incident_ids = (
+            select(LastAlertToIncident.incident_id)
+            .join(Incident, Incident.id == LastAlertToIncident.incident_id)
+            .where(
+                LastAlertToIncident.tenant_id == tenant_id,
+                LastAlertToIncident.deleted_at == NULL_FOR_DELETED_AT,
+                LastAlertToIncident.fingerprint.in_(fingerprints),
+                Incident.resolve_on == ResolveOn.ALL.value,
+                Incident.status != IncidentStatus.RESOLVED.value,
+                Incident.alerts_count > 0,
+            )
+            .distinct()
+        )
+        resolved_incident_ids = session.exec(
+            select(LastAlertToIncident.incident_id)
+            .join(
+                LastAlert,
+                and_(
+                    LastAlert.tenant_id == LastAlertToIncident.tenant_id,
+                    LastAlert.fingerprint == LastAlertToIncident.fingerprint,
+                ),
+            )
+            .join(Alert, LastAlert.alert_id == Alert.id)
+            .outerjoin(
+                AlertEnrichment,
+                and_(
+                    Alert.tenant_id == AlertEnrichment.tenant_id,
+                    Alert.fingerprint == AlertEnrichment.alert_fingerprint,
+                ),
+            )
+            .where(
+                LastAlertToIncident.tenant_id == tenant_id,
+                LastAlertToIncident.deleted_at == NULL_FOR_DELETED_AT,
+                LastAlertToIncident.incident_id.in_(incident_ids),
+            )
+            .group_by(LastAlertToIncident.incident_id)
+            .having(func.sum(not_resolved) == 0)
+        ).all()
+        if not resolved_incident_ids:
+            return []
+
+        incidents = session.exec(
+            select(Incident).where(Incident.id.in_(resolved_incident_ids))
+        ).all()
+        for incident in incidents:
+            incident.status = IncidentStatus.RESOLVED.value
+            session.add(incident)
+        session.commit()
+        return incidents
+
+
 def is_last_incident_alert_resolved(
     incident: Incident, session: Optional[Session] = None
 ) -> bool:
@@ -5650,6 +5963,23 @@ def get_activity_report(session: Optional[Session] = None):
     return activity_report
 
 
+def get_alert_changes_since(
+    tenant_id: str, since: datetime
+) -> list[tuple[UUID, str, datetime]]:
+    """
+    Get the alert audit entries (ingestion, enrichment, status changes...) written after `since`.
+
+    Returns:
+        list[tuple[UUID, str, datetime]]: (audit id, fingerprint, timestamp) tuples.
+    """
+    with Session(engine) as session:
+        return session.exec(
+            select(AlertAudit.id, AlertAudit.fingerprint, AlertAudit.timestamp)
+            .where(AlertAudit.tenant_id == tenant_id)
+            .where(AlertAudit.timestamp > since)
+        ).all()
+
+
 def get_last_alerts_by_fingerprints(
     tenant_id: str,
     fingerprint: List[str],
@@ -5699,6 +6029,7 @@ def set_last_alert(
                 },
             )
             try:
+                superseded_alert_id = None
                 last_alert = get_last_alert_by_fingerprint(
                     tenant_id, fingerprint, session, for_update=True
                 )
@@ -5718,6 +6049,7 @@ def set_last_alert(
                             "fingerprint": fingerprint,
                         },
                     )
+                    superseded_alert_id = last_alert.alert_id
                     last_alert.timestamp = alert.timestamp
                     last_alert.alert_id = alert.id
                     last_alert.alert_hash = alert.alert_hash
@@ -5736,6 +6068,8 @@ def set_last_alert(
 
                 session.add(last_alert)
                 session.commit()
+                if ALERT_HISTORY_COMPACTION_ENABLED and superseded_alert_id:
+                    compact_alerts(session, tenant_id, [superseded_alert_id])
                 break
             except OperationalError as ex:
                 if "no such savepoint" in ex.args[0]:
@@ -5970,4 +6304,53 @@ def recover_prev_alert_status(alert: Alert, session: Optional[Session] = None):
             )
         )
         session.exec(query)
-        session.commit()
\ No newline at end of file
+        session.commit()
+
+def get_alerts_by_status_batched(
+    status: AlertStatus, batch_size: int = 1000, session: Optional[Session] = None
+) -> Iterator[List[Alert]]:
+    """
+    It'll yield the alerts with the given status in batches of `batch_size`.
+
+    Batches are paged by alert id instead of offset, so the caller may update
+    and commit the alerts of a batch before asking for the next one.
+    """
+    with existed_or_new_session(session) as session:
+        status_field = get_json_extract_field(session, Alert.event, "status")
+        last_id = None
+        while True:
+            query = (
+                select(Alert)
+                .where(status_field == status.value)
+                .order_by(Alert.id)
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                query = query.where(Alert.id > last_id)
+            alerts = session.exec(query).all()
+            if not alerts:
+                return
+            expand_alert_payloads(session, alerts)
+            yield alerts
+            if len(alerts) < batch_size:
+                return
+            last_id = alerts[-1].id
+
+
+def update_alerts_events(
+    alerts_events: List[Tuple[Alert, dict]], session: Optional[Session] = None
+):
+    """
+    It'll replace the event of every given alert in a single bulk UPDATE.
+
+    The loaded alerts get the new event too, without being marked as modified.
+    """
+    if not alerts_events:
+        return
+    with existed_or_new_session(session) as session:
+        session.execute(
+            update(Alert),
+            [{"id": alert.id, "event": event} for alert, event in alerts_events],
+        )
+        for alert, event in alerts_events:
+            set_committed_value(alert, "event", event)
@@ -1,7 +1,10 @@
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
 
-from elasticsearch import ApiError, BadRequestError, Elasticsearch
+from elasticsearch import ApiError, BadRequestError, Elasticsearch, NotFoundError
 from elasticsearch.helpers import BulkIndexError, bulk
 
 from keep.api.core.db import get_enrichments
@@ -11,6 +14,87 @@ from keep.api.models.alert import AlertDto, AlertSeverity
 from keep.api.utils.cel_utils import preprocess_cel_expression
 from keep.api.utils.enrichment_helpers import parse_and_enrich_deleted_and_assignees
 
+# "true" refreshes the index on every write, "wait_for" returns once the write is
+# visible to searches (refreshes are shared by concurrent writers), "interval" doesn't
+# wait and lets the index refresh every ELASTIC_REFRESH_INTERVAL, "false" doesn't wait
+# and leaves the refresh interval of the index untouched.
+DEFAULT_REFRESH_STRATEGY = "wait_for"
+REFRESH_STRATEGIES = ("true", "false", "wait_for", "interval")
+
+# how long the preset counts of an index are served from cache, the writes of this
+# process invalidate them right away, the writes of other processes once expired
+PRESET_COUNTS_CACHE_TTL = float(os.environ.get("ELASTIC_PRESET_COUNTS_CACHE_TTL", "5"))
+PRESET_COUNTS_CACHE_SIZE = 1000
+SQL_TRANSLATIONS_CACHE_SIZE = 10000
+NOISY_ALERTS_FILTER = {
+    "bool": {
+        "filter": [
+            {"term": {"isNoisy": True}},
+            {"term": {"dismissed": False}},
+            {"term": {"deleted": False}},
+        ]
+    }
+}
+
+_clients: dict[tuple, Elasticsearch] = {}
+_clients_lock = threading.Lock()
+_clients_pid = None
+# indices whose refresh interval was set by this process
+_refresh_interval_indices = set()
+# bumped on every write of this process to the index
+_index_generations = defaultdict(int)
+# (index, sql where clause) -> DSL query
+_sql_translations: OrderedDict[tuple[str, str], dict] = OrderedDict()
+# (index, generation, where clauses) -> (expires at, counts)
+_preset_counts: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_elastic_client(
+    hosts: list[str],
+    verify_certs: bool,
+    api_key: str | None = None,
+    basic_auth: tuple[str, str] | None = None,
+    **kwargs,
+) -> Elasticsearch:
+    """
+    Get the Elasticsearch client of the process for the configuration.
+
+    The client holds the connection pool to the cluster, building one per request or
+    per ingested batch pays a new connection (and TLS handshake) every time.
+    """
+    global _clients_pid
+    key = (
+        tuple(hosts),
+        verify_certs,
+        api_key,
+        tuple(basic_auth) if basic_auth else None,
+        repr(sorted(kwargs.items())),
+    )
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            # the connections can't be shared with the parent process
+            _clients.clear()
+            _clients_pid = os.getpid()
+        client = _clients.get(key)
+        if client is None:
+            if basic_auth:
+                client = Elasticsearch(
+                    basic_auth=basic_auth,
+                    hosts=hosts,
+                    verify_certs=verify_certs,
+                    **kwargs,
+                )
+            else:
+                client = Elasticsearch(
+                    api_key=api_key,
+                    hosts=hosts,
+                    verify_certs=verify_certs,
+                    **kwargs,
+                )
+            _clients[key] = client
+    return client
+
 
 class ElasticClient:
 
@@ -50,7 +134,15 @@ class ElasticClient:
         if not self.enabled:
             return
 
-        self.refresh_strategy = os.environ.get("ELASTIC_REFRESH_STRATEGY", "true")
+        self.refresh_strategy = os.environ.get(
+            "ELASTIC_REFRESH_STRATEGY", DEFAULT_REFRESH_STRATEGY
+        ).lower()
+        if self.refresh_strategy not in REFRESH_STRATEGIES:
+            raise ValueError(
+                f"Invalid ELASTIC_REFRESH_STRATEGY {self.refresh_strategy}, "
+                f"valid options are {', '.join(REFRESH_STRATEGIES)}"
+            )
+        self.refresh_interval = os.environ.get("ELASTIC_REFRESH_INTERVAL", "1s")
         self.api_key = api_key or os.environ.get("ELASTIC_API_KEY")
         self.hosts = hosts or os.environ.get("ELASTIC_HOSTS").split(",")
         self.verify_certs = (
@@ -76,7 +168,7 @@ class ElasticClient:
 
         if any(basic_auth):
             self.logger.debug("Using basic auth for Elastic")
-            self._client = Elasticsearch(
+            self._client = get_elastic_client(
                 basic_auth=basic_auth,
                 hosts=self.hosts,
                 verify_certs=self.verify_certs,
@@ -84,7 +176,7 @@ class ElasticClient:
             )
         else:
             self.logger.debug("Using API key for Elastic")
-            self._client = Elasticsearch(
+            self._client = get_elastic_client(
                 api_key=self.api_key,
                 hosts=self.hosts,
                 verify_certs=self.verify_certs,
@@ -99,6 +191,38 @@ class ElasticClient:
         else:
             return f"keep-alerts-{self.tenant_id}"
 
+    @property
+    def write_refresh(self) -> str:
+        """
+        The refresh parameter of the index and bulk requests.
+        """
+        if self.refresh_strategy == "interval":
+            return "false"
+        return self.refresh_strategy
+
+    def _ensure_refresh_interval(self):
+        """
+        With the "interval" strategy, make the index refresh every refresh_interval.
+
+        Runs after the first write of the process to the index, which creates it.
+        """
+        if (
+            self.refresh_strategy != "interval"
+            or self.alerts_index in _refresh_interval_indices
+        ):
+            return
+        try:
+            self._client.indices.put_settings(
+                index=self.alerts_index,
+                settings={"index": {"refresh_interval": self.refresh_interval}},
+            )
+            _refresh_interval_indices.add(self.alerts_index)
+        except Exception:
+            self.logger.warning(
+                "Failed to set the refresh interval of the index",
+                extra={"tenant_id": self.tenant_id, "index": self.alerts_index},
+            )
+
     def _construct_alert_dto_from_results(self, results):
         if not results:
             return []
@@ -200,6 +324,103 @@ class ElasticClient:
             self.logger.error(f"Failed to search alerts in Elastic: {e}")
             raise Exception(f"Failed to search alerts in Elastic: {e}")
 
+    def _translate_where(self, where: str) -> dict:
+        """
+        Translate an SQL where clause on the alerts index to a DSL query, cached since
+        the queries of the presets rarely change.
+        """
+        key = (self.alerts_index, where)
+        with _cache_lock:
+            if key in _sql_translations:
+                _sql_translations.move_to_end(key)
+                return _sql_translations[key]
+
+        sql_query = preprocess_cel_expression(
+            f"""select * from "{self.alerts_index}" """
+            + (f"where {where}" if where else "")
+        )
+        dsl_query = dict(self._client.sql.translate(body={"query": sql_query}))
+        query = dsl_query.get("query", {"match_all": {}})
+        with _cache_lock:
+            _sql_translations[key] = query
+            while len(_sql_translations) > SQL_TRANSLATIONS_CACHE_SIZE:
+                _sql_translations.popitem(last=False)
+        return query
+
+    def count_presets(
+        self, where_clauses: dict[str, str]
+    ) -> dict[str, tuple[int, bool]]:
+        """
+        Count the alerts matching each SQL where clause and whether any of them is noisy
+        (noisy, not dismissed and not deleted), with a single search.
+
+        Args:
+            where_clauses (dict[str, str]): The where clauses, by preset id.
+
+        Returns:
+            dict[str, tuple[int, bool]]: The count and noisy flag, by preset id. Presets
+                whose where clause can't be translated are left out.
+        """
+        if not self.enabled or not where_clauses:
+            return {}
+
+        cache_key = (
+            self.alerts_index,
+            _index_generations[self.alerts_index],
+            tuple(sorted(where_clauses.items())),
+        )
+        with _cache_lock:
+            cached = _preset_counts.get(cache_key)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+
+        filters = {}
+        for preset_id, where in where_clauses.items():
+            try:
+                filters[preset_id] = self._translate_where(where)
+            except BadRequestError as e:
+                # means no index. if no alert was indexed, the index is not exist
+                if "Unknown index" in str(e):
+                    self.logger.warning("Index does not exist yet.")
+                    return {preset_id: (0, False) for preset_id in where_clauses}
+                self.logger.exception(
+                    f"Failed to translate preset query: {e}",
+                    extra={"tenant_id": self.tenant_id, "preset_id": preset_id},
+                )
+        if not filters:
+            return {}
+
+        try:
+            results = self._client.search(
+                index=self.alerts_index,
+                body={
+                    "size": 0,
+                    "aggs": {
+                        "presets": {
+                            "filters": {"filters": filters},
+                            "aggs": {"noisy": {"filter": NOISY_ALERTS_FILTER}},
+                        }
+                    },
+                },
+            )
+        except NotFoundError:
+            self.logger.warning("Index does not exist yet.")
+            return {preset_id: (0, False) for preset_id in filters}
+
+        buckets = results["aggregations"]["presets"]["buckets"]
+        counts = {
+            preset_id: (bucket["doc_count"], bucket["noisy"]["doc_count"] > 0)
+            for preset_id, bucket in buckets.items()
+        }
+        with _cache_lock:
+            _preset_counts[cache_key] = (
+                time.monotonic() + PRESET_COUNTS_CACHE_TTL,
+                counts,
+            )
+            while len(_preset_counts) > PRESET_COUNTS_CACHE_SIZE:
+                _preset_counts.popitem(last=False)
+        return counts
+
     def index_alert(self, alert: AlertDto):
         if not self.enabled:
             return
@@ -214,8 +435,10 @@ class ElasticClient:
                 index=self.alerts_index,
                 body=alert_dict,
                 id=alert.fingerprint,  # we want to update the alert if it already exists so that elastic will have the latest version
-                refresh=self.refresh_strategy,
+                refresh=self.write_refresh,
             )
+            self._ensure_refresh_interval()
+            _index_generations[self.alerts_index] += 1
         # TODO: retry/pubsub
         except ApiError as e:
             self.logger.error(f"Failed to index alert to Elastic: {e} {e.errors}")
@@ -245,7 +468,9 @@ class ElasticClient:
             actions.append(action)
 
         try:
-            success, failed = bulk(self._client, actions, refresh=self.refresh_strategy)
+            success, failed = bulk(self._client, actions, refresh=self.write_refresh)
+            self._ensure_refresh_interval()
+            _index_generations[self.alerts_index] += 1
             self.logger.info(
                 f"Successfully indexed {success} alerts. Failed to index {failed} alerts."
             )
@@ -282,3 +507,4 @@ class ElasticClient:
             return
 
         self._client.indices.delete(index=self.alerts_index)
+        _index_generations[self.alerts_index] += 1
@@ -1,9 +1,12 @@
 import json
 import logging
-from typing import Any
+import threading
+import time
+from typing import Any, Optional
 from sqlalchemy import select
 from sqlalchemy.exc import OperationalError
 from keep.api.core.cel_to_sql.ast_nodes import DataType
+from keep.api.core.config import config
 from keep.api.core.cel_to_sql.properties_metadata import PropertiesMetadata
 from keep.api.core.facets_query_builder.get_facets_query_builder import (
     get_facets_query_builder,
@@ -21,6 +24,88 @@ from keep.api.models.db.facet import Facet, FacetType
 logger = logging.getLogger(__name__)
 
 OPTIONS_PER_FACET = 50
+FACETS_CACHE_TTL_SECONDS = config("KEEP_FACETS_CACHE_TTL", cast=int, default=10)
+FACETS_CACHE_MAX_ENTRIES = config("KEEP_FACETS_CACHE_MAX_ENTRIES", cast=int, default=1000)
+
+
+class FacetOptionsCache:
+    """
+    Short lived, process local cache of computed facet options.
+
+    Entries are keyed by the caller scope (tenant, entity type and a cheap data version of
+    the filtered entities), the filter cel and the requested facet set, so repeated
+    sidebar refreshes over unchanged data don't hit the database.
+    The TTL bounds the staleness for changes the data version doesn't capture.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: dict[tuple, tuple[float, dict[str, list[FacetOptionDto]]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @staticmethod
+    def build_key(
+        cache_scope: tuple,
+        facets: list[FacetDto],
+        facet_options_query: FacetOptionsQueryDto,
+    ) -> tuple:
+        facet_queries = facet_options_query.facet_queries or {}
+        return (
+            cache_scope,
+            facet_options_query.cel or "",
+            tuple(
+                sorted(
+                    (facet.id, facet.property_path, facet_queries.get(facet.id) or "")
+                    for facet in facets
+                )
+            ),
+        )
+
+    def get(self, key: tuple) -> Optional[dict[str, list[FacetOptionDto]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: tuple, value: dict[str, list[FacetOptionDto]]):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                self._entries = {
+                    entry_key: entry
+                    for entry_key, entry in self._entries.items()
+                    if entry[0] >= now
+                }
+                if len(self._entries) >= self.max_entries:
+                    # drop the oldest entry, dicts keep insertion order
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def invalidate(self, cache_scope_prefix: tuple = ()):
+        with self._lock:
+            if not cache_scope_prefix:
+                self._entries.clear()
+                return
+            self._entries = {
+                key: entry
+                for key, entry in self._entries.items()
+                if key[0][: len(cache_scope_prefix)] != cache_scope_prefix
+            }
+
+
+facet_options_cache = FacetOptionsCache(
+    FACETS_CACHE_TTL_SECONDS, FACETS_CACHE_MAX_ENTRIES
+)
 
 
 def build_facet_selects(
@@ -60,6 +145,7 @@ def get_facet_options(
     facets: list[FacetDto],
     facet_options_query: FacetOptionsQueryDto,
     properties_metadata: PropertiesMetadata,
+    cache_scope: Optional[tuple] = None,
 ) -> dict[str, list[FacetOptionDto]]:
     """
     Generates facet options based on the provided query and metadata.
@@ -68,9 +154,19 @@ def get_facet_options(
         cel (str): The CEL (Common Expression Language) string for filtering.
         facets (list[FacetDto]): A list of facet definitions.
         properties_metadata (PropertiesMetadata): Metadata about the properties.
+        cache_scope (tuple, optional): Identifies the filtered dataset, e.g. (tenant_id, entity_type, data_version).
+            When provided, results are cached for KEEP_FACETS_CACHE_TTL seconds. Defaults to None (no caching).
     Returns:
         dict[str, list[FacetOptionDto]]: A dictionary where keys are facet IDs and values are lists of FacetOptionDto objects.
     """
+    cache_key = None
+    if cache_scope is not None and facet_options_cache.enabled:
+        cache_key = FacetOptionsCache.build_key(
+            cache_scope, facets, facet_options_query
+        )
+        cached_result = facet_options_cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
 
     invalid_facets = []
     valid_facets = []
@@ -87,16 +183,13 @@ def get_facet_options(
     if valid_facets:
         with Session(engine) as session:
             try:
-                db_query = get_facets_query_builder(
-                    properties_metadata
-                ).build_facets_data_query(
+                data = get_facets_query_builder(properties_metadata).fetch_facets_data(
+                    session=session,
                     base_query_factory=base_query_factory,
                     entity_id_column=entity_id_column,
                     facets=valid_facets,
                     facet_options_query=facet_options_query,
                 )
-
-                data = session.exec(db_query).all()
             except OperationalError as e:
                 logger.warning(
                     f"""Failed to execute query for facet options.
@@ -109,19 +202,16 @@ def get_facet_options(
             grouped_by_id_dict = {}
 
             for facet_data in data:
-                if facet_data.facet_id not in grouped_by_id_dict:
-                    grouped_by_id_dict[facet_data.facet_id] = []
-
-                # This is to limit the number of options per facet
-                # It's done mostly for sqlite, because in sqlite we can't use limit in the subquery
-                if (
-                    engine.dialect.name == "sqlite"
-                    and len(grouped_by_id_dict[facet_data.facet_id])
-                    >= OPTIONS_PER_FACET
-                ):
+                facet_id = facet_data[0]
+                if facet_id not in grouped_by_id_dict:
+                    grouped_by_id_dict[facet_id] = []
+
+                # This is to limit the number of options per facet,
+                # facets computed in a single pass can't be limited per facet in SQL
+                if len(grouped_by_id_dict[facet_id]) >= OPTIONS_PER_FACET:
                     continue
 
-                grouped_by_id_dict[facet_data.facet_id].append(facet_data)
+                grouped_by_id_dict[facet_id].append(facet_data)
 
             for facet in facets:
                 facet_key = get_facet_key(
@@ -188,6 +278,9 @@ def get_facet_options(
     for invalid_facet in invalid_facets:
         result_dict[invalid_facet.id] = []
 
+    if cache_key is not None:
+        facet_options_cache.set(cache_key, result_dict)
+
     return result_dict
 
 
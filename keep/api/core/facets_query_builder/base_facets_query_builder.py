@@ -1,5 +1,5 @@
 from typing import Any
-from sqlalchemy import CTE, func, literal, literal_column, select, text
+from sqlalchemy import CTE, case, func, literal, literal_column, select, text
 from keep.api.core.cel_to_sql.ast_nodes import DataType
 from keep.api.core.cel_to_sql.properties_metadata import (
     JsonFieldMapping,
@@ -17,6 +17,11 @@ class BaseFacetsQueryBuilder:
     Base class for facets handlers.
     """
 
+    # Dialects supporting GROUP BY GROUPING SETS compute all scalar facets of
+    # a filter in one statement, others stream the filtered set once and aggregate in Python.
+    supports_grouping_sets = False
+    stream_batch_size = 1000
+
     def __init__(
         self, properties_metadata: PropertiesMetadata, cel_to_sql: BaseCelToSqlProvider
     ):
@@ -85,6 +90,182 @@ class BaseFacetsQueryBuilder:
 
         return query
 
+    def fetch_facets_data(
+        self,
+        session,
+        base_query_factory: lambda facet_property_path, involved_fields, select_statement: Any,
+        entity_id_column: any,
+        facets: list[FacetDto],
+        facet_options_query: FacetOptionsQueryDto,
+    ) -> list[tuple[str, Any, int]]:
+        """
+        Computes the options of all requested facets, scanning the filtered entity set once
+        per distinct filter instead of once per facet.
+
+        Facets are grouped by their final CEL filter (filter cel + facet cel). Scalar facets of
+        a group are computed in a single pass, array facets still need a json table join per
+        facet and are fetched with the per-facet subqueries of build_facets_data_query.
+
+        Args:
+            session: The database session to execute the queries with.
+            base_query_factory: Factory building the filtered base query for the entity.
+            entity_id_column: The column used to count distinct entities.
+            facets (list[FacetDto]): The facets to compute.
+            facet_options_query (FacetOptionsQueryDto): The filter and per facet queries.
+
+        Returns:
+            list[tuple[str, Any, int]]: (facet_key, facet_value, matches_count) rows.
+        """
+        facets_by_cel: dict[str, dict[str, FacetDto]] = {}
+        array_facets: list[FacetDto] = []
+
+        for facet in facets:
+            facet_cel = facet_options_query.facet_queries.get(facet.id, "")
+            facet_key = get_facet_key(
+                facet_property_path=facet.property_path,
+                filter_cel=facet_options_query.cel,
+                facet_cel=facet_cel,
+            )
+            metadata = self.properties_metadata.get_property_metadata_for_str(
+                facet.property_path
+            )
+
+            if metadata.data_type == DataType.ARRAY:
+                array_facets.append(facet)
+                continue
+
+            final_cel = " && ".join(
+                filter(lambda cel: cel, [facet_options_query.cel, facet_cel])
+            )
+            facets_by_cel.setdefault(final_cel, {}).setdefault(facet_key, facet)
+
+        rows = []
+
+        for final_cel, facets_by_key in facets_by_cel.items():
+            rows.extend(
+                self.fetch_single_pass_facets_data(
+                    session=session,
+                    base_query_factory=base_query_factory,
+                    entity_id_column=entity_id_column,
+                    facets_by_key=facets_by_key,
+                    facet_cel=final_cel,
+                )
+            )
+
+        if array_facets:
+            rows.extend(
+                session.exec(
+                    self.build_facets_data_query(
+                        base_query_factory=base_query_factory,
+                        entity_id_column=entity_id_column,
+                        facets=array_facets,
+                        facet_options_query=facet_options_query,
+                    )
+                ).all()
+            )
+
+        return rows
+
+    def fetch_single_pass_facets_data(
+        self,
+        session,
+        base_query_factory: lambda facet_property_path, involved_fields, select_statement: Any,
+        entity_id_column,
+        facets_by_key: dict[str, FacetDto],
+        facet_cel: str,
+    ) -> list[tuple[str, Any, int]]:
+        """
+        Computes the histograms of several scalar facets sharing the same filter in one pass
+        over the filtered entity set.
+
+        Args:
+            session: The database session to execute the query with.
+            base_query_factory: Factory building the filtered base query for the entity.
+            entity_id_column: The column used to count distinct entities.
+            facets_by_key (dict[str, FacetDto]): The facets to compute, keyed by facet key.
+            facet_cel (str): The CEL expression filtering the entities.
+
+        Returns:
+            list[tuple[str, Any, int]]: (facet_key, facet_value, matches_count) rows.
+        """
+        facet_keys = list(facets_by_key.keys())
+        facets_metadata = [
+            self.properties_metadata.get_property_metadata_for_str(
+                facet.property_path
+            )
+            for facet in facets_by_key.values()
+        ]
+        involved_fields = list(facets_metadata)
+        sql_filter = None
+
+        if facet_cel:
+            cel_to_sql_result = self.cel_to_sql.convert_to_sql_str_v2(facet_cel)
+            involved_fields += cel_to_sql_result.involved_fields
+            sql_filter = cel_to_sql_result.sql
+
+        source_query = base_query_factory(
+            "",
+            involved_fields,
+            [entity_id_column.label("entity_id")]
+            + [
+                self._get_select_for_column(metadata).label(f"facet_{index}")
+                for index, metadata in enumerate(facets_metadata)
+            ],
+        )
+
+        if sql_filter:
+            source_query = source_query.filter(text(sql_filter))
+
+        if self.supports_grouping_sets:
+            return session.exec(
+                self._build_grouping_sets_query(source_query, facet_keys)
+            ).all()
+
+        return self._aggregate_facets_stream(session, source_query, facet_keys)
+
+    def _build_grouping_sets_query(self, source_query, facet_keys: list[str]):
+        source = source_query.subquery("facets_source")
+        facet_columns = [source.c[f"facet_{index}"] for index in range(len(facet_keys))]
+
+        # GROUPING(column) is 0 only in the grouping set of that column,
+        # which tells the facet a row belongs to even when the facet value is NULL
+        return select(
+            case(
+                *[
+                    (func.grouping(column) == 0, literal(facet_key))
+                    for facet_key, column in zip(facet_keys, facet_columns)
+                ]
+            ).label("facet_id"),
+            case(
+                *[
+                    (func.grouping(column) == 0, column)
+                    for column in facet_columns
+                ]
+            ).label("facet_value"),
+            func.count(func.distinct(source.c.entity_id)).label("matches_count"),
+        ).group_by(func.grouping_sets(*facet_columns))
+
+    def _aggregate_facets_stream(
+        self, session, source_query, facet_keys: list[str]
+    ) -> list[tuple[str, Any, int]]:
+        # (facet_key, facet_value) -> distinct entity ids, dicts keep the first seen order
+        entities_by_option: dict[tuple[str, Any], set] = {}
+        result = session.execute(
+            source_query.execution_options(yield_per=self.stream_batch_size)
+        )
+
+        for row in result:
+            entity_id = row[0]
+            for facet_key, facet_value in zip(facet_keys, row[1:]):
+                entities_by_option.setdefault((facet_key, facet_value), set()).add(
+                    entity_id
+                )
+
+        return [
+            (facet_key, facet_value, len(entity_ids))
+            for (facet_key, facet_value), entity_ids in entities_by_option.items()
+        ]
+
     def build_facet_select(self, entity_id_column, facet_key: str, facet_property_path):
         property_metadata = self.properties_metadata.get_property_metadata_for_str(
             facet_property_path
@@ -603,9 +603,31 @@ def get_incident_facets_data(
         facets=facets,
         facet_options_query=facet_options_query,
         properties_metadata=properties_metadata,
+        cache_scope=(
+            tenant_id,
+            "incident",
+            tuple(sorted(str(incident_id) for incident_id in allowed_incident_ids or [])),
+            get_incidents_data_version(tenant_id),
+        ),
     )
 
 
+def get_incidents_data_version(tenant_id: str) -> tuple:
+    """
+    Returns a cheap version of the tenant's incidents, used to key facet caches.
+    It changes when incidents are created or receive alerts, other changes are bounded by the cache TTL.
+    """
+    with Session(engine) as session:
+        count, last_creation_time, last_seen_time = session.exec(
+            select(
+                func.count(Incident.id),
+                func.max(Incident.creation_time),
+                func.max(Incident.last_seen_time),
+            ).where(Incident.tenant_id == tenant_id)
+        ).one()
+    return count, str(last_creation_time), str(last_seen_time)
+
+
 def get_incident_facets(
     tenant_id: str, facet_ids_to_load: list[str] = None
 ) -> list[FacetDto]:
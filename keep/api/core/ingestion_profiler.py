@@ -0,0 +1,120 @@
+"""
+Per-stage profiling of the ingestion pipeline (process_event).
+
+Every stage already runs in an OpenTelemetry span; profile_stage also records how long it
+took and how many DB queries it ran in Prometheus histograms, so the stage eating the
+ingest budget shows on /metrics/processing without a tracing backend. Queries are counted
+with a SQLAlchemy hook for the stages active in the current context, a nested stage counts
+for its parents too, like its duration does.
+
+Metrics are labeled with the tenant id of the first KEEP_INGESTION_METRICS_MAX_TENANTS
+tenants seen by the process, later tenants share the "other" label.
+"""
+
+import contextlib
+import contextvars
+import threading
+import time
+
+from opentelemetry import trace
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from keep.api.core.config import config
+from keep.api.core.metrics import (
+    ingestion_batch_size,
+    ingestion_stage_db_queries,
+    ingestion_stage_duration_seconds,
+)
+
+INGESTION_PROFILER_ENABLED = config(
+    "KEEP_INGESTION_PROFILER_ENABLED", cast=bool, default=True
+)
+INGESTION_METRICS_TENANT_LABEL = config(
+    "KEEP_INGESTION_METRICS_TENANT_LABEL", cast=bool, default=True
+)
+INGESTION_METRICS_MAX_TENANTS = config(
+    "KEEP_INGESTION_METRICS_MAX_TENANTS", cast=int, default=20
+)
+OTHER_TENANTS = "other"
+STAGE_PREFIX = "process_event_"
+
+_active_stages: contextvars.ContextVar[tuple[list[int], ...]] = contextvars.ContextVar(
+    "keep_ingestion_active_stages", default=()
+)
+
+
+class TenantLabels:
+    """
+    Bounds the number of tenant_id label values a process exports.
+    """
+
+    def __init__(
+        self,
+        max_tenants: int = INGESTION_METRICS_MAX_TENANTS,
+        enabled: bool = INGESTION_METRICS_TENANT_LABEL,
+    ):
+        self.max_tenants = max_tenants
+        self.enabled = enabled
+        self._tenants = set()
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id: str | None) -> str:
+        if not self.enabled or not tenant_id:
+            return OTHER_TENANTS
+        if tenant_id in self._tenants:
+            return tenant_id
+        with self._lock:
+            if len(self._tenants) < self.max_tenants:
+                self._tenants.add(tenant_id)
+                return tenant_id
+        return OTHER_TENANTS
+
+
+tenant_labels = TenantLabels()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    for queries in _active_stages.get():
+        queries[0] += 1
+
+
+@contextlib.contextmanager
+def profile_stage(tracer: trace.Tracer, name: str, tenant_id: str | None):
+    """
+    Run a stage of the ingestion pipeline in a span and record its duration and DB queries.
+
+    Args:
+        tracer (trace.Tracer): The tracer to start the span with.
+        name (str): The span name, e.g. "process_event_deduplication". The stage label
+            is the name without the "process_event_" prefix.
+        tenant_id (str | None): The tenant the events belong to.
+    """
+    with tracer.start_as_current_span(name) as span:
+        if not INGESTION_PROFILER_ENABLED:
+            yield span
+            return
+        queries = [0]
+        token = _active_stages.set(_active_stages.get() + (queries,))
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            duration = time.perf_counter() - start
+            _active_stages.reset(token)
+            stage = name.removeprefix(STAGE_PREFIX)
+            tenant_label = tenant_labels.get(tenant_id)
+            ingestion_stage_duration_seconds.labels(
+                stage=stage, tenant_id=tenant_label
+            ).observe(duration)
+            ingestion_stage_db_queries.labels(
+                stage=stage, tenant_id=tenant_label
+            ).observe(queries[0])
+
+
+def observe_batch_size(tenant_id: str | None, size: int):
+    if INGESTION_PROFILER_ENABLED:
+        ingestion_batch_size.labels(tenant_id=tenant_labels.get(tenant_id)).observe(
+            size
+        )
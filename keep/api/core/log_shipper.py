@@ -0,0 +1,192 @@
+"""
+Background shipping of workflow and provider logs to the database.
+
+Log handlers only enqueue plain dicts; a single daemon thread per process drains
+the bounded queue and bulk inserts the entries once enough of them are pending
+or the flush interval elapsed, whichever comes first.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Callable
+
+from keep.api.core.config import config
+from keep.api.core.metrics import log_shipper_records_total
+
+LOG_SHIPPER_QUEUE_SIZE = config("KEEP_LOG_SHIPPER_QUEUE_SIZE", cast=int, default=10000)
+LOG_SHIPPER_BATCH_SIZE = config("KEEP_LOG_SHIPPER_BATCH_SIZE", cast=int, default=500)
+LOG_SHIPPER_FLUSH_INTERVAL = config(
+    "KEEP_LOG_SHIPPER_FLUSH_INTERVAL", cast=float, default=2
+)
+# "drop" drops new records right away when the queue is full,
+# "block" makes the logging thread wait up to LOG_SHIPPER_BLOCK_TIMEOUT seconds first
+LOG_SHIPPER_OVERFLOW_POLICY = config(
+    "KEEP_LOG_SHIPPER_OVERFLOW_POLICY", default="drop"
+).lower()
+LOG_SHIPPER_BLOCK_TIMEOUT = config(
+    "KEEP_LOG_SHIPPER_BLOCK_TIMEOUT", cast=float, default=0.5
+)
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class LogShipper:
+    def __init__(
+        self,
+        sinks: dict[str, Callable[[list[dict]], None]],
+        queue_size: int = LOG_SHIPPER_QUEUE_SIZE,
+        batch_size: int = LOG_SHIPPER_BATCH_SIZE,
+        flush_interval: float = LOG_SHIPPER_FLUSH_INTERVAL,
+        overflow_policy: str = LOG_SHIPPER_OVERFLOW_POLICY,
+        block_timeout: float = LOG_SHIPPER_BLOCK_TIMEOUT,
+    ):
+        self.sinks = sinks
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.stats = defaultdict(int)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+
+    def _ensure_started(self):
+        # the thread (and the queue it drains) doesn't survive a fork,
+        # e.g. gunicorn workers forked from a preloaded master
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._thread = threading.Thread(
+                target=self._run, name="keep-log-shipper", daemon=True
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def enqueue(self, kind: str, entry: dict) -> bool:
+        """
+        Queue a log entry for shipping without ever raising into the caller.
+
+        Args:
+            kind (str): The sink to ship the entry to, e.g. "workflow".
+            entry (dict): The log entry.
+
+        Returns:
+            bool: False if the entry was dropped because the queue is full.
+        """
+        self._ensure_started()
+        try:
+            if self.overflow_policy == "block":
+                self._queue.put((kind, entry), timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait((kind, entry))
+        except queue.Full:
+            self._count(kind, "dropped")
+            return False
+        return True
+
+    def flush(self, timeout: float = 10) -> bool:
+        """
+        Ship everything queued so far and wait for it to be written.
+
+        Returns:
+            bool: False if the entries were not shipped within the timeout.
+        """
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return True
+        flushed = threading.Event()
+        try:
+            self._queue.put(flushed, timeout=timeout)
+        except queue.Full:
+            return False
+        return flushed.wait(timeout)
+
+    def stop(self, timeout: float = 10):
+        if self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _count(self, kind: str, outcome: str, count: int = 1):
+        self.stats[(kind, outcome)] += count
+        log_shipper_records_total.labels(kind=kind, outcome=outcome).inc(count)
+
+    def _run(self):
+        pending = defaultdict(list)
+        pending_count = 0
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is _STOP or isinstance(item, threading.Event):
+                self._ship(pending)
+                pending, pending_count = defaultdict(list), 0
+                deadline = time.monotonic() + self.flush_interval
+                if item is _STOP:
+                    return
+                item.set()
+                continue
+
+            if item is not None:
+                kind, entry = item
+                pending[kind].append(entry)
+                pending_count += 1
+
+            if pending_count >= self.batch_size or time.monotonic() >= deadline:
+                self._ship(pending)
+                pending, pending_count = defaultdict(list), 0
+                deadline = time.monotonic() + self.flush_interval
+
+    def _ship(self, pending: dict[str, list[dict]]):
+        for kind, entries in pending.items():
+            if not entries:
+                continue
+            try:
+                self.sinks[kind](entries)
+                self._count(kind, "shipped", len(entries))
+            except Exception:
+                # never log through the DB handlers from here, it would loop
+                logger.exception(
+                    "Failed to ship logs", extra={"kind": kind, "count": len(entries)}
+                )
+                self._count(kind, "failed", len(entries))
+
+
+_log_shipper = None
+_log_shipper_lock = threading.Lock()
+
+
+def get_log_shipper() -> LogShipper:
+    global _log_shipper
+    if _log_shipper is None:
+        with _log_shipper_lock:
+            if _log_shipper is None:
+                # avoid circular import
+                from keep.api.core.db import (
+                    push_logs_to_db,
+                    push_provider_logs_to_db,
+                )
+
+                _log_shipper = LogShipper(
+                    sinks={
+                        "workflow": push_logs_to_db,
+                        "provider": push_provider_logs_to_db,
+                    }
+                )
+    return _log_shipper
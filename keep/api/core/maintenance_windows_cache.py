@@ -0,0 +1,183 @@
+"""
+Per-tenant cache of the maintenance windows checked on the ingest path.
+
+Every event batch used to load the windows of its tenant from the DB and compile their
+CEL queries again. The windows enabled and not ended yet which start within the next
+KEEP_MAINTENANCE_WINDOWS_CACHE_TTL seconds are now loaded once per TTL, with their CEL
+compiled, and checked against the current time in memory. The windows of a tenant are
+reloaded right away when they are changed through the API, in any process (see invalidate).
+"""
+
+import dataclasses
+import datetime
+import functools
+import logging
+import threading
+import time
+
+import celpy
+from sqlmodel import Session
+
+from keep.api.core import db
+from keep.api.core.cache_invalidation import CacheEntity, cache_invalidation_bus
+from keep.api.core.config import config
+from keep.api.models.db.maintenance_window import MaintenanceWindowRule
+from keep.api.utils.cel_utils import preprocess_cel_expression
+
+MAINTENANCE_WINDOWS_CACHE_ENABLED = config(
+    "KEEP_MAINTENANCE_WINDOWS_CACHE_ENABLED", cast=bool, default=True
+)
+MAINTENANCE_WINDOWS_CACHE_TTL = config(
+    "KEEP_MAINTENANCE_WINDOWS_CACHE_TTL", cast=int, default=60
+)
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=1024)
+def get_cel_program(cel_query: str) -> celpy.Runner:
+    """
+    Compile the CEL query of a maintenance window once, the program is reused for every alert.
+    """
+    environment = celpy.Environment()
+    ast = environment.compile(preprocess_cel_expression(cel_query))
+    return environment.program(ast)
+
+
+def _as_utc(value: datetime.datetime) -> datetime.datetime:
+    # sqlite gives back naive datetimes, they are stored in UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.UTC)
+    return value
+
+
+@dataclasses.dataclass(frozen=True)
+class CachedMaintenanceWindow:
+    """
+    A snapshot of a maintenance window, safe to share between sessions and threads.
+    """
+
+    id: int
+    tenant_id: str
+    name: str
+    cel_query: str
+    start_time: datetime.datetime
+    end_time: datetime.datetime
+    suppress: bool
+    ignore_statuses: list
+
+    @classmethod
+    def from_rule(cls, rule: MaintenanceWindowRule) -> "CachedMaintenanceWindow":
+        return cls(
+            id=rule.id,
+            tenant_id=rule.tenant_id,
+            name=rule.name,
+            cel_query=rule.cel_query,
+            start_time=_as_utc(rule.start_time),
+            end_time=_as_utc(rule.end_time),
+            suppress=rule.suppress,
+            ignore_statuses=list(rule.ignore_statuses or []),
+        )
+
+    @property
+    def program(self) -> celpy.Runner:
+        return get_cel_program(self.cel_query)
+
+    def is_active(self, now: datetime.datetime) -> bool:
+        return self.start_time <= now < self.end_time
+
+
+class _TenantMaintenanceWindows:
+    def __init__(self, windows: list[CachedMaintenanceWindow]):
+        self.windows = windows
+        self.loaded_at = time.monotonic()
+
+
+class MaintenanceWindowsCache:
+    def __init__(self, ttl: int = MAINTENANCE_WINDOWS_CACHE_TTL):
+        self.ttl = ttl
+        self._tenants: dict[str, _TenantMaintenanceWindows] = {}
+        self._lock = threading.Lock()
+
+    def _load(
+        self, tenant_id: str, session: Session | None
+    ) -> list[CachedMaintenanceWindow]:
+        now = datetime.datetime.now(datetime.UTC)
+        with db.existed_or_new_session(session) as session:
+            rules = (
+                session.query(MaintenanceWindowRule)
+                .filter(MaintenanceWindowRule.tenant_id == tenant_id)
+                .filter(MaintenanceWindowRule.enabled == True)
+                .filter(MaintenanceWindowRule.end_time >= now)
+                # windows starting before the next reload are cached ahead of time
+                .filter(
+                    MaintenanceWindowRule.start_time
+                    <= now + datetime.timedelta(seconds=self.ttl)
+                )
+                .all()
+            )
+        windows = []
+        for rule in rules:
+            window = CachedMaintenanceWindow.from_rule(rule)
+            try:
+                # compile now rather than on the first alert of the tenant
+                window.program
+            except Exception:
+                logger.exception(
+                    "Failed to compile maintenance window CEL",
+                    extra={"tenant_id": tenant_id, "maintenance_rule_id": rule.id},
+                )
+                continue
+            windows.append(window)
+        logger.info(
+            "Loaded maintenance windows",
+            extra={"tenant_id": tenant_id, "windows_count": len(windows)},
+        )
+        return windows
+
+    def get_windows(
+        self, tenant_id: str, session: Session | None = None
+    ) -> list[CachedMaintenanceWindow]:
+        """
+        Get the maintenance windows of the tenant which are active now.
+
+        Args:
+            tenant_id (str): The tenant to get the windows of.
+            session (Session | None): The session to load the windows with on a cache miss.
+        """
+        if not MAINTENANCE_WINDOWS_CACHE_ENABLED:
+            windows = self._load(tenant_id, session)
+        else:
+            cache_invalidation_bus.poll()
+            tenant_windows = self._tenants.get(tenant_id)
+            if (
+                tenant_windows is None
+                or time.monotonic() - tenant_windows.loaded_at >= self.ttl
+            ):
+                with self._lock:
+                    tenant_windows = self._tenants.get(tenant_id)
+                    if (
+                        tenant_windows is None
+                        or time.monotonic() - tenant_windows.loaded_at >= self.ttl
+                    ):
+                        tenant_windows = _TenantMaintenanceWindows(
+                            self._load(tenant_id, session)
+                        )
+                        self._tenants[tenant_id] = tenant_windows
+            windows = tenant_windows.windows
+
+        now = datetime.datetime.now(datetime.UTC)
+        return [window for window in windows if window.is_active(now)]
+
+    def invalidate(self, tenant_id: str | None = None):
+        with self._lock:
+            if tenant_id is None:
+                self._tenants.clear()
+            else:
+                self._tenants.pop(tenant_id, None)
+
+
+maintenance_windows_cache = MaintenanceWindowsCache()
+cache_invalidation_bus.subscribe(
+    CacheEntity.MAINTENANCE_WINDOWS, maintenance_windows_cache.invalidate
+)
@@ -38,6 +38,75 @@ running_tasks_by_process_gauge = Gauge(
     multiprocess_mode="livesum",
 )
 
+# Provider pulling metrics
+provider_pull_duration = Histogram(
+    f"{METRIC_PREFIX}provider_pull_duration_seconds",
+    "Time spent pulling data from a provider",
+    labelnames=["provider_type", "status"],
+    buckets=(0.5, 1, 5, 10, 30, 60, 120, 300),
+)
+
+provider_pulled_alerts_total = Counter(
+    f"{METRIC_PREFIX}provider_pulled_alerts_total",
+    "Total number of alerts pulled from providers",
+    labelnames=["provider_type"],
+)
+
+# Workflow / provider log shipping metrics
+log_shipper_records_total = Counter(
+    f"{METRIC_PREFIX}log_shipper_records_total",
+    "Total number of log records handled by the log shipper",
+    labelnames=["kind", "outcome"],
+)
+
+ui_notifications_total = Counter(
+    f"{METRIC_PREFIX}ui_notifications_total",
+    "Total number of UI notifications by outcome (dispatched, coalesced, deduplicated, dropped, failed)",
+    labelnames=["event", "outcome"],
+)
+
+# Ingestion pipeline metrics, per stage of process_event (see ingestion_profiler)
+ingestion_stage_duration_seconds = Histogram(
+    f"{METRIC_PREFIX}ingestion_stage_duration_seconds",
+    "Time spent in each stage of the ingestion pipeline",
+    labelnames=["stage", "tenant_id"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+ingestion_stage_db_queries = Histogram(
+    f"{METRIC_PREFIX}ingestion_stage_db_queries",
+    "Number of DB queries run by each stage of the ingestion pipeline",
+    labelnames=["stage", "tenant_id"],
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+
+ingestion_batch_size = Histogram(
+    f"{METRIC_PREFIX}ingestion_batch_size",
+    "Number of events in each batch processed by the ingestion pipeline",
+    labelnames=["tenant_id"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000),
+)
+
+# Retention metrics (see retention)
+retention_rows_total = Counter(
+    f"{METRIC_PREFIX}retention_rows_total",
+    "Total number of rows deleted or archived by the retention",
+    labelnames=["table", "action", "tenant_id"],
+)
+
+retention_batch_duration_seconds = Histogram(
+    f"{METRIC_PREFIX}retention_batch_duration_seconds",
+    "Time spent deleting or archiving a batch of rows by the retention",
+    labelnames=["table", "action"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+retention_last_run_timestamp = Gauge(
+    f"{METRIC_PREFIX}retention_last_run_timestamp_seconds",
+    "Unix time the last retention run completed",
+    multiprocess_mode="max",
+)
+
 ### WORKFLOWS
 METRIC_PREFIX = "keep_workflows_"
 
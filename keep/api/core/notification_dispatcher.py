@@ -0,0 +1,213 @@
+"""
+Asynchronous, coalescing dispatcher for the UI notifications sent through Pusher.
+
+Callers only queue (tenant, event, data); a daemon thread per process sends them with a
+single Pusher client. Notifications of the same tenant and event queued while one was
+sent less than PUSHER_POLLING_INTERVAL seconds ago are merged into a single one, sent
+once the interval is over, so the UI gets the latest state without being flooded. With
+REDIS=true the interval is also enforced across the API and ARQ worker processes.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from keep.api.consts import REDIS
+from keep.api.core.config import config
+from keep.api.core.dependencies import get_pusher_client
+from keep.api.core.metrics import ui_notifications_total
+from keep.api.redis_settings import get_redis_client
+
+NOTIFICATION_INTERVAL = config("PUSHER_POLLING_INTERVAL", cast=float, default=15)
+NOTIFICATION_QUEUE_SIZE = config("KEEP_NOTIFICATION_QUEUE_SIZE", cast=int, default=10000)
+NOTIFICATION_TICK = config("KEEP_NOTIFICATION_TICK", cast=float, default=0.5)
+NOTIFICATION_REDIS_DEDUP = config(
+    "KEEP_NOTIFICATION_REDIS_DEDUP", cast=bool, default=REDIS
+)
+
+logger = logging.getLogger(__name__)
+
+_FLUSH = object()
+
+
+def _merge(pending_data, data):
+    # lists (e.g. the presets to poll) are merged, anything else is replaced
+    if isinstance(pending_data, list) and isinstance(data, list):
+        return pending_data + [item for item in data if item not in pending_data]
+    return data
+
+
+class NotificationDispatcher:
+    def __init__(
+        self,
+        client_factory=get_pusher_client,
+        interval: float = NOTIFICATION_INTERVAL,
+        queue_size: int = NOTIFICATION_QUEUE_SIZE,
+        tick: float = NOTIFICATION_TICK,
+        redis_dedup: bool = NOTIFICATION_REDIS_DEDUP,
+    ):
+        self.client_factory = client_factory
+        self.interval = interval
+        self.queue_size = queue_size
+        self.tick = tick
+        self.redis_dedup = redis_dedup
+        self.stats = defaultdict(int)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._client = None
+        self._queue = None
+        self._thread = None
+
+    def _ensure_started(self):
+        # neither the thread nor the client survive a fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._client = self.client_factory()
+            if self._client is not None:
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._thread = threading.Thread(
+                    target=self._run, name="keep-notification-dispatcher", daemon=True
+                )
+                self._thread.start()
+            self._pid = os.getpid()
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether notifications are sent at all, e.g. False when Pusher is disabled.
+        """
+        self._ensure_started()
+        return self._client is not None
+
+    def notify(self, tenant_id: str, event: str, data=None) -> bool:
+        """
+        Queue a UI notification without ever blocking or raising into the caller.
+
+        Args:
+            tenant_id (str): The tenant to notify, sent on its private channel.
+            event (str): The Pusher event, e.g. "poll-alerts".
+            data: The event data. Lists are merged with the data of the pending
+                notification of the same event, anything else replaces it.
+
+        Returns:
+            bool: False if the notification was not queued.
+        """
+        if not self.enabled:
+            return False
+        try:
+            self._queue.put_nowait((tenant_id, event, data))
+        except queue.Full:
+            self._count(event, "dropped")
+            return False
+        return True
+
+    def flush(self, timeout: float = 10) -> bool:
+        """
+        Send all the pending notifications now, regardless of the interval.
+
+        Returns:
+            bool: False if they were not sent within the timeout.
+        """
+        if self._pid != os.getpid() or self._thread is None:
+            return True
+        flushed = threading.Event()
+        try:
+            self._queue.put((_FLUSH, flushed), timeout=timeout)
+        except queue.Full:
+            return False
+        return flushed.wait(timeout)
+
+    def _count(self, event: str, outcome: str):
+        self.stats[(event, outcome)] += 1
+        ui_notifications_total.labels(event=event, outcome=outcome).inc()
+
+    def _run(self):
+        pending = {}
+        last_sent = {}
+        while True:
+            try:
+                item = self._queue.get(timeout=self.tick)
+            except queue.Empty:
+                item = None
+
+            force = False
+            if item is not None and item[0] is _FLUSH:
+                force = True
+            elif item is not None:
+                tenant_id, event, data = item
+                key = (tenant_id, event)
+                if key in pending:
+                    pending[key] = _merge(pending[key], data)
+                    self._count(event, "coalesced")
+                else:
+                    pending[key] = data
+
+            now = time.monotonic()
+            for key in list(pending):
+                if not force and now - last_sent.get(key, float("-inf")) < self.interval:
+                    continue
+                if not force and not self._acquire(key):
+                    # another process sent it, keep it pending for the next interval
+                    last_sent[key] = now
+                    self._count(key[1], "deduplicated")
+                    continue
+                self._send(key, pending.pop(key))
+                last_sent[key] = now
+
+            if force:
+                item[1].set()
+
+    def _acquire(self, key: tuple[str, str]) -> bool:
+        if not self.redis_dedup:
+            return True
+        tenant_id, event = key
+        try:
+            return bool(
+                get_redis_client().set(
+                    f"keep:ui-notification:{tenant_id}:{event}",
+                    os.getpid(),
+                    nx=True,
+                    # expire a tick early so the next interval of the sender isn't skipped
+                    px=max(1, int((self.interval - self.tick) * 1000)),
+                )
+            )
+        except Exception:
+            # never hold notifications back because redis is unavailable
+            logger.warning("Failed to deduplicate UI notification with Redis")
+            return True
+
+    def _send(self, key: tuple[str, str], data):
+        tenant_id, event = key
+        if data is None:
+            data = {}
+        elif isinstance(data, list):
+            data = json.dumps(data, default=str)
+        try:
+            self._client.trigger(f"private-{tenant_id}", event, data)
+            self._count(event, "dispatched")
+        except Exception:
+            logger.exception(
+                "Failed to send UI notification",
+                extra={"tenant_id": tenant_id, "event": event},
+            )
+            self._count(event, "failed")
+
+
+_notification_dispatcher = None
+_notification_dispatcher_lock = threading.Lock()
+
+
+def get_notification_dispatcher() -> NotificationDispatcher:
+    global _notification_dispatcher
+    if _notification_dispatcher is None:
+        with _notification_dispatcher_lock:
+            if _notification_dispatcher is None:
+                _notification_dispatcher = NotificationDispatcher()
+    return _notification_dispatcher
@@ -0,0 +1,542 @@
+"""
+Time-based retention of the alert tables (opt-in, KEEP_RETENTION_ENABLED).
+
+The rows older than the policy of their tenant and table are deleted, or archived to
+gzipped JSONL (or Parquet) files under KEEP_RETENTION_ARCHIVE_DIR and then deleted, in
+small batches and only in the off-peak KEEP_RETENTION_WINDOW. The default policies are
+set by KEEP_RETENTION_POLICY and overridden per tenant by the "retention" key of the
+tenant configuration, both as:
+    {"alert": {"days": 90, "action": "archive"}, "alertraw": {"days": 7}}
+
+The alerts referenced by LastAlert or AlertToIncident, and the alerts and audits of the
+fingerprints of open incidents are never deleted. The stats rollups keep counting the
+deleted rows, and the payloads of the compacted history (alert_history) are deleted
+with their last alert. On a partitioned alert table (alert_partitions), the partitions
+expired for every tenant are dropped as a whole first.
+
+The watcher runs the retention for at most KEEP_RETENTION_TICK_SECONDS per tick and
+resumes it on the next tick, so it never holds the watcher (and its lock) for the whole
+window. `keep retention --dry-run` reports what would be deleted without deleting
+anything.
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Callable
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import delete, func
+from sqlmodel import Session, select
+
+from keep.api.consts import WATCHER_LAPSED_TIME
+from keep.api.core.alert_history import expand_alert_payloads
+from keep.api.core.alert_partitions import (
+    ALERT_PARTITIONING_ENABLED,
+    drop_expired_alert_partitions,
+)
+from keep.api.core.config import config
+from keep.api.core.db import get_session_sync
+from keep.api.core.metrics import (
+    retention_batch_duration_seconds,
+    retention_last_run_timestamp,
+    retention_rows_total,
+)
+from keep.api.models.db.alert import (
+    Alert,
+    AlertAudit,
+    AlertDeduplicationEvent,
+    AlertPayload,
+    AlertRaw,
+    AlertToIncident,
+    CommentMention,
+    LastAlert,
+    LastAlertToIncident,
+)
+from keep.api.models.db.enrichment_event import EnrichmentEvent, EnrichmentLog
+from keep.api.models.db.helpers import NULL_FOR_DELETED_AT
+from keep.api.models.db.incident import Incident, IncidentStatus
+from keep.api.models.db.tenant import Tenant
+from keep.api.models.db.workflow import WorkflowExecution, WorkflowExecutionLog
+
+RETENTION_ENABLED = config("KEEP_RETENTION_ENABLED", cast=bool, default=False)
+RETENTION_POLICY = config("KEEP_RETENTION_POLICY", default="{}")
+RETENTION_ARCHIVE_DIR = config("KEEP_RETENTION_ARCHIVE_DIR", default="./keep-archive")
+RETENTION_ARCHIVE_FORMAT = config("KEEP_RETENTION_ARCHIVE_FORMAT", default="jsonl")
+RETENTION_BATCH_SIZE = config("KEEP_RETENTION_BATCH_SIZE", cast=int, default=1000)
+# seconds between two batches, so that the retention doesn't hog the database
+RETENTION_BATCH_PAUSE = config("KEEP_RETENTION_BATCH_PAUSE", cast=float, default=0.5)
+# UTC hours, "1-5" runs from 01:00 to 05:00, empty runs at any time
+RETENTION_WINDOW = config("KEEP_RETENTION_WINDOW", default="1-5")
+RETENTION_INTERVAL = config("KEEP_RETENTION_INTERVAL", cast=int, default=3600)
+# seconds of retention per watcher tick, well within the watcher lock
+RETENTION_TICK_SECONDS = config(
+    "KEEP_RETENTION_TICK_SECONDS", cast=int, default=max(1, WATCHER_LAPSED_TIME // 2)
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionAction(str, Enum):
+    DELETE = "delete"
+    ARCHIVE = "archive"
+
+
+class RetentionPolicy(BaseModel):
+    days: int
+    action: RetentionAction = RetentionAction.DELETE
+
+
+class RetentionReport(BaseModel):
+    tenant_id: str
+    table: str
+    action: RetentionAction
+    cutoff: datetime
+    rows: int
+    oldest: datetime | None = None
+    archives: list[str] = []
+
+
+def _open_incidents_fingerprints(tenant_id: str):
+    return (
+        select(LastAlertToIncident.fingerprint)
+        .join(Incident, Incident.id == LastAlertToIncident.incident_id)
+        .where(
+            LastAlertToIncident.tenant_id == tenant_id,
+            LastAlertToIncident.deleted_at == NULL_FOR_DELETED_AT,
+            Incident.status.in_(IncidentStatus.get_active(return_values=True)),
+        )
+    )
+
+
+class RetentionTable:
+    """
+    A table the retention applies to, subclasses protect rows and delete dependents.
+    """
+
+    def __init__(self, model, timestamp_column):
+        self.model = model
+        self.name = model.__tablename__
+        self.timestamp_column = timestamp_column
+
+    def expired(self, tenant_id: str, cutoff: datetime, *columns):
+        return select(*columns).where(
+            self.model.tenant_id == tenant_id, self.timestamp_column < cutoff
+        )
+
+    def prepare_archive(self, session: Session, rows: list):
+        pass
+
+    def delete(self, session: Session, tenant_id: str, rows: list):
+        session.execute(
+            delete(self.model).where(self.model.id.in_([row.id for row in rows]))
+        )
+
+
+class AlertRetentionTable(RetentionTable):
+    def expired(self, tenant_id: str, cutoff: datetime, *columns):
+        return (
+            super()
+            .expired(tenant_id, cutoff, *columns)
+            .where(
+                Alert.id.not_in(
+                    select(LastAlert.alert_id).where(LastAlert.tenant_id == tenant_id)
+                ),
+                Alert.id.not_in(
+                    select(AlertToIncident.alert_id).where(
+                        AlertToIncident.tenant_id == tenant_id
+                    )
+                ),
+                Alert.fingerprint.not_in(_open_incidents_fingerprints(tenant_id)),
+            )
+        )
+
+    def prepare_archive(self, session: Session, rows: list):
+        # the archive holds the whole events
+        expand_alert_payloads(session, rows)
+
+    def delete(self, session: Session, tenant_id: str, rows: list):
+        super().delete(session, tenant_id, rows)
+        payload_hashes = {row.payload_hash for row in rows if row.payload_hash}
+        if payload_hashes:
+            # the payloads no remaining alert is a delta of
+            session.execute(
+                delete(AlertPayload).where(
+                    AlertPayload.tenant_id == tenant_id,
+                    AlertPayload.payload_hash.in_(payload_hashes),
+                    AlertPayload.payload_hash.not_in(
+                        select(Alert.payload_hash).where(
+                            Alert.tenant_id == tenant_id,
+                            Alert.payload_hash.in_(payload_hashes),
+                        )
+                    ),
+                )
+            )
+
+
+class AlertAuditRetentionTable(RetentionTable):
+    def expired(self, tenant_id: str, cutoff: datetime, *columns):
+        return (
+            super()
+            .expired(tenant_id, cutoff, *columns)
+            .where(
+                AlertAudit.fingerprint.not_in(_open_incidents_fingerprints(tenant_id))
+            )
+        )
+
+    def delete(self, session: Session, tenant_id: str, rows: list):
+        session.execute(
+            delete(CommentMention).where(
+                CommentMention.comment_id.in_([row.id for row in rows])
+            )
+        )
+        super().delete(session, tenant_id, rows)
+
+
+class WorkflowExecutionLogRetentionTable(RetentionTable):
+    def expired(self, tenant_id: str, cutoff: datetime, *columns):
+        # the logs are tenant scoped through their execution
+        return select(*columns).where(
+            WorkflowExecution.id == WorkflowExecutionLog.workflow_execution_id,
+            WorkflowExecution.tenant_id == tenant_id,
+            WorkflowExecutionLog.timestamp < cutoff,
+        )
+
+
+class EnrichmentEventRetentionTable(RetentionTable):
+    def expired(self, tenant_id: str, cutoff: datetime, *columns):
+        # date_hour is indexed with the tenant and never after the timestamp
+        return (
+            super()
+            .expired(tenant_id, cutoff, *columns)
+            .where(EnrichmentEvent.date_hour < cutoff)
+        )
+
+    def delete(self, session: Session, tenant_id: str, rows: list):
+        session.execute(
+            delete(EnrichmentLog).where(
+                EnrichmentLog.enrichment_event_id.in_([row.id for row in rows])
+            )
+        )
+        super().delete(session, tenant_id, rows)
+
+
+RETENTION_TABLES: dict[str, RetentionTable] = {
+    table.name: table
+    for table in [
+        AlertRetentionTable(Alert, Alert.timestamp),
+        AlertAuditRetentionTable(AlertAudit, AlertAudit.timestamp),
+        RetentionTable(AlertRaw, AlertRaw.timestamp),
+        RetentionTable(AlertDeduplicationEvent, AlertDeduplicationEvent.timestamp),
+        WorkflowExecutionLogRetentionTable(
+            WorkflowExecutionLog, WorkflowExecutionLog.timestamp
+        ),
+        EnrichmentEventRetentionTable(EnrichmentEvent, EnrichmentEvent.timestamp),
+    ]
+}
+
+
+def _parse_policies(policies: dict, source: str) -> dict[str, RetentionPolicy]:
+    parsed = {}
+    for table, policy in (policies or {}).items():
+        if table not in RETENTION_TABLES:
+            logger.warning(
+                "Unknown table in retention policy",
+                extra={"table": table, "source": source},
+            )
+            continue
+        try:
+            parsed[table] = RetentionPolicy.parse_obj(policy)
+        except ValidationError:
+            logger.warning(
+                "Invalid retention policy",
+                extra={"table": table, "source": source, "policy": policy},
+            )
+    return parsed
+
+
+def get_retention_policies(
+    tenant_configuration: dict | None,
+) -> dict[str, RetentionPolicy]:
+    """
+    The policies of a tenant, its configuration overrides KEEP_RETENTION_POLICY.
+    """
+    try:
+        default_policies = json.loads(RETENTION_POLICY or "{}")
+    except json.JSONDecodeError:
+        logger.warning("KEEP_RETENTION_POLICY is not valid JSON, ignoring it")
+        default_policies = {}
+    policies = _parse_policies(default_policies, "KEEP_RETENTION_POLICY")
+    policies.update(
+        _parse_policies(
+            (tenant_configuration or {}).get("retention"), "tenant configuration"
+        )
+    )
+    # days <= 0 keeps the rows forever
+    return {table: policy for table, policy in policies.items() if policy.days > 0}
+
+
+def _serialize(rows: list) -> list[dict]:
+    return [
+        json.loads(
+            json.dumps(
+                {
+                    column.key: getattr(row, column.key)
+                    for column in row.__table__.columns
+                },
+                default=str,
+            )
+        )
+        for row in rows
+    ]
+
+
+def _write_archive(tenant_id: str, table: str, rows: list[dict]) -> str:
+    directory = os.path.join(RETENTION_ARCHIVE_DIR, tenant_id, table)
+    os.makedirs(directory, exist_ok=True)
+    name = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    if RETENTION_ARCHIVE_FORMAT == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Archiving to Parquet requires pyarrow to be installed")
+        path = os.path.join(directory, f"{name}.parquet")
+        # nested columns (events...) are kept as JSON strings
+        rows = [
+            {
+                key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                for key, value in row.items()
+            }
+            for row in rows
+        ]
+        pq.write_table(pa.Table.from_pylist(rows), f"{path}.tmp", compression="zstd")
+    else:
+        path = os.path.join(directory, f"{name}.jsonl.gz")
+        with gzip.open(f"{path}.tmp", "wt", encoding="utf-8") as archive:
+            for row in rows:
+                archive.write(json.dumps(row) + "\n")
+    # the rows are only deleted once their archive is complete
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+def apply_retention(
+    session: Session,
+    tenant_id: str,
+    table: str,
+    policy: RetentionPolicy,
+    dry_run: bool = False,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    should_continue: Callable[[], bool] | None = None,
+) -> RetentionReport:
+    """
+    Delete or archive the expired rows of a tenant's table, batch by batch.
+
+    should_continue is checked before every batch, e.g. to stop at the end of the
+    off-peak window.
+    """
+    retention_table = RETENTION_TABLES[table]
+    cutoff = datetime.utcnow() - timedelta(days=policy.days)
+    report = RetentionReport(
+        tenant_id=tenant_id,
+        table=table,
+        action=policy.action,
+        cutoff=cutoff,
+        rows=0,
+    )
+    if dry_run:
+        report.rows, report.oldest = session.exec(
+            retention_table.expired(
+                tenant_id,
+                cutoff,
+                func.count(),
+                func.min(retention_table.timestamp_column),
+            )
+        ).one()
+        return report
+
+    while should_continue is None or should_continue():
+        start = time.perf_counter()
+        rows = session.exec(
+            retention_table.expired(tenant_id, cutoff, retention_table.model)
+            .order_by(retention_table.timestamp_column)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        report.oldest = report.oldest or getattr(
+            rows[0], retention_table.timestamp_column.key
+        )
+        if policy.action == RetentionAction.ARCHIVE:
+            retention_table.prepare_archive(session, rows)
+            report.archives.append(_write_archive(tenant_id, table, _serialize(rows)))
+        for row in rows:
+            session.expunge(row)
+        retention_table.delete(session, tenant_id, rows)
+        session.commit()
+
+        report.rows += len(rows)
+        retention_rows_total.labels(
+            table=table, action=policy.action.value, tenant_id=tenant_id
+        ).inc(len(rows))
+        retention_batch_duration_seconds.labels(
+            table=table, action=policy.action.value
+        ).observe(time.perf_counter() - start)
+        logger.info(
+            "Retention batch applied",
+            extra={
+                "tenant_id": tenant_id,
+                "table": table,
+                "action": policy.action.value,
+                "batch_rows": len(rows),
+                "rows": report.rows,
+            },
+        )
+        if len(rows) < batch_size:
+            break
+        time.sleep(RETENTION_BATCH_PAUSE)
+    return report
+
+
+def _drop_expired_alert_partitions(session: Session) -> int:
+    """
+    Drop the alert partitions expired for every tenant, before the batched deletes.
+    """
+    cutoffs = []
+    now = datetime.utcnow()
+    for configuration in session.exec(select(Tenant.configuration)).all():
+        policy = get_retention_policies(configuration).get(Alert.__tablename__)
+        if not policy or policy.action != RetentionAction.DELETE:
+            # the partitions hold alerts of a tenant to keep or archive
+            return 0
+        cutoffs.append(now - timedelta(days=policy.days))
+    if not cutoffs:
+        return 0
+    dropped = drop_expired_alert_partitions(session, min(cutoffs))
+    if dropped:
+        retention_rows_total.labels(
+            table=Alert.__tablename__,
+            action=RetentionAction.DELETE.value,
+            tenant_id="*",
+        ).inc(dropped)
+    return dropped
+
+
+def run_retention(
+    session: Session,
+    tenant_id: str | None = None,
+    dry_run: bool = False,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    should_continue: Callable[[], bool] | None = None,
+) -> list[RetentionReport]:
+    """
+    Apply the retention policies of every tenant (or only tenant_id).
+    """
+    query = select(Tenant.id, Tenant.configuration)
+    if tenant_id:
+        query = query.where(Tenant.id == tenant_id)
+    reports = []
+    if ALERT_PARTITIONING_ENABLED and not dry_run and not tenant_id:
+        try:
+            _drop_expired_alert_partitions(session)
+        except Exception:
+            logger.exception("Failed to drop the expired alert partitions")
+            session.rollback()
+    for _tenant_id, configuration in session.exec(query).all():
+        for table, policy in get_retention_policies(configuration).items():
+            if should_continue is not None and not should_continue():
+                return reports
+            try:
+                reports.append(
+                    apply_retention(
+                        session,
+                        _tenant_id,
+                        table,
+                        policy,
+                        dry_run=dry_run,
+                        batch_size=batch_size,
+                        should_continue=should_continue,
+                    )
+                )
+            except Exception:
+                logger.exception(
+                    "Failed to apply retention",
+                    extra={"tenant_id": _tenant_id, "table": table},
+                )
+                session.rollback()
+    return reports
+
+
+def in_retention_window(now: datetime | None = None) -> bool:
+    if not RETENTION_WINDOW:
+        return True
+    hour = (now or datetime.utcnow()).hour
+    start, end = (int(bound) for bound in RETENTION_WINDOW.split("-"))
+    if start <= end:
+        return start <= hour < end
+    # e.g. 22-4
+    return hour >= start or hour < end
+
+
+_last_run: float | None = None
+_last_run_lock = threading.Lock()
+
+
+def run_scheduled_retention(
+    logger: logging.Logger, session: Session | None = None
+) -> list[RetentionReport]:
+    """
+    Run by the watcher, applies the retention at most every KEEP_RETENTION_INTERVAL
+    seconds and only in the off-peak window, for at most KEEP_RETENTION_TICK_SECONDS.
+    A run cut short by the budget resumes on the next tick, from the oldest rows.
+    """
+    global _last_run
+    if not RETENTION_ENABLED or not in_retention_window():
+        return []
+    with _last_run_lock:
+        if _last_run is not None and time.monotonic() - _last_run < RETENTION_INTERVAL:
+            return []
+        _last_run = time.monotonic()
+
+    logger.info("Starting retention")
+    deadline = time.monotonic() + RETENTION_TICK_SECONDS
+    out_of_budget = False
+
+    def should_continue() -> bool:
+        nonlocal out_of_budget
+        if time.monotonic() >= deadline:
+            out_of_budget = True
+            return False
+        return in_retention_window()
+
+    own_session = session is None
+    session = session or get_session_sync()
+    try:
+        reports = run_retention(session, should_continue=should_continue)
+    finally:
+        if own_session:
+            session.close()
+    if out_of_budget:
+        # not done yet, carry on at the next tick instead of the next interval
+        with _last_run_lock:
+            _last_run = None
+    retention_last_run_timestamp.set(time.time())
+    logger.info(
+        (
+            "Retention paused until the next tick"
+            if out_of_budget
+            else "Retention completed"
+        ),
+        extra={
+            "rows": {
+                f"{report.tenant_id}/{report.table}": report.rows for report in reports
+            }
+        },
+    )
+    return reports
@@ -0,0 +1,635 @@
+"""
+Hourly rollups of the dashboard and statistics metrics.
+
+The dashboard widgets and the deduplication stats used to group the raw alert,
+deduplication event, workflow execution and incident rows on every call, which gets
+slower as the history grows. The rows are counted per (tenant, metric, hour, dimensions)
+in the statsrollup table instead, so the readers only sum a few rows per hour:
+- a SQLAlchemy after_flush hook collects the increments of the rows created (and of the
+  incidents resolved or reopened) by a session, they're applied with a single upsert in a
+  short transaction of their own once the session commits, so the hot rollup rows aren't
+  locked for the duration of the ingestion transactions. A rolled back session applies
+  nothing.
+- updates bypassing the ORM report their incident changes with track_incident_update.
+- backfill_stats_rollups recomputes the rollups of a time range from the raw rows. The
+  migration creating the table only backfills the last
+  KEEP_STATS_ROLLUPS_MIGRATION_BACKFILL_HOURS, so it doesn't hold the deploy over the
+  whole history; `keep backfill-stats-rollups` backfills the older hours, and reconciles
+  the rollups after a crash between a commit and its rollup upsert.
+
+Rows deleted from the raw tables (e.g. by retention) stay counted in the rollups.
+"""
+
+import enum
+import json
+import logging
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta, timezone
+
+from dateutil.parser import parse
+from sqlalchemy import delete, event, func, inspect
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session as SASession
+from sqlmodel import Session, select
+
+from keep.api.core.config import config
+from keep.api.models.db.alert import Alert, AlertDeduplicationEvent
+from keep.api.models.db.incident import Incident, IncidentStatus
+from keep.api.models.db.statistics import StatsRollup
+from keep.api.models.db.workflow import WorkflowExecution
+
+STATS_ROLLUPS_ENABLED = config("KEEP_STATS_ROLLUPS_ENABLED", cast=bool, default=True)
+# hours backfilled by the migration creating the table, the rest is left to
+# `keep backfill-stats-rollups`
+STATS_ROLLUPS_MIGRATION_BACKFILL_HOURS = config(
+    "KEEP_STATS_ROLLUPS_MIGRATION_BACKFILL_HOURS", cast=int, default=24
+)
+SUPPORTED_DIALECTS = ("postgresql", "mysql", "sqlite")
+TIME_FORMAT = "%Y-%m-%d %H"
+INCREMENTS_KEY = "stats_rollup_increments"
+UPSERT_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+DeduplicationCount = namedtuple(
+    "DeduplicationCount",
+    [
+        "deduplication_rule_id",
+        "provider_id",
+        "provider_type",
+        "deduplication_type",
+        "dedup_count",
+    ],
+)
+DeduplicationHourlyCount = namedtuple(
+    "DeduplicationHourlyCount",
+    [
+        "deduplication_rule_id",
+        "provider_id",
+        "provider_type",
+        "date_hour",
+        "hourly_count",
+    ],
+)
+
+
+class RollupMetric(str, enum.Enum):
+    # dimensions: provider_id, provider_type
+    ALERTS = "alerts"
+    # dimensions: deduplication_rule_id, provider_id, provider_type, deduplication_type
+    DEDUPLICATIONS = "deduplications"
+    WORKFLOW_EXECUTIONS = "workflow_executions"
+    INCIDENTS_CREATED = "incidents_created"
+    # per creation hour, total is the sum of the resolution times in hours
+    INCIDENTS_RESOLVED = "incidents_resolved"
+
+
+def stats_rollups_enabled(session: Session) -> bool:
+    return STATS_ROLLUPS_ENABLED and session.bind.dialect.name in SUPPORTED_DIALECTS
+
+
+def _naive_utc(value: datetime | str | None) -> datetime | None:
+    if isinstance(value, str):
+        value = parse(value)
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _hour(value: datetime | str | None) -> datetime | None:
+    value = _naive_utc(value)
+    return value.replace(minute=0, second=0, microsecond=0) if value else None
+
+
+def _resolution_hours(status, start_time, end_time) -> float | None:
+    status = getattr(status, "value", status)
+    if status != IncidentStatus.RESOLVED.value or not start_time or not end_time:
+        return None
+    return (_naive_utc(end_time) - _naive_utc(start_time)).total_seconds() / 3600
+
+
+class RollupIncrements:
+    """
+    Increments of the rollup rows, summed per row before they're applied.
+    """
+
+    def __init__(self):
+        # (tenant_id, metric, hour, dimensions) -> [count, total, last_seen]
+        self.rows = defaultdict(lambda: [0, 0.0, None])
+
+    def __bool__(self):
+        return bool(self.rows)
+
+    def add(
+        self,
+        tenant_id: str,
+        metric: RollupMetric,
+        when: datetime | str | None,
+        dimensions: tuple = (),
+        count: int = 1,
+        total: float = 0,
+        last_seen: datetime | str | None = None,
+    ):
+        hour = _hour(when)
+        if not tenant_id or hour is None:
+            return
+        row = self.rows[(tenant_id, metric.value, hour, json.dumps(list(dimensions)))]
+        row[0] += count
+        row[1] += total
+        last_seen = _naive_utc(last_seen)
+        if last_seen is not None and (row[2] is None or last_seen > row[2]):
+            row[2] = last_seen
+
+    def add_incident_resolution(
+        self, tenant_id: str, creation_time, resolution_hours: float | None, sign: int
+    ):
+        if resolution_hours is not None:
+            self.add(
+                tenant_id,
+                RollupMetric.INCIDENTS_RESOLVED,
+                creation_time,
+                count=sign,
+                total=sign * resolution_hours,
+            )
+
+    def apply(self, connection):
+        """
+        Upsert the increments, in the primary key order so that concurrent upserts can't
+        deadlock each other.
+        """
+        rows = [
+            {
+                "tenant_id": tenant_id,
+                "metric": metric,
+                "hour": hour,
+                "dimensions": dimensions,
+                "count": count,
+                "total": total,
+                "last_seen": last_seen,
+            }
+            for (tenant_id, metric, hour, dimensions), (
+                count,
+                total,
+                last_seen,
+            ) in sorted(self.rows.items())
+            if count or total or last_seen
+        ]
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            connection.execute(
+                _upsert_statement(
+                    connection.dialect.name, rows[i : i + UPSERT_BATCH_SIZE]
+                )
+            )
+
+
+def _latest(dialect_name: str, current, new):
+    greatest = func.max if dialect_name == "sqlite" else func.greatest
+    # both return NULL when one of the values is NULL on MySQL and SQLite
+    return greatest(func.coalesce(current, new), func.coalesce(new, current))
+
+
+def _upsert_statement(dialect_name: str, rows: list[dict]):
+    table = StatsRollup.__table__
+    if dialect_name == "mysql":
+        statement = mysql_insert(table).values(rows)
+        return statement.on_duplicate_key_update(
+            count=table.c.count + statement.inserted.count,
+            total=table.c.total + statement.inserted.total,
+            last_seen=_latest(
+                dialect_name, table.c.last_seen, statement.inserted.last_seen
+            ),
+        )
+    insert = pg_insert if dialect_name == "postgresql" else sqlite_insert
+    statement = insert(table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=["tenant_id", "metric", "hour", "dimensions"],
+        set_={
+            "count": table.c.count + statement.excluded.count,
+            "total": table.c.total + statement.excluded.total,
+            "last_seen": _latest(
+                dialect_name, table.c.last_seen, statement.excluded.last_seen
+            ),
+        },
+    )
+
+
+def _pending_increments(session: SASession) -> RollupIncrements:
+    increments = session.info.get(INCREMENTS_KEY)
+    if increments is None:
+        increments = session.info[INCREMENTS_KEY] = RollupIncrements()
+    return increments
+
+
+INCIDENT_RESOLUTION_ATTRIBUTES = ("creation_time", "status", "start_time", "end_time")
+
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+
+if STATS_ROLLUPS_ENABLED:
+    for _attribute in INCIDENT_RESOLUTION_ATTRIBUTES:
+        # load the previous value of an expired incident when it's set, so that the
+        # flush knows the resolution it replaces
+        event.listen(
+            getattr(Incident, _attribute),
+            "set",
+            _load_previous_value,
+            active_history=True,
+            retval=True,
+        )
+
+
+def _previous_value(state, attribute: str):
+    history = state.attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.object, attribute)
+
+
+@event.listens_for(SASession, "after_flush")
+def _collect_increments(session: SASession, flush_context):
+    if not STATS_ROLLUPS_ENABLED:
+        return
+    increments = None
+    for obj in session.new:
+        if increments is None:
+            increments = _pending_increments(session)
+        if isinstance(obj, Alert):
+            increments.add(
+                obj.tenant_id,
+                RollupMetric.ALERTS,
+                obj.timestamp,
+                (obj.provider_id, obj.provider_type),
+                last_seen=obj.timestamp,
+            )
+        elif isinstance(obj, AlertDeduplicationEvent):
+            increments.add(
+                obj.tenant_id,
+                RollupMetric.DEDUPLICATIONS,
+                obj.date_hour,
+                (
+                    str(obj.deduplication_rule_id),
+                    obj.provider_id,
+                    obj.provider_type,
+                    obj.deduplication_type,
+                ),
+            )
+        elif isinstance(obj, WorkflowExecution):
+            increments.add(obj.tenant_id, RollupMetric.WORKFLOW_EXECUTIONS, obj.started)
+        elif isinstance(obj, Incident):
+            increments.add(
+                obj.tenant_id, RollupMetric.INCIDENTS_CREATED, obj.creation_time
+            )
+            increments.add_incident_resolution(
+                obj.tenant_id,
+                obj.creation_time,
+                _resolution_hours(obj.status, obj.start_time, obj.end_time),
+                1,
+            )
+    for obj in session.dirty:
+        if not isinstance(obj, Incident):
+            continue
+        state = inspect(obj)
+        previous = [
+            _previous_value(state, attribute)
+            for attribute in INCIDENT_RESOLUTION_ATTRIBUTES
+        ]
+        current = [obj.creation_time, obj.status, obj.start_time, obj.end_time]
+        if previous == current:
+            continue
+        increments = _pending_increments(session)
+        increments.add_incident_resolution(
+            obj.tenant_id, previous[0], _resolution_hours(*previous[1:]), -1
+        )
+        increments.add_incident_resolution(
+            obj.tenant_id, current[0], _resolution_hours(*current[1:]), 1
+        )
+
+
+@event.listens_for(SASession, "after_commit")
+def _apply_increments(session: SASession):
+    increments = session.info.pop(INCREMENTS_KEY, None)
+    if not increments:
+        return
+    bind = session.get_bind()
+    if bind.dialect.name not in SUPPORTED_DIALECTS:
+        return
+    try:
+        with bind.engine.begin() as connection:
+            increments.apply(connection)
+    except Exception:
+        logger.exception(
+            "Failed to update the stats rollups, run `keep backfill-stats-rollups` to "
+            "reconcile them"
+        )
+
+
+@event.listens_for(SASession, "after_transaction_end")
+def _discard_increments(session: SASession, transaction):
+    if transaction.parent is None:
+        # rolled back or closed without a commit
+        session.info.pop(INCREMENTS_KEY, None)
+
+
+def track_incident_update(session: Session, incident: Incident | None, **values):
+    """
+    Account for an update of the incident issued without the ORM (update(Incident)), call
+    it with the values of the update before they're applied to the loaded incident.
+    """
+    if not STATS_ROLLUPS_ENABLED or incident is None:
+        return
+    previous = [incident.status, incident.start_time, incident.end_time]
+    current = [
+        values.get(attribute, previous[i])
+        for i, attribute in enumerate(("status", "start_time", "end_time"))
+    ]
+    increments = _pending_increments(session)
+    increments.add_incident_resolution(
+        incident.tenant_id, incident.creation_time, _resolution_hours(*previous), -1
+    )
+    increments.add_incident_resolution(
+        incident.tenant_id, incident.creation_time, _resolution_hours(*current), 1
+    )
+
+
+def _hour_filters(lower: datetime | None, upper: datetime | None) -> list:
+    filters = []
+    if lower:
+        filters.append(StatsRollup.hour >= _hour(lower))
+    if upper:
+        filters.append(StatsRollup.hour <= _naive_utc(upper))
+    return filters
+
+
+def get_hourly_counts(
+    session: Session,
+    tenant_id: str,
+    metric: RollupMetric,
+    lower: datetime | None = None,
+    upper: datetime | None = None,
+) -> dict[str, tuple[int, float]]:
+    """
+    (count, total) of the metric per hour formatted as "%Y-%m-%d %H", all dimensions
+    combined.
+    """
+    query = (
+        select(
+            StatsRollup.hour,
+            func.sum(StatsRollup.count),
+            func.sum(StatsRollup.total),
+        )
+        .where(StatsRollup.tenant_id == tenant_id)
+        .where(StatsRollup.metric == metric.value)
+        .where(*_hour_filters(lower, upper))
+        .group_by(StatsRollup.hour)
+    )
+    return {
+        _naive_utc(hour).strftime(TIME_FORMAT): (int(count or 0), float(total or 0))
+        for hour, count, total in session.exec(query).all()
+    }
+
+
+def get_rollups(
+    session: Session,
+    tenant_id: str,
+    metric: RollupMetric,
+    lower: datetime | None = None,
+    upper: datetime | None = None,
+) -> list[tuple[list, datetime, int, datetime | None]]:
+    """
+    (dimensions, hour, count, last_seen) of the metric per hour and dimensions.
+    """
+    query = (
+        select(
+            StatsRollup.dimensions,
+            StatsRollup.hour,
+            StatsRollup.count,
+            StatsRollup.last_seen,
+        )
+        .where(StatsRollup.tenant_id == tenant_id)
+        .where(StatsRollup.metric == metric.value)
+        .where(StatsRollup.count != 0)
+        .where(*_hour_filters(lower, upper))
+        .order_by(StatsRollup.dimensions, StatsRollup.hour)
+    )
+    return [
+        (json.loads(dimensions), _naive_utc(hour), count, _naive_utc(last_seen))
+        for dimensions, hour, count, last_seen in session.exec(query).all()
+    ]
+
+
+def get_deduplication_counts(
+    session: Session, tenant_id: str
+) -> list[DeduplicationCount]:
+    query = (
+        select(StatsRollup.dimensions, func.sum(StatsRollup.count))
+        .where(StatsRollup.tenant_id == tenant_id)
+        .where(StatsRollup.metric == RollupMetric.DEDUPLICATIONS.value)
+        .group_by(StatsRollup.dimensions)
+    )
+    return [
+        DeduplicationCount(*json.loads(dimensions), int(dedup_count))
+        for dimensions, dedup_count in session.exec(query).all()
+        if dedup_count
+    ]
+
+
+def get_deduplication_hourly_counts(
+    session: Session, tenant_id: str, since: datetime
+) -> list[DeduplicationHourlyCount]:
+    hourly_counts = defaultdict(int)
+    for dimensions, hour, count, _ in get_rollups(
+        session, tenant_id, RollupMetric.DEDUPLICATIONS, lower=since
+    ):
+        rule_id, provider_id, provider_type, _ = dimensions
+        # the raw events are only taken from since on
+        if hour >= since:
+            hourly_counts[(rule_id, provider_id, provider_type, hour)] += count
+    return [
+        DeduplicationHourlyCount(*key, count) for key, count in hourly_counts.items()
+    ]
+
+
+def _format_hour(dialect_name: str, column):
+    if dialect_name == "mysql":
+        return func.date_format(column, TIME_FORMAT)
+    if dialect_name == "postgresql":
+        return func.to_char(column, "YYYY-MM-DD HH24")
+    return func.strftime(TIME_FORMAT, column)
+
+
+def _raw_increments(
+    session: Session,
+    metric: RollupMetric,
+    tenant_id: str | None,
+    lower: datetime | None,
+    upper: datetime | None,
+) -> RollupIncrements:
+    dialect_name = session.bind.dialect.name
+    increments = RollupIncrements()
+
+    def time_filters(model, column):
+        filters = []
+        if tenant_id:
+            filters.append(model.tenant_id == tenant_id)
+        if lower:
+            filters.append(column >= lower)
+        if upper:
+            filters.append(column < upper)
+        return filters
+
+    if metric == RollupMetric.ALERTS:
+        hour = _format_hour(dialect_name, Alert.timestamp).label("hour")
+        query = (
+            select(
+                Alert.tenant_id,
+                Alert.provider_id,
+                Alert.provider_type,
+                hour,
+                func.count(),
+                func.max(Alert.timestamp),
+            )
+            .where(*time_filters(Alert, Alert.timestamp))
+            .group_by(Alert.tenant_id, Alert.provider_id, Alert.provider_type, hour)
+        )
+        for (
+            row_tenant_id,
+            provider_id,
+            provider_type,
+            hour,
+            count,
+            last_seen,
+        ) in session.exec(query).all():
+            increments.add(
+                row_tenant_id,
+                metric,
+                datetime.strptime(hour, TIME_FORMAT),
+                (provider_id, provider_type),
+                count=count,
+                last_seen=last_seen,
+            )
+    elif metric == RollupMetric.DEDUPLICATIONS:
+        columns = (
+            AlertDeduplicationEvent.tenant_id,
+            AlertDeduplicationEvent.deduplication_rule_id,
+            AlertDeduplicationEvent.provider_id,
+            AlertDeduplicationEvent.provider_type,
+            AlertDeduplicationEvent.deduplication_type,
+            AlertDeduplicationEvent.date_hour,
+        )
+        query = (
+            select(*columns, func.count())
+            .where(
+                *time_filters(
+                    AlertDeduplicationEvent, AlertDeduplicationEvent.date_hour
+                )
+            )
+            .group_by(*columns)
+        )
+        for (
+            row_tenant_id,
+            rule_id,
+            provider_id,
+            provider_type,
+            deduplication_type,
+            date_hour,
+            count,
+        ) in session.exec(query).all():
+            increments.add(
+                row_tenant_id,
+                metric,
+                date_hour,
+                (str(rule_id), provider_id, provider_type, deduplication_type),
+                count=count,
+            )
+    elif metric == RollupMetric.INCIDENTS_RESOLVED:
+        hour = _format_hour(dialect_name, Incident.creation_time).label("hour")
+        query = (
+            select(
+                Incident.tenant_id,
+                hour,
+                Incident.start_time,
+                Incident.end_time,
+                func.count(),
+            )
+            .where(*time_filters(Incident, Incident.creation_time))
+            .where(Incident.status == IncidentStatus.RESOLVED.value)
+            .group_by(Incident.tenant_id, hour, Incident.start_time, Incident.end_time)
+        )
+        for row_tenant_id, hour, start_time, end_time, count in session.exec(
+            query
+        ).all():
+            resolution_hours = _resolution_hours(
+                IncidentStatus.RESOLVED, start_time, end_time
+            )
+            if resolution_hours is not None:
+                increments.add(
+                    row_tenant_id,
+                    metric,
+                    datetime.strptime(hour, TIME_FORMAT),
+                    count=count,
+                    total=count * resolution_hours,
+                )
+    else:
+        model, column = {
+            RollupMetric.WORKFLOW_EXECUTIONS: (
+                WorkflowExecution,
+                WorkflowExecution.started,
+            ),
+            RollupMetric.INCIDENTS_CREATED: (Incident, Incident.creation_time),
+        }[metric]
+        hour = _format_hour(dialect_name, column).label("hour")
+        query = (
+            select(model.tenant_id, hour, func.count())
+            .where(*time_filters(model, column))
+            .group_by(model.tenant_id, hour)
+        )
+        for row_tenant_id, hour, count in session.exec(query).all():
+            increments.add(
+                row_tenant_id,
+                metric,
+                datetime.strptime(hour, TIME_FORMAT),
+                count=count,
+            )
+    return increments
+
+
+def backfill_stats_rollups(
+    session: Session,
+    tenant_id: str | None = None,
+    lower: datetime | None = None,
+    upper: datetime | None = None,
+) -> dict[str, int]:
+    """
+    Recompute the rollups of the hours between lower and upper (all of them by default)
+    from the raw rows, returns the number of rollup rows written per metric.
+    """
+    lower = _hour(lower)
+    # the whole hour of upper
+    upper = _hour(upper) + timedelta(hours=1) if upper else None
+    written = {}
+    for metric in RollupMetric:
+        increments = _raw_increments(session, metric, tenant_id, lower, upper)
+        statement = delete(StatsRollup).where(StatsRollup.metric == metric.value)
+        if tenant_id:
+            statement = statement.where(StatsRollup.tenant_id == tenant_id)
+        if lower:
+            statement = statement.where(StatsRollup.hour >= lower)
+        if upper:
+            statement = statement.where(StatsRollup.hour < upper)
+        session.execute(statement)
+        increments.apply(session.connection())
+        session.commit()
+        written[metric.value] = len(increments.rows)
+        logger.info(
+            "Backfilled stats rollups",
+            extra={
+                "metric": metric.value,
+                "rows": len(increments.rows),
+                "tenant_id": tenant_id,
+            },
+        )
+    return written
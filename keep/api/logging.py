@@ -8,16 +8,13 @@ import sys
 import threading
 import uuid
 from datetime import datetime
-from threading import Timer
 
 # tb: small hack to avoid the InsecureRequestWarning logs
 import urllib3
 from pythonjsonlogger import jsonlogger
-from sqlmodel import Session
 
 from keep.api.consts import RUNNING_IN_CLOUD_RUN
-from keep.api.core.db import get_session, push_logs_to_db
-from keep.api.models.db.provider import ProviderExecutionLog
+from keep.api.core.log_shipper import get_log_shipper
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -107,32 +104,14 @@ class WorkflowContextFilter(logging.Filter):
 
 
 class WorkflowDBHandler(logging.Handler):
+    """
+    Ships workflow logs to the DB through the process-wide log shipper.
+    """
+
     def __init__(self, flush_interval: int = 2):
         super().__init__()
-        logging.getLogger(__name__).info("Initializing WorkflowDBHandler")
-        self.records = []
+        # kept for backwards compatibility, the log shipper owns the flush policy
         self.flush_interval = flush_interval
-        self._stop_event = threading.Event()
-        # Start repeating timer in a separate thread
-        self._timer_thread = threading.Thread(target=self._timer_run)
-        self._timer_thread.daemon = (
-            True  # Make it a daemon so it stops when program exits
-        )
-        logging.getLogger(__name__).info("Starting WorkflowDBHandler timer thread")
-        self._timer_thread.start()
-        logging.getLogger(__name__).info("Started WorkflowDBHandler timer thread")
-
-    def _timer_run(self):
-        while not self._stop_event.is_set():
-            # logging.getLogger(__name__).info("Timer running")
-            self.flush()
-            # logging.getLogger(__name__).info("Timer sleeping")
-            self._stop_event.wait(self.flush_interval)  # Wait but can be interrupted
-
-    def close(self):
-        self._stop_event.set()  # Signal the timer to stop
-        self._timer_thread.join()  # Wait for timer thread to finish
-        super().close()
 
     def emit(self, record):
         # we want to push only workflow logs to the DB
@@ -140,99 +119,49 @@ class WorkflowDBHandler(logging.Handler):
             return
         if hasattr(record, "workflow_execution_id") and record.workflow_execution_id:
             self.format(record)
-            self.records.append(record)
-
-    def push_logs_to_db(self):
-        # Convert log records to a list of dictionaries and clean the self.records buffer
-        log_entries, self.records = [record.__dict__ for record in self.records], []
-        # Push log entries to the database
-        push_logs_to_db(log_entries)
+            get_log_shipper().enqueue("workflow", dict(record.__dict__))
 
     def flush(self):
-        if not self.records:
-            return
+        get_log_shipper().flush()
 
-        try:
-            logging.getLogger(__name__).info("Flushing workflow logs to DB")
-            self.push_logs_to_db()
-            logging.getLogger(__name__).info("Flushed workflow logs to DB")
-        except Exception as e:
-            # Use the parent logger to avoid infinite recursion
-            logging.getLogger(__name__).error(
-                f"Failed to flush workflow logs: {str(e)}"
-            )
-        finally:
-            # Clear the timer reference
-            self._flush_timer = None
+    def close(self):
+        self.flush()
+        super().close()
 
 
 class ProviderDBHandler(logging.Handler):
+    """
+    Ships provider logs to the DB through the process-wide log shipper.
+    """
+
     def __init__(self, flush_interval: int = 2):
         super().__init__()
-        self.records = []
+        # kept for backwards compatibility, the log shipper owns the flush policy
         self.flush_interval = flush_interval
-        self._flush_timer = None
 
     def emit(self, record):
         # Only store provider logs
-        if hasattr(record, "provider_id") and record.provider_id:
-            self.records.append(record)
-
-            # Cancel existing timer if any
-            if self._flush_timer:
-                self._flush_timer.cancel()
-
-            # Start new timer
-            self._flush_timer = Timer(self.flush_interval, self.flush)
-            self._flush_timer.start()
+        if getattr(record, "provider_id", None) and getattr(record, "tenant_id", None):
+            get_log_shipper().enqueue(
+                "provider",
+                {
+                    "id": str(uuid.uuid4()),
+                    "tenant_id": record.tenant_id,
+                    "provider_id": record.provider_id,
+                    "timestamp": datetime.fromtimestamp(record.created),
+                    "log_message": record.getMessage(),
+                    "log_level": record.levelname,
+                    "context": getattr(record, "extra", {}),
+                    # if record have execution_id use it, but mostly for future use
+                    "execution_id": getattr(record, "execution_id", None),
+                },
+            )
 
     def flush(self):
-        if not self.records:
-            return
-
-        # Copy records and clear original list to avoid race conditions
-        _records = self.records.copy()
-        self.records = []
-
-        try:
-            session = Session(next(get_session()).bind)
-            log_entries = []
-
-            for record in _records:
-                # if record have execution_id use it, but mostly for future use
-                if hasattr(record, "execution_id"):
-                    execution_id = record.execution_id
-                else:
-                    execution_id = None
-                entry = ProviderExecutionLog(
-                    id=str(uuid.uuid4()),
-                    tenant_id=record.tenant_id,
-                    provider_id=record.provider_id,
-                    timestamp=datetime.fromtimestamp(record.created),
-                    log_message=record.getMessage(),
-                    log_level=record.levelname,
-                    context=getattr(record, "extra", {}),
-                    execution_id=execution_id,
-                )
-                log_entries.append(entry)
-
-            session.add_all(log_entries)
-            session.commit()
-            session.close()
-        except Exception as e:
-            # Use the parent logger to avoid infinite recursion
-            logging.getLogger(__name__).error(
-                f"Failed to flush provider logs: {str(e)}"
-            )
-        finally:
-            # Clear the timer reference
-            self._flush_timer = None
+        get_log_shipper().flush()
 
     def close(self):
-        """Cancel timer and flush remaining logs when handler is closed"""
-        if self._flush_timer:
-            self._flush_timer.cancel()
-            self._flush_timer = None
+        """Flush remaining logs when handler is closed"""
         self.flush()
         super().close()
 
@@ -242,9 +171,12 @@ class ProviderLoggerAdapter(logging.LoggerAdapter):
         # Create a new logger specifically for this adapter
         self.provider_logger = logging.getLogger(f"provider.{provider_id}")
 
-        # Add the ProviderDBHandler only to this specific logger
-        handler = ProviderDBHandler()
-        self.provider_logger.addHandler(handler)
+        # Add the ProviderDBHandler only to this specific logger, once
+        if not any(
+            isinstance(handler, ProviderDBHandler)
+            for handler in self.provider_logger.handlers
+        ):
+            self.provider_logger.addHandler(ProviderDBHandler())
 
         # Initialize the adapter with the new logger
         super().__init__(self.provider_logger, {})
@@ -375,6 +375,27 @@ class BatchEnrichAlertRequestBody(BaseModel):
     cel: Optional[str] = None
 
 
+class BatchEnrichJobStatus(str, Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class BatchEnrichJobDto(BaseModel):
+    job_id: str
+    tenant_id: str
+    status: BatchEnrichJobStatus = BatchEnrichJobStatus.RUNNING
+    total: int
+    processed: int = 0
+    chunks: int = 0
+    error: Optional[str] = None
+    started: datetime.datetime
+    finished: Optional[datetime.datetime] = None
+    # host:pid of the process running the job and when it last saved its progress
+    owner: Optional[str] = None
+    updated: Optional[datetime.datetime] = None
+
+
 class UnEnrichAlertRequestBody(BaseModel):
     enrichments: list[str]
     fingerprint: str
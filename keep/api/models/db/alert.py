@@ -4,7 +4,13 @@ from typing import List
 from uuid import UUID, uuid4
 
 from pydantic import PrivateAttr
-from sqlalchemy import ForeignKey, ForeignKeyConstraint, UniqueConstraint
+from sqlalchemy import (
+    ForeignKey,
+    ForeignKeyConstraint,
+    UniqueConstraint,
+    event,
+    inspect,
+)
 from sqlalchemy_utils import UUIDType
 from sqlmodel import JSON, TEXT, Column, Field, Index, Relationship, SQLModel
 
@@ -128,6 +134,10 @@ class Alert(SQLModel, table=True):
     #            alert can be different but have the same fingerprint (e.g. different "firing" and "resolved" will have the same fingerprint but not the same alert_hash)
     alert_hash: str | None
 
+    # set when the history is compacted (see alert_history): event only holds the fields
+    #            differing from the AlertPayload with this payload_hash
+    payload_hash: str | None = Field(default=None)
+
     # Define a one-to-one relationship to AlertEnrichment using alert_fingerprint
     alert_enrichment: "AlertEnrichment" = Relationship(
         sa_relationship_kwargs={
@@ -170,12 +180,25 @@ class Alert(SQLModel, table=True):
             "tenant_id",
             "provider_id",
         ),
+        # the retention looks up the alerts still referencing a payload
+        Index("ix_alert_tenant_payload_hash", "tenant_id", "payload_hash"),
     )
 
     class Config:
         arbitrary_types_allowed = True
 
 
+class AlertPayload(SQLModel, table=True):
+    """
+    Event the compacted occurrences of an alert are stored as a delta of, addressed by
+    the hash of its content.
+    """
+
+    tenant_id: str = Field(foreign_key="tenant.id", primary_key=True)
+    payload_hash: str = Field(primary_key=True)
+    event: dict = Field(sa_column=Column(JSON))
+
+
 class AlertEnrichment(SQLModel, table=True):
     """
     TODO: we need to rename this table to EntityEnrichment since it's not only for alerts anymore.
@@ -202,6 +225,104 @@ class AlertEnrichment(SQLModel, table=True):
         arbitrary_types_allowed = True
 
 
+class AlertDismissalExpiry(SQLModel, table=True):
+    """
+    When the dismissal (dismissed + dismissUntil enrichments) of an alert expires.
+
+    Kept in sync with AlertEnrichment, so the dismissal expiry watcher only reads the
+    rows which are due instead of scanning the enrichments JSON.
+    """
+
+    tenant_id: str = Field(foreign_key="tenant.id", primary_key=True)
+    fingerprint: str = Field(primary_key=True)
+    expires_at: datetime = Field(nullable=False, index=True)
+
+
+DISMISS_UNTIL_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def get_dismissal_expires_at(enrichments: dict | None) -> datetime | None:
+    """
+    Get the (naive, UTC) time the dismissal expires at, None if the alert is not
+    dismissed or is dismissed forever.
+    """
+    if not enrichments:
+        return None
+    # depending on how it was written, dismissed may be a bool, 1 or a string
+    if enrichments.get("dismissed") not in (True, 1, "true", "True"):
+        return None
+    dismiss_until = enrichments.get("dismissUntil")
+    if not dismiss_until or dismiss_until == "forever":
+        return None
+    try:
+        return datetime.strptime(dismiss_until, DISMISS_UNTIL_FORMAT)
+    except (ValueError, TypeError):
+        logger.warning(
+            "Invalid dismissUntil timestamp, the dismissal will not expire",
+            extra={"dismiss_until": dismiss_until},
+        )
+        return None
+
+
+def sync_dismissal_expiries(
+    connection, tenant_id: str, enrichments_by_fingerprint: dict[str, dict | None]
+):
+    """
+    Set (or clear) the dismissal expiry of the given fingerprints from their enrichments.
+
+    Takes a connection so it can run both inside a flush and next to Core UPDATEs.
+    """
+    if not enrichments_by_fingerprint:
+        return
+    table = AlertDismissalExpiry.__table__
+    connection.execute(
+        table.delete().where(
+            table.c.tenant_id == tenant_id,
+            table.c.fingerprint.in_(list(enrichments_by_fingerprint)),
+        )
+    )
+    rows = []
+    for fingerprint, enrichments in enrichments_by_fingerprint.items():
+        expires_at = get_dismissal_expires_at(enrichments)
+        if expires_at:
+            rows.append(
+                {
+                    "tenant_id": tenant_id,
+                    "fingerprint": fingerprint,
+                    "expires_at": expires_at,
+                }
+            )
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+@event.listens_for(AlertEnrichment, "after_insert")
+def set_dismissal_expiry_on_insert(mapper, connection, target):
+    if get_dismissal_expires_at(target.enrichments):
+        sync_dismissal_expiries(
+            connection,
+            target.tenant_id,
+            {target.alert_fingerprint: target.enrichments},
+        )
+
+
+@event.listens_for(AlertEnrichment, "after_update")
+def set_dismissal_expiry_on_update(mapper, connection, target):
+    if inspect(target).attrs.enrichments.history.has_changes():
+        sync_dismissal_expiries(
+            connection,
+            target.tenant_id,
+            {target.alert_fingerprint: target.enrichments},
+        )
+
+
+@event.listens_for(AlertEnrichment, "after_delete")
+def clear_dismissal_expiry_on_delete(mapper, connection, target):
+    sync_dismissal_expiries(
+        connection, target.tenant_id, {target.alert_fingerprint: None}
+    )
+
+
 class AlertDeduplicationRule(SQLModel, table=True):
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     tenant_id: str = Field(foreign_key="tenant.id")
@@ -262,6 +383,11 @@ class AlertDeduplicationEvent(SQLModel, table=True):
             "provider_type",
             "date_hour",
         ),
+        Index(
+            "ix_alert_deduplication_event_tenant_id_timestamp",
+            "tenant_id",
+            "timestamp",
+        ),
     )
 
     class Config:
@@ -0,0 +1,99 @@
+"""add alertdismissalexpiry
+
+Revision ID: 3f1c2b7d9e4a
+Revises: 9dd1be4539e0
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from datetime import datetime
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f1c2b7d9e4a"
+down_revision = "9dd1be4539e0"
+branch_labels = None
+depends_on = None
+
+
+def _get_dismissal_expires_at(enrichments: dict | None) -> datetime | None:
+    # a frozen copy of keep.api.models.db.alert.get_dismissal_expires_at
+    if not enrichments:
+        return None
+    if enrichments.get("dismissed") not in (True, 1, "true", "True"):
+        return None
+    dismiss_until = enrichments.get("dismissUntil")
+    if not dismiss_until or dismiss_until == "forever":
+        return None
+    try:
+        return datetime.strptime(dismiss_until, "%Y-%m-%dT%H:%M:%S.%fZ")
+    except (ValueError, TypeError):
+        return None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "alertdismissalexpiry",
+        sa.Column("tenant_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("fingerprint", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["tenant_id"],
+            ["tenant.id"],
+        ),
+        sa.PrimaryKeyConstraint("tenant_id", "fingerprint"),
+    )
+    with op.batch_alter_table("alertdismissalexpiry", schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f("ix_alertdismissalexpiry_expires_at"),
+            ["expires_at"],
+            unique=False,
+        )
+
+    # backfill from the enrichments of the currently dismissed alerts
+    alert_enrichment = sa.table(
+        "alertenrichment",
+        sa.column("tenant_id", sa.String),
+        sa.column("alert_fingerprint", sa.String),
+        sa.column("enrichments", sa.JSON),
+    )
+    connection = op.get_bind()
+    rows = []
+    for tenant_id, fingerprint, enrichments in connection.execute(
+        sa.select(
+            alert_enrichment.c.tenant_id,
+            alert_enrichment.c.alert_fingerprint,
+            alert_enrichment.c.enrichments,
+        ).where(
+            sa.cast(alert_enrichment.c.enrichments, sa.Text).like("%dismissUntil%")
+        )
+    ):
+        expires_at = _get_dismissal_expires_at(enrichments)
+        if expires_at:
+            rows.append(
+                {
+                    "tenant_id": tenant_id,
+                    "fingerprint": fingerprint,
+                    "expires_at": expires_at,
+                }
+            )
+    if rows:
+        op.bulk_insert(
+            sa.table(
+                "alertdismissalexpiry",
+                sa.column("tenant_id", sa.String),
+                sa.column("fingerprint", sa.String),
+                sa.column("expires_at", sa.DateTime),
+            ),
+            rows,
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("alertdismissalexpiry", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_alertdismissalexpiry_expires_at"))
+
+    op.drop_table("alertdismissalexpiry")
@@ -0,0 +1,31 @@
+"""add cacheversion
+
+Revision ID: 7a4e2c9b1d53
+Revises: 3f1c2b7d9e4a
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7a4e2c9b1d53"
+down_revision = "3f1c2b7d9e4a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cacheversion",
+        sa.Column("tenant_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("entity", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("tenant_id", "entity"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cacheversion")
@@ -0,0 +1,64 @@
+"""add statsrollup
+
+Revision ID: 5d8b3a6f2c11
+Revises: 7a4e2c9b1d53
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+from sqlmodel import Session
+
+from keep.api.core.stats_rollups import (
+    STATS_ROLLUPS_MIGRATION_BACKFILL_HOURS,
+    SUPPORTED_DIALECTS,
+    backfill_stats_rollups,
+)
+
+# revision identifiers, used by Alembic.
+revision = "5d8b3a6f2c11"
+down_revision = "7a4e2c9b1d53"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "statsrollup",
+        sa.Column("tenant_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "metric", sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False
+        ),
+        sa.Column("hour", sa.DateTime(), nullable=False),
+        sa.Column(
+            "dimensions", sqlmodel.sql.sqltypes.AutoString(length=400), nullable=False
+        ),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("last_seen", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["tenant_id"],
+            ["tenant.id"],
+        ),
+        sa.PrimaryKeyConstraint("tenant_id", "metric", "hour", "dimensions"),
+    )
+
+    # the dashboards read from the rollups from now on, only the recent hours are
+    # backfilled here, `keep backfill-stats-rollups` backfills the older ones
+    if (
+        op.get_bind().dialect.name in SUPPORTED_DIALECTS
+        and STATS_ROLLUPS_MIGRATION_BACKFILL_HOURS > 0
+    ):
+        backfill_stats_rollups(
+            Session(op.get_bind()),
+            lower=datetime.utcnow()
+            - timedelta(hours=STATS_ROLLUPS_MIGRATION_BACKFILL_HOURS),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("statsrollup")
@@ -0,0 +1,43 @@
+"""add alertpayload and alert.payload_hash
+
+Revision ID: 8e2f4c7a9b30
+Revises: 5d8b3a6f2c11
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8e2f4c7a9b30"
+down_revision = "5d8b3a6f2c11"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "alertpayload",
+        sa.Column("tenant_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("payload_hash", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("event", sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["tenant_id"],
+            ["tenant.id"],
+        ),
+        sa.PrimaryKeyConstraint("tenant_id", "payload_hash"),
+    )
+    with op.batch_alter_table("alert", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "payload_hash", sqlmodel.sql.sqltypes.AutoString(), nullable=True
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("alert", schema=None) as batch_op:
+        batch_op.drop_column("payload_hash")
+    op.drop_table("alertpayload")
@@ -0,0 +1,45 @@
+"""add retention indexes
+
+Revision ID: b71d5e3a9c42
+Revises: 8e2f4c7a9b30
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b71d5e3a9c42"
+down_revision = "8e2f4c7a9b30"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_alert_tenant_payload_hash",
+        "alert",
+        ["tenant_id", "payload_hash"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_alert_deduplication_event_tenant_id_timestamp",
+        "alertdeduplicationevent",
+        ["tenant_id", "timestamp"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_workflowexecutionlog_timestamp",
+        "workflowexecutionlog",
+        ["timestamp"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_workflowexecutionlog_timestamp", table_name="workflowexecutionlog")
+    op.drop_index(
+        "ix_alert_deduplication_event_tenant_id_timestamp",
+        table_name="alertdeduplicationevent",
+    )
+    op.drop_index("ix_alert_tenant_payload_hash", table_name="alert")
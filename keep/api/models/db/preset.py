@@ -89,6 +89,9 @@ class PresetDto(BaseModel, extra="ignore"):
     should_do_noise_now: Optional[bool] = Field(default=False)
     """Meaning is_noisy + at least one alert is doing noise"""
 
+    alerts_count: Optional[int] = Field(default=None)
+    """Number of alerts matching the preset, set by SearchEngine.search_preset_alerts"""
+
     # static presets
     static: Optional[bool] = Field(default=False)
     tags: List[TagDto] = []
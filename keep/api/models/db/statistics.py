@@ -1,9 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import Column
 from sqlmodel import Field, SQLModel
 
+from keep.api.models.db.helpers import DATETIME_COLUMN_TYPE
+
 
 class PMIMatrix(SQLModel, table=True):
     tenant_id: str = Field(foreign_key="tenant.id")
     fingerprint_i: str = Field(primary_key=True)
     fingerprint_j: str = Field(primary_key=True)
     pmi: float
-    
\ No newline at end of file
+
+
+class StatsRollup(SQLModel, table=True):
+    """
+    Hourly pre-aggregate of a dashboard metric (see stats_rollups), one row per
+    (tenant, metric, hour, dimensions).
+    """
+
+    tenant_id: str = Field(foreign_key="tenant.id", primary_key=True)
+    metric: str = Field(primary_key=True, max_length=32)
+    # start of the hour, UTC
+    hour: datetime = Field(
+        sa_column=Column(DATETIME_COLUMN_TYPE, primary_key=True, nullable=False)
+    )
+    # JSON list of the dimension values, e.g. ["provider-id", "provider-type"]
+    dimensions: str = Field(primary_key=True, max_length=400, default="[]")
+    count: int = Field(default=0)
+    # sum of the measured values, e.g. the resolution hours of the resolved incidents
+    total: float = Field(default=0)
+    last_seen: datetime | None = Field(
+        default=None, sa_column=Column(DATETIME_COLUMN_TYPE, nullable=True)
+    )
@@ -6,3 +6,15 @@ class System(SQLModel, table=True):
     id: str = Field(primary_key=True)
     name: str
     value: str
+
+
+class CacheVersion(SQLModel, table=True):
+    """
+    Version counter of the in-process caches of an entity, bumped whenever the entity
+    changes so every process can tell its cached copy is stale (see cache_invalidation).
+    """
+
+    # "*" for changes concerning every tenant
+    tenant_id: str = Field(primary_key=True)
+    entity: str = Field(primary_key=True)
+    version: int = Field(default=0)
@@ -195,6 +195,8 @@ class WorkflowToIncidentExecution(SQLModel, table=True):
 
 
 class WorkflowExecutionLog(SQLModel, table=True):
+    __table_args__ = (Index("ix_workflowexecutionlog_timestamp", "timestamp"),)
+
     id: int = Field(default=None, primary_key=True)
     workflow_execution_id: str = Field(foreign_key="workflowexecution.id")
     timestamp: datetime
@@ -5,9 +5,17 @@ This module provides a centralized way to configure Redis connections,
 supporting both direct Redis and Redis Sentinel configurations.
 """
 
+import threading
+
+import redis
 from arq.connections import RedisSettings
+from redis.sentinel import Sentinel, SentinelManagedSSLConnection
+
 from keep.api.core.config import config
 
+_redis_client = None
+_redis_client_lock = threading.Lock()
+
 
 def get_redis_settings() -> RedisSettings:
     """
@@ -65,3 +73,39 @@ def get_redis_settings() -> RedisSettings:
             conn_retries=10,
             conn_retry_delay=10,
         )
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Get a synchronous Redis client, shared by the process, for the same Redis the ARQ pool uses.
+
+    Returns:
+        redis.Redis: The Redis client (the sentinel master when sentinel is enabled)
+    """
+    global _redis_client
+    if _redis_client is None:
+        with _redis_client_lock:
+            if _redis_client is None:
+                settings = get_redis_settings()
+                connection_kwargs = {
+                    "username": settings.username,
+                    "password": settings.password,
+                    "socket_connect_timeout": 5,
+                    "socket_timeout": 5,
+                }
+                if settings.sentinel:
+                    if settings.ssl:
+                        connection_kwargs["connection_class"] = (
+                            SentinelManagedSSLConnection
+                        )
+                    _redis_client = Sentinel(settings.host).master_for(
+                        settings.sentinel_master, **connection_kwargs
+                    )
+                else:
+                    _redis_client = redis.Redis(
+                        host=settings.host,
+                        port=settings.port,
+                        ssl=settings.ssl,
+                        **connection_kwargs,
+                    )
+    return _redis_client
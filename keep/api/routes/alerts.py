@@ -15,10 +15,13 @@ from arq import ArqRedis
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
 from pusher import Pusher
-from sqlalchemy_utils import UUIDType
 from sqlmodel import Session
 
 from keep.api.arq_pool import get_pool
+from keep.api.bl.batch_enrichment_bl import (
+    BatchEnrichmentBl,
+    get_batch_enrich_job_store,
+)
 from keep.api.bl.enrichments_bl import EnrichmentsBl
 from keep.api.consts import KEEP_ARQ_QUEUE_BASIC
 from keep.api.core.alerts import (
@@ -34,17 +37,14 @@ from keep.api.core.db import enrich_alerts_with_incidents
 from keep.api.core.db import get_alert_audit as get_alert_audit_db
 from keep.api.core.db import (
     get_alerts_by_fingerprint,
-    get_alerts_by_ids,
     get_alerts_metrics_by_provider,
     get_enrichment,
 )
 from keep.api.core.db import get_error_alerts as get_error_alerts_db
 from keep.api.core.db import (
     get_last_alerts,
-    get_last_alerts_by_fingerprints,
     get_provider_by_name,
     get_session,
-    is_all_alerts_resolved,
 )
 from keep.api.core.dependencies import extract_generic_body, get_pusher_client
 from keep.api.core.elastic import ElasticClient
@@ -55,6 +55,8 @@ from keep.api.models.alert import (
     AlertErrorDto,
     AlertStatus,
     BatchEnrichAlertRequestBody,
+    BatchEnrichJobDto,
+    BatchEnrichJobStatus,
     DeleteRequestBody,
     DismissAlertRequest,
     EnrichAlertNoteRequestBody,
@@ -62,8 +64,6 @@ from keep.api.models.alert import (
     UnEnrichAlertRequestBody,
 )
 from keep.api.models.alert_audit import AlertAuditDto
-from keep.api.models.db.incident import IncidentStatus
-from keep.api.models.db.rule import ResolveOn
 from keep.api.models.facet import FacetOptionsQueryDto
 from keep.api.models.query import QueryDto
 from keep.api.models.search_alert import SearchAlertsRequest
@@ -815,6 +815,10 @@ def batch_enrich_alerts(
     dispose_on_new_alert: Optional[bool] = Query(
         False, description="Dispose on new alert"
     ),
+    background: Optional[bool] = Query(
+        False,
+        description="Enrich in the background and return a job id, see GET /alerts/batch_enrich/{job_id}",
+    ),
     session: Session = Depends(get_session),
 ):
     tenant_id = authenticated_entity.tenant_id
@@ -841,6 +845,10 @@ def batch_enrich_alerts(
             status_code=400, detail="Either fingerprints or cel can be provided at once"
         )
 
+    batch_enrichment_bl = BatchEnrichmentBl(
+        tenant_id, authenticated_entity, session=session
+    )
+
     # If CEL is provided, use it to find matching alerts
     if enrich_data.cel:
         logger.info(
@@ -852,12 +860,9 @@ def batch_enrich_alerts(
         )
 
         try:
-            db_alerts, total_count = query_last_alerts(
-                tenant_id=tenant_id,
-                query=QueryDto(cel=enrich_data.cel),
-            )
+            fingerprints = batch_enrichment_bl.select_fingerprints(enrich_data.cel)
 
-            if not db_alerts:
+            if not fingerprints:
                 logger.info(
                     "No alerts found matching the CEL query",
                     extra={"cel": enrich_data.cel, "tenant_id": tenant_id},
@@ -867,13 +872,12 @@ def batch_enrich_alerts(
                     "message": "No alerts matched the query",
                 }
 
-            fingerprints = [alert.fingerprint for alert in db_alerts]
             logger.info(
                 "Found alerts matching CEL query",
                 extra={
                     "cel": enrich_data.cel,
                     "tenant_id": tenant_id,
-                    "alert_count": total_count,
+                    "alert_count": len(fingerprints),
                 },
             )
         except CelToSqlException as e:
@@ -889,124 +893,47 @@ def batch_enrich_alerts(
             return {"status": "failed", "message": str(e)}
     else:
         # Use the provided fingerprints
-        fingerprints = enrich_data.fingerprints
+        fingerprints = list(dict.fromkeys(enrich_data.fingerprints))
         logger.info(
             "Enriching alerts batch",
             extra={
-                "fingerprints": fingerprints,
+                "alert_count": len(fingerprints),
                 "tenant_id": tenant_id,
             },
         )
 
-    # Common enrichment processing
-    try:
-        enrichment_bl = EnrichmentsBl(tenant_id, db=session)
-        (
-            action_type,
-            action_description,
-            should_run_workflow,
-            should_check_incidents_resolution,
-        ) = enrichment_bl.get_enrichment_metadata(
-            enrich_data.enrichments, authenticated_entity
+    if background:
+        # the job opens a session of its own, the request's is closed with it
+        job = BatchEnrichmentBl(tenant_id, authenticated_entity).start_job(
+            fingerprints, deepcopy(enrich_data.enrichments), dispose_on_new_alert
         )
-
-        enrichments = deepcopy(enrich_data.enrichments)
-
-        enrichment_bl.batch_enrich(
-            fingerprints=fingerprints,
-            enrichments=enrichments,
-            action_type=action_type,
-            action_callee=authenticated_entity.email,
-            action_description=action_description,
-            dispose_on_new_alert=dispose_on_new_alert,
-        )
-
-        last_alerts = get_last_alerts_by_fingerprints(
-            tenant_id, fingerprints, session=session
-        )
-        alert_ids = [last_alert.alert_id for last_alert in last_alerts]
-
-        if dispose_on_new_alert:
-            # Create instance-wide enrichment for history
-
-            # For better database-native UUID support
-            formatted_alert_ids = [
-                UUIDType(binary=False).process_bind_param(
-                    alert_id, session.bind.dialect
-                )
-                for alert_id in alert_ids
-            ]
-            enrichment_bl.batch_enrich(
-                fingerprints=formatted_alert_ids,
-                enrichments=enrichments,
-                action_type=action_type,
-                action_callee=authenticated_entity.email,
-                action_description=action_description,
-                audit_enabled=False,
-            )
-
-        alerts = get_alerts_by_ids(tenant_id, alert_ids, session=session)
-
-        enriched_alerts_dto = convert_db_alerts_to_dto_alerts(alerts, session=session)
-        # push the enriched alert to the elasticsearch
-        try:
-            logger.info("Pushing enriched alerts to elasticsearch")
-            elastic_client = ElasticClient(tenant_id)
-            elastic_client.index_alerts(
-                alerts=enriched_alerts_dto,
-            )
-            logger.info("Pushed enriched alerts to elasticsearch")
-        except Exception:
-            logger.exception("Failed to push alerts to elasticsearch")
-            pass
-
-        # use pusher to push the enriched alert to the client
-        pusher_client = get_pusher_client()
-        if pusher_client:
-            logger.info("Telling client to poll alerts")
-            try:
-                pusher_client.trigger(
-                    f"private-{tenant_id}",
-                    "poll-alerts",
-                    "{}",
-                )
-                logger.info("Told client to poll alerts")
-            except Exception:
-                logger.exception("Failed to tell client to poll alerts")
-                pass
-
-        logger.info(
-            "Alerts batch enriched successfully",
-            extra={"fingerprints": fingerprints, "tenant_id": tenant_id},
+        return JSONResponse(
+            content={"status": "accepted", "job_id": job.job_id}, status_code=202
         )
 
-        if should_run_workflow:
-            workflow_manager = WorkflowManager.get_instance()
-            workflow_manager.insert_events(
-                tenant_id=tenant_id,
-                events=enriched_alerts_dto,
-            )
+    job = batch_enrichment_bl.enrich(
+        fingerprints, deepcopy(enrich_data.enrichments), dispose_on_new_alert
+    )
+    if job.status == BatchEnrichJobStatus.FAILED:
+        return {"status": "failed"}
+    return {"status": "ok"}
 
-        # @tb add "and session" cuz I saw AttributeError: 'NoneType' object has no attribute 'add'"
-        if should_check_incidents_resolution and session:
-            enrich_alerts_with_incidents(tenant_id=tenant_id, alerts=alerts)
-            for alert in alerts:
-                for incident in alert._incidents:
-                    if (
-                        incident.resolve_on == ResolveOn.ALL.value
-                        and is_all_alerts_resolved(incident=incident, session=session)
-                    ):
-                        incident.status = IncidentStatus.RESOLVED.value
-                        session.add(incident)
-                    session.commit()
 
-        return {"status": "ok"}
-    except HTTPException:
-        # Re-raise HTTP exceptions
-        raise
-    except Exception as e:
-        logger.exception("Failed to enrich alerts batch", extra={"error": str(e)})
-        return {"status": "failed"}
+@router.get(
+    "/batch_enrich/{job_id}",
+    description="Get the progress of a batch enrichment started in the background",
+    response_model=BatchEnrichJobDto,
+)
+def get_batch_enrich_job(
+    job_id: str,
+    authenticated_entity: AuthenticatedEntity = Depends(
+        IdentityManagerFactory.get_auth_verifier(["read:alert"])
+    ),
+) -> BatchEnrichJobDto:
+    job = get_batch_enrich_job_store().get(authenticated_entity.tenant_id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch enrichment job not found")
+    return job
 
 
 @router.post(
@@ -3,6 +3,7 @@ from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session
 
+from keep.api.core.cache_invalidation import CacheEntity, publish_invalidation
 from keep.api.core.db import get_session
 from keep.api.models.db.maintenance_window import (
     MaintenanceRuleCreate,
@@ -54,6 +55,9 @@ def create_maintenance_rule(
     session.add(new_rule)
     session.commit()
     session.refresh(new_rule)
+    publish_invalidation(
+        CacheEntity.MAINTENANCE_WINDOWS, authenticated_entity.tenant_id
+    )
     return MaintenanceRuleRead(**new_rule.dict())
 
 
@@ -91,6 +95,9 @@ def update_maintenance_rule(
 
     session.commit()
     session.refresh(rule)
+    publish_invalidation(
+        CacheEntity.MAINTENANCE_WINDOWS, authenticated_entity.tenant_id
+    )
     return MaintenanceRuleRead(**rule.dict())
 
 
@@ -116,4 +123,7 @@ def delete_maintenance_rule(
         )
     session.delete(rule)
     session.commit()
+    publish_invalidation(
+        CacheEntity.MAINTENANCE_WINDOWS, authenticated_entity.tenant_id
+    )
     return {"detail": "Maintenance rule deleted successfully"}
@@ -1,6 +1,9 @@
 import logging
 import os
+import threading
+import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 
 from fastapi import (
@@ -14,7 +17,15 @@ from fastapi import (
 from pydantic import BaseModel
 from sqlmodel import Session, select
 
-from keep.api.consts import PROVIDER_PULL_INTERVAL_MINUTE, STATIC_PRESETS
+from keep.api.consts import (
+    PROVIDER_PULL_INTERVAL_MINUTE,
+    PROVIDER_PULL_MAX_CONCURRENT_PER_TYPE,
+    PROVIDER_PULL_MAX_WORKERS,
+    PROVIDER_PULL_PROCESS_BATCH_SIZE,
+    PROVIDER_PULL_TIMEOUT_SECONDS,
+    STATIC_PRESETS,
+)
+from keep.api.core.cache_invalidation import CacheEntity, publish_invalidation
 from keep.api.core.db import get_db_preset_by_name
 from keep.api.core.db import get_presets as get_presets_db
 from keep.api.core.db import (
@@ -22,6 +33,7 @@ from keep.api.core.db import (
     update_preset_options,
     update_provider_last_pull_time,
 )
+from keep.api.core.metrics import provider_pull_duration, provider_pulled_alerts_total
 from keep.api.models.alert import AlertDto
 from keep.api.models.db.preset import (
     Preset,
@@ -45,6 +57,183 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+# Limits the concurrent pulls of the same provider type across all tenants pulled by this process
+_provider_type_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_provider_type_semaphores_lock = threading.Lock()
+
+
+def _get_provider_type_semaphore(provider_type: str) -> threading.BoundedSemaphore:
+    with _provider_type_semaphores_lock:
+        if provider_type not in _provider_type_semaphores:
+            _provider_type_semaphores[provider_type] = threading.BoundedSemaphore(
+                PROVIDER_PULL_MAX_CONCURRENT_PER_TYPE
+            )
+        return _provider_type_semaphores[provider_type]
+
+
+def _should_pull_from_provider(provider, extra: dict) -> bool:
+    if not provider.pulling_enabled:
+        logger.debug("Pulling is disabled for this provider", extra=extra)
+        return False
+
+    if provider.last_pull_time is not None:
+        now = datetime.now()
+        minutes_passed = (now - provider.last_pull_time).total_seconds() / 60
+        if minutes_passed <= PROVIDER_PULL_INTERVAL_MINUTE:
+            logger.info(
+                "Skipping provider data pulling since not enough time has passed",
+                extra={
+                    **extra,
+                    "minutes_passed": minutes_passed,
+                    "provider_last_pull_time": str(provider.last_pull_time),
+                },
+            )
+            return False
+
+    return True
+
+
+def _process_pulled_alerts(
+    tenant_id: str,
+    trace_id: str,
+    provider,
+    sorted_provider_alerts_by_fingerprint: dict[str, list[AlertDto]],
+):
+    """
+    Streams the pulled alerts into process_event in batches of fingerprints instead of one call per fingerprint.
+    Alerts of the same fingerprint stay together and keep their lastReceived order.
+    """
+    batch = []
+    for alerts in sorted_provider_alerts_by_fingerprint.values():
+        batch.extend(alerts)
+        if len(batch) >= PROVIDER_PULL_PROCESS_BATCH_SIZE:
+            process_event(
+                {},
+                tenant_id,
+                provider.type,
+                provider.id,
+                None,
+                None,
+                trace_id,
+                batch,
+                notify_client=False,
+            )
+            batch = []
+    if batch:
+        process_event(
+            {},
+            tenant_id,
+            provider.type,
+            provider.id,
+            None,
+            None,
+            trace_id,
+            batch,
+            notify_client=False,
+        )
+
+
+def _pull_data_from_provider(tenant_id: str, trace_id: str, provider, extra: dict):
+    logger.info(
+        f"Pulling alerts from provider {provider.type} ({provider.id})",
+        extra=extra,
+    )
+    # Even if we failed at processing some event, lets save the last pull time to not iterate this process over and over again.
+    update_provider_last_pull_time(tenant_id=tenant_id, provider_id=provider.id)
+
+    provider_class = ProvidersFactory.get_installed_provider(
+        tenant_id=tenant_id,
+        provider_id=provider.id,
+        provider_type=provider.type,
+    )
+    sorted_provider_alerts_by_fingerprint = provider_class.get_alerts_by_fingerprint(
+        tenant_id=tenant_id
+    )
+    logger.info(
+        f"Pulling alerts from provider {provider.type} ({provider.id}) completed",
+        extra=extra,
+    )
+
+    # TODO: this should be moved somewhere else (@tb: too much logic in this function, wil handle it another time.)
+    if isinstance(provider_class, BaseIncidentProvider):
+        try:
+            incidents = provider_class.get_incidents()
+            process_incident(
+                {},
+                tenant_id=tenant_id,
+                provider_id=provider.id,
+                provider_type=provider.type,
+                incidents=incidents,
+                trace_id=trace_id,
+            )
+        except NotImplementedError:
+            logger.debug(
+                f"Provider {provider.type} ({provider.id}) does not implement pulling incidents",
+                extra=extra,
+            )
+        except Exception:
+            logger.exception(
+                f"Unknown error pulling incidents from provider {provider.type} ({provider.id})",
+                extra={**extra, "trace_id": trace_id},
+            )
+    else:
+        logger.debug(
+            f"Provider {provider.type} ({provider.id}) does not implement pulling incidents",
+            extra=extra,
+        )
+
+    try:
+        if isinstance(provider_class, BaseTopologyProvider):
+            logger.info("Pulling topology data", extra=extra)
+            topology_data, _ = provider_class.pull_topology()
+            logger.info(
+                "Pulling topology data finished, processing",
+                extra={**extra, "topology_length": len(topology_data)},
+            )
+            process_topology(tenant_id, topology_data, provider.id, provider.type)
+            logger.info("Finished processing topology data", extra=extra)
+    except NotImplementedError:
+        logger.debug(
+            f"Provider {provider.type} ({provider.id}) does not implement pulling topology data",
+            extra=extra,
+        )
+    except Exception as e:
+        logger.exception(
+            f"Unknown error pulling topology from provider {provider.type} ({provider.id})",
+            extra={**extra, "exception": str(e)},
+        )
+
+    provider_pulled_alerts_total.labels(provider_type=provider.type).inc(
+        sum(len(alerts) for alerts in sorted_provider_alerts_by_fingerprint.values())
+    )
+    _process_pulled_alerts(
+        tenant_id, trace_id, provider, sorted_provider_alerts_by_fingerprint
+    )
+
+
+def _pull_data_from_provider_with_limits(
+    tenant_id: str, trace_id: str, provider, extra: dict, pull_started_at: dict
+):
+    with _get_provider_type_semaphore(provider.type):
+        start_time = time.time()
+        pull_started_at[provider.id] = start_time
+        status = "success"
+        try:
+            _pull_data_from_provider(tenant_id, trace_id, provider, extra)
+        except Exception as e:
+            status = "error"
+            logger.exception(
+                f"Unknown error pulling from provider {provider.type} ({provider.id})",
+                extra={**extra, "exception": str(e)},
+            )
+        finally:
+            # unless the scheduler abandoned the pull and recorded it as timed out
+            if pull_started_at.pop(provider.id, None) is not None:
+                provider_pull_duration.labels(
+                    provider_type=provider.type, status=status
+                ).observe(time.time() - start_time)
+
+
 # SHAHAR: this function runs as background tasks as a seperate thread
 #         DO NOT ADD async HERE as it will run in the main thread and block the whole server
 def pull_data_from_providers(
@@ -55,6 +244,9 @@ def pull_data_from_providers(
     Pulls alerts from providers and record the to the DB.
 
     "Get or create logics".
+
+    Providers are pulled concurrently (KEEP_PULL_MAX_WORKERS), so a slow provider doesn't stall the others.
+    A pull that doesn't finish within KEEP_PULL_TIMEOUT_SECONDS is abandoned by the scheduler.
     """
     if os.environ.get("KEEP_PULL_DATA_ENABLED", "true") != "true":
         logger.debug("Pull data from providers is disabled")
@@ -73,6 +265,13 @@ def pull_data_from_providers(
         },
     )
 
+    executor = ThreadPoolExecutor(
+        max_workers=PROVIDER_PULL_MAX_WORKERS, thread_name_prefix="provider-pull"
+    )
+    pulls = {}
+    # provider id -> time the pull actually started (after waiting for a worker and the rate limit),
+    # until the pull or its timeout is recorded
+    pull_started_at = {}
     for provider in providers:
         extra = {
             "provider_type": provider.type,
@@ -80,114 +279,43 @@ def pull_data_from_providers(
             "tenant_id": tenant_id,
             "trace_id": trace_id,
         }
-
-        if not provider.pulling_enabled:
-            logger.debug("Pulling is disabled for this provider", extra=extra)
+        if not _should_pull_from_provider(provider, extra):
             continue
-
-        if provider.last_pull_time is not None:
-            now = datetime.now()
-            minutes_passed = (now - provider.last_pull_time).total_seconds() / 60
-            if minutes_passed <= PROVIDER_PULL_INTERVAL_MINUTE:
-                logger.info(
-                    "Skipping provider data pulling since not enough time has passed",
-                    extra={
-                        **extra,
-                        "minutes_passed": minutes_passed,
-                        "provider_last_pull_time": str(provider.last_pull_time),
-                    },
-                )
-                continue
-
-        try:
-            logger.info(
-                f"Pulling alerts from provider {provider.type} ({provider.id})",
-                extra=extra,
-            )
-            # Even if we failed at processing some event, lets save the last pull time to not iterate this process over and over again.
-            update_provider_last_pull_time(tenant_id=tenant_id, provider_id=provider.id)
-
-            provider_class = ProvidersFactory.get_installed_provider(
-                tenant_id=tenant_id,
-                provider_id=provider.id,
-                provider_type=provider.type,
-            )
-            sorted_provider_alerts_by_fingerprint = (
-                provider_class.get_alerts_by_fingerprint(tenant_id=tenant_id)
-            )
-            logger.info(
-                f"Pulling alerts from provider {provider.type} ({provider.id}) completed",
-                extra=extra,
-            )
-
-            # TODO: this should be moved somewhere else (@tb: too much logic in this function, wil handle it another time.)
-            if isinstance(provider_class, BaseIncidentProvider):
-                try:
-                    incidents = provider_class.get_incidents()
-                    process_incident(
-                        {},
-                        tenant_id=tenant_id,
-                        provider_id=provider.id,
-                        provider_type=provider.type,
-                        incidents=incidents,
-                        trace_id=trace_id,
-                    )
-                except NotImplementedError:
-                    logger.debug(
-                        f"Provider {provider.type} ({provider.id}) does not implement pulling incidents",
-                        extra=extra,
-                    )
-                except Exception:
-                    logger.exception(
-                        f"Unknown error pulling incidents from provider {provider.type} ({provider.id})",
-                        extra={**extra, "trace_id": trace_id},
-                    )
-            else:
-                logger.debug(
-                    f"Provider {provider.type} ({provider.id}) does not implement pulling incidents",
-                    extra=extra,
-                )
-
-            try:
-                if isinstance(provider_class, BaseTopologyProvider):
-                    logger.info("Pulling topology data", extra=extra)
-                    topology_data, _ = provider_class.pull_topology()
-                    logger.info(
-                        "Pulling topology data finished, processing",
-                        extra={**extra, "topology_length": len(topology_data)},
-                    )
-                    process_topology(
-                        tenant_id, topology_data, provider.id, provider.type
+        future = executor.submit(
+            _pull_data_from_provider_with_limits,
+            tenant_id,
+            trace_id,
+            provider,
+            extra,
+            pull_started_at,
+        )
+        pulls[future] = (provider, extra)
+
+    try:
+        pending = set(pulls)
+        while pending:
+            _, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            for future in list(pending):
+                provider, extra = pulls[future]
+                started_at = pull_started_at.get(provider.id)
+                if (
+                    started_at is not None
+                    and time.time() - started_at > PROVIDER_PULL_TIMEOUT_SECONDS
+                    # the pull may finish meanwhile, recorded by whoever pops it
+                    and pull_started_at.pop(provider.id, None) is not None
+                ):
+                    logger.error(
+                        f"Pulling from provider {provider.type} ({provider.id}) timed out",
+                        extra={**extra, "timeout": PROVIDER_PULL_TIMEOUT_SECONDS},
                     )
-                    logger.info("Finished processing topology data", extra=extra)
-            except NotImplementedError:
-                logger.debug(
-                    f"Provider {provider.type} ({provider.id}) does not implement pulling topology data",
-                    extra=extra,
-                )
-            except Exception as e:
-                logger.exception(
-                    f"Unknown error pulling topology from provider {provider.type} ({provider.id})",
-                    extra={**extra, "exception": str(e)},
-                )
-
-            for fingerprint, alert in sorted_provider_alerts_by_fingerprint.items():
-                process_event(
-                    {},
-                    tenant_id,
-                    provider.type,
-                    provider.id,
-                    fingerprint,
-                    None,
-                    trace_id,
-                    alert,
-                    notify_client=False,
-                )
-        except Exception as e:
-            logger.exception(
-                f"Unknown error pulling from provider {provider.type} ({provider.id})",
-                extra={**extra, "exception": str(e)},
-            )
+                    provider_pull_duration.labels(
+                        provider_type=provider.type, status="timeout"
+                    ).observe(time.time() - started_at)
+                    pending.discard(future)
+    finally:
+        # timed out pulls can't be interrupted, don't wait for them
+        executor.shutdown(wait=False, cancel_futures=True)
+
     logger.info(
         "Pulling data from providers completed",
         extra={
@@ -311,6 +439,7 @@ def create_preset(
     session.commit()
     session.refresh(preset)
     logger.info("Created preset")
+    publish_invalidation(CacheEntity.PRESETS, tenant_id)
     return PresetDto(**preset.to_dict())
 
 
@@ -341,6 +470,7 @@ def delete_preset(
     session.delete(preset)
     session.commit()
     logger.info("Deleted preset", extra={"uuid": preset_id})
+    publish_invalidation(CacheEntity.PRESETS, tenant_id)
     return {}
 
 
@@ -415,6 +545,7 @@ def update_preset(
     session.commit()
     session.refresh(preset)
     logger.info("Updated preset", extra={"uuid": preset_id})
+    publish_invalidation(CacheEntity.PRESETS, tenant_id)
     return PresetDto(**preset.to_dict())
 
 
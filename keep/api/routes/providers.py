@@ -13,6 +13,7 @@ from sqlmodel import Session, select
 from sqlalchemy.exc import NoResultFound
 from starlette.datastructures import UploadFile
 
+from keep.api.core.cache_invalidation import CacheEntity, publish_invalidation
 from keep.api.core.config import config
 from keep.api.core.db import count_alerts, get_provider_distribution, get_session
 from keep.api.core.limiter import limiter
@@ -376,6 +377,7 @@ def delete_provider(
     tenant_id = authenticated_entity.tenant_id
     try:
         ProvidersService.delete_provider(tenant_id, provider_id, session)
+        publish_invalidation(CacheEntity.PROVIDERS, tenant_id)
         return JSONResponse(status_code=200, content={"message": "deleted"})
     except HTTPException as e:
         return JSONResponse(status_code=e.status_code, content={"message": e.detail})
@@ -459,6 +461,7 @@ async def update_provider(
         result = ProvidersService.update_provider(
             tenant_id, provider_id, provider_info, updated_by, session
         )
+        publish_invalidation(CacheEntity.PROVIDERS, tenant_id)
         return JSONResponse(status_code=200, content=result)
     except HTTPException as e:
         return JSONResponse(status_code=e.status_code, content={"message": e.detail})
@@ -510,6 +513,7 @@ async def install_provider(
             provider_info,
             pulling_enabled=pulling_enabled,
         )
+        publish_invalidation(CacheEntity.PROVIDERS, tenant_id)
         return JSONResponse(status_code=200, content=result)
     except HTTPException as e:
         if e.status_code == 412:
@@ -603,6 +607,7 @@ async def install_provider_oauth2(
                 provider_type, provider.id, authenticated_entity, session
             )
 
+        publish_invalidation(CacheEntity.PROVIDERS, tenant_id)
         return JSONResponse(
             status_code=200,
             content={
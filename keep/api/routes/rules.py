@@ -3,6 +3,7 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 
+from keep.api.core.cache_invalidation import CacheEntity, publish_invalidation
 from keep.api.core.cel_to_sql.cel_ast_converter import CelToAstConverter
 from keep.api.core.db import create_rule as create_rule_db
 from keep.api.core.db import delete_rule as delete_rule_db
@@ -149,6 +150,7 @@ async def create_rule(
         assignee=assignee,
     )
     logger.info("Rule created")
+    publish_invalidation(CacheEntity.RULES, tenant_id)
     return rule
 
 
@@ -167,6 +169,7 @@ async def delete_rule(
     logger.info(f"Deleting rule {rule_id}")
     if delete_rule_db(tenant_id=tenant_id, rule_id=rule_id):
         logger.info(f"Rule {rule_id} deleted")
+        publish_invalidation(CacheEntity.RULES, tenant_id)
         return {"message": "Rule deleted"}
     else:
         logger.info(f"Rule {rule_id} not found")
@@ -265,6 +268,7 @@ async def update_rule(
 
     if rule:
         logger.info(f"Rule {rule_id} updated")
+        publish_invalidation(CacheEntity.RULES, tenant_id)
         return rule
     else:
         logger.info(f"Rule {rule_id} not found")
@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile
 from fastapi.responses import JSONResponse
 from sqlmodel import Session
 
+from keep.api.core.cache_invalidation import CacheEntity, publish_invalidation
 from keep.api.core.db import get_session, get_session_sync
 from keep.api.models.db.topology import (
     TopologyApplicationDtoIn,
@@ -96,9 +97,11 @@ def create_application(
     tenant_id = authenticated_entity.tenant_id
     logger.info("Creating application", extra={tenant_id: tenant_id})
     try:
-        return TopologiesService.create_application_by_tenant_id(
+        created_application = TopologiesService.create_application_by_tenant_id(
             tenant_id, application, session
         )
+        publish_invalidation(CacheEntity.TOPOLOGY, tenant_id)
+        return created_application
     except InvalidApplicationDataException as e:
         raise HTTPException(status_code=400, detail=str(e))
     except ServiceNotFoundException as e:
@@ -124,9 +127,11 @@ def update_application(
         extra={"tenant_id": tenant_id, "application_id": str(application_id)},
     )
     try:
-        return TopologiesService.update_application_by_id(
+        updated_application = TopologiesService.update_application_by_id(
             tenant_id, application_id, application, session
         )
+        publish_invalidation(CacheEntity.TOPOLOGY, tenant_id)
+        return updated_application
     except ApplicationNotFoundException as e:
         raise HTTPException(status_code=404, detail=str(e))
     except InvalidApplicationDataException as e:
@@ -147,6 +152,7 @@ def delete_application(
     logger.info("Deleting application", extra={tenant_id: tenant_id})
     try:
         TopologiesService.delete_application_by_id(tenant_id, application_id, session)
+        publish_invalidation(CacheEntity.TOPOLOGY, tenant_id)
         return JSONResponse(
             status_code=200, content={"message": "Application deleted successfully"}
         )
@@ -277,6 +283,8 @@ def pull_topology_data(
                     extra={**extra, "error": str(e)},
                 )
 
+        # applications created above change the repositories used for enrichment
+        publish_invalidation(CacheEntity.TOPOLOGY, tenant_id)
         # Return the updated topology data
         return TopologiesService.get_all_topology_data(
             tenant_id, session, provider_ids=provider_ids
@@ -304,9 +312,11 @@ def create_service(
     Any services created by this endpoint will have manual set to True.
     """
     try:
-        return TopologiesService.create_service(
+        created_service = TopologiesService.create_service(
             service=service, tenant_id=authenticated_entity.tenant_id, session=session
         )
+        publish_invalidation(CacheEntity.TOPOLOGY, authenticated_entity.tenant_id)
+        return created_service
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to create service: {str(e)}"
@@ -322,9 +332,11 @@ def update_service(
     session: Session = Depends(get_session),
 ) -> TopologyService:
     try:
-        return TopologiesService.update_service(
+        updated_service = TopologiesService.update_service(
             service=service, tenant_id=authenticated_entity.tenant_id, session=session
         )
+        publish_invalidation(CacheEntity.TOPOLOGY, authenticated_entity.tenant_id)
+        return updated_service
 
     except ServiceNotManualException:
         raise HTTPException(
@@ -353,6 +365,7 @@ def delete_services(
             tenant_id=authenticated_entity.tenant_id,
             session=session,
         )
+        publish_invalidation(CacheEntity.TOPOLOGY, authenticated_entity.tenant_id)
         return JSONResponse(
             status_code=200, content={"message": "Services deleted successfully"}
         )
@@ -512,6 +525,7 @@ async def import_topology_yaml(
         topology_yaml = await file.read()
         topology_data: dict = cyaml.safe_load(topology_yaml)
         TopologiesService.import_to_db(topology_data, session, tenant_id)
+        publish_invalidation(CacheEntity.TOPOLOGY, tenant_id)
         return JSONResponse(
             status_code=200, content={"message": "Topology imported successfully"}
         )
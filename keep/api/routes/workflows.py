@@ -19,6 +19,7 @@ from fastapi.responses import RedirectResponse
 from opentelemetry import trace
 from sqlmodel import Session
 
+from keep.api.core.cache_invalidation import CacheEntity, publish_invalidation
 from keep.api.core.cel_to_sql.sql_providers.base import CelToSqlException
 from keep.api.core.config import config
 from keep.api.core.db import (
@@ -640,6 +641,7 @@ async def create_workflow(
             status_code=400,
             detail="Failed to upload workflow. Please contact us via Slack for help.",
         )
+    publish_invalidation(CacheEntity.WORKFLOWS, tenant_id)
     if workflow.revision == 1:
         return WorkflowCreateOrUpdateDTO(
             workflow_id=workflow.id, status="created", revision=workflow.revision
@@ -706,6 +708,7 @@ async def create_workflow_from_body(
             status_code=400,
             detail="Failed to upload workflow. Please contact us via Slack for help.",
         )
+    publish_invalidation(CacheEntity.WORKFLOWS, tenant_id)
     if workflow.revision == 1:
         return WorkflowCreateOrUpdateDTO(
             workflow_id=workflow.id, status="created", revision=workflow.revision
@@ -850,6 +853,7 @@ async def update_workflow_by_id(
         is_disabled=workflow_raw_data.get("disabled", False),
     )
     logger.info(f"Updated workflow {workflow_id}", extra={"tenant_id": tenant_id})
+    publish_invalidation(CacheEntity.WORKFLOWS, tenant_id)
     return WorkflowCreateOrUpdateDTO(
         workflow_id=workflow_id, revision=updated_workflow.revision, status="updated"
     )
@@ -1083,6 +1087,7 @@ def delete_workflow_by_id(
     tenant_id = authenticated_entity.tenant_id
     workflowstore = WorkflowStore()
     workflowstore.delete_workflow(workflow_id=workflow_id, tenant_id=tenant_id)
+    publish_invalidation(CacheEntity.WORKFLOWS, tenant_id)
     return {"workflow_id": workflow_id, "status": "deleted"}
 
 
@@ -1196,6 +1201,7 @@ def toggle_workflow_state(
         f"Workflow {workflow_id} {'disabled' if workflow.is_disabled else 'enabled'}",
         extra={"tenant_id": tenant_id},
     )
+    publish_invalidation(CacheEntity.WORKFLOWS, tenant_id)
 
     return {
         "workflow_id": workflow_id,
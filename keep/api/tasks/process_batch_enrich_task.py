@@ -0,0 +1,36 @@
+import asyncio
+import functools
+import logging
+from typing import Optional
+
+from keep.api.bl.batch_enrichment_bl import BatchEnrichmentBl
+from keep.identitymanager.authenticatedentity import AuthenticatedEntity
+
+logger = logging.getLogger(__name__)
+
+
+def process_batch_enrich(
+    tenant_id: str,
+    job_id: str,
+    email: str,
+    api_key_name: Optional[str],
+    fingerprints: list[str],
+    enrichments: dict,
+    dispose_on_new_alert: bool = False,
+):
+    logger.info(
+        "Running batch enrichment job",
+        extra={"tenant_id": tenant_id, "job_id": job_id},
+    )
+    BatchEnrichmentBl(
+        tenant_id,
+        AuthenticatedEntity(tenant_id, email, api_key_name=api_key_name),
+    ).run_job(job_id, fingerprints, enrichments, dispose_on_new_alert)
+
+
+async def async_batch_enrich(ctx, *args, **kwargs):
+    # in the worker's threadpool, the chunks' queries would block its event loop
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        ctx["pool"], functools.partial(process_batch_enrich, *args, **kwargs)
+    )
@@ -1,7 +1,6 @@
 # builtins
 import copy
 import datetime
-import json
 import logging
 import os
 import sys
@@ -22,6 +21,7 @@ from keep.api.bl.enrichments_bl import EnrichmentsBl
 from keep.api.bl.incidents_bl import IncidentBl
 from keep.api.bl.maintenance_windows_bl import MaintenanceWindowsBl
 from keep.api.consts import KEEP_CORRELATION_ENABLED, MAINTENANCE_WINDOW_ALERT_STRATEGY
+from keep.api.core.alert_activation_cache import alert_activation_cache
 from keep.api.core.db import (
     bulk_upsert_alert_fields,
     enrich_alerts_with_incidents,
@@ -33,20 +33,20 @@ from keep.api.core.db import (
     get_started_at_for_alerts,
     set_last_alert,
 )
-from keep.api.core.dependencies import get_pusher_client
 from keep.api.core.elastic import ElasticClient
+from keep.api.core.ingestion_profiler import observe_batch_size, profile_stage
 from keep.api.core.metrics import (
     events_error_counter,
     events_in_counter,
     events_out_counter,
     processing_time_summary,
 )
+from keep.api.core.notification_dispatcher import get_notification_dispatcher
 from keep.api.models.action_type import ActionType
 from keep.api.models.alert import AlertDto, AlertStatus
 from keep.api.models.db.alert import Alert, AlertAudit, AlertRaw
 from keep.api.models.db.incident import IncidentStatus
 from keep.api.models.incident import IncidentDto
-from keep.api.tasks.notification_cache import get_notification_cache
 from keep.api.utils.alert_utils import sanitize_alert
 from keep.api.utils.enrichment_helpers import (
     calculate_firing_time_since_last_resolved,
@@ -56,6 +56,7 @@ from keep.api.utils.enrichment_helpers import (
     calculated_unresolved_counter,
 )
 from keep.providers.providers_factory import ProvidersFactory
+from keep.rulesengine.batch_cel import AlertBatch
 from keep.rulesengine.rulesengine import RulesEngine
 from keep.workflowmanager.workflowmanager import WorkflowManager
 
@@ -393,9 +394,13 @@ def __handle_formatted_events(
         },
     )
 
+    observe_batch_size(tenant_id, len(formatted_events))
+
     # first, check for maintenance windows
     if KEEP_MAINTENANCE_WINDOWS_ENABLED:
-        with tracer.start_as_current_span("process_event_maintenance_windows_check"):
+        with profile_stage(
+            tracer, "process_event_maintenance_windows_check", tenant_id
+        ):
             maintenance_windows_bl = MaintenanceWindowsBl(
                 tenant_id=tenant_id, session=session
             )
@@ -421,7 +426,7 @@ def __handle_formatted_events(
                 )
                 return
 
-    with tracer.start_as_current_span("process_event_deduplication"):
+    with profile_stage(tracer, "process_event_deduplication", tenant_id):
         # second, filter out any deduplicated events
         alert_deduplicator = AlertDeduplicator(tenant_id)
         deduplication_rules = alert_deduplicator.get_deduplication_rules(
@@ -444,7 +449,7 @@ def __handle_formatted_events(
             filter(lambda event: not event.isFullDuplicate, formatted_events)
         )
 
-    with tracer.start_as_current_span("process_event_save_to_db"):
+    with profile_stage(tracer, "process_event_save_to_db", tenant_id):
         # save to db
         enriched_formatted_events = __save_to_db(
             tenant_id,
@@ -456,11 +461,15 @@ def __handle_formatted_events(
             provider_id,
             timestamp_forced,
         )
+        # the new occurrences supersede the cached activations of their fingerprints
+        alert_activation_cache.discard(
+            tenant_id, [event.fingerprint for event in enriched_formatted_events]
+        )
 
     # let's save all fields to the DB so that we can use them in the future such in deduplication fields suggestions
     # todo: also use it on correlation rules suggestions
     if KEEP_ALERT_FIELDS_ENABLED:
-        with tracer.start_as_current_span("process_event_bulk_upsert_alert_fields"):
+        with profile_stage(tracer, "process_event_bulk_upsert_alert_fields", tenant_id):
             for enriched_formatted_event in enriched_formatted_events:
                 logger.debug(
                     "Bulk upserting alert fields",
@@ -494,7 +503,7 @@ def __handle_formatted_events(
                 )
 
     # after the alert enriched and mapped, lets send it to the elasticsearch
-    with tracer.start_as_current_span("process_event_push_to_elasticsearch"):
+    with profile_stage(tracer, "process_event_push_to_elasticsearch", tenant_id):
         elastic_client = ElasticClient(tenant_id=tenant_id)
         if elastic_client.enabled:
             for alert in enriched_formatted_events:
@@ -535,7 +544,7 @@ def __handle_formatted_events(
             )
         )
 
-    with tracer.start_as_current_span("process_event_push_to_workflows"):
+    with profile_stage(tracer, "process_event_push_to_workflows", tenant_id):
         try:
             # Now run any workflow that should run based on this alert
             # TODO: this should publish event
@@ -556,7 +565,7 @@ def __handle_formatted_events(
             )
 
     incidents = []
-    with tracer.start_as_current_span("process_event_run_rules_engine"):
+    with profile_stage(tracer, "process_event_run_rules_engine", tenant_id):
         # Now we need to run the rules engine
         if KEEP_CORRELATION_ENABLED:
             try:
@@ -579,63 +588,45 @@ def __handle_formatted_events(
     if MAINTENANCE_WINDOW_ALERT_STRATEGY == "recover_previous_status":
         enriched_formatted_events.extend(ignored_events)
 
-    with tracer.start_as_current_span("process_event_notify_client"):
-        pusher_client = get_pusher_client() if notify_client else None
-        if not pusher_client:
+    with profile_stage(tracer, "process_event_notify_client", tenant_id):
+        notification_dispatcher = get_notification_dispatcher()
+        if not notify_client or not notification_dispatcher.enabled:
             return
-        # Get the notification cache
-        pusher_cache = get_notification_cache()
-
         # Tell the client to poll alerts
-        if pusher_cache.should_notify(tenant_id, "poll-alerts"):
-            try:
-                pusher_client.trigger(
-                    f"private-{tenant_id}",
-                    "poll-alerts",
-                    "{}",
-                )
-                logger.info("Told client to poll alerts")
-            except Exception:
-                logger.exception("Failed to tell client to poll alerts")
-                pass
+        notification_dispatcher.notify(tenant_id, "poll-alerts")
 
-        if incidents and pusher_cache.should_notify(tenant_id, "incident-change"):
-            try:
-                pusher_client.trigger(
-                    f"private-{tenant_id}",
-                    "incident-change",
-                    {},
-                )
-            except Exception:
-                logger.exception("Failed to tell the client to pull incidents")
+        if incidents:
+            notification_dispatcher.notify(tenant_id, "incident-change")
 
         # Now we need to update the presets
-        # send with pusher
-
         try:
             presets = get_all_presets_dtos(tenant_id)
             rules_engine = RulesEngine(tenant_id=tenant_id)
             presets_do_update = []
+            # built once for all the presets
+            events_activation = (
+                rules_engine.get_alerts_activation(enriched_formatted_events)
+                if presets
+                else []
+            )
+            events_batch = AlertBatch(events_activation)
             for preset_dto in presets:
                 # filter the alerts based on the search query
                 filtered_alerts = rules_engine.filter_alerts(
-                    enriched_formatted_events, preset_dto.cel_query
+                    enriched_formatted_events,
+                    preset_dto.cel_query,
+                    events_activation,
+                    events_batch,
                 )
                 # if not related alerts, no need to update
                 if not filtered_alerts:
                     continue
                 presets_do_update.append(preset_dto)
-            if pusher_cache.should_notify(tenant_id, "poll-presets"):
-                try:
-                    pusher_client.trigger(
-                        f"private-{tenant_id}",
-                        "poll-presets",
-                        json.dumps(
-                            [p.name.lower() for p in presets_do_update], default=str
-                        ),
-                    )
-                except Exception:
-                    logger.exception("Failed to send presets via pusher")
+            notification_dispatcher.notify(
+                tenant_id,
+                "poll-presets",
+                [p.name.lower() for p in presets_do_update],
+            )
         except Exception:
             logger.exception(
                 "Failed to send presets via pusher",
@@ -686,19 +677,19 @@ def process_event(
     raw_event = copy.deepcopy(event)
     events_in_counter.inc()
     try:
-        with tracer.start_as_current_span("process_event_get_db_session"):
+        with profile_stage(tracer, "process_event_get_db_session", tenant_id):
             # Create a session to be used across the processing task
             session = get_session_sync()
 
         # Pre alert formatting extraction rules
-        with tracer.start_as_current_span("process_event_pre_alert_formatting"):
+        with profile_stage(tracer, "process_event_pre_alert_formatting", tenant_id):
             enrichments_bl = EnrichmentsBl(tenant_id, session)
             try:
                 event = enrichments_bl.run_extraction_rules(event, pre=True)
             except Exception:
                 logger.exception("Failed to run pre-formatting extraction rules")
 
-        with tracer.start_as_current_span("process_event_provider_formatting"):
+        with profile_stage(tracer, "process_event_provider_formatting", tenant_id):
             if (
                 provider_type is not None
                 and isinstance(event, dict)
@@ -767,7 +758,7 @@ def process_event(
                 event = [event]
                 raw_event = [raw_event]
 
-            with tracer.start_as_current_span("process_event_internal_preparation"):
+            with profile_stage(tracer, "process_event_internal_preparation", tenant_id):
                 __internal_prepartion(event, fingerprint, api_key_name)
 
             formatted_events = __handle_formatted_events(
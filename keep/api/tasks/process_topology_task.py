@@ -1,13 +1,17 @@
-import copy
+import dataclasses
 import logging
+import time
 
-from sqlalchemy import and_
+from sqlalchemy import delete, insert, or_, select, update
+from sqlmodel import Session
 
+from keep.api.core.cache_invalidation import CacheEntity, publish_invalidation
 from keep.api.core.db import get_session_sync
-from keep.api.core.dependencies import get_pusher_client
+from keep.api.core.notification_dispatcher import get_notification_dispatcher
 from keep.api.models.db.topology import (
     TopologyApplicationDtoIn,
     TopologyService,
+    TopologyServiceApplication,
     TopologyServiceDependency,
     TopologyServiceDtoIn,
     TopologyServiceInDto,
@@ -19,12 +23,203 @@ logger = logging.getLogger(__name__)
 TIMES_TO_RETRY_JOB = 5  # the number of times to retry the job in case of failure
 
 
+# bound the number of parameters per statement (sqlite allows 32k, mssql 2k)
+TOPOLOGY_SYNC_CHUNK_SIZE = 1000
+
+
+@dataclasses.dataclass
+class TopologySyncStats:
+    services_inserted: int = 0
+    services_updated: int = 0
+    services_deleted: int = 0
+    dependencies_inserted: int = 0
+    dependencies_updated: int = 0
+    dependencies_deleted: int = 0
+    applications_synced: int = 0
+    duration_seconds: float = 0
+
+
+def _chunks(items: list, size: int = TOPOLOGY_SYNC_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _sync_services(
+    session: Session,
+    tenant_id: str,
+    provider_id: str,
+    topology_data: list[TopologyServiceInDto],
+    stats: TopologySyncStats,
+) -> dict[str, int]:
+    """
+    Diff the provider's services against the pulled ones, keyed by (service, environment),
+    so untouched services keep their ids (and their application links).
+
+    Returns:
+        dict[str, int]: service name -> service id
+    """
+    service_columns = [
+        column.name
+        for column in TopologyService.__table__.columns
+        if column.name not in ("id", "tenant_id", "source_provider_id", "updated_at")
+    ]
+    existing_services = {
+        (row.service, row.environment): row
+        for row in session.execute(
+            select(
+                TopologyService.id,
+                *[getattr(TopologyService, column) for column in service_columns],
+            ).where(
+                TopologyService.tenant_id == tenant_id,
+                TopologyService.source_provider_id == provider_id,
+            )
+        )
+    }
+
+    inserts, updates, pulled_keys = [], [], set()
+    for service in topology_data:
+        values = service.dict(exclude={"dependencies", "application_relations"})
+        values = {column: values.get(column) for column in service_columns}
+        key = (values["service"], values["environment"])
+        if key in pulled_keys:
+            # same service pulled twice, the first one wins
+            continue
+        pulled_keys.add(key)
+
+        existing = existing_services.get(key)
+        if existing is None:
+            inserts.append(
+                {**values, "tenant_id": tenant_id, "source_provider_id": provider_id}
+            )
+        elif any(values[column] != getattr(existing, column) for column in service_columns):
+            updates.append({**values, "id": existing.id})
+
+    deleted_ids = [
+        existing.id
+        for key, existing in existing_services.items()
+        if key not in pulled_keys
+    ]
+
+    for chunk in _chunks(deleted_ids):
+        session.execute(
+            delete(TopologyServiceDependency).where(
+                or_(
+                    TopologyServiceDependency.service_id.in_(chunk),
+                    TopologyServiceDependency.depends_on_service_id.in_(chunk),
+                )
+            )
+        )
+        session.execute(
+            delete(TopologyServiceApplication).where(
+                TopologyServiceApplication.service_id.in_(chunk)
+            )
+        )
+        session.execute(delete(TopologyService).where(TopologyService.id.in_(chunk)))
+    for chunk in _chunks(updates):
+        # ORM bulk UPDATE by primary key (executemany)
+        session.execute(update(TopologyService), chunk)
+    for chunk in _chunks(inserts):
+        session.execute(insert(TopologyService), chunk)
+
+    stats.services_inserted = len(inserts)
+    stats.services_updated = len(updates)
+    stats.services_deleted = len(deleted_ids)
+
+    # a single round trip for the ids, instead of RETURNING which mysql lacks
+    service_ids = {}
+    for service_id, service_name, environment in session.execute(
+        select(
+            TopologyService.id, TopologyService.service, TopologyService.environment
+        ).where(
+            TopologyService.tenant_id == tenant_id,
+            TopologyService.source_provider_id == provider_id,
+        )
+    ):
+        if (service_name, environment) in pulled_keys:
+            service_ids[service_name] = service_id
+    return service_ids
+
+
+def _sync_dependencies(
+    session: Session,
+    topology_data: list[TopologyServiceInDto],
+    service_ids: dict[str, int],
+    stats: TopologySyncStats,
+):
+    pulled_dependencies = {}
+    for service in topology_data:
+        service_id = service_ids.get(service.service)
+        for dependency, protocol in service.dependencies.items():
+            depends_on_service_id = service_ids.get(dependency)
+            if not service_id or not depends_on_service_id:
+                logger.debug(
+                    "Found a dangling service, skipping",
+                    extra={"service": service.service, "dependency": dependency},
+                )
+                continue
+            pulled_dependencies[(service_id, depends_on_service_id)] = (
+                protocol or "unknown"
+            )
+
+    existing_dependencies = {}
+    for chunk in _chunks(list(set(service_ids.values()))):
+        for row in session.execute(
+            select(
+                TopologyServiceDependency.id,
+                TopologyServiceDependency.service_id,
+                TopologyServiceDependency.depends_on_service_id,
+                TopologyServiceDependency.protocol,
+            ).where(TopologyServiceDependency.service_id.in_(chunk))
+        ):
+            key = (row.service_id, row.depends_on_service_id)
+            if key in existing_dependencies:
+                # duplicates left over by older imports
+                existing_dependencies.setdefault(None, []).append(row.id)
+            else:
+                existing_dependencies[key] = row
+
+    duplicate_ids = existing_dependencies.pop(None, [])
+    deleted_ids = duplicate_ids + [
+        row.id
+        for key, row in existing_dependencies.items()
+        if key not in pulled_dependencies
+    ]
+    inserts, updates = [], []
+    for (service_id, depends_on_service_id), protocol in pulled_dependencies.items():
+        existing = existing_dependencies.get((service_id, depends_on_service_id))
+        if existing is None:
+            inserts.append(
+                {
+                    "service_id": service_id,
+                    "depends_on_service_id": depends_on_service_id,
+                    "protocol": protocol,
+                }
+            )
+        elif existing.protocol != protocol:
+            updates.append({"id": existing.id, "protocol": protocol})
+
+    for chunk in _chunks(deleted_ids):
+        session.execute(
+            delete(TopologyServiceDependency).where(
+                TopologyServiceDependency.id.in_(chunk)
+            )
+        )
+    for chunk in _chunks(updates):
+        session.execute(update(TopologyServiceDependency), chunk)
+    for chunk in _chunks(inserts):
+        session.execute(insert(TopologyServiceDependency), chunk)
+
+    stats.dependencies_inserted = len(inserts)
+    stats.dependencies_updated = len(updates)
+    stats.dependencies_deleted = len(deleted_ids)
+
+
 def process_topology(
     tenant_id: str,
     topology_data: list[TopologyServiceInDto],
     provider_id: str,
     provider_type: str,
-):
+) -> TopologySyncStats | None:
     extra = {"provider_id": provider_id, "tenant_id": tenant_id}
     if not topology_data:
         logger.info(
@@ -34,65 +229,32 @@ def process_topology(
         return
 
     logger.info("Processing topology data", extra=extra)
+    start_time = time.perf_counter()
+    stats = TopologySyncStats()
     session = get_session_sync()
 
     try:
-        logger.info(
-            "Deleting existing topology data",
-            extra=extra,
+        service_ids = _sync_services(
+            session, tenant_id, provider_id, topology_data, stats
         )
-
-        # delete dependencies
-        session.query(TopologyServiceDependency).filter(
-            TopologyServiceDependency.service.has(
-                and_(
-                    TopologyService.source_provider_id == provider_id,
-                    TopologyService.tenant_id == tenant_id,
-                )
-            )
-        ).delete(synchronize_session=False)
-
-        # delete services
-        session.query(TopologyService).filter(
-            TopologyService.source_provider_id == provider_id,
-            TopologyService.tenant_id == tenant_id,
-        ).delete()
-
+        _sync_dependencies(session, topology_data, service_ids, stats)
         session.commit()
-        logger.info(
-            "Deleted existing topology data",
-            extra=extra,
-        )
     except Exception:
+        session.rollback()
+        session.close()
         logger.exception(
-            "Failed to delete existing topology data",
+            "Failed to sync topology data",
             extra=extra,
         )
         raise
 
-    logger.info(
-        "Creating new topology data",
-        extra={"provider_id": provider_id, "tenant_id": tenant_id},
-    )
-    service_to_keep_service_id_map = {}
-    # First create the services so we have ids
-    for service in topology_data:
-        service_copy = copy.deepcopy(service.dict())
-        service_copy.pop("dependencies")
-        db_service = TopologyService(**service_copy, tenant_id=tenant_id)
-        session.add(db_service)
-        session.flush()
-        service_to_keep_service_id_map[service.service] = db_service.id
-
     application_to_services = {}
     application_to_name = {}
 
-    # Then create the dependencies
+    # Group all services by application
     for service in topology_data:
-
-        # Group all services by application (this is for processing application related data in the next step)
         if service.application_relations is not None:
-            service_id = service_to_keep_service_id_map.get(service.service)
+            service_id = service_ids.get(service.service)
             for application_id in service.application_relations:
 
                 application_to_name[application_id] = service.application_relations[
@@ -104,25 +266,6 @@ def process_topology(
                 else:
                     application_to_services[application_id].append(service_id)
 
-        for dependency in service.dependencies:
-            service_id = service_to_keep_service_id_map.get(service.service)
-            depends_on_service_id = service_to_keep_service_id_map.get(dependency)
-            if not service_id or not depends_on_service_id:
-                logger.debug(
-                    "Found a dangling service, skipping",
-                    extra={"service": service.service, "dependency": dependency},
-                )
-                continue
-            session.add(
-                TopologyServiceDependency(
-                    service_id=service_id,
-                    depends_on_service_id=depends_on_service_id,
-                    protocol=service.dependencies.get(dependency, "unknown"),
-                )
-            )
-
-    session.commit()
-
     # Now create or update the application
     for application_id in application_to_services:
         TopologiesService.create_or_update_application(
@@ -132,11 +275,13 @@ def process_topology(
                 name=application_to_name[application_id],
                 services=[
                     TopologyServiceDtoIn(id=service_id)
-                    for service_id in application_to_services[application_id]
+                    for service_id in set(application_to_services[application_id])
                 ],
             ),
             session=session,
         )
+    stats.applications_synced = len(application_to_services)
+    publish_invalidation(CacheEntity.TOPOLOGY, tenant_id)
 
     try:
         session.close()
@@ -146,21 +291,18 @@ def process_topology(
             extra={**extra, "error": str(e)},
         )
 
-    try:
-        pusher_client = get_pusher_client()
-        if pusher_client:
-            pusher_client.trigger(
-                f"private-{tenant_id}",
-                "topology-update",
-                {"providerId": provider_id, "providerType": provider_type},
-            )
-    except Exception:
-        logger.exception("Failed to push topology update to the client")
+    get_notification_dispatcher().notify(
+        tenant_id,
+        "topology-update",
+        {"providerId": provider_id, "providerType": provider_type},
+    )
 
+    stats.duration_seconds = time.perf_counter() - start_time
     logger.info(
-        "Created new topology data",
-        extra=extra,
+        "Synced topology data",
+        extra={**extra, **dataclasses.asdict(stats)},
     )
+    return stats
 
 
 async def async_process_topology(*args, **kwargs):
@@ -6,6 +6,8 @@ import redis
 from keep.api.bl.maintenance_windows_bl import MaintenanceWindowsBl
 from keep.api.bl.dismissal_expiry_bl import DismissalExpiryBl
 from keep.api.consts import REDIS, WATCHER_LAPSED_TIME
+from keep.api.core.alert_partitions import run_scheduled_partitions_check
+from keep.api.core.retention import run_scheduled_retention
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +34,16 @@ async def async_process_watcher(*args):
                 DismissalExpiryBl.check_dismissal_expiry,
                 logger
             )
+
+            # Run the retention, off-peak only
+            await loop.run_in_executor(
+                ctx.get("pool"), run_scheduled_retention, logger
+            )
+
+            # Create the future alert partitions
+            await loop.run_in_executor(
+                ctx.get("pool"), run_scheduled_partitions_check, logger
+            )
             
         except Exception as e:
             logger.error("Error in watcher process: %s", e, exc_info=True)
@@ -57,6 +69,14 @@ async def async_process_watcher(*args):
                         DismissalExpiryBl.check_dismissal_expiry,
                         logger
                     )
+
+                    # Run the retention, off-peak only
+                    await loop.run_in_executor(None, run_scheduled_retention, logger)
+
+                    # Create the future alert partitions
+                    await loop.run_in_executor(
+                        None, run_scheduled_partitions_check, logger
+                    )
                     
                     logger.info(f"Sleeping for {WATCHER_LAPSED_TIME} seconds before next run.")
                     complete_time = datetime.datetime.now()
@@ -5,6 +5,7 @@ from typing import Optional
 from opentelemetry import trace
 from sqlmodel import Session
 
+from keep.api.core.alert_history import expand_alert_payloads
 from keep.api.core.db import existed_or_new_session
 from keep.api.models.alert import (
     AlertDto,
@@ -195,6 +196,11 @@ def convert_db_alerts_to_dto_alerts(
     """
     with existed_or_new_session(session) as session:
         alerts_dto = []
+        # rebuild the events of the compacted history
+        expand_alert_payloads(
+            session,
+            [_object if isinstance(_object, Alert) else _object[0] for _object in alerts],
+        )
         with tracer.start_as_current_span("alerts_enrichment"):
             # enrich the alerts with the enrichment data
             for _object in alerts:
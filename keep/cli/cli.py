@@ -6,6 +6,7 @@ import sys
 import typing
 import uuid
 from collections import OrderedDict
+from datetime import datetime
 from importlib import metadata
 
 import click
@@ -15,7 +16,11 @@ from prettytable import PrettyTable
 
 from keep.api.core.posthog import posthog_client
 from keep.functions import cyaml
-from keep.providers.providers_factory import ProviderEncoder, ProvidersFactory
+from keep.providers.providers_factory import (
+    PROVIDERS_CACHE_FILE,
+    ProviderEncoder,
+    ProvidersFactory,
+)
 
 load_dotenv(find_dotenv())
 
@@ -139,6 +144,10 @@ class Info:
             or "config" in arguments
             or "version" in arguments
             or "build_cache" in arguments
+            or "backfill-stats-rollups" in arguments
+            or "compact-alert-history" in arguments
+            or "retention" in arguments
+            or "partition-alerts" in arguments
         ):
             return
 
@@ -352,6 +361,134 @@ def api(multi_tenant: bool, port: int, host: str):
     api.run(app)
 
 
+@cli.command(name="backfill-stats-rollups")
+@click.option("--tenant-id", type=str, help="Only backfill this tenant")
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    help="Start of the backfilled range (UTC), all the history by default",
+)
+@click.option(
+    "--until",
+    type=click.DateTime(),
+    help="End of the backfilled range (UTC), now by default",
+)
+def backfill_stats_rollups(tenant_id: str, since: datetime, until: datetime):
+    """Recompute the hourly stats rollups of the dashboards from the database."""
+    from sqlmodel import Session
+
+    from keep.api.core.db import engine
+    from keep.api.core.stats_rollups import backfill_stats_rollups
+
+    with Session(engine) as session:
+        written = backfill_stats_rollups(
+            session, tenant_id=tenant_id, lower=since, upper=until
+        )
+    for metric, rows in written.items():
+        click.echo(f"{metric}: {rows} rollup rows")
+
+
+@cli.command(name="partition-alerts")
+@click.option(
+    "--interval",
+    type=click.Choice(["month", "day"]),
+    default="month",
+    help="Time range of each partition",
+)
+@click.option(
+    "--ahead",
+    type=int,
+    default=3,
+    help="Number of future partitions to create",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Print the statements without running them",
+)
+def partition_alerts(interval: str, ahead: int, dry_run: bool):
+    """Convert the alert table to a table partitioned by timestamp."""
+    from sqlmodel import Session
+
+    from keep.api.core.alert_partitions import partition_alert_table
+    from keep.api.core.db import engine
+
+    with Session(engine) as session:
+        statements = partition_alert_table(
+            session, interval=interval, ahead=ahead, dry_run=dry_run
+        )
+    for statement in statements:
+        click.echo(f"{statement};")
+    if not dry_run:
+        click.echo(
+            click.style(
+                "Alert table partitioned, set KEEP_ALERT_PARTITIONING_ENABLED=true "
+                "and drop alert_unpartitioned (PostgreSQL) once verified.",
+                bold=True,
+            )
+        )
+
+
+@cli.command(name="retention")
+@click.option("--tenant-id", type=str, help="Only apply the policies of this tenant")
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Report the rows the policies would delete or archive, without changes",
+)
+def retention(tenant_id: str, dry_run: bool):
+    """Delete or archive the rows older than the retention policies."""
+    from sqlmodel import Session
+
+    from keep.api.core.db import engine
+    from keep.api.core.retention import run_retention
+
+    with Session(engine) as session:
+        reports = run_retention(session, tenant_id=tenant_id, dry_run=dry_run)
+    if not reports:
+        click.echo(click.style("No retention policy configured.", bold=True))
+        return
+
+    table = PrettyTable()
+    table.field_names = ["Tenant", "Table", "Action", "Cutoff", "Rows", "Oldest"]
+    for report in reports:
+        table.add_row(
+            [
+                report.tenant_id,
+                report.table,
+                report.action.value,
+                report.cutoff.isoformat(timespec="seconds"),
+                report.rows,
+                report.oldest,
+            ]
+        )
+    print(table)
+
+
+@cli.command(name="compact-alert-history")
+@click.option("--tenant-id", type=str, help="Only compact the history of this tenant")
+@click.option(
+    "--batch-size",
+    type=int,
+    default=1000,
+    help="Number of alerts compacted per transaction",
+)
+def compact_alert_history(tenant_id: str, batch_size: int):
+    """Store the superseded alerts as deltas of shared payloads."""
+    from sqlmodel import Session
+
+    from keep.api.core.alert_history import compact_alert_history
+    from keep.api.core.db import engine
+
+    with Session(engine) as session:
+        compacted = compact_alert_history(
+            session, tenant_id=tenant_id, batch_size=batch_size
+        )
+    click.echo(f"Compacted {compacted} alerts")
+
+
 @cli.group()
 @pass_info
 def workflow(info: Info):
@@ -1046,14 +1183,31 @@ def provider(info: Info):
 
 
 @provider.command(name="build_cache", help="Output providers cache for future use")
-def build_cache():
+@click.option(
+    "--output",
+    "-o",
+    default=PROVIDERS_CACHE_FILE,
+    help="Where to write the providers index (defaults to PROVIDERS_CACHE_FILE).",
+)
+@click.option(
+    "--force",
+    default=False,
+    is_flag=True,
+    help="Rebuild the index even if the existing one is up to date.",
+)
+def build_cache(output: str, force: bool):
+    if not force and ProvidersFactory.load_providers_index(output) is not None:
+        logger.info("Providers cache is up to date", extra={"file": output})
+        return
     logger.info("Building providers cache")
     providers_cache = ProvidersFactory.get_all_providers(ignore_cache_file=True)
-    with open("providers_cache.json", "w") as f:
-        json.dump(providers_cache, f, cls=ProviderEncoder)
-    logger.info(
-        "Providers cache built successfully", extra={"file": "providers_cache.json"}
-    )
+    with open(output, "w") as f:
+        json.dump(
+            ProvidersFactory.build_providers_index(providers_cache),
+            f,
+            cls=ProviderEncoder,
+        )
+    logger.info("Providers cache built successfully", extra={"file": output})
 
 
 @provider.command(name="list")
@@ -11,7 +11,7 @@ SCRIPT_DIR=$(dirname "$0")
 
 python "$SCRIPT_DIR/server_jobs_bg.py" &
 
-# Build the providers cache
+# Build the providers cache (no-op if the one baked into the image is up to date)
 {
     keep provider build_cache
 } || {
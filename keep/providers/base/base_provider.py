@@ -35,6 +35,7 @@ from keep.api.models.db.topology import TopologyServiceInDto
 from keep.api.models.incident import IncidentDto
 from keep.api.utils.enrichment_helpers import parse_and_enrich_deleted_and_assignees
 from keep.contextmanager.contextmanager import ContextManager
+from keep.providers.base.provider_http import provider_sessions
 from keep.providers.models.provider_config import ProviderConfig, ProviderScope
 from keep.providers.models.provider_method import ProviderMethod
 
@@ -180,6 +181,25 @@ class BaseProvider(metaclass=abc.ABCMeta):
         """
         return {}
 
+    def http_session(self, url: str) -> requests.Session:
+        """
+        Get the pooled HTTP session of this provider for the base URL of the url.
+
+        Use it instead of requests.get/post/... to reuse keep-alive connections across
+        calls and provider instances, with a default timeout and retries.
+
+        Args:
+            url (str): The URL (or base URL) the session is for.
+
+        Returns:
+            requests.Session: The session shared by the instances of the provider.
+        """
+        return provider_sessions.get(
+            self.context_manager.tenant_id if self.context_manager else None,
+            self.provider_id,
+            url,
+        )
+
     def notify(self, **kwargs):
         """
         Output alert message.
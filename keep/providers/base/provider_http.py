@@ -0,0 +1,174 @@
+"""
+Pooled HTTP sessions for the providers.
+
+A bare requests.get/post opens a new TCP (and TLS) connection on every call. Providers get
+a session per (tenant, provider, base URL) from BaseProvider.http_session instead, kept in
+a process wide LRU so that the instances of a provider created by every workflow run and
+every pull reuse the same keep-alive connections. The sessions:
+- apply a default timeout when the call doesn't pass one.
+- retry connection errors, and 429/502/503/504 responses of idempotent methods with an
+  exponential backoff. 429 responses are retried for every method since the request
+  wasn't processed, honoring their Retry-After header (capped).
+- never store cookies, like the bare requests calls they replace.
+"""
+
+import http.cookiejar
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from keep.api.core.config import config
+
+PROVIDER_HTTP_POOLING_ENABLED = config(
+    "KEEP_PROVIDER_HTTP_POOLING_ENABLED", cast=bool, default=True
+)
+PROVIDER_HTTP_POOL_CONNECTIONS = config(
+    "KEEP_PROVIDER_HTTP_POOL_CONNECTIONS", cast=int, default=10
+)
+PROVIDER_HTTP_POOL_MAXSIZE = config(
+    "KEEP_PROVIDER_HTTP_POOL_MAXSIZE", cast=int, default=10
+)
+PROVIDER_HTTP_MAX_SESSIONS = config(
+    "KEEP_PROVIDER_HTTP_MAX_SESSIONS", cast=int, default=256
+)
+PROVIDER_HTTP_CONNECT_TIMEOUT = config(
+    "KEEP_PROVIDER_HTTP_CONNECT_TIMEOUT", cast=float, default=10
+)
+PROVIDER_HTTP_READ_TIMEOUT = config(
+    "KEEP_PROVIDER_HTTP_READ_TIMEOUT", cast=float, default=60
+)
+PROVIDER_HTTP_RETRIES = config("KEEP_PROVIDER_HTTP_RETRIES", cast=int, default=3)
+PROVIDER_HTTP_BACKOFF_FACTOR = config(
+    "KEEP_PROVIDER_HTTP_BACKOFF_FACTOR", cast=float, default=0.5
+)
+PROVIDER_HTTP_MAX_RETRY_AFTER = config(
+    "KEEP_PROVIDER_HTTP_MAX_RETRY_AFTER", cast=float, default=30
+)
+
+
+class ProviderRetry(Retry):
+    """
+    Retries rate limited requests of every method and caps the Retry-After wait.
+    """
+
+    def is_retry(
+        self, method: str, status_code: int, has_retry_after: bool = False
+    ) -> bool:
+        if status_code == 429 and self.total:
+            # the request was rejected before being processed
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def get_retry_after(self, response) -> float | None:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, PROVIDER_HTTP_MAX_RETRY_AFTER)
+
+
+class ProviderHTTPAdapter(HTTPAdapter):
+    """
+    Applies the default timeout to the requests sent without one.
+    """
+
+    def __init__(self, timeout: tuple[float, float], **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+class NoCookiesPolicy(http.cookiejar.DefaultCookiePolicy):
+    def set_ok(self, cookie, request) -> bool:
+        return False
+
+
+def create_session(
+    pool_connections: int = PROVIDER_HTTP_POOL_CONNECTIONS,
+    pool_maxsize: int = PROVIDER_HTTP_POOL_MAXSIZE,
+    retries: int = PROVIDER_HTTP_RETRIES,
+    backoff_factor: float = PROVIDER_HTTP_BACKOFF_FACTOR,
+    timeout: tuple[float, float] = (
+        PROVIDER_HTTP_CONNECT_TIMEOUT,
+        PROVIDER_HTTP_READ_TIMEOUT,
+    ),
+) -> requests.Session:
+    session = requests.Session()
+    session.cookies.set_policy(NoCookiesPolicy())
+    adapter = ProviderHTTPAdapter(
+        timeout=timeout,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=ProviderRetry(
+            total=retries,
+            read=False,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 502, 503, 504),
+            raise_on_status=False,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class ProviderSessions:
+    """
+    LRU of the pooled sessions of the process, keyed by (tenant, provider, base URL).
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = PROVIDER_HTTP_MAX_SESSIONS,
+        enabled: bool = PROVIDER_HTTP_POOLING_ENABLED,
+    ):
+        self.max_sessions = max_sessions
+        self.enabled = enabled
+        self.stats = defaultdict(int)
+        self._sessions: OrderedDict[tuple, requests.Session] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def get(self, tenant_id: str | None, provider_id: str, url: str) -> requests.Session:
+        if not self.enabled:
+            # a connection per request, like requests.get/post
+            session = create_session()
+            session.headers["Connection"] = "close"
+            return session
+
+        parts = urlsplit(str(url))
+        key = (tenant_id, provider_id, f"{parts.scheme}://{parts.netloc}".lower())
+        with self._lock:
+            if self._pid != os.getpid():
+                # the pooled connections can't be shared with the parent process
+                self._sessions = OrderedDict()
+                self._pid = os.getpid()
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                self.stats["hits"] += 1
+                return session
+            self.stats["created"] += 1
+            session = self._sessions[key] = create_session()
+            while len(self._sessions) > self.max_sessions:
+                _, evicted = self._sessions.popitem(last=False)
+                evicted.close()
+                self.stats["evicted"] += 1
+        return session
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+provider_sessions = ProviderSessions()
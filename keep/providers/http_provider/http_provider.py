@@ -6,7 +6,6 @@ import copy
 import json
 import typing
 
-import requests
 from requests.exceptions import JSONDecodeError
 
 from keep.contextmanager.contextmanager import ContextManager
@@ -112,7 +111,7 @@ class HttpProvider(BaseProvider):
             },
         )
         if method == "GET":
-            response = requests.get(
+            response = self.http_session(url).get(
                 url,
                 headers=headers,
                 params=params,
@@ -121,7 +120,7 @@ class HttpProvider(BaseProvider):
                 **extra_args,
             )
         elif method == "POST":
-            response = requests.post(
+            response = self.http_session(url).post(
                 url,
                 headers=headers,
                 json=body,
@@ -130,7 +129,7 @@ class HttpProvider(BaseProvider):
                 **extra_args,
             )
         elif method == "PUT":
-            response = requests.put(
+            response = self.http_session(url).put(
                 url,
                 headers=headers,
                 json=body,
@@ -139,7 +138,7 @@ class HttpProvider(BaseProvider):
                 **extra_args,
             )
         elif method == "DELETE":
-            response = requests.delete(
+            response = self.http_session(url).delete(
                 url,
                 headers=headers,
                 json=body,
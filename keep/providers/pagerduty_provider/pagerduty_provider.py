@@ -332,12 +332,12 @@ class PagerdutyProvider(
             try:
                 # Todo: how to check validity for write scopes?
                 if scope.name.startswith("incidents"):
-                    response = requests.get(
+                    response = self.http_session(self.BASE_API_URL).get(
                         f"{self.BASE_API_URL}/incidents",
                         headers=headers,
                     )
                 elif scope.name.startswith("webhook_subscriptions"):
-                    response = requests.get(
+                    response = self.http_session(self.BASE_API_URL).get(
                         self.SUBSCRIPTION_API_URL,
                         headers=headers,
                     )
@@ -487,7 +487,7 @@ class PagerdutyProvider(
             title, routing_key, dedup, severity, event_type, source,
             client=client, client_url=client_url, **kwargs
         )
-        result = requests.post(url, json=payload)
+        result = self.http_session(url).post(url, json=payload)
         result.raise_for_status()
 
         self.logger.info(
@@ -553,9 +553,13 @@ class PagerdutyProvider(
             }
 
         r = (
-            requests.post(url, headers=headers, data=json.dumps(payload))
+            self.http_session(url).post(
+                url, headers=headers, data=json.dumps(payload)
+            )
             if not update
-            else requests.put(url, headers=headers, data=json.dumps(payload))
+            else self.http_session(url).put(
+                url, headers=headers, data=json.dumps(payload)
+            )
         )
         try:
             r.raise_for_status()
@@ -594,7 +598,9 @@ class PagerdutyProvider(
         )
         keep_webhook_incidents_api_url = f"{self.context_manager.api_url}/incidents/event/{self.provider_type}?provider_id={self.provider_id}"
         headers = self.__get_headers()
-        request = requests.get(self.SUBSCRIPTION_API_URL, headers=headers)
+        request = self.http_session(self.BASE_API_URL).get(
+            self.SUBSCRIPTION_API_URL, headers=headers
+        )
         if not request.ok:
             raise Exception("Could not get existing webhooks")
         existing_webhooks = request.json().get("webhook_subscriptions", [])
@@ -612,7 +618,7 @@ class PagerdutyProvider(
         if webhook_exists:
             self.logger.info("Webhook exists, removing it")
             webhook_id = webhook_exists.get("id")
-            request = requests.delete(
+            request = self.http_session(self.BASE_API_URL).delete(
                 f"{self.SUBSCRIPTION_API_URL}/{webhook_id}", headers=headers
             )
             if not request.ok:
@@ -639,7 +645,9 @@ class PagerdutyProvider(
             return
 
         headers = self.__get_headers()
-        request = requests.get(self.SUBSCRIPTION_API_URL, headers=headers)
+        request = self.http_session(self.BASE_API_URL).get(
+            self.SUBSCRIPTION_API_URL, headers=headers
+        )
         if not request.ok:
             raise Exception("Could not get existing webhooks")
         existing_webhooks = request.json().get("webhook_subscriptions", [])
@@ -689,7 +697,7 @@ class PagerdutyProvider(
         if webhook_exists:
             self.logger.info("Webhook already exists, removing and re-creating")
             webhook_id = webhook_exists.get("id")
-            request = requests.delete(
+            request = self.http_session(self.BASE_API_URL).delete(
                 f"{self.SUBSCRIPTION_API_URL}/{webhook_id}", headers=headers
             )
             if not request.ok:
@@ -697,7 +705,7 @@ class PagerdutyProvider(
             self.logger.info("Webhook removed", extra={"webhook_id": webhook_id})
 
         self.logger.info("Creating Pagerduty webhook")
-        request = requests.post(
+        request = self.http_session(self.BASE_API_URL).post(
             self.SUBSCRIPTION_API_URL,
             headers=headers,
             json=webhook_payload,
@@ -909,7 +917,9 @@ class PagerdutyProvider(
                 "users",
             ]
         }
-        response = requests.get(url, headers=self.__get_headers(), params=params)
+        response = self.http_session(url).get(
+            url, headers=self.__get_headers(), params=params
+        )
         response.raise_for_status()
         return response.json()
 
@@ -932,7 +942,9 @@ class PagerdutyProvider(
                 "users",
             ]
         }
-        response = requests.get(url, headers=self.__get_headers(), params=params)
+        response = self.http_session(url).get(
+            url, headers=self.__get_headers(), params=params
+        )
         response.raise_for_status()
         return response.json()
 
@@ -967,7 +979,7 @@ class PagerdutyProvider(
                 }
                 if not incident_id and self.authentication_config.service_id:
                     params["service_ids[]"] = [self.authentication_config.service_id]
-                response = requests.get(
+                response = self.http_session(url).get(
                     url=url,
                     headers=self.__get_headers(),
                     params=params,
@@ -1038,7 +1050,7 @@ class PagerdutyProvider(
         endpoint = "business_services" if business_services else "services"
         while more:
             try:
-                services_response = requests.get(
+                services_response = self.http_session(self.BASE_API_URL).get(
                     url=f"{self.BASE_API_URL}/{endpoint}",
                     headers=self.__get_headers(),
                     params={"include[]": ["teams"], "offset": offset, "limit": 100},
@@ -1068,7 +1080,7 @@ class PagerdutyProvider(
             service_metadata[business_service["id"]] = business_service
 
         try:
-            service_map_response = requests.get(
+            service_map_response = self.http_session(self.BASE_API_URL).get(
                 url=f"{self.BASE_API_URL}/service_dependencies",
                 headers=self.__get_headers(),
             )
@@ -13,6 +13,7 @@ import os
 import types
 import typing
 from dataclasses import _MISSING_TYPE, fields
+from importlib import metadata
 from typing import get_args
 
 from keep.api.core.config import config
@@ -35,6 +36,14 @@ from keep.providers.models.provider_method import ProviderMethodDTO, ProviderMet
 from keep.secretmanager.secretmanagerfactory import SecretManagerFactory
 
 PROVIDERS_CACHE_FILE = os.environ.get("PROVIDERS_CACHE_FILE", "providers_cache.json")
+# Bump when the layout of the providers index (or the Provider model) changes
+PROVIDERS_INDEX_SCHEMA_VERSION = 1
+BLACKLISTED_PROVIDERS = [
+    "base_provider",
+    "mock_provider",
+    "file_provider",
+    "github_workflows_provider",
+]
 READ_ONLY_MODE = config("KEEP_READ_ONLY", default="false") == "true"
 
 logger = logging.getLogger(__name__)
@@ -56,13 +65,44 @@ class ProviderConfigurationException(Exception):
     pass
 
 
+def get_keep_version() -> str:
+    try:
+        return metadata.version("keep")
+    except metadata.PackageNotFoundError:
+        return os.environ.get("KEEP_VERSION", "unknown")
+
+
+def get_provider_directories() -> list[str]:
+    """
+    List the provider packages shipped with Keep, without importing them.
+    """
+    return sorted(
+        provider_directory
+        for provider_directory in os.listdir(os.path.dirname(os.path.abspath(__file__)))
+        if provider_directory.endswith("_provider")
+        and provider_directory not in BLACKLISTED_PROVIDERS
+    )
+
+
 class ProvidersFactory:
     _loaded_providers_cache = None
     _loaded_deduplication_rules_cache = None
+    # provider type -> provider class, so every provider module is imported at most once
+    _provider_classes = {}
 
     @staticmethod
     def get_provider_class(
         provider_type: str,
+    ) -> BaseProvider | BaseTopologyProvider | BaseIncidentProvider:
+        provider_class = ProvidersFactory._provider_classes.get(provider_type)
+        if provider_class is None:
+            provider_class = ProvidersFactory._load_provider_class(provider_type)
+            ProvidersFactory._provider_classes[provider_type] = provider_class
+        return provider_class
+
+    @staticmethod
+    def _load_provider_class(
+        provider_type: str,
     ) -> BaseProvider | BaseTopologyProvider | BaseIncidentProvider:
         provider_type_split = provider_type.split(
             "."
@@ -249,6 +289,75 @@ class ProvidersFactory:
             methods.append(ProviderMethodDTO(**method.dict(), func_params=func_params))
         return methods
 
+    @staticmethod
+    def build_providers_index(providers: list[Provider]) -> dict:
+        """
+        Build the versioned providers metadata index written by `keep provider build_cache`.
+
+        Args:
+            providers (list[Provider]): The providers, as returned by get_all_providers.
+
+        Returns:
+            dict: The index, ready to be dumped with ProviderEncoder.
+        """
+        return {
+            "schema_version": PROVIDERS_INDEX_SCHEMA_VERSION,
+            "keep_version": get_keep_version(),
+            "provider_directories": get_provider_directories(),
+            "providers": providers,
+        }
+
+    @staticmethod
+    def load_providers_index(
+        index_file: str = PROVIDERS_CACHE_FILE,
+    ) -> list[Provider] | None:
+        """
+        Load the providers metadata index without importing any provider module.
+
+        Args:
+            index_file (str): The path of the index file.
+
+        Returns:
+            list[Provider] | None: The providers, or None if the index is missing or stale.
+        """
+        logger = logging.getLogger(__name__)
+        if not os.path.exists(index_file):
+            return None
+
+        try:
+            with open(index_file, "r") as f:
+                providers_index = json.load(f)
+        except (OSError, ValueError):
+            logger.warning(
+                "Could not read providers index, ignoring it",
+                extra={"file": index_file},
+            )
+            return None
+
+        # indexes built by older versions were a plain list of providers
+        if not isinstance(providers_index, dict):
+            logger.warning(
+                "Providers index has no version, ignoring it",
+                extra={"file": index_file},
+            )
+            return None
+
+        stale_reason = None
+        if providers_index.get("schema_version") != PROVIDERS_INDEX_SCHEMA_VERSION:
+            stale_reason = "schema version mismatch"
+        elif providers_index.get("keep_version") != get_keep_version():
+            stale_reason = "keep version mismatch"
+        elif providers_index.get("provider_directories") != get_provider_directories():
+            stale_reason = "providers changed"
+        if stale_reason:
+            logger.warning(
+                "Providers index is stale, ignoring it",
+                extra={"file": index_file, "reason": stale_reason},
+            )
+            return None
+
+        return [Provider(**provider) for provider in providers_index["providers"]]
+
     @staticmethod
     def get_all_providers(ignore_cache_file: bool = False) -> list[Provider]:
         """
@@ -263,39 +372,20 @@ class ProvidersFactory:
             logger.debug("Using cached providers")
             return ProvidersFactory._loaded_providers_cache
 
-        if os.path.exists(PROVIDERS_CACHE_FILE) and not ignore_cache_file:
-            logger.info(
-                "Loading providers from cache file",
-                extra={"file": PROVIDERS_CACHE_FILE},
-            )
-            with open(PROVIDERS_CACHE_FILE, "r") as f:
-                providers_cache = json.load(f)
-                ProvidersFactory._loaded_providers_cache = [
-                    Provider(**provider) for provider in providers_cache
-                ]
-            logger.info(
-                "Providers loaded from cache file",
-                extra={"file": PROVIDERS_CACHE_FILE},
-            )
-            return ProvidersFactory._loaded_providers_cache
+        if not ignore_cache_file:
+            providers = ProvidersFactory.load_providers_index(PROVIDERS_CACHE_FILE)
+            if providers is not None:
+                logger.info(
+                    "Providers loaded from cache file",
+                    extra={"file": PROVIDERS_CACHE_FILE},
+                )
+                ProvidersFactory._loaded_providers_cache = providers
+                return providers
 
         logger.info("Loading providers")
         providers = []
-        blacklisted_providers = [
-            "base_provider",
-            "mock_provider",
-            "file_provider",
-            "github_workflows_provider",
-        ]
-
-        for provider_directory in os.listdir(
-            os.path.dirname(os.path.abspath(__file__))
-        ):
-            # skip files that aren't providers
-            if not provider_directory.endswith("_provider"):
-                continue
-            elif provider_directory in blacklisted_providers:
-                continue
+
+        for provider_directory in get_provider_directories():
             # import it
             try:
                 module = importlib.import_module(
@@ -489,6 +579,29 @@ class ProvidersFactory:
         providers = []
         context_manager = ContextManager(tenant_id=tenant_id)
         secret_manager = SecretManagerFactory.get_secret_manager(context_manager)
+        providers_configs = {}
+        if include_details:
+            # read all configurations at once instead of one round trip per provider
+            try:
+                providers_configs = secret_manager.read_secrets(
+                    secret_names=[p.configuration_key for p in installed_providers],
+                    is_json=True,
+                    use_cache=True,
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Could not read the providers auth configs at once, reading them one by one: {e}"
+                )
+                for p in installed_providers:
+                    try:
+                        providers_configs[p.configuration_key] = (
+                            secret_manager.read_secret(
+                                secret_name=p.configuration_key, is_json=True
+                            )
+                        )
+                    # skipped below, like the providers whose secret is missing
+                    except Exception:
+                        pass
         for p in installed_providers:
             provider: Provider | None = next(
                 filter(
@@ -512,11 +625,7 @@ class ProvidersFactory:
             try:
                 provider_auth = {"name": p.name}
                 if include_details:
-                    provider_auth.update(
-                        secret_manager.read_secret(
-                            secret_name=p.configuration_key, is_json=True
-                        )
-                    )
+                    provider_auth.update(providers_configs[p.configuration_key])
                 if READ_ONLY_MODE and not override_readonly:
                     if "authentication" in provider_auth:
                         provider_auth["authentication"] = {
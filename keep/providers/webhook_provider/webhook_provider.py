@@ -9,7 +9,6 @@ import json
 import typing
 
 import pydantic
-import requests
 from requests.exceptions import JSONDecodeError
 
 from keep.contextmanager.contextmanager import ContextManager
@@ -221,7 +220,7 @@ class WebhookProvider(BaseProvider):
             },
         )
         if method == "GET":
-            response = requests.get(
+            response = self.http_session(url).get(
                 url,
                 headers=headers,
                 params=params,
@@ -230,15 +229,15 @@ class WebhookProvider(BaseProvider):
                 **extra_args,
             )
         elif method == "POST":
-            response = requests.post(
+            response = self.http_session(url).post(
                 url, headers=headers, json=body, timeout=10, verify=verify, **extra_args
             )
         elif method == "PUT":
-            response = requests.put(
+            response = self.http_session(url).put(
                 url, headers=headers, json=body, timeout=10, verify=verify, **extra_args
             )
         elif method == "DELETE":
-            response = requests.delete(
+            response = self.http_session(url).delete(
                 url, headers=headers, json=body, timeout=10, verify=verify, **extra_args
             )
 
@@ -0,0 +1,460 @@
+"""
+Columnar evaluation of CEL expressions over a batch of alerts.
+
+RulesEngine.filter_alerts runs the celpy program of the expression on every alert, which
+dominates when presets and maintenance windows filter thousands of alerts. Their
+expressions mostly use a small subset of CEL: ==, !=, <, <=, >, >=, in (a list literal),
+contains, startsWith, endsWith, !, && and || over fields of the alert (name, status,
+severity, labels.team, ...). compile_batch_cel compiles such an expression once into
+predicates over the columns of an AlertBatch (the values of one field for all the
+alerts, dictionary encoded), so every comparison is evaluated once per distinct value of
+the field instead of once per alert.
+
+Whenever celpy would not give a plain boolean for an alert (a type mismatch, a null, ...)
+the result of the alert is UNKNOWN and filter_alerts evaluates it with celpy as before,
+so the results are the same as celpy's. Expressions outside of the subset are evaluated
+with celpy altogether.
+"""
+
+import functools
+import logging
+import operator
+
+import celpy
+import celpy.celtypes
+import celpy.evaluation
+import lark
+
+from keep.api.core.config import config
+
+BATCH_CEL_ENABLED = config("KEEP_BATCH_CEL_ENABLED", cast=bool, default=True)
+
+logger = logging.getLogger(__name__)
+
+# The result of an expression for an alert
+FALSE = 0
+TRUE = 1
+# celpy raises a "no such member" error (e.g. labels.team of an alert without a team
+# label), filter_alerts skips the alert
+MISSING = 2
+# anything else, the alert is evaluated with celpy
+UNKNOWN = 3
+
+# CEL && and || are commutative with errors: false && error is false, true || error is
+# true, indexed by [left][right]
+_AND = (
+    (FALSE, FALSE, FALSE, FALSE),
+    (FALSE, TRUE, MISSING, UNKNOWN),
+    (FALSE, MISSING, MISSING, UNKNOWN),
+    (FALSE, UNKNOWN, UNKNOWN, UNKNOWN),
+)
+_OR = (
+    (FALSE, TRUE, MISSING, UNKNOWN),
+    (TRUE, TRUE, TRUE, TRUE),
+    (MISSING, TRUE, MISSING, UNKNOWN),
+    (UNKNOWN, TRUE, UNKNOWN, UNKNOWN),
+)
+# !error is a "no matching overload" error, not a "no such member" one
+_NOT = (TRUE, FALSE, UNKNOWN, UNKNOWN)
+
+_CONSTANT_TYPES = (
+    celpy.celtypes.StringType,
+    celpy.celtypes.IntType,
+    celpy.celtypes.DoubleType,
+    celpy.celtypes.BoolType,
+    type(None),
+)
+
+_COMPARISONS = {
+    "relation_eq": operator.eq,
+    "relation_ne": operator.ne,
+    "relation_lt": operator.lt,
+    "relation_le": operator.le,
+    "relation_gt": operator.gt,
+    "relation_ge": operator.ge,
+}
+# 'a' < name is name > 'a'
+_MIRRORED = {
+    operator.eq: operator.eq,
+    operator.ne: operator.ne,
+    operator.lt: operator.gt,
+    operator.le: operator.ge,
+    operator.gt: operator.lt,
+    operator.ge: operator.le,
+}
+
+_STRING_METHODS = {
+    "contains": lambda value, arg: arg in value,
+    "startsWith": str.startswith,
+    "endsWith": str.endswith,
+}
+
+
+class _Sentinel:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+# the last member of a path is not in its map, e.g. labels.team
+MISSING_MEMBER = _Sentinel("MISSING_MEMBER")
+# any other path that doesn't lead to a value, e.g. an unknown field or name.first
+UNREACHABLE = _Sentinel("UNREACHABLE")
+
+_SCALAR_TYPES = frozenset(_CONSTANT_TYPES + (_Sentinel,))
+
+
+class Column:
+    """
+    The values of a field for all the alerts of a batch, dictionary encoded: the alert i
+    has the value values[codes[i]].
+    """
+
+    def __init__(self, values: list, codes: list[int]):
+        self.values = values
+        self.codes = codes
+
+    @classmethod
+    def from_values(cls, values) -> "Column":
+        distinct = []
+        index = {}
+        codes = []
+        for i, value in enumerate(values):
+            # 1 == 1.0 == True in python, not in CEL
+            key = (type(value), value) if type(value) in _SCALAR_TYPES else (None, i)
+            code = index.get(key)
+            if code is None:
+                code = index[key] = len(distinct)
+                distinct.append(value)
+            codes.append(code)
+        return cls(distinct, codes)
+
+
+class AlertBatch:
+    """
+    The activations of a list of alerts (see RulesEngine.get_alerts_activation) as a
+    struct of arrays: one Column per field, built on first use and shared by all the
+    expressions evaluated on the batch.
+    """
+
+    def __init__(self, activations: list):
+        self.activations = activations
+        self._columns: dict[tuple, Column] = {}
+
+    def __len__(self) -> int:
+        return len(self.activations)
+
+    def column(self, path: tuple) -> Column:
+        column = self._columns.get(path)
+        if column is None:
+            column = self._columns[path] = Column.from_values(
+                self._lookup(activation, path) for activation in self.activations
+            )
+        return column
+
+    @staticmethod
+    def _lookup(activation, path: tuple):
+        value = activation
+        last = len(path) - 1
+        for depth, (key, indexed) in enumerate(path):
+            if not isinstance(value, dict):
+                return UNREACHABLE
+            if key not in value:
+                # labels.team is a "no such member" error, unlike an unknown field,
+                # labels["team"] or a missing map in the middle of the path
+                if depth == last and depth > 0 and not indexed:
+                    return MISSING_MEMBER
+                return UNREACHABLE
+            value = value[key]
+        return value
+
+
+class _Field:
+    def __init__(self, path: tuple):
+        self.path = path
+
+
+class _Constant:
+    def __init__(self, value):
+        self.value = value
+
+
+class _ConstantList:
+    def __init__(self, values: list):
+        self.values = values
+
+
+class Predicate:
+    def evaluate(self, batch: AlertBatch) -> list[int]:
+        """The result (FALSE, TRUE, MISSING or UNKNOWN) of every alert of the batch."""
+        raise NotImplementedError()
+
+
+class _FieldPredicate(Predicate):
+    def __init__(self, path: tuple):
+        self.path = path
+
+    def state(self, value) -> int:
+        raise NotImplementedError()
+
+    def evaluate(self, batch: AlertBatch) -> list[int]:
+        column = batch.column(self.path)
+        states = [
+            UNKNOWN if value is UNREACHABLE else self.state(value)
+            for value in column.values
+        ]
+        return [states[code] for code in column.codes]
+
+
+class _Compare(_FieldPredicate):
+    def __init__(self, path: tuple, op, constant):
+        super().__init__(path)
+        self.op = op
+        self.constant = constant
+
+    def state(self, value) -> int:
+        if value is MISSING_MEMBER:
+            return MISSING
+        # no overload between types in CEL, not even between int and double
+        if type(value) is not type(self.constant):
+            return UNKNOWN
+        if value is None or type(value) is celpy.celtypes.BoolType:
+            if self.op is operator.eq or self.op is operator.ne:
+                return TRUE if self.op(value, self.constant) else FALSE
+            return UNKNOWN
+        return TRUE if self.op(value, self.constant) else FALSE
+
+
+class _InList(_FieldPredicate):
+    def __init__(self, path: tuple, constants: list):
+        super().__init__(path)
+        self.constants = constants
+
+    def state(self, value) -> int:
+        if value is MISSING_MEMBER:
+            return MISSING if self.constants else UNKNOWN
+        if not self.constants:
+            return FALSE
+        matched = [c for c in self.constants if type(c) is type(value)]
+        if any(c == value for c in matched):
+            return TRUE
+        # celpy ignores the type errors of the other items unless nothing matched
+        return FALSE if len(matched) == len(self.constants) else UNKNOWN
+
+
+class _StringMethod(_FieldPredicate):
+    def __init__(self, path: tuple, method: str, arg: str):
+        super().__init__(path)
+        self.method = _STRING_METHODS[method]
+        self.arg = arg
+
+    def state(self, value) -> int:
+        if value is MISSING_MEMBER:
+            return MISSING
+        if type(value) is not celpy.celtypes.StringType:
+            return UNKNOWN
+        return TRUE if self.method(value, self.arg) else FALSE
+
+
+class _BoolField(_FieldPredicate):
+    def state(self, value) -> int:
+        if value is MISSING_MEMBER:
+            return MISSING
+        if type(value) is not celpy.celtypes.BoolType:
+            return UNKNOWN
+        return TRUE if value else FALSE
+
+
+class _BoolConstant(Predicate):
+    def __init__(self, value: bool):
+        self.value = value
+
+    def evaluate(self, batch: AlertBatch) -> list[int]:
+        return [TRUE if self.value else FALSE] * len(batch)
+
+
+class _Not(Predicate):
+    def __init__(self, operand: Predicate):
+        self.operand = operand
+
+    def evaluate(self, batch: AlertBatch) -> list[int]:
+        return [_NOT[state] for state in self.operand.evaluate(batch)]
+
+
+class _Logical(Predicate):
+    def __init__(self, table: tuple, left: Predicate, right: Predicate):
+        self.table = table
+        self.left = left
+        self.right = right
+
+    def evaluate(self, batch: AlertBatch) -> list[int]:
+        table = self.table
+        return [
+            table[left][right]
+            for left, right in zip(
+                self.left.evaluate(batch), self.right.evaluate(batch)
+            )
+        ]
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class _Compiler:
+    """Compiles the parse tree of celpy, raises _Unsupported outside of the subset."""
+
+    _PASSTHROUGH = (
+        "expr",
+        "conditionalor",
+        "conditionaland",
+        "relation",
+        "addition",
+        "multiplication",
+        "unary",
+        "member",
+        "primary",
+    )
+
+    def predicate(self, tree) -> Predicate:
+        operand = self.operand(tree)
+        if isinstance(operand, Predicate):
+            return operand
+        if isinstance(operand, _Field):
+            return _BoolField(operand.path)
+        if isinstance(operand, _Constant) and isinstance(
+            operand.value, celpy.celtypes.BoolType
+        ):
+            return _BoolConstant(bool(operand.value))
+        raise _Unsupported(tree)
+
+    def operand(self, tree):
+        if not isinstance(tree, lark.Tree):
+            raise _Unsupported(tree)
+        data, children = tree.data, tree.children
+        if data in self._PASSTHROUGH and len(children) == 1:
+            return self.operand(children[0])
+        if data == "conditionalor" and len(children) == 2:
+            return _Logical(
+                _OR, self.predicate(children[0]), self.predicate(children[1])
+            )
+        if data == "conditionaland" and len(children) == 2:
+            return _Logical(
+                _AND, self.predicate(children[0]), self.predicate(children[1])
+            )
+        if data == "relation" and len(children) == 2:
+            return self.relation(children[0], children[1])
+        if (
+            data == "unary"
+            and len(children) == 2
+            and isinstance(children[0], lark.Tree)
+            and children[0].data == "unary_not"
+        ):
+            return _Not(self.predicate(children[1]))
+        if data == "paren_expr" and len(children) == 1:
+            return self.operand(children[0])
+        if data == "ident":
+            return _Field(((celpy.celtypes.StringType(children[0].value), False),))
+        if data == "member_dot":
+            field = self.field(children[0])
+            key = celpy.celtypes.StringType(children[1].value)
+            return _Field(field.path + ((key, False),))
+        if data == "member_index":
+            field = self.field(children[0])
+            key = self.operand(children[1])
+            if not isinstance(key, _Constant) or not isinstance(
+                key.value, celpy.celtypes.StringType
+            ):
+                raise _Unsupported(tree)
+            return _Field(field.path + ((key.value, True),))
+        if data == "member_dot_arg":
+            return self.method(tree)
+        if data == "literal" and len(children) == 1:
+            return _Constant(self.literal(children[0]))
+        if data == "list_lit":
+            items = []
+            if children:
+                for item in children[0].children:
+                    constant = self.operand(item)
+                    if not isinstance(constant, _Constant):
+                        raise _Unsupported(tree)
+                    items.append(constant.value)
+            return _ConstantList(items)
+        raise _Unsupported(tree)
+
+    def field(self, tree) -> _Field:
+        field = self.operand(tree)
+        if not isinstance(field, _Field):
+            raise _Unsupported(tree)
+        return field
+
+    def method(self, tree) -> Predicate:
+        children = tree.children
+        name = children[1].value
+        args = children[2].children if len(children) == 3 else []
+        if name not in _STRING_METHODS or len(args) != 1:
+            raise _Unsupported(tree)
+        field = self.field(children[0])
+        arg = self.operand(args[0])
+        if not isinstance(arg, _Constant) or not isinstance(
+            arg.value, celpy.celtypes.StringType
+        ):
+            raise _Unsupported(tree)
+        return _StringMethod(field.path, name, arg.value)
+
+    def relation(self, relation, right_tree) -> Predicate:
+        if len(relation.children) != 1:
+            raise _Unsupported(relation)
+        left = self.operand(relation.children[0])
+        right = self.operand(right_tree)
+        if relation.data == "relation_in":
+            if isinstance(left, _Field) and isinstance(right, _ConstantList):
+                return _InList(left.path, right.values)
+            raise _Unsupported(relation)
+        op = _COMPARISONS.get(relation.data)
+        if op is None:
+            raise _Unsupported(relation)
+        if isinstance(left, _Field) and isinstance(right, _Constant):
+            return _Compare(left.path, op, right.value)
+        if isinstance(left, _Constant) and isinstance(right, _Field):
+            return _Compare(right.path, _MIRRORED[op], left.value)
+        raise _Unsupported(relation)
+
+    @staticmethod
+    def literal(token):
+        if token.type == "STRING_LIT":
+            return celpy.evaluation.celstr(token)
+        if token.type == "INT_LIT":
+            return celpy.celtypes.IntType(token.value)
+        if token.type == "FLOAT_LIT":
+            return celpy.celtypes.DoubleType(token.value)
+        if token.type == "BOOL_LIT":
+            return celpy.celtypes.BoolType(token.value.lower() == "true")
+        if token.type == "NULL_LIT":
+            return None
+        raise _Unsupported(token)
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_batch_cel(cel: str) -> Predicate | None:
+    """
+    Compile a (preprocessed) CEL expression for AlertBatch.
+
+    Returns:
+        Predicate | None: None if the expression is not supported (or not valid), it
+            must then be evaluated with celpy.
+    """
+    try:
+        tree = celpy.Environment().compile(cel)
+    except Exception:
+        return None
+    try:
+        return _Compiler().predicate(tree)
+    except _Unsupported:
+        logger.debug("CEL expression not supported by the batch evaluator: %s", cel)
+        return None
+    except Exception:
+        logger.exception("Failed to compile CEL expression %s for batches", cel)
+        return None
@@ -29,6 +29,13 @@ from keep.api.models.db.rule import Rule
 from keep.api.models.incident import IncidentDto
 from keep.api.utils.cel_utils import preprocess_cel_expression
 from keep.api.utils.enrichment_helpers import convert_db_alerts_to_dto_alerts
+from keep.rulesengine.batch_cel import (
+    BATCH_CEL_ENABLED,
+    TRUE,
+    UNKNOWN,
+    AlertBatch,
+    compile_batch_cel,
+)
 
 # Shahar: this is performance enhancment https://github.com/cloud-custodian/cel-python/issues/68
 
@@ -678,13 +685,20 @@ class RulesEngine:
         return activations
 
     def filter_alerts(
-        self, alerts: list[AlertDto], cel: str, alerts_activation: list = None
+        self,
+        alerts: list[AlertDto],
+        cel: str,
+        alerts_activation: list = None,
+        alerts_batch: AlertBatch = None,
     ):
         """This function filters alerts according to a CEL
 
         Args:
             alerts (list[AlertDto]): list of alerts
             cel (str): CEL expression
+            alerts_activation (list): the activations of the alerts, if already built
+            alerts_batch (AlertBatch): the batch of the alerts, to share its columns
+                between several expressions
 
         Returns:
             list[AlertDto]: list of alerts that are related to the cel
@@ -699,60 +713,81 @@ class RulesEngine:
             return alerts
         # preprocess the cel expression
         cel = preprocess_cel_expression(cel)
+
+        # performance optimization: evaluate the common subset of CEL on all the
+        # alerts at once, only the alerts it can't decide are evaluated with celpy
+        results = None
+        predicate = compile_batch_cel(cel) if BATCH_CEL_ENABLED and alerts else None
+        if predicate is not None:
+            if alerts_batch is None:
+                alerts_batch = AlertBatch(
+                    alerts_activation or self.get_alerts_activation(alerts)
+                )
+            alerts_activation = alerts_batch.activations
+            results = predicate.evaluate(alerts_batch)
+            if UNKNOWN not in results:
+                return [
+                    alert for alert, result in zip(alerts, results) if result == TRUE
+                ]
+
         ast = self.env.compile(cel)
         prgm = self.env.program(ast)
         filtered_alerts = []
 
         for i, alert in enumerate(alerts):
+            if results is not None and results[i] != UNKNOWN:
+                if results[i] == TRUE:
+                    filtered_alerts.append(alert)
+                continue
             if alerts_activation:
                 activation = alerts_activation[i]
             else:
                 activation = self.get_alerts_activation([alert])[0]
-            try:
-                r = prgm.evaluate(activation)
-            except ValueError as e:
-                if "Invalid name" in str(e):
-                    logger.warning(
-                        f"{str(e)} in the CEL expression {cel} for alert {alert.id}. This might mean there's a blank space in the field name",
-                        extra={"alert_id": alert.id, "payload": alert.dict()},
-                    )
-                    continue
-            except celpy.evaluation.CELEvalError as e:
-                # this is ok, it means that the subrule is not relevant for this event
-                if "no such member" in str(e):
-                    continue
-                # unknown
-                elif "no such overload" in str(
-                    e
-                ) or "found no matching overload" in str(e):
-                    # Try type coercion for == and !=
-                    try:
-                        coerced = self._coerce_eq_type_error(
-                            cel, prgm, activation, alert
-                        )
-                        if coerced:
-                            filtered_alerts.append(alert)
-                            continue
-                    except Exception:
-                        pass
-                    logger.debug(
-                        f"Type mismtach between operator and operand in the CEL expression {cel} for alert {alert.id}"
-                    )
-                    continue
-                logger.warning(
-                    f"Failed to evaluate the CEL expression {cel} for alert {alert.id} - {e}"
-                )
-                continue
-            except Exception:
-                logger.exception(
-                    f"Failed to evaluate the CEL expression {cel} for alert {alert.id}"
-                )
-                continue
-            if r:
+            if self._evaluate_alert(cel, prgm, activation, alert):
                 filtered_alerts.append(alert)
 
         return filtered_alerts
 
+    def _evaluate_alert(self, cel, prgm, activation, alert) -> bool:
+        logger = logging.getLogger(__name__)
+        try:
+            r = prgm.evaluate(activation)
+        except ValueError as e:
+            if "Invalid name" in str(e):
+                logger.warning(
+                    f"{str(e)} in the CEL expression {cel} for alert {alert.id}. This might mean there's a blank space in the field name",
+                    extra={"alert_id": alert.id, "payload": alert.dict()},
+                )
+                return False
+            raise
+        except celpy.evaluation.CELEvalError as e:
+            # this is ok, it means that the subrule is not relevant for this event
+            if "no such member" in str(e):
+                return False
+            # unknown
+            elif "no such overload" in str(e) or "found no matching overload" in str(e):
+                # Try type coercion for == and !=
+                try:
+                    coerced = self._coerce_eq_type_error(cel, prgm, activation, alert)
+                    if coerced:
+                        return True
+                except Exception:
+                    pass
+                logger.debug(
+                    f"Type mismtach between operator and operand in the CEL expression {cel} for alert {alert.id}"
+                )
+                return False
+            logger.warning(
+                f"Failed to evaluate the CEL expression {cel} for alert {alert.id} - {e}"
+            )
+            return False
+        except Exception:
+            logger.exception(
+                f"Failed to evaluate the CEL expression {cel} for alert {alert.id}"
+            )
+            return False
+        return bool(r)
+
     @staticmethod
     def send_workflow_event(
         tenant_id: str, session: Session, incident_dto: IncidentDto, action: str
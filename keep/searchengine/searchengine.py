@@ -1,6 +1,10 @@
 import enum
 import logging
 
+from keep.api.core.alert_activation_cache import (
+    alert_activation_cache,
+    get_alert_activation_version,
+)
 from keep.api.core.alerts import query_last_alerts
 from keep.api.core.db import get_last_alerts
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
@@ -11,9 +15,11 @@ from keep.api.models.db.preset import PresetDto, PresetSearchQuery
 from keep.api.models.query import QueryDto
 from keep.api.models.time_stamp import TimeStampFilter
 from keep.api.utils.enrichment_helpers import convert_db_alerts_to_dto_alerts
+from keep.rulesengine.batch_cel import AlertBatch
 from keep.rulesengine.rulesengine import RulesEngine
 from datetime import datetime, timedelta, timezone
 
+
 class SearchMode(enum.Enum):
     """The search mode for the search engine"""
 
@@ -55,10 +61,18 @@ class SearchEngine:
         )
 
     def _get_last_alerts(
-        self, limit=1000, timeframe: int = 0, time_stamp: TimeStampFilter = None
+        self,
+        limit=1000,
+        timeframe: int = 0,
+        time_stamp: TimeStampFilter = None,
+        activation_versions: dict[str, str] | None = None,
     ) -> list[AlertDto]:
         """Get the last alerts
 
+        Args:
+            activation_versions (dict[str, str], optional): Filled with the activation
+                version of every alert by event_id (see alert_activation_cache).
+
         Returns:
             list[AlertDto]: The list of alerts
         """
@@ -74,6 +88,11 @@ class SearchEngine:
             upper_timestamp=upper_timestamp,
             with_incidents=True,
         )
+        if activation_versions is not None:
+            # before the conversion merges the enrichments into the events
+            activation_versions.update(
+                {str(alert.id): get_alert_activation_version(alert) for alert in alerts}
+            )
         # convert the alerts to DTO
         alerts_dto = convert_db_alerts_to_dto_alerts(alerts)
         self.logger.info(
@@ -200,12 +219,23 @@ class SearchEngine:
         # if internal
         if self.search_mode == SearchMode.INTERNAL:
             # get the alerts
-            alerts_dto = self._get_last_alerts(time_stamp=time_stamp)
-            # performance optimization: get the alerts activation once
-            alerts_activation = self.rule_engine.get_alerts_activation(alerts_dto)
+            activation_versions = {}
+            alerts_dto = self._get_last_alerts(
+                time_stamp=time_stamp, activation_versions=activation_versions
+            )
+            # performance optimization: get the alerts activation once, and only
+            # build the ones of the alerts changed since the previous search
+            alerts_activation = alert_activation_cache.get_activations(
+                self.tenant_id,
+                alerts_dto,
+                activation_versions,
+                self.rule_engine.get_alerts_activation,
+            )
+            # and the columns of the fields the presets filter on, once
+            alerts_batch = AlertBatch(alerts_activation)
             for preset in presets:
                 filtered_alerts = self.rule_engine.filter_alerts(
-                    alerts_dto, preset.cel_query, alerts_activation
+                    alerts_dto, preset.cel_query, alerts_activation, alerts_batch
                 )
                 preset.alerts_count = len(filtered_alerts)
                 # update noisy
@@ -239,34 +269,30 @@ class SearchEngine:
 
         # if elastic
         elif self.search_mode == SearchMode.ELASTIC:
-            # get the alerts from elastic
+            # get number of alerts and whether they are noisy for all presets at once
+            where_clauses = {}
             for preset in presets:
                 try:
-                    query = self._create_raw_sql(
+                    where_clauses[str(preset.id)] = self._create_raw_sql(
                         preset.sql_query.get("sql"), preset.sql_query.get("params")
                     )
-                    # get number of alerts and number of noisy alerts
-                    elastic_sql_query = (
-                        f"""select count(*),  MAX(CASE WHEN isNoisy = true AND dismissed = false AND deleted = false THEN 1 ELSE 0 END) from "{self.elastic_client.alerts_index}" """
-                        + (f" where {query}" if query else "")
-                    )
-                    results = self.elastic_client.run_query(elastic_sql_query)
-                    if results:
-                        preset.alerts_count = results["rows"][0][0]
-                        preset.should_do_noise_now = results["rows"][0][1] == 1
-                    else:
-                        self.logger.warning(
-                            "No results found for preset",
-                            extra={"preset_id": preset.id, "preset_name": preset.name},
-                        )
-                        preset.alerts_count = 0
-                        preset.should_do_noise_now = False
                 except Exception:
                     self.logger.exception(
-                        "Failed to search alerts for preset",
+                        "Failed to build the query of preset",
                         extra={"preset_id": preset.id, "preset_name": preset.name},
                     )
-                    pass
+            try:
+                counts = self.elastic_client.count_presets(where_clauses)
+            except Exception:
+                self.logger.exception(
+                    "Failed to search alerts for presets",
+                    extra={"tenant_id": self.tenant_id},
+                )
+                counts = {}
+            for preset in presets:
+                if str(preset.id) not in counts:
+                    continue
+                preset.alerts_count, preset.should_do_noise_now = counts[str(preset.id)]
         self.logger.info(
             "Finished searching alerts for presets",
             extra={"tenant_id": self.tenant_id, "search_mode": self.search_mode},
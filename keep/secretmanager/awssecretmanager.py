@@ -14,6 +14,8 @@ SECRET_MANAGER_TAGS = config("AWS_SECRET_MANAGER_TAGS", default=None)
 ROTATION_ENABLED = config("AWS_SECRET_ROTATION_ENABLED", default=False, cast=bool)
 ROTATION_DAYS = config("AWS_SECRET_ROTATION_DAYS", default=30, cast=int)
 ROTATION_LAMBDA_ARN = config("AWS_SECRET_ROTATION_LAMBDA_ARN", default=None)
+# BatchGetSecretValue accepts up to 20 secret ids per call
+BATCH_GET_SECRET_VALUE_MAX_IDS = 20
 
 
 class AwsSecretManager(BaseSecretManager):
@@ -53,6 +55,7 @@ class AwsSecretManager(BaseSecretManager):
             ClientError: If an AWS-specific error occurs while writing the secret.
             Exception: If any other unexpected error occurs.
         """
+        self.invalidate_cached_secret(secret_name)
         with tracer.start_as_current_span("write_secret"):
             self.logger.info("Writing secret", extra={"secret_name": secret_name})
 
@@ -196,6 +199,51 @@ class AwsSecretManager(BaseSecretManager):
                 )
                 raise
 
+    def _read_secrets(
+        self, secret_names: list[str], is_json: bool
+    ) -> dict[str, str | dict]:
+        """
+        Reads secrets with BatchGetSecretValue, 20 secrets per call.
+        Falls back to concurrent single reads if the batch API is not permitted.
+        """
+        with tracer.start_as_current_span("read_secrets"):
+            secrets = {}
+            try:
+                for i in range(0, len(secret_names), BATCH_GET_SECRET_VALUE_MAX_IDS):
+                    chunk = secret_names[i : i + BATCH_GET_SECRET_VALUE_MAX_IDS]
+                    response = self.client.batch_get_secret_value(SecretIdList=chunk)
+                    for secret in response.get("SecretValues", []):
+                        secret_value = secret["SecretString"]
+                        if is_json:
+                            try:
+                                secret_value = json.loads(secret_value)
+                            except json.JSONDecodeError as e:
+                                self.logger.warning(
+                                    "Failed to parse secret as JSON",
+                                    extra={"secret_name": secret["Name"], "error": str(e)},
+                                )
+                                continue
+                        secrets[secret["Name"]] = secret_value
+                    for error in response.get("Errors", []):
+                        self.logger.warning(
+                            "AWS error while reading secret",
+                            extra={
+                                "secret_name": error.get("SecretId"),
+                                "error": error.get("Message"),
+                                "error_code": error.get("ErrorCode"),
+                            },
+                        )
+            except ClientError as e:
+                self.logger.warning(
+                    "Batch read of secrets failed, falling back to single reads",
+                    extra={
+                        "error": str(e),
+                        "error_code": e.response["Error"]["Code"],
+                    },
+                )
+                return super()._read_secrets(secret_names, is_json)
+            return secrets
+
     def delete_secret(self, secret_name: str) -> None:
         """
         Deletes a secret from AWS Secrets Manager.
@@ -205,6 +253,7 @@ class AwsSecretManager(BaseSecretManager):
             ClientError: If an AWS-specific error occurs while deleting the secret.
             Exception: If any other unexpected error occurs.
         """
+        self.invalidate_cached_secret(secret_name)
         with tracer.start_as_current_span("delete_secret"):
             try:
                 self.client.delete_secret(
@@ -35,8 +35,30 @@ class DbSecretManager(BaseSecretManager):
             if not secret_model:
                 raise KeyError(f"Secret {secret_name} not found")
 
+    def _read_secrets(
+        self, secret_names: list[str], is_json: bool
+    ) -> dict[str, str | dict]:
+        self.logger.info("Getting secrets", extra={"secrets_count": len(secret_names)})
+        with Session(engine) as session:
+            secret_models = session.exec(
+                select(Secret).where(Secret.key.in_(secret_names))
+            ).all()
+
+        secrets = {}
+        for secret_model in secret_models:
+            try:
+                secrets[secret_model.key] = (
+                    json.loads(secret_model.value) if is_json else secret_model.value
+                )
+            except json.JSONDecodeError as e:
+                self.logger.warning(
+                    "Failed to parse secret as JSON",
+                    extra={"secret_name": secret_model.key, "error": str(e)},
+                )
+        return secrets
 
     def write_secret(self, secret_name: str, secret_value: str) -> None:
+        self.invalidate_cached_secret(secret_name)
         self.logger.info("Writing secret", extra={"secret_name": secret_name})        
         with Session(engine) as session:
             secret_model = session.exec(
@@ -67,6 +89,7 @@ class DbSecretManager(BaseSecretManager):
                 raise
 
     def delete_secret(self, secret_name: str) -> None:
+        self.invalidate_cached_secret(secret_name)
         self.logger.info("Deleting secret", extra={"secret_name": secret_name})        
         with Session(engine) as session:
             secret_model = session.exec(
@@ -19,7 +19,23 @@ class FileSecretManager(BaseSecretManager):
         self.logger.debug(f"Read {secret_name}", extra={"is_json": is_json})
         return file_data
 
+    def _read_secrets(
+        self, secret_names: list[str], is_json: bool
+    ) -> dict[str, str | dict]:
+        # local files, threads won't help
+        secrets = {}
+        for secret_name in secret_names:
+            try:
+                secrets[secret_name] = self.read_secret(secret_name, is_json=is_json)
+            except Exception as e:
+                self.logger.warning(
+                    "Could not read secret",
+                    extra={"secret_name": secret_name, "error": str(e)},
+                )
+        return secrets
+
     def write_secret(self, secret_name: str, secret_value: str) -> None:
+        self.invalidate_cached_secret(secret_name)
         path = os.path.join(self.directory, secret_name)
         # Create directory if not exist
         os.makedirs(self.directory, exist_ok=True)
@@ -33,4 +49,5 @@ class FileSecretManager(BaseSecretManager):
             self.logger.debug(f"Wrote {secret_name}")
 
     def delete_secret(self, secret_name: str) -> None:
+        self.invalidate_cached_secret(secret_name)
         os.remove(os.path.join(self.directory, secret_name))
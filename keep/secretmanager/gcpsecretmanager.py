@@ -26,6 +26,7 @@ class GcpSecretManager(BaseSecretManager):
         Raises:
             Exception: If an error occurs while writing the secret.
         """
+        self.invalidate_cached_secret(secret_name)
         with tracer.start_as_current_span("write_secret"):
             self.logger.info("Writing secret", extra={"secret_name": secret_name})
 
@@ -85,6 +86,7 @@ class GcpSecretManager(BaseSecretManager):
             return secret_value
 
     def delete_secret(self, secret_name: str) -> None:
+        self.invalidate_cached_secret(secret_name)
         with tracer.start_as_current_span("delete_secret"):
             # Construct the resource name
             resource_name = f"projects/{self.project_id}/secrets/{secret_name}"
@@ -62,6 +62,7 @@ class KubernetesSecretManager(BaseSecretManager):
         Raises:
             ApiException: If an error occurs while writing the secret.
         """
+        self.invalidate_cached_secret(secret_name)
         # k8s requirements: https://kubernetes.io/docs/concepts/overview/working-with-objects/names/#names
         secret_name = secret_name.replace("_", "-").lower()
         self.logger.info("Writing secret", extra={"secret_name": secret_name})
@@ -123,6 +124,7 @@ class KubernetesSecretManager(BaseSecretManager):
             raise
 
     def delete_secret(self, secret_name: str) -> None:
+        self.invalidate_cached_secret(secret_name)
         secret_name = secret_name.replace("_", "-").lower()
         self.logger.info("Deleting secret", extra={"secret_name": secret_name})
         try:
@@ -1,8 +1,92 @@
 import abc
+import copy
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from keep.api.core.cache_invalidation import CacheEntity, cache_invalidation_bus
+from keep.api.core.config import config
 from keep.contextmanager.contextmanager import ContextManager
 
+SECRET_MANAGER_MAX_WORKERS = config("SECRET_MANAGER_MAX_WORKERS", cast=int, default=10)
+SECRET_MANAGER_CACHE_TTL = config("SECRET_MANAGER_CACHE_TTL", cast=int, default=30)
+
+
+class SecretsCache:
+    """
+    Short lived, process wide cache of secrets read in bulk (e.g. installed providers configurations).
+
+    Secrets written or deleted through any secret manager in this process are invalidated immediately,
+    the secrets of providers changed by other processes once the change is published, and any other
+    change once the TTL expires.
+    """
+
+    _instance = None
+    __initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not self.__initialized:
+            self.ttl = SECRET_MANAGER_CACHE_TTL
+            self.cache: dict[tuple[str, bool], tuple[float, str | dict]] = {}
+            self.lock = threading.Lock()
+            self.__initialized = True
+
+    def get(self, secret_name: str, is_json: bool):
+        cache_invalidation_bus.poll()
+        with self.lock:
+            entry = self.cache.get((secret_name, is_json))
+            if entry is None:
+                return None
+            expires_at, secret_value = entry
+            if expires_at < time.monotonic():
+                del self.cache[(secret_name, is_json)]
+                return None
+        # callers may mutate the returned configuration
+        return copy.deepcopy(secret_value)
+
+    def set(self, secret_name: str, is_json: bool, secret_value: str | dict):
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            self.cache[(secret_name, is_json)] = (
+                time.monotonic() + self.ttl,
+                copy.deepcopy(secret_value),
+            )
+
+    def invalidate(self, secret_name: str | None = None):
+        with self.lock:
+            if secret_name is None:
+                self.cache.clear()
+                return
+            self.cache.pop((secret_name, True), None)
+            self.cache.pop((secret_name, False), None)
+
+    def invalidate_prefix(self, prefix: str):
+        with self.lock:
+            self.cache = {
+                key: entry
+                for key, entry in self.cache.items()
+                if not key[0].startswith(prefix)
+            }
+
+
+def get_secrets_cache() -> SecretsCache:
+    return SecretsCache()
+
+
+def _invalidate_providers_secrets(tenant_id: str | None):
+    # provider secrets are named {tenant_id}_{provider_type}_{provider_id}
+    get_secrets_cache().invalidate_prefix(f"{tenant_id}_" if tenant_id else "")
+
+
+cache_invalidation_bus.subscribe(CacheEntity.PROVIDERS, _invalidate_providers_secrets)
+
 
 class BaseSecretManager(metaclass=abc.ABCMeta):
     def __init__(self, context_manager: ContextManager, **kwargs):
@@ -26,6 +110,85 @@ class BaseSecretManager(metaclass=abc.ABCMeta):
             " for {}".format(self.__class__.__name__)
         )
 
+    def read_secrets(
+        self, secret_names: list[str], is_json: bool = False, use_cache: bool = False
+    ) -> dict[str, str | dict]:
+        """
+        Read multiple secrets from the secret manager.
+
+        Secrets that could not be read are logged and omitted from the result.
+
+        Args:
+            secret_names (list[str]): The names of the secrets to read.
+            is_json (bool): Whether to try and convert to python dictionary or not (json.loads)
+            use_cache (bool): Whether to serve and store the secrets in the short lived secrets cache.
+
+        Returns:
+            dict[str, str | dict]: The secret values by secret name.
+        """
+        secrets = {}
+        secrets_cache = get_secrets_cache()
+        secret_names_to_read = []
+
+        for secret_name in dict.fromkeys(secret_names):
+            cached_secret = (
+                secrets_cache.get(secret_name, is_json) if use_cache else None
+            )
+            if cached_secret is not None:
+                secrets[secret_name] = cached_secret
+            else:
+                secret_names_to_read.append(secret_name)
+
+        if secret_names_to_read:
+            read_secrets = self._read_secrets(secret_names_to_read, is_json)
+            if use_cache:
+                for secret_name, secret_value in read_secrets.items():
+                    secrets_cache.set(secret_name, is_json, secret_value)
+            secrets.update(read_secrets)
+
+        return secrets
+
+    def _read_secrets(
+        self, secret_names: list[str], is_json: bool
+    ) -> dict[str, str | dict]:
+        """
+        Read multiple secrets, concurrently with a bounded thread pool.
+        Secret managers whose backend supports batch reads should override this method.
+        """
+
+        def _read(secret_name: str):
+            try:
+                return self.read_secret(secret_name=secret_name, is_json=is_json)
+            except Exception as e:
+                self.logger.warning(
+                    "Could not read secret",
+                    extra={"secret_name": secret_name, "error": str(e)},
+                )
+                return None
+
+        if len(secret_names) == 1:
+            secret_values = [_read(secret_names[0])]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(SECRET_MANAGER_MAX_WORKERS, len(secret_names))
+            ) as executor:
+                secret_values = list(executor.map(_read, secret_names))
+
+        return {
+            secret_name: secret_value
+            for secret_name, secret_value in zip(secret_names, secret_values)
+            if secret_value is not None
+        }
+
+    def invalidate_cached_secret(self, secret_name: str) -> None:
+        """
+        Drop a secret from the secrets cache, must be called whenever a secret is written or deleted.
+
+        Args:
+            secret_name (str): The name of the secret to invalidate.
+        """
+        get_secrets_cache().invalidate(secret_name)
+
     @abc.abstractmethod
     def write_secret(self, secret_name: str, secret_value: str) -> None:
         """
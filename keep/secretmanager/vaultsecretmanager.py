@@ -44,6 +44,7 @@ class VaultSecretManager(BaseSecretManager):
         self.logger.info("Using Vault Secret Manager")
 
     def write_secret(self, secret_name: str, secret_value: str) -> None:
+        self.invalidate_cached_secret(secret_name)
         self.logger.info("Writing secret", extra={"secret_name": secret_name})
         self.client.secrets.kv.v2.create_or_update_secret(
             path=secret_name, secret={"value": secret_value}
@@ -68,6 +69,7 @@ class VaultSecretManager(BaseSecretManager):
         return secret_value
 
     def delete_secret(self, secret_name: str) -> None:
+        self.invalidate_cached_secret(secret_name)
         self.logger.info("Deleting secret", extra={"secret_name": secret_name})
         self.client.secrets.kv.delete_metadata_and_all_versions(secret_name)
         self.logger.info(
@@ -0,0 +1,145 @@
+"""
+Per-tenant in-memory index of topology services, used by topology mapping rules.
+
+Matching an alert against the topology is a dict lookup instead of a SELECT per alert.
+The index of a tenant is built on first use, dropped whenever the topology of the
+tenant changes in any process (see invalidate) and rebuilt after
+KEEP_TOPOLOGY_INDEX_TTL seconds at the latest in case a change was missed.
+
+The index only serves the matches whose result is a plain string equality, so that it
+returns what the query would: string columns matched with a string (or None) on sqlite
+and PostgreSQL. The rest (e.g. the JSON tags column, or MySQL and SQL Server whose default
+collations compare case-insensitively) still runs the query.
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import String
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select
+
+from keep.api.core import db
+from keep.api.core.cache_invalidation import CacheEntity, cache_invalidation_bus
+from keep.api.core.config import config
+from keep.api.models.db.topology import TopologyService
+
+TOPOLOGY_INDEX_ENABLED = config("KEEP_TOPOLOGY_INDEX_ENABLED", cast=bool, default=True)
+TOPOLOGY_INDEX_TTL = config("KEEP_TOPOLOGY_INDEX_TTL", cast=int, default=300)
+
+logger = logging.getLogger(__name__)
+
+
+# the dialects whose default string comparison is exact
+INDEXED_DIALECTS = ("postgresql", "sqlite")
+
+
+def _is_indexed_match(matcher: str, value) -> bool:
+    column = TopologyService.__table__.columns.get(matcher)
+    return (
+        column is not None
+        and isinstance(column.type, String)
+        and (value is None or isinstance(value, str))
+    )
+
+
+class _TenantTopologyIndex:
+    def __init__(self, services: list[TopologyService]):
+        self.services = services
+        self.loaded_at = time.monotonic()
+        self._lookups = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, matchers_value: dict) -> TopologyService | None:
+        attributes = tuple(sorted(matchers_value))
+        lookup = self._lookups.get(attributes)
+        if lookup is None:
+            with self._lock:
+                lookup = self._lookups.get(attributes)
+                if lookup is None:
+                    lookup = self._build_lookup(attributes)
+                    self._lookups[attributes] = lookup
+
+        return lookup.get(tuple(matchers_value[attribute] for attribute in attributes))
+
+    def _build_lookup(self, attributes: tuple[str, ...]) -> dict:
+        lookup = {}
+        # services are ordered by id, the first match wins like the SQL query did
+        for service in self.services:
+            key = tuple(getattr(service, attribute) for attribute in attributes)
+            lookup.setdefault(key, service)
+        return lookup
+
+
+class TopologyServiceIndex:
+    def __init__(self, ttl: int = TOPOLOGY_INDEX_TTL):
+        self.ttl = ttl
+        self._tenants: dict[str, _TenantTopologyIndex] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, tenant_id: str) -> _TenantTopologyIndex:
+        with Session(db.engine) as session:
+            services = session.exec(
+                select(TopologyService)
+                .where(TopologyService.tenant_id == tenant_id)
+                .options(selectinload(TopologyService.applications))
+                .order_by(TopologyService.id)
+            ).all()
+        logger.info(
+            "Loaded topology index",
+            extra={"tenant_id": tenant_id, "services_count": len(services)},
+        )
+        return _TenantTopologyIndex(list(services))
+
+    def _get_tenant_index(self, tenant_id: str) -> _TenantTopologyIndex:
+        cache_invalidation_bus.poll()
+        tenant_index = self._tenants.get(tenant_id)
+        if tenant_index and time.monotonic() - tenant_index.loaded_at < self.ttl:
+            return tenant_index
+        with self._lock:
+            tenant_index = self._tenants.get(tenant_id)
+            if tenant_index is None or (
+                time.monotonic() - tenant_index.loaded_at >= self.ttl
+            ):
+                tenant_index = self._load(tenant_id)
+                self._tenants[tenant_id] = tenant_index
+        return tenant_index
+
+    def get_service(
+        self, tenant_id: str, matchers_value: dict
+    ) -> TopologyService | None:
+        """
+        Get the first topology service whose attributes equal the given values.
+
+        The returned service is detached and shared, it must not be modified.
+        """
+        return self._get_tenant_index(tenant_id).lookup(matchers_value)
+
+    def invalidate(self, tenant_id: str | None = None):
+        with self._lock:
+            if tenant_id is None:
+                self._tenants.clear()
+            else:
+                self._tenants.pop(tenant_id, None)
+
+
+topology_index = TopologyServiceIndex()
+cache_invalidation_bus.subscribe(CacheEntity.TOPOLOGY, topology_index.invalidate)
+
+
+def get_topology_data_by_dynamic_matcher(
+    tenant_id: str, matchers_value: dict
+) -> TopologyService | None:
+    if (
+        not TOPOLOGY_INDEX_ENABLED
+        or not matchers_value
+        or db.engine.dialect.name not in INDEXED_DIALECTS
+        or not all(
+            _is_indexed_match(matcher, value)
+            for matcher, value in matchers_value.items()
+        )
+    ):
+        # unknown columns still raise from the query like they always did
+        return db.get_topology_data_by_dynamic_matcher(tenant_id, matchers_value)
+    return topology_index.get_service(tenant_id, matchers_value)
@@ -1,17 +1,21 @@
 import logging
 import os
 import threading
+import time
 from collections import defaultdict
+from datetime import datetime, timedelta
 from typing import Dict, Optional, Set
 
 from sqlmodel import select
 
 from keep.api.core.config import config
 from keep.api.core.db import (
+    KEEP_AUDIT_EVENTS_ENABLED,
     add_alerts_to_incident,
     assign_alert_to_incident,
     enrich_incidents_with_alerts,
     existed_or_new_session,
+    get_alert_changes_since,
     get_last_alerts,
 )
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
@@ -61,6 +65,21 @@ class TopologyProcessor:
         self.look_back_window = config(
             "KEEP_TOPOLOGY_PROCESSOR_LOOK_BACK_WINDOW", cast=int, default=15
         )  # minutes
+        # Between full reconciles only the alerts that changed since the last run
+        # (according to the alert audit trail, written by ingestion and enrichment) are processed
+        self.full_reconcile_interval = config(
+            "KEEP_TOPOLOGY_PROCESSOR_FULL_RECONCILE_INTERVAL", cast=int, default=3600
+        )  # seconds
+        # audit entries are timestamped before they are committed, so we look a bit
+        # behind the watermark to catch entries committed out of order
+        self.changes_overlap = timedelta(
+            seconds=config(
+                "KEEP_TOPOLOGY_PROCESSOR_CHANGES_OVERLAP", cast=int, default=5
+            )
+        )
+        self._watermarks: Dict[str, datetime] = {}
+        self._seen_changes: Dict[str, Dict] = {}
+        self._last_full_reconcile: Dict[str, float] = {}
 
     async def start(self):
         """Runs the topology processor in server mode"""
@@ -132,50 +151,154 @@ class TopologyProcessor:
 
     def _process_tenant(self, tenant_id: str):
         """Process topology for a single tenant"""
-        self.logger.info(f"Processing topology for tenant {tenant_id}")
+        last_full_reconcile = self._last_full_reconcile.get(tenant_id)
+        if (
+            not KEEP_AUDIT_EVENTS_ENABLED
+            or last_full_reconcile is None
+            or time.monotonic() - last_full_reconcile >= self.full_reconcile_interval
+        ):
+            # start watching for changes before reconciling so none are missed
+            self._watermarks[tenant_id] = datetime.utcnow() - self.changes_overlap
+            self._seen_changes[tenant_id] = {}
+            self._last_full_reconcile[tenant_id] = time.monotonic()
+            self._reconcile_tenant(tenant_id)
+            return
 
-        # 1. Get last alerts for the tenant
-        topology_data = self._get_topology_data(tenant_id)
-        applications = self._get_applications_data(tenant_id)
-        services = [t.service for t in topology_data]
-        if not topology_data:
-            self.logger.info(f"No topology data found for tenant {tenant_id}")
+        fingerprints = self._get_changed_fingerprints(tenant_id)
+        if not fingerprints:
+            self.logger.info(f"No alert changes for tenant {tenant_id}")
             return
+        self._process_changed_alerts(tenant_id, fingerprints)
+
+    def _get_changed_fingerprints(self, tenant_id: str) -> Set[str]:
+        """Get the fingerprints of the alerts changed since the last run"""
+        watermark = self._watermarks[tenant_id]
+        seen_changes = self._seen_changes[tenant_id]
+        changes = [
+            change
+            for change in get_alert_changes_since(
+                tenant_id, watermark - self.changes_overlap
+            )
+            if change[0] not in seen_changes
+        ]
+        if not changes:
+            return set()
+
+        watermark = max(watermark, max(change[2] for change in changes))
+        seen_changes.update({change[0]: change[2] for change in changes})
+        # only entries within the overlap window can be returned again
+        self._seen_changes[tenant_id] = {
+            change_id: timestamp
+            for change_id, timestamp in seen_changes.items()
+            if timestamp > watermark - self.changes_overlap
+        }
+        self._watermarks[tenant_id] = watermark
+        return {change[1] for change in changes}
 
-        # Currently topology-based incidents are created for applications only
-        # SHAHAR: this is harder to implement service-related incidents without applications
-        # TODO: add support for service-related incidents
+    def _process_changed_alerts(self, tenant_id: str, fingerprints: Set[str]):
+        """Update the incidents of the applications the changed alerts belong to"""
+        applications = self._get_applications_data(tenant_id)
         if not applications:
             self.logger.info(f"No applications found for tenant {tenant_id}")
             return
 
+        service_to_applications = defaultdict(list)
+        for application in applications:
+            for service in application.services:
+                service_to_applications[service.service].append(application)
+
+        db_alerts = get_last_alerts(
+            tenant_id,
+            with_incidents=True,
+            fingerprints=list(fingerprints),
+            limit=len(fingerprints),
+        )
+        applications_to_alerts = defaultdict(lambda: defaultdict(list))
+        for alert in convert_db_alerts_to_dto_alerts(db_alerts):
+            for application in service_to_applications.get(alert.service, []):
+                applications_to_alerts[application.id][alert.service].append(alert)
+
+        self.logger.info(
+            f"Processing {len(fingerprints)} changed alerts for tenant {tenant_id}",
+            extra={"affected_applications": len(applications_to_alerts)},
+        )
+        services_to_alerts = None
+        for application in applications:
+            if application.id not in applications_to_alerts:
+                continue
+            incident = self._get_application_based_incident(tenant_id, application)
+            if incident:
+                self._update_application_based_incident(
+                    tenant_id,
+                    application,
+                    incident,
+                    applications_to_alerts[application.id],
+                )
+            else:
+                # a new incident gets the alerts of all the application's services,
+                # not only the changed ones
+                if services_to_alerts is None:
+                    services_to_alerts = self._get_services_to_alerts(tenant_id)
+                self._create_application_based_incident(
+                    tenant_id,
+                    application,
+                    self._get_application_services_to_alerts(
+                        services_to_alerts, application
+                    ),
+                )
+
+    def _get_services_to_alerts(self, tenant_id: str) -> Dict[str, list[AlertDto]]:
+        """Get the last alerts of the tenant grouped by service"""
         # TODO: get only alerts with service ( if lot of alerts it will be hidden)
         db_last_alerts = get_last_alerts(tenant_id, with_incidents=True)
         last_alerts = convert_db_alerts_to_dto_alerts(db_last_alerts)
 
         services_to_alerts = defaultdict(list)
-        # group by service
         for alert in last_alerts:
             if alert.service:
-                if alert.service not in services:
-                    # ignore alerts for services not in topology data
-                    self.logger.debug(
-                        f"Alert service {alert.service} not in topology data"
-                    )
-                    continue
                 services_to_alerts[alert.service].append(alert)
+        return services_to_alerts
+
+    @staticmethod
+    def _get_application_services_to_alerts(
+        services_to_alerts: Dict[str, list[AlertDto]], application
+    ) -> Dict[str, list[AlertDto]]:
+        return {
+            service.service: services_to_alerts[service.service]
+            for service in application.services
+            if service.service in services_to_alerts
+        }
+
+    def _reconcile_tenant(self, tenant_id: str):
+        """Reconcile the incidents of all the applications of a tenant with its last alerts"""
+        self.logger.info(f"Reconciling topology for tenant {tenant_id}")
+
+        # 1. Get last alerts for the tenant
+        topology_data = self._get_topology_data(tenant_id)
+        applications = self._get_applications_data(tenant_id)
+        if not topology_data:
+            self.logger.info(f"No topology data found for tenant {tenant_id}")
+            return
+
+        # Currently topology-based incidents are created for applications only
+        # SHAHAR: this is harder to implement service-related incidents without applications
+        # TODO: add support for service-related incidents
+        if not applications:
+            self.logger.info(f"No applications found for tenant {tenant_id}")
+            return
+
+        # alerts for services not in topology data are ignored, since applications
+        # are made of topology services
+        services_to_alerts = self._get_services_to_alerts(tenant_id)
 
         for application in applications:
             # check if there is an incident for the application
             incident = self._get_application_based_incident(tenant_id, application)
-            application_services = [t.service for t in application.services]
-            services_with_alerts = [
-                service
-                for service in application_services
-                if service in services_to_alerts
-            ]
+            application_services_to_alerts = self._get_application_services_to_alerts(
+                services_to_alerts, application
+            )
             # if none of the services in the application have alerts, we don't need to create an incident
-            if not services_with_alerts:
+            if not application_services_to_alerts:
                 self.logger.info(
                     f"No alerts found for application {application.name}, skipping"
                 )
@@ -193,7 +316,7 @@ class TopologyProcessor:
                 )
                 # update the incident with new alerts / status / severity
                 self._update_application_based_incident(
-                    tenant_id, application, incident, services_to_alerts
+                    tenant_id, application, incident, application_services_to_alerts
                 )
             else:
                 self.logger.info(
@@ -201,7 +324,7 @@ class TopologyProcessor:
                 )
                 # create a new incident with the alerts
                 self._create_application_based_incident(
-                    tenant_id, application, services_to_alerts
+                    tenant_id, application, application_services_to_alerts
                 )
 
     def _get_topology_based_incidents(self, tenant_id: str) -> Dict[str, Incident]:
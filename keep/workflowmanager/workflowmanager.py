@@ -285,18 +285,21 @@ class WorkflowManager:
             raise
 
     def insert_events(self, tenant_id, events: typing.List[AlertDto | IncidentDto]):
+        if not events:
+            return
+        # read once for the whole batch of events
+        self.logger.info("Getting all workflows", extra={"tenant_id": tenant_id})
+        all_workflow_models = self.workflow_store.get_all_workflows(
+            tenant_id, exclude_disabled=True
+        )
+        self.logger.info(
+            "Got all workflows",
+            extra={
+                "num_of_workflows": len(all_workflow_models),
+                "tenant_id": tenant_id,
+            },
+        )
         for event in events:
-            self.logger.info("Getting all workflows", extra={"tenant_id": tenant_id})
-            all_workflow_models = self.workflow_store.get_all_workflows(
-                tenant_id, exclude_disabled=True
-            )
-            self.logger.info(
-                "Got all workflows",
-                extra={
-                    "num_of_workflows": len(all_workflow_models),
-                    "tenant_id": tenant_id,
-                },
-            )
             for workflow_model in all_workflow_models:
                 workflow = self._get_workflow_from_store(tenant_id, workflow_model)
 
@@ -0,0 +1,102 @@
+"""
+Compare the size and the read latency of an alert history before and after compaction.
+
+Inserts --occurrences occurrences of a flapping alert with large labels into the
+database of DATABASE_CONNECTION_STRING (migrated), measures the stored size and the
+history query (get_alerts_by_fingerprint and the conversion to AlertDto), compacts the
+history with compact_alert_history and measures again. It's destructive, run it on a
+throwaway database.
+
+Usage:
+    DATABASE_CONNECTION_STRING=postgresql+psycopg2://... \\
+        python scripts/benchmark_alert_history.py [--occurrences 1000] [--runs 5]
+"""
+
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, select
+
+from keep.api.core.alert_history import compact_alert_history
+from keep.api.core.db import engine, get_alerts_by_fingerprint
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.db.alert import Alert, AlertPayload
+from keep.api.utils.enrichment_helpers import convert_db_alerts_to_dto_alerts
+
+
+def _insert_history(session: Session, fingerprint: str, occurrences: int):
+    start = datetime.utcnow() - timedelta(hours=1)
+    labels = {f"label_{i}": f"value-{i}" * 4 for i in range(40)}
+    for i in range(occurrences):
+        status = "firing" if i % 3 else "resolved"
+        session.add(
+            Alert(
+                tenant_id=SINGLE_TENANT_UUID,
+                provider_type="prometheus",
+                provider_id="benchmark",
+                event={
+                    "id": fingerprint,
+                    "name": f"High latency on {fingerprint}",
+                    "status": status,
+                    "severity": "critical",
+                    "source": ["prometheus"],
+                    "fingerprint": fingerprint,
+                    "description": "p99 latency is above the threshold " * 20,
+                    "labels": labels,
+                    "lastReceived": (start + timedelta(seconds=i)).isoformat(),
+                },
+                fingerprint=fingerprint,
+                alert_hash=f"{fingerprint}-{status}",
+                timestamp=start + timedelta(seconds=i),
+            )
+        )
+    session.commit()
+
+
+def _stored_bytes(session: Session, fingerprint: str) -> int:
+    alerts = session.exec(
+        select(Alert.event).where(Alert.fingerprint == fingerprint)
+    ).all()
+    payloads = session.exec(
+        select(AlertPayload.event).where(
+            AlertPayload.payload_hash.in_(
+                select(Alert.payload_hash).where(Alert.fingerprint == fingerprint)
+            )
+        )
+    ).all()
+    return sum(len(json.dumps(event)) for event in [*alerts, *payloads])
+
+
+def _history_latency(fingerprint: str, occurrences: int, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        alerts = get_alerts_by_fingerprint(
+            SINGLE_TENANT_UUID, fingerprint, limit=occurrences
+        )
+        convert_db_alerts_to_dto_alerts(alerts)
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--occurrences", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    fingerprint = f"benchmark-{uuid.uuid4()}"
+    with Session(engine) as session:
+        _insert_history(session, fingerprint, args.occurrences)
+        print(f"{'':<12} {'stored':>10} {'history query':>14}")
+        for name in ("uncompacted", "compacted"):
+            if name == "compacted":
+                compact_alert_history(session, tenant_id=SINGLE_TENANT_UUID)
+            size = _stored_bytes(session, fingerprint)
+            latency = _history_latency(fingerprint, args.occurrences, args.runs)
+            print(f"{name:<12} {size / 1024:>8.0f}KB {latency * 1000:>12.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Compare the alerts queries and the retention on a plain and a partitioned alert table.
+
+Fills the database of DATABASE_CONNECTION_STRING (PostgreSQL or MySQL, migrated, with
+no alerts) with synthetic alerts, measures get_alerts_by_fingerprint, get_last_alerts
+and deleting the oldest month, converts the table with partition_alert_table and
+measures again. It's destructive, run it on a throwaway database.
+
+Usage:
+    DATABASE_CONNECTION_STRING=postgresql+psycopg2://... \\
+        python scripts/benchmark_alert_partitions.py [--rows 50000000] [--months 6]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import func, text
+from sqlmodel import Session, select
+
+from keep.api.core.alert_partitions import (
+    drop_expired_alert_partitions,
+    partition_alert_table,
+)
+from keep.api.core.db import engine, get_alerts_by_fingerprint, get_last_alerts
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.db.alert import Alert, LastAlert
+
+BATCH_SIZE = 10000
+
+
+def _event(fingerprint: str, timestamp: datetime) -> dict:
+    return {
+        "name": f"alert-{fingerprint}",
+        "status": "firing",
+        "severity": "critical",
+        "fingerprint": fingerprint,
+        "lastReceived": timestamp.isoformat(),
+    }
+
+
+def populate(session: Session, rows: int, months: int, fingerprints: int):
+    start = datetime.utcnow() - timedelta(days=30 * months)
+    step = (datetime.utcnow() - start) / rows
+    if session.bind.dialect.name == "postgresql":
+        # generated server side, batch by batch
+        for offset in range(0, rows, BATCH_SIZE * 10):
+            session.execute(
+                text(
+                    "INSERT INTO alert (id, tenant_id, timestamp, provider_type, "
+                    "provider_id, event, fingerprint, alert_hash) "
+                    "SELECT gen_random_uuid(), :tenant_id, "
+                    ":start + i * :step, 'prometheus', 'benchmark', "
+                    "json_build_object('name', 'alert-fp-' || (i % :fingerprints), "
+                    "'status', 'firing', 'fingerprint', 'fp-' || (i % :fingerprints)), "
+                    "'fp-' || (i % :fingerprints), md5(i::text) "
+                    "FROM generate_series(:first, :last) AS i"
+                ),
+                {
+                    "tenant_id": SINGLE_TENANT_UUID,
+                    "start": start,
+                    "step": step,
+                    "fingerprints": fingerprints,
+                    "first": offset,
+                    "last": min(offset + BATCH_SIZE * 10, rows) - 1,
+                },
+            )
+            session.commit()
+    else:
+        for offset in range(0, rows, BATCH_SIZE):
+            batch = []
+            for i in range(offset, min(offset + BATCH_SIZE, rows)):
+                fingerprint = f"fp-{i % fingerprints}"
+                timestamp = start + i * step
+                batch.append(
+                    {
+                        "id": uuid.uuid4(),
+                        "tenant_id": SINGLE_TENANT_UUID,
+                        "timestamp": timestamp,
+                        "provider_type": "prometheus",
+                        "provider_id": "benchmark",
+                        "event": _event(fingerprint, timestamp),
+                        "fingerprint": fingerprint,
+                        "alert_hash": str(i),
+                    }
+                )
+            session.execute(Alert.__table__.insert(), batch)
+            session.commit()
+
+    # the last occurrence of every fingerprint
+    latest = (
+        select(
+            Alert.fingerprint,
+            func.max(Alert.timestamp).label("timestamp"),
+            func.min(Alert.timestamp).label("first_timestamp"),
+        )
+        .group_by(Alert.fingerprint)
+        .subquery()
+    )
+    for fingerprint, alert_id, timestamp, first_timestamp in session.exec(
+        select(
+            Alert.fingerprint, Alert.id, latest.c.timestamp, latest.c.first_timestamp
+        ).join(
+            latest,
+            (latest.c.fingerprint == Alert.fingerprint)
+            & (latest.c.timestamp == Alert.timestamp),
+        )
+    ).all():
+        session.add(
+            LastAlert(
+                tenant_id=SINGLE_TENANT_UUID,
+                fingerprint=fingerprint,
+                alert_id=alert_id,
+                timestamp=timestamp,
+                first_timestamp=first_timestamp,
+                alert_hash="",
+            )
+        )
+    session.commit()
+
+
+def _timed(function, runs: int) -> dict:
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": round(statistics.median(durations), 1),
+        "max_ms": round(max(durations), 1),
+    }
+
+
+def measure_queries(fingerprints: int, runs: int) -> dict:
+    return {
+        "get_alerts_by_fingerprint": _timed(
+            lambda: get_alerts_by_fingerprint(
+                SINGLE_TENANT_UUID,
+                f"fp-{random.randrange(fingerprints)}",
+                limit=1000,
+            ),
+            runs,
+        ),
+        "get_last_alerts_last_day": _timed(
+            lambda: get_last_alerts(SINGLE_TENANT_UUID, limit=1000, timeframe=1),
+            runs,
+        ),
+    }
+
+
+def _oldest_month(session: Session, table: str) -> tuple[datetime, datetime]:
+    first = session.execute(text(f"SELECT min(timestamp) FROM {table}")).scalar()
+    lower = first.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return lower, (lower + timedelta(days=32)).replace(day=1)
+
+
+def measure_retention(session: Session, partitioned: bool) -> dict:
+    start = time.perf_counter()
+    if partitioned:
+        lower, upper = _oldest_month(session, "alert")
+        rows = drop_expired_alert_partitions(session, upper)
+    else:
+        # the copy kept by the PostgreSQL conversion, batch deletes as the retention
+        table = (
+            "alert_unpartitioned"
+            if session.bind.dialect.name == "postgresql"
+            else "alert"
+        )
+        lower, upper = _oldest_month(session, table)
+        rows = 0
+        while True:
+            deleted = session.execute(
+                text(
+                    f"DELETE FROM {table} WHERE id IN (SELECT id FROM (SELECT id FROM "
+                    f"{table} WHERE timestamp < :upper ORDER BY timestamp "
+                    f"LIMIT {BATCH_SIZE // 10}) AS batch)"
+                ),
+                {"upper": upper},
+            ).rowcount
+            session.commit()
+            rows += deleted
+            if not deleted:
+                break
+    return {
+        "month": lower.strftime("%Y-%m"),
+        "rows": rows,
+        "seconds": round(time.perf_counter() - start, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--fingerprints", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {}
+    with Session(engine) as session:
+        start = time.perf_counter()
+        populate(session, args.rows, args.months, args.fingerprints)
+        results["populate_seconds"] = round(time.perf_counter() - start, 1)
+        results["plain"] = measure_queries(args.fingerprints, args.runs)
+
+        start = time.perf_counter()
+        partition_alert_table(session, interval="month")
+        results["partition_seconds"] = round(time.perf_counter() - start, 1)
+    with patch("keep.api.core.db.ALERT_PARTITIONING_ENABLED", True):
+        results["partitioned"] = measure_queries(args.fingerprints, args.runs)
+
+    with Session(engine) as session:
+        # MySQL converts in place, the batch deletes run on the partitioned table
+        results["retention_batch_delete"] = measure_retention(session, False)
+        results["retention_drop_partition"] = measure_retention(session, True)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
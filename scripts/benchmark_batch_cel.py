@@ -0,0 +1,108 @@
+"""
+Compare filtering alerts with celpy alert by alert and with the batch CEL evaluator.
+
+Builds synthetic alerts and their activations, then filters them with a set of preset
+like CEL expressions, once per alert with celpy (KEEP_BATCH_CEL_ENABLED=false) and once
+per batch (see keep/rulesengine/batch_cel.py), and checks both return the same alerts.
+
+Usage:
+    python scripts/benchmark_batch_cel.py [--alerts 50000] [--celpy-sample 5000]
+
+celpy is measured on the first --celpy-sample alerts and extrapolated, it takes minutes
+on 50k alerts.
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
+from keep.rulesengine.batch_cel import AlertBatch
+from keep.rulesengine.rulesengine import RulesEngine
+
+EXPRESSIONS = [
+    "status == 'firing'",
+    "severity > 'warning' && status != 'resolved'",
+    "source == 'grafana' || source.contains('datadog')",
+    "labels.team == 'sre'",
+    "labels.team in ['sre', 'noc'] && labels.region == 'eu'",
+    "name.startsWith('db-') && !(service == 'api')",
+    "(labels.team == 'sre' || service in ['api', 'db']) && severity >= 'high'",
+    "assignee == 'oncall@keephq.dev'",
+]
+
+
+def build_alerts(count: int) -> list[AlertDto]:
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    alerts = []
+    for i in range(count):
+        labels = {"region": rng.choice(["eu", "us", "ap"])}
+        if rng.random() < 0.7:
+            labels["team"] = rng.choice(["sre", "noc", "dba", "web"])
+        alerts.append(
+            AlertDto(
+                id=f"id-{i}",
+                name=f"{rng.choice(['db', 'api', 'web'])}-alert-{i % 500}",
+                status=rng.choice(list(AlertStatus)),
+                severity=rng.choice(list(AlertSeverity)),
+                lastReceived=(now - timedelta(seconds=i)).isoformat(),
+                source=[rng.choice(["grafana", "prometheus", "datadog"])],
+                service=rng.choice(["api", "db", "web"]),
+                assignee=rng.choice(["oncall@keephq.dev", "sre@keephq.dev"]),
+                fingerprint=f"fp-{i}",
+                labels=labels,
+            )
+        )
+    return alerts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--alerts", type=int, default=50000)
+    parser.add_argument("--celpy-sample", type=int, default=5000)
+    args = parser.parse_args()
+
+    alerts = build_alerts(args.alerts)
+    start = time.perf_counter()
+    activations = RulesEngine.get_alerts_activation(alerts)
+    print(f"{len(alerts)} activations built in {time.perf_counter() - start:.2f}s")
+
+    rules_engine = RulesEngine()
+    sample = min(args.celpy_sample, len(alerts))
+    batch = AlertBatch(activations)
+    sample_batch = AlertBatch(activations[:sample])
+    total_celpy = total_batch = 0.0
+    print(f"{'expression':<75} {'matched':>8} {'celpy':>9} {'batch':>8} {'speedup':>8}")
+    for cel in EXPRESSIONS:
+        with patch("keep.rulesengine.rulesengine.BATCH_CEL_ENABLED", False):
+            start = time.perf_counter()
+            expected = rules_engine.filter_alerts(
+                alerts[:sample], cel, activations[:sample]
+            )
+            celpy_time = (time.perf_counter() - start) * len(alerts) / sample
+
+        start = time.perf_counter()
+        filtered = rules_engine.filter_alerts(alerts, cel, activations, batch)
+        batch_time = time.perf_counter() - start
+
+        sample_filtered = rules_engine.filter_alerts(
+            alerts[:sample], cel, activations[:sample], sample_batch
+        )
+        assert [a.id for a in sample_filtered] == [a.id for a in expected], cel
+        total_celpy += celpy_time
+        total_batch += batch_time
+        print(
+            f"{cel:<75} {len(filtered):>8} {celpy_time:>8.2f}s {batch_time:>7.3f}s "
+            f"{celpy_time / batch_time:>7.0f}x"
+        )
+    print(
+        f"{'total':<75} {'':>8} {total_celpy:>8.2f}s {total_batch:>7.3f}s "
+        f"{total_celpy / total_batch:>7.0f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
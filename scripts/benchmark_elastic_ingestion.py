@@ -0,0 +1,67 @@
+"""
+Compare the Elasticsearch write throughput of the ingestion per refresh strategy.
+
+Indexes batches of synthetic alerts the way the ingestion does, a client per batch, with
+ELASTIC_REFRESH_STRATEGY set to true, wait_for and interval in turn, and drops the index
+afterwards. It's destructive, point ELASTIC_HOSTS and ELASTIC_INDEX_SUFFIX to a
+throwaway index.
+
+Usage:
+    ELASTIC_ENABLED=true ELASTIC_HOSTS=http://localhost:9200 ELASTIC_USER=elastic \\
+        ELASTIC_PASSWORD=... ELASTIC_INDEX_SUFFIX=benchmark \\
+        python scripts/benchmark_elastic_ingestion.py [--batches 50] [--batch-size 20]
+"""
+
+import argparse
+import datetime
+import os
+import time
+from unittest.mock import patch
+
+from keep.api.core import elastic
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.core.elastic import ElasticClient
+from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
+
+REFRESH_STRATEGIES = ["true", "wait_for", "interval"]
+
+
+def _alerts(count: int, batch: int) -> list[AlertDto]:
+    return [
+        AlertDto(
+            id=f"alert-{batch}-{i}",
+            name=f"Alert {i}",
+            status=AlertStatus.FIRING,
+            severity=AlertSeverity.CRITICAL,
+            lastReceived=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            source=["benchmark"],
+            fingerprint=f"fingerprint-{batch}-{i}",
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batches", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=20)
+    args = parser.parse_args()
+
+    alerts = args.batches * args.batch_size
+    for refresh_strategy in REFRESH_STRATEGIES:
+        with patch.dict(
+            os.environ, {"ELASTIC_REFRESH_STRATEGY": refresh_strategy}
+        ), patch.object(elastic, "_refresh_interval_indices", set()):
+            client = ElasticClient(tenant_id=SINGLE_TENANT_UUID)
+            start = time.perf_counter()
+            for batch in range(args.batches):
+                ElasticClient(tenant_id=SINGLE_TENANT_UUID).index_alerts(
+                    _alerts(args.batch_size, batch)
+                )
+            duration = time.perf_counter() - start
+            client.drop_index()
+        print(f"refresh={refresh_strategy:<10} {alerts / duration:>8.0f} alerts/s")
+
+
+if __name__ == "__main__":
+    main()
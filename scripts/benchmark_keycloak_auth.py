@@ -0,0 +1,77 @@
+"""
+Compare the Keycloak authentication latency per request with and without the auth cache.
+
+Authenticates and authorizes the same token against a local stand-in of the Keycloak
+endpoints (see tests/test_keycloak_auth_cache.py) that answers every request after
+--latency milliseconds, once with KEEP_KEYCLOAK_AUTH_CACHE_ENABLED=false (a realm key
+fetch and a UMA check per request) and once with the JWKS and UMA decisions cached.
+
+Usage:
+    python scripts/benchmark_keycloak_auth.py [--requests 200] [--latency 20]
+"""
+
+import argparse
+import os
+import time
+from unittest.mock import patch
+
+from ee.identitymanager.identity_managers.keycloak.keycloak_auth_cache import (
+    jwks_cache,
+    uma_decision_cache,
+)
+from ee.identitymanager.identity_managers.keycloak.keycloak_authverifier import (
+    KeycloakAuthVerifier,
+)
+from tests.test_keycloak_auth_cache import CLIENT_ID, REALM, KeycloakStandIn
+
+
+def _average_latency(verifier: KeycloakAuthVerifier, token: str, requests: int):
+    start = time.perf_counter()
+    for _ in range(requests):
+        authenticated_entity = verifier._verify_bearer_token(token)
+        verifier._authorize(authenticated_entity)
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=20, help="milliseconds")
+    args = parser.parse_args()
+
+    stand_in = KeycloakStandIn(latency=args.latency / 1000)
+    os.environ.update(
+        {
+            "KEYCLOAK_URL": stand_in.url,
+            "KEYCLOAK_REALM": REALM,
+            "KEYCLOAK_CLIENT_ID": CLIENT_ID,
+            "KEYCLOAK_CLIENT_SECRET": "secret",
+        }
+    )
+    jwks_cache.invalidate()
+    uma_decision_cache.invalidate()
+    verifier = KeycloakAuthVerifier(["read:alert"])
+    verifier.protected_resource = "GET /alerts"
+    token = stand_in.issue_token()
+
+    try:
+        with patch(
+            "ee.identitymanager.identity_managers.keycloak.keycloak_authverifier.KEYCLOAK_AUTH_CACHE_ENABLED",
+            False,
+        ):
+            uncached = _average_latency(verifier, token, args.requests)
+        uncached_calls = dict(stand_in.calls)
+        cached = _average_latency(verifier, token, args.requests)
+    finally:
+        stand_in.server.shutdown()
+
+    cached_calls = {
+        name: count - uncached_calls[name] for name, count in stand_in.calls.items()
+    }
+    print(f"{'':<10} {'per request':>12} {'keycloak requests':>40}")
+    print(f"{'uncached':<10} {uncached * 1000:>10.1f}ms {uncached_calls!s:>40}")
+    print(f"{'cached':<10} {cached * 1000:>10.1f}ms {cached_calls!s:>40}")
+
+
+if __name__ == "__main__":
+    main()
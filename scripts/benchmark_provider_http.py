@@ -0,0 +1,53 @@
+"""
+Compare the latency of the provider HTTP calls with and without the pooled sessions.
+
+Sends webhook notifications, a provider instance per notification like a workflow run,
+to a local keep-alive server (see tests/test_provider_http.py) where every new connection
+costs --handshake milliseconds, once with KEEP_PROVIDER_HTTP_POOLING_ENABLED=false (a
+connection per call) and once with the sessions pooled per (tenant, provider, base URL).
+
+Usage:
+    python scripts/benchmark_provider_http.py [--notifications 200] [--handshake 20]
+"""
+
+import argparse
+import time
+from unittest.mock import patch
+
+from keep.providers.base.provider_http import ProviderSessions
+from tests.test_provider_http import MockHTTPServer, _webhook_provider
+
+
+def _average_latency(url: str, notifications: int) -> float:
+    start = time.perf_counter()
+    for _ in range(notifications):
+        _webhook_provider(url).notify(body={"alert": "test"})
+    return (time.perf_counter() - start) / notifications
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notifications", type=int, default=200)
+    parser.add_argument("--handshake", type=float, default=20, help="milliseconds")
+    args = parser.parse_args()
+
+    server = MockHTTPServer(handshake_latency=args.handshake / 1000)
+    try:
+        print(f"{'':<10} {'per call':>10} {'connections':>12}")
+        for name, enabled in (("unpooled", False), ("pooled", True)):
+            connections = server.connections
+            with patch(
+                "keep.providers.base.base_provider.provider_sessions",
+                ProviderSessions(enabled=enabled),
+            ):
+                latency = _average_latency(server.url, args.notifications)
+            print(
+                f"{name:<10} {latency * 1000:>8.1f}ms "
+                f"{server.connections - connections:>12}"
+            )
+    finally:
+        server.server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
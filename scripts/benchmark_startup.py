@@ -0,0 +1,116 @@
+"""
+Measure cold-start time and peak RSS of the API, the ARQ worker and the `keep` CLI.
+
+Every target runs in a fresh interpreter, twice: once importing every provider
+module to build the providers metadata (no index) and once loading the
+versioned providers index built by `keep provider build_cache`.
+
+Usage:
+    python scripts/benchmark_startup.py [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Each snippet does what the process does at boot, up to the point it starts serving
+TARGETS = {
+    "api": """
+from keep.api.api import get_app
+from keep.providers.providers_factory import ProvidersFactory
+get_app()
+ProvidersFactory.get_all_providers()
+""",
+    "arq_worker": """
+import keep.api.arq_worker
+from keep.providers.providers_factory import ProvidersFactory
+ProvidersFactory.get_all_providers()
+""",
+    "cli": """
+import sys
+from keep.cli.cli import cli
+# the cli looks at sys.argv to decide whether an api key is required
+sys.argv = ["keep", "version"]
+cli.main(sys.argv[1:], standalone_mode=False)
+""",
+}
+
+MEASURE = """
+import json, resource, sys, time
+start = time.perf_counter()
+exec(compile(sys.argv[1], "<target>", "exec"))
+seconds = time.perf_counter() - start
+provider_modules = [
+    name for name in sys.modules
+    if name.startswith("keep.providers.") and name.count(".") == 3
+    and name.split(".")[2].endswith("_provider")
+]
+print(json.dumps({
+    "seconds": seconds,
+    # ru_maxrss is in kilobytes on linux
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "provider_modules": len(provider_modules),
+}))
+"""
+
+
+def run_target(code: str, env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE, code],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Target failed:\n{result.stderr}")
+    # the measurement is always the last line, anything before is app logging
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="Runs per target")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index_file = os.path.join(tmp_dir, "providers_cache.json")
+        subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "from keep.cli.cli import cli; cli()",
+                "provider",
+                "build_cache",
+                "--force",
+                "--output",
+                index_file,
+            ],
+            check=True,
+            capture_output=True,
+        )
+        modes = {
+            "no index": os.path.join(tmp_dir, "missing.json"),
+            "index": index_file,
+        }
+
+        print(
+            f"{'target':<12}{'mode':<10}{'seconds':>10}{'max rss (MB)':>15}{'provider modules':>18}"
+        )
+        for target, code in TARGETS.items():
+            for mode, providers_cache_file in modes.items():
+                env = {**os.environ, "PROVIDERS_CACHE_FILE": providers_cache_file}
+                runs = [run_target(code, env) for _ in range(args.runs)]
+                print(
+                    f"{target:<12}{mode:<10}"
+                    f"{statistics.median(r['seconds'] for r in runs):>10.2f}"
+                    f"{statistics.median(r['max_rss_mb'] for r in runs):>15.1f}"
+                    f"{runs[-1]['provider_modules']:>18}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -22,8 +22,10 @@ from playwright.sync_api import Page
 
 # This import is required to create the tables
 from keep.api.bl.maintenance_windows_bl import MaintenanceWindowsBl
+from keep.api.core.alert_activation_cache import alert_activation_cache
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
 from keep.api.core.elastic import ElasticClient
+from keep.api.core.maintenance_windows_cache import maintenance_windows_cache
 from keep.api.models.alert import AlertStatus
 from keep.api.models.db.alert import *
 from keep.api.models.db.maintenance_window import MaintenanceWindowRule
@@ -35,6 +37,7 @@ from keep.api.models.db.workflow import *
 from keep.api.tasks.process_event_task import process_event
 from keep.api.utils.enrichment_helpers import convert_db_alerts_to_dto_alerts
 from keep.contextmanager.contextmanager import ContextManager
+from keep.topologies.topology_index import topology_index
 
 original_request = requests.Session.request  # noqa
 load_dotenv(find_dotenv())
@@ -319,6 +322,10 @@ actions:
     logger.info("Dropping all tables")
     # delete the database
     SQLModel.metadata.drop_all(mock_engine)
+    # in-memory indexes must not outlive the database they were built from
+    topology_index.invalidate()
+    maintenance_windows_cache.invalidate()
+    alert_activation_cache.invalidate()
     # Clean up after the test
     session.close()
 
@@ -785,6 +792,8 @@ def create_window_maintenance_active(db_session):
         )
         db_session.add(window)
         db_session.commit()
+        # the window is added behind the API's back
+        maintenance_windows_cache.invalidate(tenant_id)
         return window
 
     return _create_window_maintenance_active
@@ -805,6 +814,7 @@ def finalize_window_maintenance(db_session):
 
         db_session.commit()
         db_session.refresh(rule)
+        maintenance_windows_cache.invalidate(tenant_id)
 
     return _finalize_window_maintenance
 
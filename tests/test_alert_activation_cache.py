@@ -0,0 +1,176 @@
+import uuid
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from keep.api.bl.enrichments_bl import EnrichmentsBl
+from keep.api.core.alert_activation_cache import (
+    AlertActivationCache,
+    alert_activation_cache,
+)
+from keep.api.core.db import (
+    get_last_alerts,
+    recover_prev_alert_status,
+    update_alerts_events,
+)
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.action_type import ActionType
+from keep.api.models.alert import AlertDto, AlertStatus
+from keep.api.models.db.preset import PresetDto
+from keep.rulesengine.rulesengine import RulesEngine
+from keep.searchengine.searchengine import SearchEngine
+
+
+def _alert(fingerprint: str, event_id: str, **kwargs) -> AlertDto:
+    return AlertDto(
+        id=event_id,
+        event_id=event_id,
+        name=fingerprint,
+        status=AlertStatus.FIRING,
+        severity="critical",
+        lastReceived=datetime.utcnow().isoformat(),
+        fingerprint=fingerprint,
+        source=["test"],
+        **kwargs,
+    )
+
+
+def test_alert_activation_cache():
+    built = []
+
+    def build(alerts):
+        built.extend(alert.fingerprint for alert in alerts)
+        return RulesEngine.get_alerts_activation(alerts)
+
+    cache = AlertActivationCache(max_size=3)
+    alerts = [_alert(f"fp-{i}", f"id-{i}") for i in range(3)]
+    versions = {f"id-{i}": "v1" for i in range(3)}
+
+    activations = cache.get_activations("tenant", alerts, versions, build)
+    assert activations == RulesEngine.get_alerts_activation(alerts)
+    assert built == ["fp-0", "fp-1", "fp-2"]
+    assert cache.get_activations("tenant", alerts, versions, build) == activations
+    assert len(built) == 3
+
+    # a new version, a dismissal expiring and another tenant are built again
+    versions["id-0"] = "v2"
+    alerts[1] = _alert("fp-1", "id-1", dismissed=True)
+    cache.get_activations("tenant", alerts, versions, build)
+    cache.get_activations("other-tenant", alerts[2:], versions, build)
+    assert built[3:] == ["fp-0", "fp-1", "fp-2"]
+    # least recently used out
+    assert len(cache) == 3
+    cache.get_activations("tenant", alerts, versions, build)
+    assert built[6:] == ["fp-2"]
+
+    # without a version, built and not kept
+    cache.get_activations("tenant", [_alert("fp-3", "id-3")], versions, build)
+    cache.get_activations("tenant", [_alert("fp-3", "id-3")], versions, build)
+    assert built[7:] == ["fp-3", "fp-3"]
+
+    cache.discard("tenant", ["fp-0"])
+    cache.get_activations("tenant", alerts, versions, build)
+    assert built[9:] == ["fp-0"]
+    cache.invalidate("tenant")
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("elastic_client", [False], indirect=True)
+def test_preset_search_reuses_activations(db_session, create_alert, elastic_client):
+    for i in range(6):
+        create_alert(
+            f"fp-{i}",
+            AlertStatus.FIRING,
+            datetime.utcnow() - timedelta(minutes=i),
+            {"source": [f"source-{i % 2}"], "labels": {"team": f"team-{i % 3}"}},
+        )
+    presets = [
+        PresetDto(
+            id=uuid.uuid4(),
+            name=f"preset-{cel}",
+            options=[{"label": "CEL", "value": cel}],
+        )
+        for cel in ["source == 'source-0'", "labels.team == 'team-1'", "assignee"]
+    ]
+    build_activations = RulesEngine.get_alerts_activation
+
+    def search() -> tuple[list[int], int]:
+        built = []
+
+        def build(alerts):
+            built.extend(alerts)
+            return build_activations(alerts)
+
+        with patch.object(RulesEngine, "get_alerts_activation", staticmethod(build)):
+            SearchEngine(SINGLE_TENANT_UUID).search_preset_alerts(presets)
+        return [preset.alerts_count for preset in presets], len(built)
+
+    with patch.object(alert_activation_cache, "enabled", False):
+        expected, built = search()
+    assert expected == [3, 2, 0]
+    assert built == 6
+
+    assert search() == (expected, 6)
+    assert search() == (expected, 0)
+
+    # an enrichment and a new occurrence only rebuild their alerts
+    EnrichmentsBl(SINGLE_TENANT_UUID, db=db_session).enrich_entity(
+        "fp-0",
+        {"assignee": "oncall@keephq.dev"},
+        action_type=ActionType.GENERIC_ENRICH,
+        action_callee="test",
+        action_description="test",
+    )
+    create_alert(
+        "fp-3", AlertStatus.FIRING, datetime.utcnow(), {"source": ["source-0"]}
+    )
+    assert search() == ([4, 2, 1], 2)
+
+    with patch.object(alert_activation_cache, "enabled", False):
+        assert search() == ([4, 2, 1], 6)
+
+
+@pytest.mark.parametrize("elastic_client", [False], indirect=True)
+def test_preset_search_after_maintenance_recovery(
+    db_session, create_alert, elastic_client
+):
+    for fingerprint in ["recovered-one", "recovered-batch"]:
+        create_alert(
+            fingerprint,
+            AlertStatus.MAINTENANCE,
+            datetime.utcnow(),
+            {"previous_status": AlertStatus.FIRING.value},
+        )
+    preset = PresetDto(
+        id=uuid.uuid4(),
+        name="firing",
+        options=[{"label": "CEL", "value": "status == 'firing'"}],
+    )
+
+    def search() -> int:
+        SearchEngine(SINGLE_TENANT_UUID).search_preset_alerts([preset])
+        return preset.alerts_count
+
+    assert search() == 0
+
+    # the recovery updates the events in place, the alerts keep their id
+    alerts = {alert.fingerprint: alert for alert in get_last_alerts(SINGLE_TENANT_UUID)}
+    recover_prev_alert_status(alerts["recovered-one"], session=db_session)
+    batch_alert = alerts["recovered-batch"]
+    update_alerts_events(
+        [
+            (
+                batch_alert,
+                {
+                    **batch_alert.event,
+                    "status": AlertStatus.FIRING.value,
+                    "previous_status": AlertStatus.MAINTENANCE.value,
+                },
+            )
+        ],
+        session=db_session,
+    )
+    db_session.commit()
+
+    assert search() == 2
@@ -0,0 +1,174 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import func
+from sqlmodel import select
+
+from keep.api.core.alert_history import AlertPayloadsCache, compact_alert_history
+from keep.api.core.db import (
+    get_alert_by_event_id,
+    get_alerts_by_fingerprint,
+    get_alerts_by_ids,
+    get_previous_alert_by_fingerprint,
+    query_alerts,
+)
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.alert import AlertStatus
+from keep.api.models.db.alert import Alert, AlertPayload, LastAlert
+from keep.api.utils.enrichment_helpers import convert_db_alerts_to_dto_alerts
+
+
+@pytest.fixture
+def payloads_cache():
+    with patch(
+        "keep.api.core.alert_history.alert_payloads_cache", AlertPayloadsCache()
+    ) as payloads_cache:
+        yield payloads_cache
+
+
+def _history(fingerprint: str, **kwargs) -> list[dict]:
+    alerts = get_alerts_by_fingerprint(
+        SINGLE_TENANT_UUID, fingerprint, limit=1000, **kwargs
+    )
+    return [alert.event for alert in alerts]
+
+
+def test_alert_history_compacted_on_ingestion(db_session, create_alert, payloads_cache):
+    now = datetime.utcnow()
+    with patch("keep.api.core.db.ALERT_HISTORY_COMPACTION_ENABLED", True):
+        # a flapping alert, its occurrences only differ by a few fields
+        for i in range(6):
+            create_alert(
+                "flapping",
+                AlertStatus.FIRING if i % 2 == 0 else AlertStatus.RESOLVED,
+                now + timedelta(minutes=i),
+                {"labels": {"pod": "api-1", "namespace": "prod"}},
+            )
+
+    alerts = db_session.exec(
+        select(Alert).where(Alert.fingerprint == "flapping").order_by(Alert.timestamp)
+    ).all()
+    last_alert = db_session.exec(
+        select(LastAlert).where(LastAlert.fingerprint == "flapping")
+    ).one()
+    # the last alert keeps its whole event
+    assert [alert.payload_hash is not None for alert in alerts] == [True] * 5 + [False]
+    assert alerts[-1].id == last_alert.alert_id
+    assert db_session.exec(select(func.count()).select_from(AlertPayload)).one() == 1
+    # the compacted rows keep the queried fields and what differs from the payload
+    assert alerts[0].event["status"] == AlertStatus.FIRING.value
+    assert "labels" not in alerts[0].event
+
+    history = _history("flapping")
+    assert [event["lastReceived"] for event in history] == [
+        alert.event["lastReceived"] for alert in reversed(alerts)
+    ]
+    assert [event["status"] for event in history] == ["resolved", "firing"] * 3
+    assert all(
+        event["labels"] == {"pod": "api-1", "namespace": "prod"} for event in history
+    )
+    assert len(_history("flapping", status=AlertStatus.RESOLVED.value)) == 3
+
+    # reloaded from the database and converted as is
+    db_session.expire_all()
+    alerts_dto = convert_db_alerts_to_dto_alerts(
+        db_session.exec(select(Alert).where(Alert.fingerprint == "flapping")).all()
+    )
+    assert {alert.labels["pod"] for alert in alerts_dto} == {"api-1"}
+
+
+def test_compacted_alert_read_by_id(db_session, create_alert, payloads_cache):
+    now = datetime.utcnow()
+    with patch("keep.api.core.db.ALERT_HISTORY_COMPACTION_ENABLED", True):
+        for i in range(3):
+            create_alert(
+                "by-id",
+                AlertStatus.FIRING,
+                now + timedelta(minutes=i),
+                {"labels": {"pod": f"api-{i}", "namespace": "prod"}},
+            )
+    superseded = db_session.exec(
+        select(Alert).where(Alert.fingerprint == "by-id").order_by(Alert.timestamp)
+    ).all()[:2]
+    assert all(alert.payload_hash for alert in superseded)
+    assert "labels" not in superseded[0].event
+    db_session.expire_all()
+
+    def labels(alert) -> dict:
+        return alert.event["labels"]
+
+    assert labels(get_alert_by_event_id(SINGLE_TENANT_UUID, str(superseded[0].id))) == {
+        "pod": "api-0",
+        "namespace": "prod",
+    }
+    assert sorted(
+        labels(alert)["pod"]
+        for alert in get_alerts_by_ids(
+            SINGLE_TENANT_UUID, [alert.id for alert in superseded]
+        )
+    ) == ["api-0", "api-1"]
+    assert labels(get_previous_alert_by_fingerprint(SINGLE_TENANT_UUID, "by-id")) == {
+        "pod": "api-1",
+        "namespace": "prod",
+    }
+    assert all(
+        labels(alert)["namespace"] == "prod"
+        for alert in query_alerts(SINGLE_TENANT_UUID)
+    )
+
+
+def _insert_history(db_session, fingerprint: str, occurrences: int) -> None:
+    start = datetime.utcnow() - timedelta(hours=1)
+    labels = {f"label_{i}": f"value-{i}" * 4 for i in range(40)}
+    for i in range(occurrences):
+        status = AlertStatus.FIRING if i % 3 else AlertStatus.RESOLVED
+        event = {
+            "id": fingerprint,
+            "name": f"High latency on {fingerprint}",
+            "status": status.value,
+            "severity": "critical",
+            "source": ["prometheus"],
+            "fingerprint": fingerprint,
+            "description": "p99 latency is above the threshold " * 20,
+            "labels": labels,
+            "lastReceived": (start + timedelta(seconds=i)).isoformat(),
+        }
+        db_session.add(
+            Alert(
+                tenant_id=SINGLE_TENANT_UUID,
+                provider_type="prometheus",
+                provider_id="test",
+                event=event,
+                fingerprint=fingerprint,
+                alert_hash=f"{fingerprint}-{status.value}",
+                timestamp=start + timedelta(seconds=i),
+            )
+        )
+    db_session.commit()
+
+
+def _stored_bytes(db_session) -> int:
+    alerts = db_session.exec(
+        select(func.sum(func.length(func.json(Alert.event))))
+    ).one()
+    payloads = db_session.exec(
+        select(func.sum(func.length(func.json(AlertPayload.event))))
+    ).one()
+    return (alerts or 0) + (payloads or 0)
+
+
+def test_alert_history_compaction_size(db_session, payloads_cache):
+    occurrences = 1000
+    _insert_history(db_session, "history", occurrences)
+    expected = _history("history")
+    raw_bytes = _stored_bytes(db_session)
+
+    assert compact_alert_history(db_session, batch_size=300) == occurrences
+    # idempotent
+    assert compact_alert_history(db_session) == 0
+    compact_bytes = _stored_bytes(db_session)
+
+    assert _history("history") == expected
+    assert compact_bytes < raw_bytes / 5
+    assert db_session.exec(select(func.count()).select_from(AlertPayload)).one() == 1
@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from keep.api.core.alert_partitions import (
+    ensure_alert_partitions,
+    mysql_partitioning_statements,
+    parse_partition_name,
+    partition_alert_table,
+    partition_name,
+    partition_ranges,
+    postgresql_default_split_statements,
+    postgresql_partitioning_statements,
+)
+from keep.api.core.db import get_alerts_by_fingerprint, get_last_alerts
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.alert import AlertStatus
+
+
+def test_partition_ranges():
+    ranges = partition_ranges(
+        datetime(2025, 11, 17, 8, 30), datetime(2026, 1, 31), "month"
+    )
+    assert ranges == [
+        (datetime(2025, 11, 1), datetime(2025, 12, 1)),
+        (datetime(2025, 12, 1), datetime(2026, 1, 1)),
+        (datetime(2026, 1, 1), datetime(2026, 2, 1)),
+    ]
+    assert partition_ranges(datetime(2026, 2, 28, 23), datetime(2026, 3, 1), "day") == [
+        (datetime(2026, 2, 28), datetime(2026, 3, 1)),
+        (datetime(2026, 3, 1), datetime(2026, 3, 2)),
+    ]
+    with pytest.raises(ValueError):
+        partition_ranges(datetime(2026, 1, 1), datetime(2026, 2, 1), "week")
+
+    assert (
+        partition_name(datetime(2026, 1, 1), "month", "postgresql") == "alert_p202601"
+    )
+    assert partition_name(datetime(2026, 1, 5), "day", "mysql") == "p20260105"
+    assert parse_partition_name("alert_p202612") == (
+        datetime(2026, 12, 1),
+        datetime(2027, 1, 1),
+    )
+    assert parse_partition_name("p20260105") == (
+        datetime(2026, 1, 5),
+        datetime(2026, 1, 6),
+    )
+    assert parse_partition_name("alert_pdefault") is None
+    assert parse_partition_name("pfuture") is None
+
+
+def test_partitioning_statements():
+    ranges = partition_ranges(datetime(2026, 1, 10), datetime(2026, 2, 1), "month")
+    foreign_keys = [("lastalert", "lastalert_alert_id_fkey")]
+
+    statements = postgresql_partitioning_statements(
+        ranges,
+        "month",
+        foreign_keys,
+        [{"name": "ix_alert_fingerprint", "column_names": ["fingerprint"]}],
+    )
+    assert statements[0] == (
+        'ALTER TABLE lastalert DROP CONSTRAINT IF EXISTS "lastalert_alert_id_fkey"'
+    )
+    assert (
+        'ALTER TABLE alert ADD CONSTRAINT alert_pkey PRIMARY KEY (id, "timestamp")'
+        in statements
+    )
+    assert (
+        "CREATE TABLE IF NOT EXISTS alert_p202602 PARTITION OF alert FOR VALUES "
+        "FROM ('2026-02-01 00:00:00') TO ('2026-03-01 00:00:00')" in statements
+    )
+    # every row is copied: the partitions, then the default one
+    inserts = [statement for statement in statements if statement.startswith("INSERT")]
+    assert len(inserts) == 3
+    assert inserts[-1].endswith("\"timestamp\" >= '2026-03-01 00:00:00'")
+    # indexed after the copy, under the name of the original index
+    assert statements.index(
+        'CREATE INDEX "ix_alert_fingerprint" ON alert ("fingerprint")'
+    ) > statements.index(inserts[-1])
+
+    # the rows of the default partition in the range are moved to the new one
+    assert postgresql_default_split_statements(
+        datetime(2026, 3, 1), datetime(2026, 4, 1), "month"
+    ) == [
+        "ALTER TABLE alert DETACH PARTITION alert_pdefault",
+        "CREATE TABLE IF NOT EXISTS alert_p202603 PARTITION OF alert FOR VALUES "
+        "FROM ('2026-03-01 00:00:00') TO ('2026-04-01 00:00:00')",
+        "INSERT INTO alert SELECT * FROM alert_pdefault WHERE "
+        "\"timestamp\" >= '2026-03-01 00:00:00' AND \"timestamp\" < '2026-04-01 00:00:00'",
+        "DELETE FROM alert_pdefault WHERE "
+        "\"timestamp\" >= '2026-03-01 00:00:00' AND \"timestamp\" < '2026-04-01 00:00:00'",
+        "ALTER TABLE alert ATTACH PARTITION alert_pdefault DEFAULT",
+    ]
+
+    statements = mysql_partitioning_statements(
+        ranges, "month", foreign_keys, ["alert_ibfk_1"]
+    )
+    assert statements[:3] == [
+        "ALTER TABLE lastalert DROP FOREIGN KEY `lastalert_alert_id_fkey`",
+        "ALTER TABLE alert DROP FOREIGN KEY `alert_ibfk_1`",
+        "ALTER TABLE alert DROP PRIMARY KEY, ADD PRIMARY KEY (id, `timestamp`)",
+    ]
+    assert statements[3] == (
+        "ALTER TABLE alert PARTITION BY RANGE COLUMNS(`timestamp`) ("
+        "PARTITION p202601 VALUES LESS THAN ('2026-02-01 00:00:00'), "
+        "PARTITION p202602 VALUES LESS THAN ('2026-03-01 00:00:00'), "
+        "PARTITION pfuture VALUES LESS THAN (MAXVALUE))"
+    )
+
+
+def test_partitioning_unsupported_on_sqlite(db_session):
+    with pytest.raises(ValueError):
+        partition_alert_table(db_session, dry_run=True)
+    assert ensure_alert_partitions(db_session) == []
+
+
+def test_alerts_queries_with_partitioning(db_session, create_alert):
+    now = datetime.utcnow()
+    for fingerprint in ["fp-1", "fp-2"]:
+        for i in range(3):
+            create_alert(
+                fingerprint,
+                AlertStatus.FIRING,
+                now - timedelta(days=40) + timedelta(days=20 * i),
+            )
+
+    def _queries():
+        return (
+            [
+                alert.id
+                for alert in get_alerts_by_fingerprint(
+                    SINGLE_TENANT_UUID, "fp-1", limit=None
+                )
+            ],
+            sorted(alert.id for alert in get_last_alerts(SINGLE_TENANT_UUID)),
+            sorted(
+                alert.id for alert in get_last_alerts(SINGLE_TENANT_UUID, timeframe=1)
+            ),
+            sorted(
+                alert.id
+                for alert in get_last_alerts(
+                    SINGLE_TENANT_UUID, lower_timestamp=now - timedelta(days=1)
+                )
+            ),
+        )
+
+    expected = _queries()
+    with patch("keep.api.core.db.ALERT_PARTITIONING_ENABLED", True):
+        partitioned = _queries()
+
+    assert len(expected[0]) == 3
+    assert len(expected[1]) == 2
+    assert len(expected[2]) == 2
+    assert len(expected[3]) == 2
+    assert partitioned == expected
+
+
+def test_alerts_by_fingerprint_out_of_order_with_partitioning(db_session, create_alert):
+    now = datetime.utcnow()
+    create_alert("fp-1", AlertStatus.FIRING, now)
+    # processed after the first occurrence, the lastalert's first_timestamp is later
+    create_alert("fp-1", AlertStatus.FIRING, now - timedelta(days=10))
+
+    expected = get_alerts_by_fingerprint(SINGLE_TENANT_UUID, "fp-1", limit=None)
+    with patch("keep.api.core.db.ALERT_PARTITIONING_ENABLED", True):
+        partitioned = get_alerts_by_fingerprint(SINGLE_TENANT_UUID, "fp-1", limit=None)
+
+    assert len(expected) == 2
+    assert [alert.id for alert in partitioned] == [alert.id for alert in expected]
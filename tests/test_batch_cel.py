@@ -0,0 +1,150 @@
+import random
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
+from keep.api.utils.cel_utils import preprocess_cel_expression
+from keep.rulesengine.batch_cel import AlertBatch, compile_batch_cel
+from keep.rulesengine.rulesengine import RulesEngine
+
+SUPPORTED = [
+    "name == 'alert-1'",
+    "name != 'alert-1'",
+    "'alert-1' == name",
+    "status == 'firing' && severity > 'warning'",
+    "severity >= 3",
+    "severity < 'critical' || status == 'resolved'",
+    "source == 'grafana'",
+    "source.contains('prometheus')",
+    "name.startsWith('alert-1')",
+    "name.endsWith('7')",
+    "service in ['api', 'db']",
+    "service in []",
+    "labels.team == 'sre'",
+    "labels.team != 'sre'",
+    "labels['team'] == 'sre'",
+    "labels.team in ['sre', 'noc']",
+    "labels.team.contains('s')",
+    "labels.team.startsWith('n')",
+    "labels.port == 8080",
+    "labels.port == '8080'",
+    "labels.port > 1000",
+    "labels.port in [8080, '443']",
+    "labels.ratio < 0.5",
+    "labels.ratio == 1",
+    "labels.critical",
+    "labels.critical == true",
+    "!labels.critical",
+    "labels.critical && status == 'firing'",
+    "!(labels.team == 'sre')",
+    "labels.team == 'sre' || labels.region == 'eu'",
+    "labels.team == 'sre' && labels.region == 'eu'",
+    "(labels.team == 'sre' || service == 'api') && !(status == 'resolved')",
+    "assignee == 'oncall@keephq.dev'",
+    "assignee != 'oncall@keephq.dev'",
+    "assignee == null",
+    "assignee in [null]",
+    "assignee.contains('oncall')",
+    "note == 'x' || labels.team == 'noc'",
+    "name.first == 'a'",
+    "unknown_field == 'a'",
+    "dismissed == false",
+    "isNoisy",
+    "true",
+    "false && name == 'alert-1'",
+    "name > 1",
+    "severity == 'high' && (source == 'grafana' || source.endsWith('dog'))",
+]
+
+UNSUPPORTED = [
+    "has(labels.team)",
+    "size(name) > 3",
+    "labels.port + 1 == 8081",
+    "'sre' in labels.tags",
+    "name == service",
+    "status == 'firing' ? true : false",
+    "name.matches('alert-.*')",
+    "labels.tags[0] == 'sre'",
+    "name in 'alert-10'",
+]
+
+
+def _alerts(count: int) -> list[AlertDto]:
+    rng = random.Random(count)
+    alerts = []
+    for i in range(count):
+        labels = {}
+        for key, values in {
+            "team": ["sre", "noc", "", None],
+            "region": ["eu", "us"],
+            "port": [8080, 443, "8080", 1.5],
+            "ratio": [0.25, 1.0, 1, "0.1"],
+            "critical": [True, False, "true", 1],
+            "tags": [["sre", "db"], []],
+        }.items():
+            if rng.random() < 0.6:
+                labels[key] = rng.choice(values)
+        alerts.append(
+            AlertDto(
+                id=f"id-{i}",
+                name=f"alert-{i % 20}",
+                status=rng.choice(list(AlertStatus)),
+                severity=rng.choice(list(AlertSeverity)),
+                lastReceived=(datetime.utcnow() - timedelta(minutes=i)).isoformat(),
+                source=rng.choice([["grafana"], ["prometheus", "datadog"], []]),
+                service=rng.choice(["api", "db", None]),
+                assignee=rng.choice(["oncall@keephq.dev", None]),
+                fingerprint=f"fp-{i}",
+                labels=labels,
+                **({"note": "x"} if rng.random() < 0.3 else {}),
+            )
+        )
+    return alerts
+
+
+def _filter(alerts, cel, batched: bool, **kwargs):
+    with patch("keep.rulesengine.rulesengine.BATCH_CEL_ENABLED", batched):
+        return [
+            alert.id for alert in RulesEngine().filter_alerts(alerts, cel, **kwargs)
+        ]
+
+
+@pytest.mark.parametrize("cel", SUPPORTED)
+def test_batch_cel_matches_celpy(cel):
+    assert compile_batch_cel(preprocess_cel_expression(cel)) is not None
+    alerts = _alerts(200)
+    assert _filter(alerts, cel, batched=True) == _filter(alerts, cel, batched=False)
+
+
+@pytest.mark.parametrize("cel", UNSUPPORTED)
+def test_batch_cel_falls_back_to_celpy(cel):
+    assert compile_batch_cel(preprocess_cel_expression(cel)) is None
+    alerts = _alerts(50)
+    assert _filter(alerts, cel, batched=True) == _filter(alerts, cel, batched=False)
+
+
+def test_batch_cel_random_expressions():
+    rng = random.Random(0)
+    alerts = _alerts(200)
+    activations = RulesEngine.get_alerts_activation(alerts)
+    alerts_batch = AlertBatch(activations)
+
+    def expression(depth: int) -> str:
+        if depth == 0 or rng.random() < 0.3:
+            return rng.choice(SUPPORTED)
+        operator = rng.choice(["&&", "||"])
+        left, right = expression(depth - 1), expression(depth - 1)
+        cel = f"({left}) {operator} ({right})"
+        return f"!({cel})" if rng.random() < 0.2 else cel
+
+    for _ in range(30):
+        cel = expression(2)
+        assert _filter(
+            alerts,
+            cel,
+            batched=True,
+            alerts_activation=activations,
+            alerts_batch=alerts_batch,
+        ) == _filter(alerts, cel, batched=False, alerts_activation=activations), cel
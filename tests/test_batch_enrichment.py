@@ -0,0 +1,251 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlmodel import select
+
+from keep.api.bl.batch_enrichment_bl import BatchEnrichJobStore, BatchEnrichmentBl
+from keep.api.consts import KEEP_ARQ_QUEUE_BASIC
+from keep.api.core.db import add_alerts_to_incident, get_enrichment
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.models.action_type import ActionType
+from keep.api.models.alert import AlertStatus, BatchEnrichJobDto, BatchEnrichJobStatus
+from keep.api.models.db.alert import AlertAudit
+from keep.api.models.db.incident import Incident, IncidentSeverity, IncidentStatus
+from keep.api.models.db.rule import ResolveOn
+from keep.api.tasks.process_batch_enrich_task import process_batch_enrich
+from keep.identitymanager.authenticatedentity import AuthenticatedEntity
+from tests.fixtures.client import client, setup_api_key, test_app  # noqa
+
+
+def _incident(db_session, fingerprints) -> Incident:
+    incident = Incident(
+        id=uuid4(),
+        tenant_id=SINGLE_TENANT_UUID,
+        user_generated_name=f"incident of {fingerprints}",
+        severity=IncidentSeverity.CRITICAL.order,
+        status=IncidentStatus.FIRING.value,
+        resolve_on=ResolveOn.ALL.value,
+    )
+    db_session.add(incident)
+    db_session.commit()
+    add_alerts_to_incident(
+        SINGLE_TENANT_UUID, incident, fingerprints, session=db_session
+    )
+    return incident
+
+
+@pytest.mark.parametrize("elastic_client", [False], indirect=True)
+def test_batch_enrich_in_chunks(db_session, create_alert, elastic_client):
+    fingerprints = [f"fp-{i}" for i in range(5)]
+    for fingerprint in fingerprints + ["untouched"]:
+        create_alert(fingerprint, AlertStatus.FIRING, datetime.utcnow())
+    # fp-4 is the last alert of the incident, enriched by the last chunk
+    resolved_incident = _incident(db_session, ["fp-0", "fp-4"])
+    firing_incident = _incident(db_session, ["fp-1", "untouched"])
+
+    store = BatchEnrichJobStore(use_redis=False)
+    with patch(
+        "keep.api.bl.batch_enrichment_bl.get_batch_enrich_job_store",
+        return_value=store,
+    ):
+        job = BatchEnrichmentBl(
+            SINGLE_TENANT_UUID,
+            AuthenticatedEntity(SINGLE_TENANT_UUID, "user@keephq.dev"),
+            chunk_size=2,
+            session=db_session,
+        ).enrich(fingerprints, {"status": "resolved", "note": "outage over"})
+
+    assert job.status == BatchEnrichJobStatus.COMPLETED
+    assert (job.total, job.processed, job.chunks) == (5, 5, 3)
+    # only the background jobs keep a record
+    assert store.get(SINGLE_TENANT_UUID, job.job_id) is None
+    for fingerprint in fingerprints:
+        enrichment = get_enrichment(SINGLE_TENANT_UUID, fingerprint)
+        assert enrichment.enrichments["status"] == "resolved"
+        assert enrichment.enrichments["note"] == "outage over"
+    assert get_enrichment(SINGLE_TENANT_UUID, "untouched") is None
+    assert (
+        len(
+            db_session.exec(
+                select(AlertAudit).where(
+                    AlertAudit.action == ActionType.MANUAL_RESOLVE.value,
+                    AlertAudit.fingerprint.in_(fingerprints),
+                )
+            ).all()
+        )
+        == 5
+    )
+
+    db_session.expire_all()
+    assert (
+        db_session.get(Incident, resolved_incident.id).status
+        == IncidentStatus.RESOLVED.value
+    )
+    assert (
+        db_session.get(Incident, firing_incident.id).status
+        == IncidentStatus.FIRING.value
+    )
+
+    # merged into the existing enrichments with a single UPDATE per chunk
+    with patch(
+        "keep.api.bl.batch_enrichment_bl.get_batch_enrich_job_store",
+        return_value=BatchEnrichJobStore(use_redis=False),
+    ):
+        BatchEnrichmentBl(
+            SINGLE_TENANT_UUID,
+            AuthenticatedEntity(SINGLE_TENANT_UUID, "user@keephq.dev"),
+            chunk_size=2,
+            session=db_session,
+        ).enrich(fingerprints[:3], {"assignee": "oncall@keephq.dev"})
+    enrichment = get_enrichment(SINGLE_TENANT_UUID, "fp-2")
+    assert enrichment.enrichments["assignee"] == "oncall@keephq.dev"
+    assert enrichment.enrichments["note"] == "outage over"
+
+
+@pytest.mark.parametrize("test_app", ["NO_AUTH"], indirect=True)
+@pytest.mark.parametrize("elastic_client", [False], indirect=True)
+def test_batch_enrich_in_background(
+    db_session, client, test_app, create_alert, elastic_client
+):
+    for i in range(5):
+        create_alert(
+            f"background-{i}",
+            AlertStatus.FIRING,
+            datetime.utcnow(),
+            {"name": f"Background Alert {i}"},
+        )
+
+    with patch("keep.api.bl.batch_enrichment_bl.BATCH_ENRICH_CHUNK_SIZE", 2):
+        response = client.post(
+            "/alerts/batch_enrich?background=true",
+            headers={"x-api-key": "some-key"},
+            json={
+                "cel": "name.contains('Background')",
+                "enrichments": {"status": "acknowledged"},
+            },
+        )
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        for _ in range(50):
+            job = client.get(
+                f"/alerts/batch_enrich/{job_id}", headers={"x-api-key": "some-key"}
+            ).json()
+            if job["status"] != BatchEnrichJobStatus.RUNNING.value:
+                break
+            time.sleep(0.1)
+
+    assert job["status"] == BatchEnrichJobStatus.COMPLETED.value
+    assert (job["total"], job["processed"], job["chunks"]) == (5, 5, 3)
+    for i in range(5):
+        enrichment = get_enrichment(SINGLE_TENANT_UUID, f"background-{i}")
+        assert enrichment.enrichments["status"] == "acknowledged"
+
+    response = client.get(
+        "/alerts/batch_enrich/unknown-job", headers={"x-api-key": "some-key"}
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("elastic_client", [False], indirect=True)
+def test_batch_enrich_job_enqueued_with_redis(db_session, create_alert, elastic_client):
+    fingerprints = [f"queued-{i}" for i in range(3)]
+    for fingerprint in fingerprints:
+        create_alert(fingerprint, AlertStatus.FIRING, datetime.utcnow())
+    store = BatchEnrichJobStore(use_redis=False)
+    pool = AsyncMock()
+
+    with patch(
+        "keep.api.bl.batch_enrichment_bl.get_batch_enrich_job_store",
+        return_value=store,
+    ), patch("keep.api.bl.batch_enrichment_bl.REDIS", True), patch(
+        "keep.api.bl.batch_enrichment_bl.get_pool", AsyncMock(return_value=pool)
+    ), patch(
+        "keep.api.bl.batch_enrichment_bl.BATCH_ENRICH_CHUNK_SIZE", 2
+    ), patch(
+        "keep.api.bl.batch_enrichment_bl.threading.Thread"
+    ) as thread:
+        job = BatchEnrichmentBl(
+            SINGLE_TENANT_UUID,
+            AuthenticatedEntity(SINGLE_TENANT_UUID, "user@keephq.dev"),
+        ).start_job(fingerprints, {"status": "acknowledged"})
+        thread.assert_not_called()
+        pool.enqueue_job.assert_awaited_once()
+        # the pool isn't leaked
+        pool.close.assert_awaited_once_with(close_connection_pool=True)
+        args = pool.enqueue_job.await_args
+        assert args.args[0] == "async_batch_enrich"
+        assert args.kwargs["_queue_name"] == KEEP_ARQ_QUEUE_BASIC
+        assert store.get(SINGLE_TENANT_UUID, job.job_id).status == (
+            BatchEnrichJobStatus.RUNNING
+        )
+
+        # what the ARQ worker runs
+        process_batch_enrich(*args.args[1:])
+
+    job = store.get(SINGLE_TENANT_UUID, job.job_id)
+    assert job.status == BatchEnrichJobStatus.COMPLETED
+    assert (job.total, job.processed, job.chunks) == (3, 3, 2)
+    assert job.owner == f"{socket.gethostname()}:{os.getpid()}"
+    for fingerprint in fingerprints:
+        enrichment = get_enrichment(SINGLE_TENANT_UUID, fingerprint)
+        assert enrichment.enrichments["status"] == "acknowledged"
+
+
+def test_batch_enrich_job_failed_when_its_owner_is_gone():
+    store = BatchEnrichJobStore(use_redis=False)
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    now = datetime.now(tz=timezone.utc)
+    dead_owner = BatchEnrichJobDto(
+        job_id="dead-owner",
+        tenant_id=SINGLE_TENANT_UUID,
+        total=10,
+        started=now,
+        updated=now,
+        owner=f"{socket.gethostname()}:{exited.pid}",
+    )
+    no_heartbeat = BatchEnrichJobDto(
+        job_id="no-heartbeat",
+        tenant_id=SINGLE_TENANT_UUID,
+        total=10,
+        started=now - timedelta(hours=1),
+        updated=now - timedelta(hours=1),
+        owner="another-host:1",
+    )
+    alive = BatchEnrichJobDto(
+        job_id="alive",
+        tenant_id=SINGLE_TENANT_UUID,
+        total=10,
+        started=now,
+        updated=now,
+        owner=f"{socket.gethostname()}:{os.getpid()}",
+    )
+    for job in (dead_owner, no_heartbeat, alive):
+        store.save(job)
+
+    for job_id in ("dead-owner", "no-heartbeat"):
+        job = store.get(SINGLE_TENANT_UUID, job_id)
+        assert job.status == BatchEnrichJobStatus.FAILED
+        assert job.error == "The process running the job is gone"
+        assert job.finished is not None
+    assert store.get(SINGLE_TENANT_UUID, "alive").status == BatchEnrichJobStatus.RUNNING
+
+    # a job failed while it was waiting in the queue is not run anymore
+    with patch(
+        "keep.api.bl.batch_enrichment_bl.get_batch_enrich_job_store",
+        return_value=store,
+    ), patch("keep.api.bl.batch_enrichment_bl.get_session_sync") as get_session:
+        job = BatchEnrichmentBl(
+            SINGLE_TENANT_UUID,
+            AuthenticatedEntity(SINGLE_TENANT_UUID, "user@keephq.dev"),
+        ).run_job("no-heartbeat", ["fp"], {"status": "acknowledged"})
+    assert job.status == BatchEnrichJobStatus.FAILED
+    get_session.assert_not_called()
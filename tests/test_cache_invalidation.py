@@ -0,0 +1,168 @@
+import json
+import queue
+import time
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+from keep.api.core.cache_invalidation import (
+    CACHE_INVALIDATION_CHANNEL,
+    CacheEntity,
+    CacheInvalidationBus,
+    cache_invalidation_bus,
+)
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.core.maintenance_windows_cache import maintenance_windows_cache
+from keep.api.models.db.maintenance_window import MaintenanceWindowRule
+from keep.api.models.db.system import CacheVersion
+
+
+def test_cache_invalidation_db_backend(db_session):
+    publisher = CacheInvalidationBus(backend="db", poll_interval=0)
+    subscriber = CacheInvalidationBus(backend="db", poll_interval=0)
+    published, invalidated = [], []
+    publisher.subscribe(CacheEntity.RULES, published.append)
+    subscriber.subscribe(CacheEntity.RULES, invalidated.append)
+    # the first poll only records the current versions
+    subscriber.poll()
+
+    publisher.publish(CacheEntity.RULES, "tenant-a")
+    publisher.publish(CacheEntity.RULES, "tenant-a")
+    publisher.publish(CacheEntity.RULES)
+    publisher.publish(CacheEntity.PRESETS, "tenant-a")
+    # the publishing process invalidates right away
+    assert published == ["tenant-a", "tenant-a", None]
+    assert invalidated == []
+
+    subscriber.poll()
+    assert sorted(invalidated, key=str) == [None, "tenant-a"]
+    versions = {
+        (row.tenant_id, row.entity): row.version
+        for row in db_session.query(CacheVersion).all()
+    }
+    assert versions == {
+        ("tenant-a", "rules"): 2,
+        ("*", "rules"): 1,
+        ("tenant-a", "presets"): 1,
+    }
+
+    # nothing changed since
+    subscriber.poll()
+    assert len(invalidated) == 2
+
+
+def test_cache_invalidation_db_backend_poll_interval(db_session):
+    publisher = CacheInvalidationBus(backend="db", poll_interval=0)
+    subscriber = CacheInvalidationBus(backend="db", poll_interval=60)
+    invalidated = []
+    subscriber.subscribe(CacheEntity.WORKFLOWS, invalidated.append)
+    subscriber.poll()
+
+    publisher.publish(CacheEntity.WORKFLOWS, "tenant-a")
+    with patch("keep.api.core.cache_invalidation.Session") as session:
+        subscriber.poll()
+        session.assert_not_called()
+    assert invalidated == []
+
+
+class FakeRedis:
+    """
+    A single channel in-memory pub/sub shared by the buses of the test.
+    """
+
+    def __init__(self):
+        self.subscribers = []
+
+    def publish(self, channel, message):
+        for subscriber in self.subscribers:
+            subscriber.put({"type": "message", "channel": channel, "data": message})
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        fake_redis = self
+        messages = queue.Queue()
+
+        class PubSub:
+            def subscribe(self, channel):
+                assert channel == CACHE_INVALIDATION_CHANNEL
+                fake_redis.subscribers.append(messages)
+
+            def listen(self):
+                while True:
+                    yield messages.get()
+
+        return PubSub()
+
+
+def test_cache_invalidation_redis_backend():
+    fake_redis = FakeRedis()
+    subscriber = CacheInvalidationBus(backend="redis", poll_interval=0.1)
+    invalidated = []
+    subscriber.subscribe(CacheEntity.TOPOLOGY, invalidated.append)
+
+    with patch(
+        "keep.api.core.cache_invalidation.get_redis_client", return_value=fake_redis
+    ):
+        subscriber.poll()
+        time.sleep(0.1)
+        # a message published by another process
+        fake_redis.publish(
+            CACHE_INVALIDATION_CHANNEL,
+            json.dumps(
+                {"origin": "other-host:1", "entity": "topology", "tenant_id": "t1"}
+            ).encode(),
+        )
+        fake_redis.publish(
+            CACHE_INVALIDATION_CHANNEL,
+            json.dumps(
+                {"origin": "other-host:1", "entity": "topology", "tenant_id": "*"}
+            ).encode(),
+        )
+        # invalid and own messages are ignored
+        fake_redis.publish(CACHE_INVALIDATION_CHANNEL, b"not json")
+        subscriber.publish(CacheEntity.TOPOLOGY, "t2")
+        time.sleep(0.2)
+
+    assert invalidated == ["t2", "t1", None]
+
+
+def test_cache_invalidation_publish_never_raises():
+    bus = CacheInvalidationBus(backend="redis")
+    invalidated = []
+    bus.subscribe(CacheEntity.PROVIDERS, invalidated.append)
+    redis_client = MagicMock()
+    redis_client.publish.side_effect = ConnectionError("redis is down")
+
+    with patch(
+        "keep.api.core.cache_invalidation.get_redis_client", return_value=redis_client
+    ):
+        bus.publish(CacheEntity.PROVIDERS, "tenant-a")
+    assert invalidated == ["tenant-a"]
+    assert bus.stats["failed"] == 1
+
+
+def test_maintenance_windows_cache_invalidated_by_other_process(db_session):
+    db_session.add(
+        MaintenanceWindowRule(
+            name="Test window",
+            tenant_id=SINGLE_TENANT_UUID,
+            cel_query='source == "test-source"',
+            start_time=datetime.utcnow() - timedelta(hours=1),
+            end_time=datetime.utcnow() + timedelta(hours=1),
+            created_by="test_user",
+            enabled=True,
+        )
+    )
+    db_session.commit()
+
+    with patch.object(cache_invalidation_bus, "poll_interval", 0), patch.object(
+        cache_invalidation_bus, "_versions", None
+    ):
+        assert len(maintenance_windows_cache.get_windows(SINGLE_TENANT_UUID)) == 1
+
+        # another process disables the window
+        db_session.query(MaintenanceWindowRule).update({"enabled": False})
+        db_session.commit()
+        CacheInvalidationBus(backend="db").publish(
+            CacheEntity.MAINTENANCE_WINDOWS, SINGLE_TENANT_UUID
+        )
+
+        assert maintenance_windows_cache.get_windows(SINGLE_TENANT_UUID) == []
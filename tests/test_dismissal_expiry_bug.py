@@ -1336,3 +1336,120 @@ def test_dismissal_expiry_bug_cel_filter_FIXED_with_watcher(db_session):
             )
             assert results[0].dismissed == False
             assert results[0].dismissUntil is None
+
+
+def test_dismissal_expiry_index_follows_enrichments(db_session):
+    """
+    The dismissal expiry index is set and cleared with the dismissed/dismissUntil enrichments.
+    """
+    from keep.api.models.db.alert import AlertDismissalExpiry
+
+    tenant_id = SINGLE_TENANT_UUID
+    dismiss_until = datetime.datetime(2030, 1, 1, tzinfo=timezone.utc)
+    enrichment_bl = EnrichmentsBl(tenant_id, db_session)
+
+    def expiries():
+        db_session.expire_all()
+        return {
+            (row.fingerprint, row.expires_at)
+            for row in db_session.query(AlertDismissalExpiry).all()
+        }
+
+    # new enrichment
+    enrichment_bl.enrich_entity(
+        fingerprint="index-fp-1",
+        enrichments={
+            "dismissed": True,
+            "dismissUntil": dismiss_until.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        },
+        action_callee="test",
+        action_description="dismiss",
+        action_type=ActionType.GENERIC_ENRICH,
+    )
+    # existing enrichment
+    enrichment_bl.enrich_entity(
+        fingerprint="index-fp-2",
+        enrichments={"note": "a note"},
+        action_callee="test",
+        action_description="note",
+        action_type=ActionType.GENERIC_ENRICH,
+    )
+    enrichment_bl.enrich_entity(
+        fingerprint="index-fp-2",
+        enrichments={"dismissed": True, "dismissUntil": "forever"},
+        action_callee="test",
+        action_description="dismiss forever",
+        action_type=ActionType.GENERIC_ENRICH,
+    )
+    assert expiries() == {("index-fp-1", dismiss_until.replace(tzinfo=None))}
+
+    # un-dismissing clears the expiry
+    enrichment_bl.enrich_entity(
+        fingerprint="index-fp-1",
+        enrichments={"dismissed": False, "dismissUntil": None},
+        action_callee="test",
+        action_description="restore",
+        action_type=ActionType.GENERIC_ENRICH,
+    )
+    assert expiries() == set()
+
+
+def test_dismissal_expiry_processed_in_bulk(db_session):
+    """
+    Expired dismissals of a tenant are indexed to Elasticsearch and notified to the UI at once.
+    """
+    from unittest.mock import MagicMock, patch
+
+    from keep.api.models.db.alert import AlertDismissalExpiry, AlertEnrichment
+
+    tenant_id = SINGLE_TENANT_UUID
+    initial_time = datetime.datetime(2025, 1, 15, 20, 0, 0, tzinfo=timezone.utc)
+    dismiss_until_str = (initial_time + timedelta(hours=1)).strftime(
+        "%Y-%m-%dT%H:%M:%S.%fZ"
+    )
+    fingerprints = [f"bulk-fp-{i}" for i in range(3)]
+    with freeze_time(initial_time):
+        for fingerprint in fingerprints:
+            alert = Alert(
+                tenant_id=tenant_id,
+                provider_type="test",
+                provider_id="test",
+                event=_create_valid_event({"fingerprint": fingerprint}),
+                fingerprint=fingerprint,
+                timestamp=initial_time,
+            )
+            db_session.add(alert)
+            db_session.commit()
+            db_session.add(
+                LastAlert(
+                    tenant_id=tenant_id,
+                    fingerprint=fingerprint,
+                    timestamp=alert.timestamp,
+                    first_timestamp=alert.timestamp,
+                    alert_id=alert.id,
+                )
+            )
+        db_session.commit()
+        EnrichmentsBl(tenant_id, db_session).batch_enrich(
+            fingerprints=fingerprints,
+            enrichments={"dismissed": True, "dismissUntil": dismiss_until_str},
+            action_type=ActionType.GENERIC_ENRICH,
+            action_callee="test",
+            action_description="dismiss",
+        )
+
+    dispatcher = MagicMock()
+    with freeze_time(initial_time + timedelta(hours=2)), patch(
+        "keep.api.bl.dismissal_expiry_bl.get_notification_dispatcher",
+        return_value=dispatcher,
+    ), patch("keep.api.bl.dismissal_expiry_bl.ElasticClient") as elastic_client:
+        wait_for_dismissal_expiry_processing(tenant_id, db_session)
+
+    elastic_client.return_value.index_alerts.assert_called_once()
+    indexed_alerts = elastic_client.return_value.index_alerts.call_args[0][0]
+    assert sorted(alert.fingerprint for alert in indexed_alerts) == fingerprints
+    assert all(alert.dismissed is False for alert in indexed_alerts)
+    dispatcher.notify.assert_called_once_with(tenant_id, "poll-alerts")
+    assert db_session.query(AlertDismissalExpiry).count() == 0
+    for enrichment in db_session.query(AlertEnrichment).all():
+        assert enrichment.enrichments["dismissed"] is False
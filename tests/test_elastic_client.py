@@ -0,0 +1,186 @@
+import datetime
+import os
+import uuid
+from collections import OrderedDict
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from keep.api.core import elastic
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.core.elastic import ElasticClient
+from keep.api.models.alert import AlertDto, AlertSeverity, AlertStatus
+from keep.api.models.db.preset import PresetDto
+from keep.searchengine.searchengine import SearchEngine
+
+ELASTIC_ENV = {
+    "ELASTIC_ENABLED": "true",
+    "ELASTIC_USER": "elastic",
+    "ELASTIC_PASSWORD": "keeptests",
+    "ELASTIC_HOSTS": "http://localhost:9200",
+    "ELASTIC_INDEX_SUFFIX": "test",
+}
+
+
+def _alerts(count: int, batch: int = 0) -> list[AlertDto]:
+    return [
+        AlertDto(
+            id=f"alert-{batch}-{i}",
+            name=f"Alert {i}",
+            status=AlertStatus.FIRING,
+            severity=AlertSeverity.CRITICAL,
+            lastReceived=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            source=["test"],
+            fingerprint=f"fingerprint-{batch}-{i}",
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def elasticsearch_class():
+    with patch("keep.api.core.elastic.Elasticsearch") as elasticsearch_class, patch(
+        "keep.api.core.elastic._clients", {}
+    ), patch("keep.api.core.elastic._refresh_interval_indices", set()), patch(
+        "keep.api.core.elastic._sql_translations", OrderedDict()
+    ), patch(
+        "keep.api.core.elastic._preset_counts", OrderedDict()
+    ):
+        elasticsearch_class.side_effect = lambda **kwargs: MagicMock()
+        yield elasticsearch_class
+
+
+def test_elastic_client_reused(elasticsearch_class):
+    with patch.dict(os.environ, ELASTIC_ENV):
+        clients = [ElasticClient(tenant_id=SINGLE_TENANT_UUID) for _ in range(5)]
+        assert len({id(client._client) for client in clients}) == 1
+        assert elasticsearch_class.call_count == 1
+
+        # another endpoint gets its own client
+        ElasticClient(tenant_id=SINGLE_TENANT_UUID, hosts=["http://other:9200"])
+        assert elasticsearch_class.call_count == 2
+
+    # and so does a forked process
+    with patch.dict(os.environ, ELASTIC_ENV), patch.object(elastic, "_clients_pid", -1):
+        ElasticClient(tenant_id=SINGLE_TENANT_UUID)
+        assert elasticsearch_class.call_count == 3
+
+
+@pytest.mark.parametrize(
+    "refresh_strategy, write_refresh",
+    [(None, "wait_for"), ("true", "true"), ("interval", "false")],
+)
+def test_elastic_refresh_strategy(elasticsearch_class, refresh_strategy, write_refresh):
+    env = dict(ELASTIC_ENV)
+    if refresh_strategy:
+        env["ELASTIC_REFRESH_STRATEGY"] = refresh_strategy
+    with patch.dict(os.environ, env), patch("keep.api.core.elastic.bulk") as bulk:
+        bulk.return_value = (2, [])
+        elastic_client = ElasticClient(tenant_id=SINGLE_TENANT_UUID)
+        elastic_client.index_alerts(_alerts(2))
+        elastic_client.index_alerts(_alerts(2))
+        elastic_client.index_alert(_alerts(1)[0])
+
+    assert bulk.call_args.kwargs["refresh"] == write_refresh
+    assert elastic_client._client.index.call_args.kwargs["refresh"] == write_refresh
+    put_settings = elastic_client._client.indices.put_settings
+    if refresh_strategy == "interval":
+        # once per index and process
+        put_settings.assert_called_once_with(
+            index="keep-alerts-test", settings={"index": {"refresh_interval": "1s"}}
+        )
+    else:
+        put_settings.assert_not_called()
+
+
+def test_elastic_invalid_refresh_strategy(elasticsearch_class):
+    with patch.dict(
+        os.environ, {**ELASTIC_ENV, "ELASTIC_REFRESH_STRATEGY": "sometimes"}
+    ), pytest.raises(ValueError):
+        ElasticClient(tenant_id=SINGLE_TENANT_UUID)
+
+
+def _presets(count: int) -> list[PresetDto]:
+    return [
+        PresetDto(
+            id=uuid.uuid4(),
+            name=f"preset-{i}",
+            options=[
+                {"label": "CEL", "value": f"source == 'source-{i}'"},
+                {
+                    "label": "SQL",
+                    "value": {
+                        "sql": "(source in (:source_1))",
+                        "params": {"source_1": f"source-{i}"},
+                    },
+                },
+            ],
+        )
+        for i in range(count)
+    ]
+
+
+def test_elastic_preset_counts_single_search(db_session, elasticsearch_class):
+    presets = _presets(60)
+    with patch.dict(os.environ, ELASTIC_ENV):
+        search_engine = SearchEngine(tenant_id=SINGLE_TENANT_UUID)
+        client = search_engine.elastic_client._client
+        client.sql.translate.side_effect = lambda body: {
+            "query": {"term": {"sql": body["query"]}}
+        }
+        client.search.return_value = {
+            "aggregations": {
+                "presets": {
+                    "buckets": {
+                        str(preset.id): {"doc_count": i, "noisy": {"doc_count": i % 2}}
+                        for i, preset in enumerate(presets)
+                    }
+                }
+            }
+        }
+
+        search_engine.search_preset_alerts(presets)
+        assert client.search.call_count == 1
+        assert client.sql.translate.call_count == 60
+        client.run_query.assert_not_called()
+        aggs = client.search.call_args.kwargs["body"]["aggs"]["presets"]
+        assert aggs["filters"]["filters"][str(presets[1].id)] == {
+            "term": {
+                "sql": """select * from "keep-alerts-test" where (source in ('source-1'))"""
+            }
+        }
+        for i, preset in enumerate(presets):
+            assert preset.alerts_count == i
+            assert preset.should_do_noise_now == (i % 2 == 1)
+
+        # served from cache until the index is written to
+        SearchEngine(tenant_id=SINGLE_TENANT_UUID).search_preset_alerts(presets)
+        assert client.search.call_count == 1
+
+        with patch("keep.api.core.elastic.bulk", return_value=(1, [])):
+            search_engine.elastic_client.index_alerts(_alerts(1))
+        search_engine.search_preset_alerts(presets)
+        assert client.search.call_count == 2
+        # the translations of the queries are kept
+        assert client.sql.translate.call_count == 60
+
+
+@pytest.mark.parametrize("refresh_strategy", ["true", "wait_for", "interval"])
+def test_elastic_ingestion_refresh_strategies(elastic_client, refresh_strategy):
+    """
+    Index batches the way the ingestion does, every refresh strategy indexes all of them
+    (see scripts/benchmark_elastic_ingestion.py for their throughput).
+    """
+    batches, batch_size = 50, 20
+    with patch.dict(
+        os.environ, {"ELASTIC_REFRESH_STRATEGY": refresh_strategy}
+    ), patch.object(elastic, "_refresh_interval_indices", set()):
+        for batch in range(batches):
+            # a client per batch, like __handle_formatted_events
+            ElasticClient(tenant_id=SINGLE_TENANT_UUID).index_alerts(
+                _alerts(batch_size, batch)
+            )
+
+    elastic_client._client.indices.refresh(index=elastic_client.alerts_index)
+    count = elastic_client._client.count(index=elastic_client.alerts_index)
+    assert count["count"] == batches * batch_size
@@ -0,0 +1,113 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlmodel import Session
+
+from keep.api.core.alerts import (
+    __build_query_for_filtering as build_query_for_filtering,
+)
+from keep.api.core.alerts import (
+    get_alert_facets_data,
+    properties_metadata,
+    static_facets,
+)
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.core.facets import facet_options_cache
+from keep.api.core.facets_query_builder.get_facets_query_builder import (
+    get_facets_query_builder_for_dialect,
+)
+from keep.api.models.alert import AlertStatus
+from keep.api.models.db.alert import LastAlert
+from keep.api.models.facet import FacetOptionsQueryDto
+
+
+@pytest.fixture
+def facets_engine(db_session):
+    engine = db_session.get_bind()
+    facet_options_cache.invalidate()
+    with patch("keep.api.core.facets.engine", engine), patch(
+        "keep.api.core.facets_query_builder.get_facets_query_builder.engine", engine
+    ):
+        yield engine
+    facet_options_cache.invalidate()
+
+
+def _alerts_base_query_factory(facet_property_path, involved_fields, select_statement):
+    return build_query_for_filtering(
+        tenant_id=SINGLE_TENANT_UUID,
+        select_args=select_statement,
+        force_fetch=False,
+        fetch_incidents="incident." in facet_property_path,
+    )["query"]
+
+
+def test_single_pass_facets_match_per_facet_queries(
+    db_session, facets_engine, setup_stress_alerts_no_elastic
+):
+    setup_stress_alerts_no_elastic(100)
+    facets = [
+        facet
+        for facet in static_facets
+        if "incident." not in facet.property_path
+    ]
+    facet_options_query = FacetOptionsQueryDto(
+        cel="", facet_queries={facet.id: "" for facet in facets}
+    )
+    facets_query_builder = get_facets_query_builder_for_dialect(
+        "sqlite", properties_metadata
+    )
+
+    with Session(facets_engine) as session:
+        single_pass_rows = facets_query_builder.fetch_facets_data(
+            session=session,
+            base_query_factory=_alerts_base_query_factory,
+            entity_id_column=LastAlert.alert_id,
+            facets=facets,
+            facet_options_query=facet_options_query,
+        )
+        per_facet_rows = session.exec(
+            facets_query_builder.build_facets_data_query(
+                base_query_factory=_alerts_base_query_factory,
+                entity_id_column=LastAlert.alert_id,
+                facets=facets,
+                facet_options_query=facet_options_query,
+            )
+        ).all()
+
+    assert sorted(map(tuple, single_pass_rows), key=str) == sorted(
+        map(tuple, per_facet_rows), key=str
+    )
+
+
+def test_facet_options_are_cached_until_data_changes(
+    db_session, facets_engine, setup_stress_alerts_no_elastic, create_alert
+):
+    setup_stress_alerts_no_elastic(20)
+    facet_options_query = FacetOptionsQueryDto(
+        cel="", facet_queries={facet.id: "" for facet in static_facets}
+    )
+
+    first = get_alert_facets_data(SINGLE_TENANT_UUID, facet_options_query)
+    with patch(
+        "keep.api.core.facets_query_builder.base_facets_query_builder"
+        ".BaseFacetsQueryBuilder.fetch_facets_data"
+    ) as fetch_facets_data:
+        second = get_alert_facets_data(SINGLE_TENANT_UUID, facet_options_query)
+        fetch_facets_data.assert_not_called()
+    assert first == second
+
+    source_facet_id = next(
+        facet.id for facet in static_facets if facet.property_path == "source"
+    )
+    assert sum(option.matches_count for option in first[source_facet_id]) == 20
+
+    # new alerts change the data version, so the cache is bypassed
+    create_alert(
+        "new-fingerprint",
+        AlertStatus.FIRING,
+        datetime.utcnow(),
+        {"source": ["new-source"]},
+    )
+    third = get_alert_facets_data(SINGLE_TENANT_UUID, facet_options_query)
+    assert sum(option.matches_count for option in third[source_facet_id]) == 21
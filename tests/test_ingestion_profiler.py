@@ -0,0 +1,89 @@
+import datetime
+
+from opentelemetry import trace
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.core.ingestion_profiler import (
+    OTHER_TENANTS,
+    TenantLabels,
+    profile_stage,
+)
+from keep.api.models.alert import AlertStatus
+
+
+def _sample(name: str, stage: str, tenant_id: str = SINGLE_TENANT_UUID) -> float:
+    return (
+        REGISTRY.get_sample_value(name, {"stage": stage, "tenant_id": tenant_id}) or 0
+    )
+
+
+def test_profile_stage_counts_queries_of_nested_stages(db_session):
+    tracer = trace.get_tracer(__name__)
+    # the first query of the session may run setup queries of the connection
+    db_session.execute(text("SELECT 1"))
+    outer_before = _sample("keep_ingestion_stage_db_queries_sum", "test_outer")
+    inner_before = _sample("keep_ingestion_stage_db_queries_sum", "test_inner")
+    count_before = _sample("keep_ingestion_stage_duration_seconds_count", "test_outer")
+
+    with profile_stage(tracer, "process_event_test_outer", SINGLE_TENANT_UUID):
+        db_session.execute(text("SELECT 1"))
+        with profile_stage(tracer, "process_event_test_inner", SINGLE_TENANT_UUID):
+            db_session.execute(text("SELECT 1"))
+            db_session.execute(text("SELECT 1"))
+    # queries out of any stage are not counted
+    db_session.execute(text("SELECT 1"))
+
+    assert (
+        _sample("keep_ingestion_stage_db_queries_sum", "test_inner") - inner_before == 2
+    )
+    assert (
+        _sample("keep_ingestion_stage_db_queries_sum", "test_outer") - outer_before == 3
+    )
+    assert (
+        _sample("keep_ingestion_stage_duration_seconds_count", "test_outer")
+        - count_before
+        == 1
+    )
+
+
+def test_tenant_labels_cardinality_guard():
+    tenant_labels = TenantLabels(max_tenants=2)
+    assert tenant_labels.get("tenant-a") == "tenant-a"
+    assert tenant_labels.get("tenant-b") == "tenant-b"
+    assert tenant_labels.get("tenant-c") == OTHER_TENANTS
+    assert tenant_labels.get("tenant-a") == "tenant-a"
+    assert tenant_labels.get(None) == OTHER_TENANTS
+
+    assert TenantLabels(enabled=False).get("tenant-a") == OTHER_TENANTS
+
+
+def test_process_event_records_stage_metrics(db_session, create_alert):
+    stages = ["deduplication", "save_to_db", "internal_preparation"]
+    durations_before = {
+        stage: _sample("keep_ingestion_stage_duration_seconds_count", stage)
+        for stage in stages
+    }
+    queries_before = _sample("keep_ingestion_stage_db_queries_sum", "save_to_db")
+    batches_before = (
+        REGISTRY.get_sample_value(
+            "keep_ingestion_batch_size_count", {"tenant_id": SINGLE_TENANT_UUID}
+        )
+        or 0
+    )
+
+    create_alert("fp1", AlertStatus.FIRING, datetime.datetime.utcnow())
+
+    for stage in stages:
+        assert (
+            _sample("keep_ingestion_stage_duration_seconds_count", stage)
+            == durations_before[stage] + 1
+        )
+    assert _sample("keep_ingestion_stage_db_queries_sum", "save_to_db") > queries_before
+    assert (
+        REGISTRY.get_sample_value(
+            "keep_ingestion_batch_size_count", {"tenant_id": SINGLE_TENANT_UUID}
+        )
+        == batches_before + 1
+    )
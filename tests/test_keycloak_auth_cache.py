@@ -0,0 +1,248 @@
+import json
+import threading
+import time
+import urllib.parse
+import uuid
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from freezegun import freeze_time
+from jwcrypto import jwk, jwt
+
+from ee.identitymanager.identity_managers.keycloak.keycloak_auth_cache import (
+    invalidates_authorization,
+    jwks_cache,
+    uma_decision_cache,
+)
+from ee.identitymanager.identity_managers.keycloak.keycloak_authverifier import (
+    KeycloakAuthVerifier,
+)
+
+REALM = "keep"
+CLIENT_ID = "keep"
+
+
+class KeycloakStandIn:
+    """
+    A local stand-in for the Keycloak endpoints used on the request path, counting the
+    requests it serves. An optional latency per request stands for the network round
+    trip (see scripts/benchmark_keycloak_auth.py).
+    """
+
+    def __init__(self, latency: float = 0):
+        self.latency = latency
+        self.calls = {"certs": 0, "realm": 0, "uma": 0}
+        self.allowed = {}
+        self.rotate_key()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, body: dict):
+                time.sleep(stand_in.latency)
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                base = f"/realms/{REALM}"
+                if self.path == f"{base}/protocol/openid-connect/certs":
+                    stand_in.calls["certs"] += 1
+                    self._reply(json.loads(stand_in.keys.export(private_keys=False)))
+                elif self.path == f"{base}/.well-known/uma2-configuration":
+                    self._reply(
+                        {
+                            "token_endpoint": f"{stand_in.url}{base}/protocol/openid-connect/token"
+                        }
+                    )
+                elif self.path == base:
+                    stand_in.calls["realm"] += 1
+                    pem = stand_in.key.export_to_pem().decode()
+                    public_key = "".join(pem.strip().splitlines()[1:-1])
+                    self._reply({"public_key": public_key})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = urllib.parse.parse_qs(self.rfile.read(length).decode())
+                if form.get("grant_type") == ["client_credentials"]:
+                    self._reply(
+                        {
+                            "access_token": "service-token",
+                            "refresh_token": "service-refresh-token",
+                            "expires_in": 300,
+                            "refresh_expires_in": 300,
+                        }
+                    )
+                    return
+                stand_in.calls["uma"] += 1
+                resource = form["permission"][0].split("#")[0]
+                self._reply({"result": stand_in.allowed.get(resource, True)})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def rotate_key(self):
+        self.key = jwk.JWK.generate(kty="RSA", size=2048, kid=f"key-{time.time_ns()}")
+        self.keys = jwk.JWKSet()
+        self.keys.add(self.key)
+
+    def issue_token(self, expires_in: int = 300) -> str:
+        token = jwt.JWT(
+            header={"alg": "RS256", "kid": self.key.key_id},
+            claims={
+                "exp": int(time.time()) + expires_in,
+                "jti": str(uuid.uuid4()),
+                "keep_tenant_id": "keep",
+                "preferred_username": "user@keephq.dev",
+                "resource_access": {CLIENT_ID: {"roles": ["admin"]}},
+            },
+        )
+        token.make_signed_token(self.key)
+        return token.serialize()
+
+
+@pytest.fixture
+def keycloak_stand_in(monkeypatch):
+    stand_in = KeycloakStandIn()
+    monkeypatch.setenv("KEYCLOAK_URL", stand_in.url)
+    monkeypatch.setenv("KEYCLOAK_REALM", REALM)
+    monkeypatch.setenv("KEYCLOAK_CLIENT_ID", CLIENT_ID)
+    monkeypatch.setenv("KEYCLOAK_CLIENT_SECRET", "secret")
+    jwks_cache.invalidate()
+    uma_decision_cache.invalidate()
+    yield stand_in
+    stand_in.server.shutdown()
+    jwks_cache.invalidate()
+    uma_decision_cache.invalidate()
+
+
+def _verifier(resource: str = "GET /alerts") -> KeycloakAuthVerifier:
+    verifier = KeycloakAuthVerifier(["read:alert"])
+    verifier.protected_resource = resource
+    return verifier
+
+
+def _request(verifier: KeycloakAuthVerifier, token: str):
+    authenticated_entity = verifier._verify_bearer_token(token)
+    verifier._authorize(authenticated_entity)
+    return authenticated_entity
+
+
+def test_keycloak_token_validated_with_cached_jwks(keycloak_stand_in):
+    verifier = _verifier()
+    token = keycloak_stand_in.issue_token()
+
+    for _ in range(10):
+        authenticated_entity = verifier._verify_bearer_token(token)
+    assert authenticated_entity.tenant_id == "keep"
+    assert authenticated_entity.role == "admin"
+    assert keycloak_stand_in.calls["certs"] == 1
+    assert keycloak_stand_in.calls["realm"] == 0
+
+    # other routes have their own verifier but share the realm keys
+    _verifier("GET /incidents")._verify_bearer_token(token)
+    assert keycloak_stand_in.calls["certs"] == 1
+
+
+def test_keycloak_jwks_refreshed_on_key_rotation(keycloak_stand_in):
+    verifier = _verifier()
+    verifier._verify_bearer_token(keycloak_stand_in.issue_token())
+
+    keycloak_stand_in.rotate_key()
+    with patch.object(jwks_cache, "min_refresh_interval", 0):
+        verifier._verify_bearer_token(keycloak_stand_in.issue_token())
+    assert keycloak_stand_in.calls["certs"] == 2
+
+    # unknown keys can't make every request fetch the keys again
+    keycloak_stand_in.rotate_key()
+    for _ in range(3):
+        with pytest.raises(HTTPException) as e:
+            verifier._verify_bearer_token(keycloak_stand_in.issue_token())
+        assert e.value.status_code == 401
+    assert keycloak_stand_in.calls["certs"] == 2
+
+
+def test_keycloak_uma_decisions_cached(keycloak_stand_in):
+    verifier = _verifier()
+    token = keycloak_stand_in.issue_token()
+
+    for _ in range(10):
+        _request(verifier, token)
+    assert keycloak_stand_in.calls["uma"] == 1
+
+    # decisions are per resource
+    keycloak_stand_in.allowed["GET /secrets"] = False
+    secrets_verifier = _verifier("GET /secrets")
+    for _ in range(3):
+        with pytest.raises(HTTPException) as e:
+            _request(secrets_verifier, token)
+        assert e.value.status_code == 403
+    assert keycloak_stand_in.calls["uma"] == 2
+
+    # and per token
+    _request(verifier, keycloak_stand_in.issue_token())
+    assert keycloak_stand_in.calls["uma"] == 3
+
+
+def test_keycloak_uma_decisions_invalidated_on_permission_changes(keycloak_stand_in):
+    verifier = _verifier()
+    token = keycloak_stand_in.issue_token()
+    _request(verifier, token)
+
+    @invalidates_authorization
+    def update_role():
+        keycloak_stand_in.allowed["GET /alerts"] = False
+
+    update_role()
+    with pytest.raises(HTTPException):
+        _request(verifier, token)
+    assert keycloak_stand_in.calls["uma"] == 2
+
+
+def test_keycloak_uma_decisions_expire_with_token(keycloak_stand_in):
+    verifier = _verifier()
+    token = keycloak_stand_in.issue_token(expires_in=10)
+    _request(verifier, token)
+
+    authenticated_entity = verifier._verify_bearer_token(token)
+    with freeze_time(timedelta(seconds=5), tick=True):
+        verifier._authorize(authenticated_entity)
+    assert keycloak_stand_in.calls["uma"] == 1
+    # the cache TTL is longer, the token expiry wins
+    with freeze_time(timedelta(seconds=11), tick=True):
+        verifier._authorize(authenticated_entity)
+    assert keycloak_stand_in.calls["uma"] == 2
+
+
+def test_keycloak_auth_round_trips(keycloak_stand_in):
+    verifier = _verifier()
+    token = keycloak_stand_in.issue_token()
+    requests = 20
+
+    with patch(
+        "ee.identitymanager.identity_managers.keycloak.keycloak_authverifier.KEYCLOAK_AUTH_CACHE_ENABLED",
+        False,
+    ):
+        for _ in range(requests):
+            _request(verifier, token)
+    # a realm key fetch and a UMA check per request
+    assert keycloak_stand_in.calls["realm"] == requests
+    assert keycloak_stand_in.calls["uma"] == requests
+
+    for _ in range(requests):
+        _request(verifier, token)
+    # a single key fetch and UMA check for all of them
+    assert keycloak_stand_in.calls["certs"] == 1
+    assert keycloak_stand_in.calls["realm"] == requests
+    assert keycloak_stand_in.calls["uma"] == requests + 1
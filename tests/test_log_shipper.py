@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from unittest.mock import patch
+from uuid import uuid4
+
+from keep.api.core import db
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.core.log_shipper import LogShipper
+from keep.api.models.db.workflow import Workflow, WorkflowExecution
+from keep.workflowmanager.workflowstore import WorkflowStore
+
+
+def test_log_shipper_flushes_by_size_and_time():
+    shipped = []
+    shipper = LogShipper(
+        sinks={"workflow": lambda entries: shipped.append(list(entries))},
+        batch_size=3,
+        flush_interval=0.5,
+    )
+    for i in range(4):
+        shipper.enqueue("workflow", {"i": i})
+
+    # the first 3 entries fill a batch, the last one waits for the interval
+    time.sleep(0.2)
+    assert shipped == [[{"i": 0}, {"i": 1}, {"i": 2}]]
+    time.sleep(0.6)
+    assert shipped[1:] == [[{"i": 3}]]
+    assert shipper.stats[("workflow", "shipped")] == 4
+    shipper.stop()
+
+
+def test_log_shipper_drops_when_queue_is_full():
+    release = threading.Event()
+    shipper = LogShipper(
+        sinks={"provider": lambda entries: release.wait(5)},
+        queue_size=2,
+        batch_size=1,
+    )
+    # the first entry blocks the shipping thread, the next two fill the queue
+    results = [shipper.enqueue("provider", {"i": i}) for i in range(3)]
+    time.sleep(0.1)
+    results += [shipper.enqueue("provider", {"i": i}) for i in range(3, 6)]
+
+    assert results.count(False) >= 1
+    assert shipper.stats[("provider", "dropped")] == results.count(False)
+    release.set()
+    assert shipper.flush()
+    assert shipper.stats[("provider", "shipped")] == results.count(True)
+    shipper.stop()
+
+
+def test_compacted_workflow_logs_are_expanded(db_session):
+    workflow = Workflow(
+        id="workflow-compact",
+        name="Workflow compact",
+        tenant_id=SINGLE_TENANT_UUID,
+        description="",
+        created_by="test@keephq.dev",
+        interval=0,
+        workflow_raw="",
+        last_updated=datetime.now(tz=timezone.utc),
+    )
+    workflow_execution = WorkflowExecution(
+        id=str(uuid4()),
+        workflow_id=workflow.id,
+        workflow_revision=1,
+        tenant_id=SINGLE_TENANT_UUID,
+        started=datetime.now(tz=timezone.utc),
+        triggered_by="test",
+        execution_number=1,
+        status="success",
+    )
+    db_session.add(workflow)
+    db_session.add(workflow_execution)
+    db_session.commit()
+
+    now = time.time()
+    log_entries = [
+        {
+            "workflow_execution_id": workflow_execution.id,
+            "message": f"line {i}",
+            "created": now + i,
+            "context": {"step_id": "step"},
+        }
+        for i in range(5)
+    ]
+    with patch.object(db, "engine", db_session.get_bind()), patch.object(
+        db, "WORKFLOW_LOGS_COMPACT_THRESHOLD", 3
+    ), patch("keep.api.logging.LOG_FORMAT", "dev_terminal"):
+        db.push_logs_to_db(log_entries)
+        stored_rows = db_session.exec(
+            db.select(db.WorkflowExecutionLog).where(
+                db.WorkflowExecutionLog.workflow_execution_id == workflow_execution.id
+            )
+        ).all()
+        _, logs = WorkflowStore().get_workflow_execution_with_logs(
+            tenant_id=SINGLE_TENANT_UUID,
+            workflow_execution_id=workflow_execution.id,
+        )
+
+    assert len(stored_rows) == 1
+    assert [log.message for log in logs] == [f"line {i}" for i in range(5)]
+    assert all(log.context == {"step_id": "step"} for log in logs)
+
+
+def test_workflow_db_handler_ships_through_log_shipper():
+    from keep.api.logging import WorkflowDBHandler
+
+    handler = WorkflowDBHandler()
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "hello", None, None)
+    record.workflow_execution_id = "execution-id"
+    with patch("keep.api.logging.get_log_shipper") as get_log_shipper:
+        handler.emit(record)
+    kind, entry = get_log_shipper.return_value.enqueue.call_args.args
+    assert kind == "workflow"
+    assert entry["workflow_execution_id"] == "execution-id"
+    assert entry["message"] == "hello"
@@ -5,15 +5,20 @@ from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
 import pytest
+from sqlmodel import select
+
 import keep.api.consts
 from keep.api.bl.maintenance_windows_bl import MaintenanceWindowsBl
 from keep.api.core.db import get_alerts_by_status, get_workflow_executions, get_workflow_executions_count
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.core.maintenance_windows_cache import maintenance_windows_cache
 from keep.api.models.alert import AlertDto, AlertStatus
-from keep.api.models.db.alert import Alert
+from keep.api.models.action_type import ActionType
+from keep.api.models.db.alert import Alert, AlertAudit
 from keep.api.models.db.maintenance_window import MaintenanceRuleCreate, MaintenanceWindowRule
+from keep.api.models.db.tenant import Tenant
 from keep.api.models.db.workflow import Workflow
-from keep.api.routes.maintenance import update_maintenance_rule
+from keep.api.routes.maintenance import create_maintenance_rule, update_maintenance_rule
 from keep.functions import cyaml
 from keep.workflowmanager.workflowstore import WorkflowStore
 from tests.fixtures.workflow_manager import (
@@ -24,6 +29,8 @@ from tests.fixtures.workflow_manager import (
 
 @pytest.fixture
 def mock_session():
+    # every test brings its own windows for the same tenant
+    maintenance_windows_cache.invalidate()
     return MagicMock()
 
 
@@ -319,7 +326,7 @@ def test_strategy_restore_update_status(
     assert alert_dto.status == AlertStatus.MAINTENANCE.value
 
 def test_strategy_clean_status(
-    mock_session, alert_maint, monkeypatch, expired_maintenance_window_rule_with_suppression_on
+    db_session, alert_maint, monkeypatch, expired_maintenance_window_rule_with_suppression_on
 ):
     """
     Feature: Strategy - recover previous status
@@ -330,39 +337,28 @@ def test_strategy_clean_status(
     importlib.reload(keep.api.consts)
     importlib.reload(keep.api.bl.maintenance_windows_bl)
     # AND there is a maintenance window expired.
-    retrieve_windows_session = MagicMock()
-    retrieve_windows_session.exec.return_value.all.return_value = [
-        expired_maintenance_window_rule_with_suppression_on
-    ]
+    expired_maintenance_window_rule_with_suppression_on.created_by = "test_user"
+    db_session.add(expired_maintenance_window_rule_with_suppression_on)
     # AND there is an alert which was received inside a maintenance window
-    retrieve_alerts_session = MagicMock()
-    retrieve_alerts_session.exec.return_value.all.return_value = [alert_maint]
-
-    recover_status_session = MagicMock()
-    recover_status_session.exec = MagicMock()
-    recover_status_session.commit = MagicMock()
-
-    # AND there is a last alert with the same FP
-    mock_last_alert = MagicMock()
-    mock_last_alert.alert_id = alert_maint.id
-    mock_last_alert.event = {"alert_id": alert_maint.id}
+    db_session.add(alert_maint)
+    db_session.commit()
 
     # WHEN recover its previous status
-    mock_session.__enter__.side_effect = [retrieve_windows_session, retrieve_alerts_session, recover_status_session, MagicMock(),  MagicMock()]
-    with patch("keep.api.core.db.existed_or_new_session", return_value=mock_session), \
-            patch("keep.api.bl.maintenance_windows_bl.get_last_alert_by_fingerprint", return_value=mock_last_alert), \
-                patch("keep.api.core.db.get_alert_by_event_id", return_value=alert_maint):
-        
-        MaintenanceWindowsBl.recover_strategy(logger=MagicMock(), session=mock_session)
+    MaintenanceWindowsBl.recover_strategy(logger=MagicMock(), session=db_session)
 
     # THEN the new status will be the previous status, and the previous status will be the old status
-    _, new_status, new_previous_status, _ = list(recover_status_session.exec.call_args[0][0]._values.values())[0].value.values()
-    assert new_status == AlertStatus.FIRING.value
-    assert new_previous_status == AlertStatus.MAINTENANCE.value
+    db_session.refresh(alert_maint)
+    assert alert_maint.event["status"] == AlertStatus.FIRING.value
+    assert alert_maint.event["previous_status"] == AlertStatus.MAINTENANCE.value
+    # AND the recovery is audited
+    audits = db_session.exec(
+        select(AlertAudit).where(AlertAudit.fingerprint == alert_maint.fingerprint)
+    ).all()
+    assert [audit.action for audit in audits] == [ActionType.MAINTENANCE_EXPIRED.value]
 
 
 def test_strategy_alert_block_by_window(
-    mock_session, active_maintenance_window_rule_with_suppression_on, alert_maint, monkeypatch
+    db_session, active_maintenance_window_rule_with_suppression_on, alert_maint, monkeypatch
 ):
     """
     Feature: Strategy - recover previous status
@@ -373,30 +369,96 @@ def test_strategy_alert_block_by_window(
     importlib.reload(keep.api.consts)
     importlib.reload(keep.api.bl.maintenance_windows_bl)
     # AND there is a maintenance window active
-    retrieve_windows_session = MagicMock()
-    retrieve_windows_session.exec.return_value.all.return_value = [active_maintenance_window_rule_with_suppression_on]
+    active_maintenance_window_rule_with_suppression_on.created_by = "test_user"
+    db_session.add(active_maintenance_window_rule_with_suppression_on)
     # AND there is an alert which was received inside a maintenance window
-    retrieve_alerts_session = MagicMock()
-    retrieve_alerts_session.exec.return_value.all.return_value = [alert_maint]
-
-    recover_status_session = MagicMock()
-    recover_status_session.exec = MagicMock()
-    recover_status_session.commit = MagicMock()
+    db_session.add(alert_maint)
+    db_session.commit()
 
     loggerMag = MagicMock()
     # WHEN the conditions match to recover the initial alert status
-    mock_session.__enter__.side_effect = [retrieve_windows_session, retrieve_alerts_session, recover_status_session, MagicMock()]
-    with patch("keep.api.core.db.existed_or_new_session", return_value=mock_session):
-        MaintenanceWindowsBl.recover_strategy(logger=loggerMag, session=mock_session)
-
-    # THEN the update status method will not be called
-    assert not recover_status_session.exec.called
+    MaintenanceWindowsBl.recover_strategy(logger=loggerMag, session=db_session)
+
+    # THEN the alert keeps its status
+    db_session.refresh(alert_maint)
+    assert alert_maint.event["status"] == AlertStatus.MAINTENANCE.value
+    # AND the window is recorded in the alert maintenance windows trace
+    assert alert_maint.event["maintenance_windows_trace"] == [
+        str(active_maintenance_window_rule_with_suppression_on.id)
+    ]
     # AND logger alert will rise an info about the alert blocked by maintenance window
     loggerMag.info.assert_any_call(
             "Alert %s is blocked due to the maintenance window: %s.", alert_maint.id,
             active_maintenance_window_rule_with_suppression_on.id
         )
 
+
+def test_strategy_recovers_in_batches_per_tenant(db_session, monkeypatch):
+    """
+    Feature: Strategy - recover previous status
+    Scenario: Alerts are reviewed in batches and only the windows of their own tenant
+             can keep them in maintenance.
+    """
+    monkeypatch.setenv("MAINTENANCE_WINDOW_STRATEGY", "recover_previous_status")
+    importlib.reload(keep.api.consts)
+    importlib.reload(keep.api.bl.maintenance_windows_bl)
+    db_session.add(Tenant(id="other-tenant", name="Other Tenant"))
+    # GIVEN an active window for the alerts of "blocked-source" in the other tenant only
+    db_session.add(
+        MaintenanceWindowRule(
+            id=3,
+            name="Other tenant maintenance_window",
+            tenant_id="other-tenant",
+            cel_query='source == "blocked-source"',
+            start_time=datetime.utcnow() - timedelta(hours=1),
+            end_time=datetime.utcnow() + timedelta(days=1),
+            enabled=True,
+            suppress=True,
+            created_by="test_user",
+        )
+    )
+    # AND alerts in maintenance of both tenants
+    alerts = []
+    for tenant_id in [SINGLE_TENANT_UUID, "other-tenant"]:
+        for i in range(3):
+            alert = Alert(
+                tenant_id=tenant_id,
+                fingerprint=f"fingerprint-{i}",
+                provider_id="test-provider",
+                provider_type="test-provider-type",
+                event={
+                    "name": "Test Alert",
+                    "status": AlertStatus.MAINTENANCE.value,
+                    "previous_status": AlertStatus.FIRING.value,
+                    "source": ["blocked-source"],
+                },
+                alert_hash=f"{tenant_id}-{i}",
+            )
+            alerts.append(alert)
+            db_session.add(alert)
+    db_session.commit()
+
+    # WHEN the strategy runs with batches smaller than the number of alerts
+    MaintenanceWindowsBl.recover_strategy(
+        logger=MagicMock(), session=db_session, batch_size=2
+    )
+
+    # THEN only the alerts of the tenant without windows are recovered
+    for alert in alerts:
+        db_session.refresh(alert)
+    statuses = {(alert.tenant_id, alert.event["status"]) for alert in alerts}
+    assert statuses == {
+        (SINGLE_TENANT_UUID, AlertStatus.FIRING.value),
+        ("other-tenant", AlertStatus.MAINTENANCE.value),
+    }
+    audits = db_session.exec(
+        select(AlertAudit).where(
+            AlertAudit.action == ActionType.MAINTENANCE_EXPIRED.value
+        )
+    ).all()
+    assert {audit.tenant_id for audit in audits} == {SINGLE_TENANT_UUID}
+    assert len(audits) == 3
+
 def test_strategy_alert_expired_by_current_time(
     create_alert, db_session, monkeypatch, create_window_maintenance_active
 ):
@@ -554,4 +616,111 @@ def test_strategy_alert_execution_wf(
     #THEN The WF is not executed if there is a resolved alert or executed 1 time if there are only firing alerts
     n_executions = get_workflow_executions(SINGLE_TENANT_UUID, workflow.id)[0]
 
-    assert n_executions == executions
\ No newline at end of file
+    assert n_executions == executions
+
+def test_maintenance_windows_are_cached_until_changed(db_session, alert_dto):
+    """
+    Feature: Maintenance windows cache
+    Scenario: The windows of a tenant are loaded once and reloaded when a window is changed
+             through the API.
+    """
+    authenticated_entity = MagicMock(tenant_id=SINGLE_TENANT_UUID, email="test@keephq.dev")
+    rule = create_maintenance_rule(
+        rule_dto=MaintenanceRuleCreate(
+            name="Test window",
+            cel_query='source == "test-source"',
+            start_time=datetime.utcnow() - timedelta(hours=1),
+            duration_seconds=7200,
+        ),
+        authenticated_entity=authenticated_entity,
+        session=db_session,
+    )
+    assert MaintenanceWindowsBl(
+        tenant_id=SINGLE_TENANT_UUID, session=db_session
+    ).check_if_alert_in_maintenance_windows(alert_dto)
+
+    # GIVEN the windows of the tenant were loaded
+    with patch.object(
+        maintenance_windows_cache, "_load", wraps=maintenance_windows_cache._load
+    ) as load:
+        # WHEN the next events are checked
+        assert MaintenanceWindowsBl(
+            tenant_id=SINGLE_TENANT_UUID, session=db_session
+        ).check_if_alert_in_maintenance_windows(alert_dto)
+        # THEN the windows are not loaded again
+        load.assert_not_called()
+
+        # WHEN the window is changed
+        update_maintenance_rule(
+            rule_id=rule.id,
+            rule_dto=MaintenanceRuleCreate(
+                name="Test window",
+                cel_query='source == "other-source"',
+                start_time=datetime.utcnow() - timedelta(hours=1),
+                duration_seconds=7200,
+            ),
+            authenticated_entity=authenticated_entity,
+            session=db_session,
+        )
+        # THEN the new definition is used right away
+        assert not MaintenanceWindowsBl(
+            tenant_id=SINGLE_TENANT_UUID, session=db_session
+        ).check_if_alert_in_maintenance_windows(alert_dto)
+        load.assert_called_once()
+
+
+def test_maintenance_window_starting_soon_is_cached_ahead(db_session, alert_dto):
+    """
+    Feature: Maintenance windows cache
+    Scenario: A window starting before the next reload is cached, but only applies once started.
+    """
+    db_session.add(
+        MaintenanceWindowRule(
+            name="Upcoming window",
+            tenant_id=SINGLE_TENANT_UUID,
+            cel_query='source == "test-source"',
+            start_time=datetime.utcnow() + timedelta(seconds=2),
+            end_time=datetime.utcnow() + timedelta(hours=1),
+            created_by="test_user",
+            enabled=True,
+        )
+    )
+    db_session.commit()
+
+    assert not MaintenanceWindowsBl(
+        tenant_id=SINGLE_TENANT_UUID, session=db_session
+    ).check_if_alert_in_maintenance_windows(alert_dto)
+
+    time.sleep(2.5)
+    with patch.object(maintenance_windows_cache, "_load") as load:
+        assert MaintenanceWindowsBl(
+            tenant_id=SINGLE_TENANT_UUID, session=db_session
+        ).check_if_alert_in_maintenance_windows(alert_dto)
+        load.assert_not_called()
+
+
+def test_alert_activation_is_built_once_for_all_windows(mock_session, alert_dto):
+    rules = [
+        MaintenanceWindowRule(
+            id=i,
+            name=f"Window {i}",
+            tenant_id="test-tenant",
+            cel_query=f'source == "other-source-{i}"',
+            start_time=datetime.utcnow() - timedelta(hours=1),
+            end_time=datetime.utcnow() + timedelta(days=1),
+            enabled=True,
+        )
+        for i in range(3)
+    ]
+    mock_session.query.return_value.filter.return_value.filter.return_value.filter.return_value.filter.return_value.all.return_value = rules
+    maintenance_window_bl = MaintenanceWindowsBl(
+        tenant_id="test-tenant", session=mock_session
+    )
+
+    # other tests reload the module, patch the class the module currently holds
+    bl_class = keep.api.bl.maintenance_windows_bl.MaintenanceWindowsBl
+    with patch.object(
+        bl_class, "get_cel_activation", wraps=bl_class.get_cel_activation
+    ) as get_cel_activation:
+        assert not maintenance_window_bl.check_if_alert_in_maintenance_windows(alert_dto)
+    get_cel_activation.assert_called_once()
@@ -0,0 +1,114 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+from keep.api.core.notification_dispatcher import NotificationDispatcher
+
+
+def _dispatcher(client, **kwargs):
+    kwargs.setdefault("interval", 0.5)
+    kwargs.setdefault("tick", 0.05)
+    kwargs.setdefault("redis_dedup", False)
+    return NotificationDispatcher(client_factory=lambda: client, **kwargs)
+
+
+def test_notification_dispatcher_disabled_without_client():
+    dispatcher = NotificationDispatcher(client_factory=lambda: None)
+    assert not dispatcher.enabled
+    assert dispatcher.notify("tenant", "poll-alerts") is False
+    assert dispatcher.flush()
+
+
+def test_notification_dispatcher_coalesces_within_interval():
+    client = MagicMock()
+    dispatcher = _dispatcher(client)
+
+    # the first notification is sent right away, the next ones once the interval is over
+    dispatcher.notify("tenant", "poll-alerts")
+    time.sleep(0.2)
+    assert client.trigger.call_count == 1
+    for _ in range(5):
+        dispatcher.notify("tenant", "poll-alerts")
+    time.sleep(0.1)
+    assert client.trigger.call_count == 1
+    time.sleep(0.5)
+    assert client.trigger.call_count == 2
+    client.trigger.assert_called_with("private-tenant", "poll-alerts", {})
+    assert dispatcher.stats[("poll-alerts", "dispatched")] == 2
+    assert dispatcher.stats[("poll-alerts", "coalesced")] == 4
+
+
+def test_notification_dispatcher_merges_lists_per_tenant_and_event():
+    client = MagicMock()
+    dispatcher = _dispatcher(client, interval=60)
+
+    dispatcher.notify("tenant", "poll-presets", ["feed"])
+    time.sleep(0.2)
+    dispatcher.notify("tenant", "poll-presets", ["feed", "dismissed"])
+    dispatcher.notify("tenant", "poll-presets", ["noisy"])
+    dispatcher.notify("other-tenant", "poll-presets", ["feed"])
+    assert dispatcher.flush()
+
+    calls = [call.args for call in client.trigger.call_args_list]
+    assert calls[0] == ("private-tenant", "poll-presets", json.dumps(["feed"]))
+    assert sorted(calls[1:]) == [
+        ("private-other-tenant", "poll-presets", json.dumps(["feed"])),
+        (
+            "private-tenant",
+            "poll-presets",
+            json.dumps(["feed", "dismissed", "noisy"]),
+        ),
+    ]
+
+
+def test_notification_dispatcher_deduplicates_across_processes():
+    client = MagicMock()
+    redis_client = MagicMock()
+    # another process already sent this notification within the interval
+    redis_client.set.return_value = None
+    dispatcher = _dispatcher(client, redis_dedup=True)
+
+    with patch(
+        "keep.api.core.notification_dispatcher.get_redis_client",
+        return_value=redis_client,
+    ):
+        dispatcher.notify("tenant", "poll-alerts")
+        time.sleep(0.2)
+        assert client.trigger.call_count == 0
+        assert dispatcher.stats[("poll-alerts", "deduplicated")] == 1
+        redis_client.set.assert_called_with(
+            "keep:ui-notification:tenant:poll-alerts",
+            dispatcher._pid,
+            nx=True,
+            px=450,
+        )
+
+        # the pending notification is sent once this process gets the lock
+        redis_client.set.return_value = True
+        time.sleep(0.6)
+        assert client.trigger.call_count == 1
+
+
+def test_notification_dispatcher_fails_open_without_redis():
+    client = MagicMock()
+    redis_client = MagicMock()
+    redis_client.set.side_effect = ConnectionError("redis is down")
+    dispatcher = _dispatcher(client, redis_dedup=True)
+
+    with patch(
+        "keep.api.core.notification_dispatcher.get_redis_client",
+        return_value=redis_client,
+    ):
+        dispatcher.notify("tenant", "incident-change")
+        time.sleep(0.2)
+    client.trigger.assert_called_once_with("private-tenant", "incident-change", {})
+
+
+def test_notification_dispatcher_counts_failures():
+    client = MagicMock()
+    client.trigger.side_effect = Exception("pusher is down")
+    dispatcher = _dispatcher(client)
+
+    assert dispatcher.notify("tenant", "poll-alerts")
+    assert dispatcher.flush()
+    assert dispatcher.stats[("poll-alerts", "failed")] == 1
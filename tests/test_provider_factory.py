@@ -1,5 +1,10 @@
 from datetime import datetime
+import importlib
 import inspect
+import json
+import os
+import subprocess
+import sys
 from typing import Optional, Union
 
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
@@ -61,7 +66,114 @@ def test_provider_factory_is_using_config_key_from_db(db_session):
     db_session.commit()
 
     with patch('keep.secretmanager.secretmanagerfactory.SecretManagerFactory.get_secret_manager') as mock_secret_manager:
-        mock_secret_manager.return_value.read_secret.return_value = {"key": "value"}
-        ProvidersFactory.get_installed_providers(tenant_id=SINGLE_TENANT_UUID)
-        assert mock_secret_manager.return_value.read_secret.call_args[1]['secret_name'] == custom_configuration_key
+        mock_secret_manager.return_value.read_secrets.return_value = {
+            custom_configuration_key: {"key": "value"}
+        }
+        installed_providers = ProvidersFactory.get_installed_providers(tenant_id=SINGLE_TENANT_UUID)
+        assert mock_secret_manager.return_value.read_secrets.call_args[1]['secret_names'] == [custom_configuration_key]
+        assert installed_providers[0].details == {"name": "test_provider", "key": "value"}
 
+
+def test_provider_factory_reads_configs_one_by_one_on_bulk_error(db_session):
+    for provider_id in ["readable", "unreadable"]:
+        db_session.add(
+            Provider(
+                id=provider_id,
+                tenant_id=SINGLE_TENANT_UUID,
+                name=provider_id,
+                type="grafana",
+                installed_by="test_user",
+                installation_time=datetime.now(),
+                configuration_key=f"{provider_id}_secret",
+                validatedScopes=True,
+                pulling_enabled=False,
+            )
+        )
+    db_session.commit()
+
+    def _read_secret(secret_name, is_json):
+        if secret_name == "unreadable_secret":
+            raise Exception("Secret not found")
+        return {"key": "value"}
+
+    with patch('keep.secretmanager.secretmanagerfactory.SecretManagerFactory.get_secret_manager') as mock_secret_manager:
+        mock_secret_manager.return_value.read_secrets.side_effect = Exception("Throttled")
+        mock_secret_manager.return_value.read_secret.side_effect = _read_secret
+        installed_providers = ProvidersFactory.get_installed_providers(tenant_id=SINGLE_TENANT_UUID)
+
+    assert [provider.id for provider in installed_providers] == ["readable"]
+    assert installed_providers[0].details == {"name": "readable", "key": "value"}
+
+
+
+def _write_providers_index(path, **overrides):
+    from keep.api.models.provider import Provider as ProviderModel
+    from keep.providers.providers_factory import ProviderEncoder
+
+    providers_index = ProvidersFactory.build_providers_index(
+        [
+            ProviderModel(
+                type="prometheus",
+                display_name="Prometheus",
+                can_notify=False,
+                can_query=True,
+            )
+        ]
+    )
+    providers_index.update(overrides)
+    with open(path, "w") as f:
+        json.dump(providers_index, f, cls=ProviderEncoder)
+
+
+def test_providers_index_is_loaded_without_importing_providers(tmp_path):
+    index_file = tmp_path / "providers_cache.json"
+    _write_providers_index(index_file)
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys\n"
+            "from keep.providers.providers_factory import ProvidersFactory\n"
+            "providers = ProvidersFactory.get_all_providers()\n"
+            "print(len(providers), len([m for m in sys.modules "
+            "if m.startswith('keep.providers.prometheus_provider')]))",
+        ],
+        env={**os.environ, "PROVIDERS_CACHE_FILE": str(index_file)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip().splitlines()[-1] == "1 0"
+
+
+def test_stale_providers_index_is_ignored(tmp_path):
+    index_file = tmp_path / "providers_cache.json"
+
+    _write_providers_index(index_file)
+    assert [p.type for p in ProvidersFactory.load_providers_index(index_file)] == [
+        "prometheus"
+    ]
+
+    _write_providers_index(index_file, keep_version="0.0.0-old")
+    assert ProvidersFactory.load_providers_index(index_file) is None
+
+    _write_providers_index(index_file, provider_directories=["prometheus_provider"])
+    assert ProvidersFactory.load_providers_index(index_file) is None
+
+    # unversioned indexes from older releases
+    with open(index_file, "w") as f:
+        json.dump([], f)
+    assert ProvidersFactory.load_providers_index(index_file) is None
+
+
+def test_get_provider_class_is_memoized():
+    with patch(
+        "keep.providers.providers_factory.importlib.import_module",
+        wraps=importlib.import_module,
+    ) as import_module, patch.dict(ProvidersFactory._provider_classes, clear=True):
+        first = ProvidersFactory.get_provider_class("prometheus")
+        second = ProvidersFactory.get_provider_class("prometheus")
+
+    assert first is second
+    assert import_module.call_count == 1
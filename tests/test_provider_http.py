@@ -0,0 +1,169 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from keep.contextmanager.contextmanager import ContextManager
+from keep.providers.base.provider_http import ProviderSessions, create_session
+from keep.providers.models.provider_config import ProviderConfig
+from keep.providers.webhook_provider.webhook_provider import WebhookProvider
+
+
+class MockHTTPServer:
+    """
+    A local keep-alive HTTP server counting its connections, the responses can be scripted
+    per path. An optional handshake_latency per new connection stands for the TCP+TLS
+    handshake with a remote API (see scripts/benchmark_provider_http.py).
+    """
+
+    def __init__(self, handshake_latency: float = 0):
+        self.handshake_latency = handshake_latency
+        self.connections = 0
+        self.requests = []
+        self.responses = {}
+        mock_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # don't wait for the ACK of the headers to send the body
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                mock_server.connections += 1
+                time.sleep(mock_server.handshake_latency)
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                mock_server.requests.append((self.command, self.path))
+                scripted = mock_server.responses.get(self.path, [])
+                status, headers, delay = scripted.pop(0) if scripted else (200, {}, 0)
+                time.sleep(delay)
+                body = b'{"ok": true}'
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def mock_server():
+    mock_server = MockHTTPServer()
+    yield mock_server
+    mock_server.server.shutdown()
+
+
+def _webhook_provider(url: str, provider_id: str = "webhook-test") -> WebhookProvider:
+    context_manager = ContextManager(tenant_id="test-tenant", workflow_id="test")
+    config = ProviderConfig(
+        description="Webhook Output Provider",
+        authentication={"url": f"{url}/hook", "method": "POST"},
+    )
+    return WebhookProvider(context_manager, provider_id=provider_id, config=config)
+
+
+def test_provider_http_connections_reused(mock_server):
+    with patch(
+        "keep.providers.base.base_provider.provider_sessions", ProviderSessions()
+    ) as provider_sessions:
+        for _ in range(10):
+            _webhook_provider(mock_server.url).notify(body={"alert": "test"})
+        assert mock_server.connections == 1
+        assert provider_sessions.stats["created"] == 1
+
+        # other providers get their own session
+        _webhook_provider(mock_server.url, "other-webhook").notify(body={})
+        assert mock_server.connections == 2
+    assert len(mock_server.requests) == 11
+
+
+def test_provider_http_sessions_lru():
+    provider_sessions = ProviderSessions(max_sessions=2)
+    session = provider_sessions.get("t1", "p1", "https://api.example.com/v1/a")
+    assert provider_sessions.get("t1", "p1", "https://API.example.com/v2") is session
+    provider_sessions.get("t1", "p1", "https://other.example.com")
+    provider_sessions.get("t2", "p1", "https://api.example.com")
+    assert provider_sessions.stats["evicted"] == 1
+    assert provider_sessions.get("t1", "p1", "https://api.example.com") is not session
+
+
+def test_provider_http_retries(mock_server):
+    session = create_session(retries=2)
+
+    # rate limited requests are retried for every method, after Retry-After
+    mock_server.responses["/limited"] = [(429, {"Retry-After": "1"}, 0)]
+    start = time.perf_counter()
+    assert session.post(f"{mock_server.url}/limited", json={}).status_code == 200
+    assert time.perf_counter() - start >= 1
+
+    # server errors only for the idempotent methods
+    mock_server.responses["/unavailable"] = [(503, {}, 0), (503, {}, 0)]
+    assert session.post(f"{mock_server.url}/unavailable", json={}).status_code == 503
+    assert session.get(f"{mock_server.url}/unavailable").status_code == 200
+
+    # the last response is returned when the retries are exhausted
+    mock_server.responses["/down"] = [(502, {}, 0)] * 3
+    assert session.get(f"{mock_server.url}/down").status_code == 502
+
+    assert mock_server.requests == [
+        ("POST", "/limited"),
+        ("POST", "/limited"),
+        ("POST", "/unavailable"),
+        ("GET", "/unavailable"),
+        ("GET", "/unavailable"),
+        ("GET", "/down"),
+        ("GET", "/down"),
+        ("GET", "/down"),
+    ]
+
+
+def test_provider_http_default_timeout(mock_server):
+    session = create_session(timeout=(1, 0.1))
+    mock_server.responses["/slow"] = [(200, {}, 0.5), (200, {}, 0.5)]
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        session.get(f"{mock_server.url}/slow")
+    # an explicit timeout wins
+    assert session.get(f"{mock_server.url}/slow", timeout=2).ok
+
+
+def test_provider_http_session_reused_across_calls(mock_server):
+    url = f"{mock_server.url}/hook"
+    with patch(
+        "keep.providers.base.base_provider.provider_sessions",
+        ProviderSessions(enabled=False),
+    ):
+        provider = _webhook_provider(mock_server.url)
+        assert provider.http_session(url) is not provider.http_session(url)
+        for _ in range(5):
+            _webhook_provider(mock_server.url).notify(body={"alert": "test"})
+    # a session and a connection per call
+    assert mock_server.connections == 5
+
+    with patch(
+        "keep.providers.base.base_provider.provider_sessions", ProviderSessions()
+    ):
+        session = _webhook_provider(mock_server.url).http_session(url)
+        adapter = session.get_adapter(url)
+        for _ in range(5):
+            provider = _webhook_provider(mock_server.url)
+            # a provider instance per workflow run, one session for all of them
+            assert provider.http_session(url) is session
+            assert provider.http_session(url).get_adapter(url) is adapter
+            provider.notify(body={"alert": "test"})
+    assert mock_server.connections == 6
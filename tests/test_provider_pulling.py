@@ -0,0 +1,104 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import call, patch
+
+from keep.api.models.alert import AlertDto
+from keep.api.routes import preset
+
+
+class FakePullingProvider:
+    def __init__(self, alerts_by_fingerprint, delay=0):
+        self.alerts_by_fingerprint = alerts_by_fingerprint
+        self.delay = delay
+
+    def get_alerts_by_fingerprint(self, tenant_id):
+        time.sleep(self.delay)
+        return self.alerts_by_fingerprint
+
+
+def _installed_provider(provider_id, provider_type):
+    return SimpleNamespace(
+        id=provider_id, type=provider_type, pulling_enabled=True, last_pull_time=None
+    )
+
+
+def _alerts(prefix, count):
+    return {
+        f"{prefix}-{i}": [
+            AlertDto(id=f"{prefix}-{i}", name="alert", fingerprint=f"{prefix}-{i}")
+        ]
+        for i in range(count)
+    }
+
+
+def test_pull_data_from_providers_concurrently_in_batches(monkeypatch):
+    installed_providers = [
+        _installed_provider("slow", "datadog"),
+        _installed_provider("fast", "grafana"),
+    ]
+    provider_instances = {
+        "slow": FakePullingProvider(_alerts("slow", 3), delay=1.5),
+        "fast": FakePullingProvider(_alerts("fast", 5)),
+    }
+    processed_batches = []
+    monkeypatch.setattr(preset, "PROVIDER_PULL_PROCESS_BATCH_SIZE", 2)
+
+    with patch.object(
+        preset.ProvidersFactory,
+        "get_installed_providers",
+        return_value=installed_providers,
+    ), patch.object(
+        preset.ProvidersFactory,
+        "get_installed_provider",
+        side_effect=lambda tenant_id, provider_id, provider_type: provider_instances[
+            provider_id
+        ],
+    ), patch.object(
+        preset, "update_provider_last_pull_time"
+    ), patch.object(
+        preset,
+        "process_event",
+        side_effect=lambda ctx, tenant_id, provider_type, provider_id, fingerprint, api_key_name, trace_id, event, **kwargs: processed_batches.append(
+            (provider_id, time.time(), [alert.fingerprint for alert in event])
+        ),
+    ):
+        start = time.time()
+        preset.pull_data_from_providers("tenant", "trace")
+
+    fast_batches = [batch for batch in processed_batches if batch[0] == "fast"]
+    slow_batches = [batch for batch in processed_batches if batch[0] == "slow"]
+    # the fast provider is not blocked by the slow one
+    assert all(batch[1] - start < 1.5 for batch in fast_batches)
+    assert [len(batch[2]) for batch in fast_batches] == [2, 2, 1]
+    assert [len(batch[2]) for batch in slow_batches] == [2, 1]
+
+
+def test_pull_data_from_providers_timeout(monkeypatch):
+    installed_providers = [_installed_provider("stuck", "datadog")]
+    monkeypatch.setattr(preset, "PROVIDER_PULL_TIMEOUT_SECONDS", 1)
+
+    with patch.object(
+        preset.ProvidersFactory,
+        "get_installed_providers",
+        return_value=installed_providers,
+    ), patch.object(
+        preset.ProvidersFactory,
+        "get_installed_provider",
+        return_value=FakePullingProvider(_alerts("stuck", 1), delay=3),
+    ), patch.object(
+        preset, "update_provider_last_pull_time"
+    ), patch.object(
+        preset, "process_event"
+    ), patch.object(
+        preset, "provider_pull_duration"
+    ) as provider_pull_duration:
+        start = time.time()
+        preset.pull_data_from_providers("tenant", "trace")
+        assert time.time() - start < 2.5
+        # let the abandoned pull finish while everything is still patched
+        time.sleep(3.5 - (time.time() - start))
+
+    # recorded once, as timed out
+    assert provider_pull_duration.labels.call_args_list == [
+        call(provider_type="datadog", status="timeout")
+    ]
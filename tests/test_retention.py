@@ -0,0 +1,273 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func
+from sqlmodel import select
+
+from keep.api.core import retention
+from keep.api.core.db import add_alerts_to_incident
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.core.retention import (
+    RetentionAction,
+    get_retention_policies,
+    in_retention_window,
+    run_retention,
+    run_scheduled_retention,
+)
+from keep.api.models.alert import AlertStatus
+from keep.api.models.db.alert import (
+    Alert,
+    AlertAudit,
+    AlertPayload,
+    AlertRaw,
+    CommentMention,
+    LastAlert,
+)
+from keep.api.models.db.enrichment_event import EnrichmentEvent, EnrichmentLog
+from keep.api.models.db.incident import Incident, IncidentSeverity, IncidentStatus
+from keep.api.models.db.tenant import Tenant
+from keep.api.models.db.workflow import WorkflowExecution, WorkflowExecutionLog
+
+
+def _count(db_session, model, *where) -> int:
+    return db_session.exec(select(func.count()).select_from(model).where(*where)).one()
+
+
+@pytest.fixture
+def retention_history(db_session, create_alert):
+    old = datetime.utcnow() - timedelta(days=60)
+    recent = datetime.utcnow() - timedelta(days=1)
+    with patch("keep.api.core.db.ALERT_HISTORY_COMPACTION_ENABLED", True):
+        for fingerprint in ["superseded", "open-incident", "resolved-incident"]:
+            for i in range(3):
+                create_alert(
+                    fingerprint,
+                    AlertStatus.FIRING,
+                    old + timedelta(minutes=i),
+                    {"labels": {"service": fingerprint}},
+                )
+        create_alert("recent", AlertStatus.FIRING, recent)
+
+    for status in [IncidentStatus.FIRING, IncidentStatus.RESOLVED]:
+        incident = Incident(
+            id=uuid4(),
+            tenant_id=SINGLE_TENANT_UUID,
+            user_generated_name=f"{status.value} incident",
+            severity=IncidentSeverity.CRITICAL.order,
+            status=status.value,
+        )
+        db_session.add(incident)
+        db_session.commit()
+        add_alerts_to_incident(
+            SINGLE_TENANT_UUID,
+            incident,
+            [
+                (
+                    "open-incident"
+                    if status == IncidentStatus.FIRING
+                    else "resolved-incident"
+                )
+            ],
+            session=db_session,
+        )
+
+    for timestamp in [old, recent]:
+        db_session.add(
+            AlertRaw(tenant_id=SINGLE_TENANT_UUID, raw_alert={}, timestamp=timestamp)
+        )
+        audit = AlertAudit(
+            tenant_id=SINGLE_TENANT_UUID,
+            fingerprint="superseded",
+            timestamp=timestamp,
+            user_id="keep",
+            action="a comment",
+            description="a comment",
+        )
+        db_session.add(audit)
+        db_session.add(
+            CommentMention(
+                comment_id=audit.id,
+                mentioned_user_id="user@keephq.dev",
+                tenant_id=SINGLE_TENANT_UUID,
+            )
+        )
+        enrichment_event = EnrichmentEvent(
+            tenant_id=SINGLE_TENANT_UUID,
+            timestamp=timestamp,
+            date_hour=timestamp.replace(minute=0, second=0, microsecond=0),
+            status="success",
+            enrichment_type="mapping",
+            rule_id=1,
+            alert_id=uuid4(),
+        )
+        db_session.add(enrichment_event)
+        db_session.add(
+            EnrichmentLog(
+                tenant_id=SINGLE_TENANT_UUID,
+                enrichment_event_id=enrichment_event.id,
+                timestamp=timestamp,
+                message="mapped",
+            )
+        )
+    execution = WorkflowExecution(
+        id="retention-execution",
+        workflow_id="test-id-1",
+        tenant_id=SINGLE_TENANT_UUID,
+        triggered_by="keep-test",
+        status="success",
+        execution_number=1000,
+        started=old,
+    )
+    db_session.add(execution)
+    for i in range(5):
+        db_session.add(
+            WorkflowExecutionLog(
+                workflow_execution_id=execution.id,
+                timestamp=old if i < 3 else recent,
+                message=f"step {i}",
+                context={},
+            )
+        )
+
+    tenant = db_session.get(Tenant, SINGLE_TENANT_UUID)
+    tenant.configuration = {
+        **(tenant.configuration or {}),
+        "retention": {
+            "alert": {"days": 30, "action": "archive"},
+            "alertaudit": {"days": 30},
+            "alertraw": {"days": 7},
+            "workflowexecutionlog": {"days": 30},
+            "enrichmentevent": {"days": 30},
+            # keeps the rows forever
+            "alertdeduplicationevent": {"days": 0},
+        },
+    }
+    db_session.add(tenant)
+    db_session.commit()
+
+
+def test_retention_policies():
+    with patch(
+        "keep.api.core.retention.RETENTION_POLICY",
+        '{"alert": {"days": 90}, "alertraw": {"days": 7}, "unknown": {"days": 1}}',
+    ):
+        policies = get_retention_policies(
+            {"retention": {"alert": {"days": 30, "action": "archive"}}}
+        )
+    assert set(policies) == {"alert", "alertraw"}
+    assert policies["alert"].days == 30
+    assert policies["alert"].action == RetentionAction.ARCHIVE
+    assert policies["alertraw"].action == RetentionAction.DELETE
+
+    with patch("keep.api.core.retention.RETENTION_WINDOW", "22-4"):
+        assert in_retention_window(datetime(2026, 1, 1, 23))
+        assert in_retention_window(datetime(2026, 1, 1, 3))
+        assert not in_retention_window(datetime(2026, 1, 1, 12))
+
+
+def test_retention_dry_run_and_archive(db_session, retention_history, tmp_path):
+    # superseded occurrences of the fingerprints not in an open incident
+    expected_alerts = 4
+    alerts_before = _count(db_session, Alert)
+
+    reports = {
+        report.table: report
+        for report in run_retention(db_session, SINGLE_TENANT_UUID, dry_run=True)
+    }
+    assert {table: report.rows for table, report in reports.items()} == {
+        "alert": expected_alerts,
+        "alertaudit": 1,
+        "alertraw": 1,
+        "workflowexecutionlog": 3,
+        "enrichmentevent": 1,
+    }
+    assert reports["alert"].oldest is not None
+    assert _count(db_session, Alert) == alerts_before
+
+    with patch("keep.api.core.retention.RETENTION_ARCHIVE_DIR", str(tmp_path)), patch(
+        "keep.api.core.retention.RETENTION_BATCH_PAUSE", 0
+    ):
+        reports = {
+            report.table: report
+            for report in run_retention(db_session, SINGLE_TENANT_UUID, batch_size=3)
+        }
+    assert {table: report.rows for table, report in reports.items()} == {
+        "alert": expected_alerts,
+        "alertaudit": 1,
+        "alertraw": 1,
+        "workflowexecutionlog": 3,
+        "enrichmentevent": 1,
+    }
+
+    # the last alerts and the open incident's alerts are kept
+    assert _count(db_session, Alert) == alerts_before - expected_alerts
+    kept = db_session.exec(select(Alert.fingerprint, Alert.id)).all()
+    assert {fingerprint for fingerprint, _ in kept} == {
+        "superseded",
+        "open-incident",
+        "resolved-incident",
+        "recent",
+    }
+    assert _count(db_session, Alert, Alert.fingerprint == "open-incident") == 3
+    assert {alert_id for _, alert_id in kept} >= set(
+        db_session.exec(select(LastAlert.alert_id)).all()
+    )
+    # the payloads of the deleted compacted alerts go with them
+    assert db_session.exec(select(AlertPayload.payload_hash)).all()
+    assert all(
+        _count(db_session, Alert, Alert.payload_hash == payload_hash)
+        for payload_hash in db_session.exec(select(AlertPayload.payload_hash)).all()
+    )
+
+    assert _count(db_session, AlertAudit, AlertAudit.action == "a comment") == 1
+    assert _count(db_session, CommentMention) == 1
+    assert _count(db_session, AlertRaw) == 1
+    assert _count(db_session, WorkflowExecutionLog) == 2
+    assert _count(db_session, EnrichmentEvent, EnrichmentEvent.rule_id == 1) == 1
+    assert _count(db_session, EnrichmentLog, EnrichmentLog.message == "mapped") == 1
+
+    # in batches of 3, with the whole events of the compacted alerts
+    assert len(reports["alert"].archives) == 2
+    archived = []
+    for path in reports["alert"].archives:
+        with gzip.open(path, "rt") as archive:
+            archived.extend(json.loads(line) for line in archive)
+    assert len(archived) == expected_alerts
+    assert all(alert["event"]["labels"] for alert in archived)
+    assert {alert["fingerprint"] for alert in archived} == {
+        "superseded",
+        "resolved-incident",
+    }
+
+    # nothing left to delete
+    assert all(
+        report.rows == 0
+        for report in run_retention(db_session, SINGLE_TENANT_UUID, dry_run=True)
+    )
+
+
+def test_scheduled_retention_resumes_next_tick(db_session, retention_history, tmp_path):
+    alerts_before = _count(db_session, Alert)
+    with patch("keep.api.core.retention.RETENTION_ENABLED", True), patch(
+        "keep.api.core.retention.RETENTION_WINDOW", ""
+    ), patch("keep.api.core.retention.RETENTION_ARCHIVE_DIR", str(tmp_path)), patch(
+        "keep.api.core.retention.RETENTION_BATCH_PAUSE", 0
+    ), patch.object(
+        retention, "_last_run", None
+    ):
+        # the budget of the tick is spent, nothing done and resumed next tick
+        with patch("keep.api.core.retention.RETENTION_TICK_SECONDS", 0):
+            assert run_scheduled_retention(retention.logger, db_session) == []
+        assert retention._last_run is None
+        assert _count(db_session, Alert) == alerts_before
+
+        reports = run_scheduled_retention(retention.logger, db_session)
+        assert {report.table: report.rows for report in reports}["alert"] == 4
+        assert _count(db_session, Alert) == alerts_before - 4
+        # done, the next run waits for KEEP_RETENTION_INTERVAL
+        assert retention._last_run is not None
+        assert run_scheduled_retention(retention.logger, db_session) == []
@@ -1,5 +1,6 @@
 import pytest
 
+from keep.secretmanager.secretmanager import get_secrets_cache
 from keep.secretmanager.vaultsecretmanager import VaultSecretManager
 
 
@@ -57,3 +58,46 @@ def test_delete_secret(vault_secret_manager):
     secret_name = "test_secret"
     vault_secret_manager.delete_secret(secret_name)
     # You might want to assert logs or other side effects if necessary
+
+
+def test_read_secrets(vault_secret_manager, monkeypatch):
+    read_secret_names = []
+
+    def read_secret_version(path, *args, **kwargs):
+        read_secret_names.append(path)
+        if path == "missing_secret":
+            raise Exception("secret not found")
+        return {"data": {"data": {"value": f"value-of-{path}"}}}
+
+    monkeypatch.setattr(
+        vault_secret_manager.client, "read_secret_version", read_secret_version
+    )
+    secrets = vault_secret_manager.read_secrets(
+        ["secret_1", "secret_2", "missing_secret"]
+    )
+    assert secrets == {"secret_1": "value-of-secret_1", "secret_2": "value-of-secret_2"}
+    assert sorted(read_secret_names) == ["missing_secret", "secret_1", "secret_2"]
+
+
+def test_read_secrets_cache_invalidated_on_write(vault_secret_manager, monkeypatch):
+    get_secrets_cache().invalidate()
+    read_count = {"count": 0}
+
+    def read_secret_version(path, *args, **kwargs):
+        read_count["count"] += 1
+        return {"data": {"data": {"value": '{"authentication": {"token": "a"}}'}}}
+
+    monkeypatch.setattr(
+        vault_secret_manager.client, "read_secret_version", read_secret_version
+    )
+    first = vault_secret_manager.read_secrets(["cached_secret"], is_json=True, use_cache=True)
+    # cached values are copies, mutating them doesn't leak into the cache
+    first["cached_secret"]["authentication"]["token"] = "mutated"
+    second = vault_secret_manager.read_secrets(["cached_secret"], is_json=True, use_cache=True)
+    assert second == {"cached_secret": {"authentication": {"token": "a"}}}
+    assert read_count["count"] == 1
+
+    vault_secret_manager.write_secret("cached_secret", '{"authentication": {"token": "b"}}')
+    vault_secret_manager.read_secrets(["cached_secret"], is_json=True, use_cache=True)
+    assert read_count["count"] == 2
+    get_secrets_cache().invalidate()
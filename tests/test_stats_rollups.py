@@ -0,0 +1,216 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from sqlmodel import select
+
+from keep.api.core.db import (
+    add_alerts_to_incident,
+    calc_incidents_mttr,
+    change_incident_status_by_id,
+    create_deduplication_event,
+    delete_incident_by_id,
+    get_all_deduplication_stats,
+    get_combined_workflow_execution_distribution,
+    get_incidents_created_distribution,
+    get_provider_distribution,
+    remove_alerts_to_incident_by_incident_id,
+)
+from keep.api.core.dependencies import SINGLE_TENANT_UUID
+from keep.api.core.stats_rollups import RollupMetric, backfill_stats_rollups
+from keep.api.models.alert import AlertStatus
+from keep.api.models.db.alert import Alert
+from keep.api.models.db.incident import Incident, IncidentSeverity, IncidentStatus
+from keep.api.models.db.statistics import StatsRollup
+from keep.api.models.db.workflow import WorkflowExecution
+from keep.api.models.time_stamp import TimeStampFilter
+
+
+def _incident(creation_time: datetime, hours_to_resolve: float | None = None):
+    return Incident(
+        id=uuid4(),
+        tenant_id=SINGLE_TENANT_UUID,
+        user_generated_name="Test incident",
+        severity=IncidentSeverity.CRITICAL.order,
+        status=(
+            IncidentStatus.RESOLVED.value
+            if hours_to_resolve is not None
+            else IncidentStatus.FIRING.value
+        ),
+        creation_time=creation_time,
+        start_time=creation_time,
+        end_time=(
+            creation_time + timedelta(hours=hours_to_resolve)
+            if hours_to_resolve is not None
+            else None
+        ),
+    )
+
+
+@pytest.fixture
+def stats_history(db_session):
+    now = datetime.utcnow()
+    for i in range(30):
+        db_session.add(
+            Alert(
+                tenant_id=SINGLE_TENANT_UUID,
+                provider_type="prometheus" if i % 3 else "grafana",
+                provider_id="test" if i % 2 else None,
+                event={"name": f"alert-{i}"},
+                fingerprint=f"fingerprint-{i % 7}",
+                timestamp=now - timedelta(hours=i % 30, minutes=i),
+            )
+        )
+        db_session.add(
+            WorkflowExecution(
+                id=f"stats-execution-{i}",
+                workflow_id="test-id-1",
+                tenant_id=SINGLE_TENANT_UUID,
+                triggered_by="keep-test",
+                status="success",
+                execution_number=100 + i,
+                started=now - timedelta(hours=i % 5, minutes=i),
+            )
+        )
+    incidents = [
+        _incident(now - timedelta(hours=i), i / 2 if i % 2 else None) for i in range(10)
+    ]
+    db_session.commit()
+    for incident in incidents:
+        # the running number is assigned per insert
+        db_session.add(incident)
+        db_session.commit()
+
+    rule_id = str(uuid4())
+    for dedup_type in ["full", "full", "partial", "none"]:
+        create_deduplication_event(
+            SINGLE_TENANT_UUID, rule_id, dedup_type, "test", "prometheus"
+        )
+    create_deduplication_event(SINGLE_TENANT_UUID, str(uuid4()), "full", None, None)
+
+    # resolved through the ORM, through a core update, reopened and deleted
+    incidents[0].status = IncidentStatus.RESOLVED.value
+    incidents[0].end_time = now + timedelta(hours=2)
+    db_session.add(incidents[0])
+    db_session.commit()
+    change_incident_status_by_id(
+        SINGLE_TENANT_UUID,
+        incidents[2].id,
+        IncidentStatus.RESOLVED,
+        end_time=now + timedelta(hours=1),
+    )
+    change_incident_status_by_id(
+        SINGLE_TENANT_UUID, incidents[3].id, IncidentStatus.FIRING
+    )
+    delete_incident_by_id(SINGLE_TENANT_UUID, incidents[5].id)
+    return now
+
+
+def _stats(now: datetime) -> dict:
+    # the rollups count whole hours
+    timestamp_filter = TimeStampFilter(
+        lower_timestamp=now.replace(minute=0, second=0, microsecond=0)
+        - timedelta(hours=24),
+        upper_timestamp=now,
+    )
+    return {
+        "deduplication": get_all_deduplication_stats(SINGLE_TENANT_UUID),
+        "providers": get_provider_distribution(SINGLE_TENANT_UUID),
+        "alerts": get_provider_distribution(
+            SINGLE_TENANT_UUID, aggregate_all=True, timestamp_filter=timestamp_filter
+        ),
+        "workflow_executions": get_combined_workflow_execution_distribution(
+            SINGLE_TENANT_UUID, timestamp_filter
+        ),
+        "incidents": get_incidents_created_distribution(
+            SINGLE_TENANT_UUID, timestamp_filter
+        ),
+        "mttr": calc_incidents_mttr(SINGLE_TENANT_UUID, timestamp_filter),
+    }
+
+
+def _rollups(db_session) -> dict:
+    db_session.expire_all()
+    return {
+        (row.metric, row.hour, row.dimensions): (row.count, round(row.total, 6))
+        for row in db_session.exec(select(StatsRollup)).all()
+    }
+
+
+def test_stats_rollups_match_raw_queries(db_session, stats_history):
+    with patch("keep.api.core.stats_rollups.STATS_ROLLUPS_ENABLED", False):
+        expected = _stats(stats_history)
+    stats = _stats(stats_history)
+
+    assert stats == expected
+    assert sum(hour["number"] for hour in stats["alerts"]) > 0
+    assert [row["mttr"] for row in stats["mttr"] if row["mttr"]]
+    rule_stats = next(
+        rule
+        for rule in stats["deduplication"].values()
+        if rule["provider_type"] == "prometheus"
+    )
+    assert rule_stats["full_dedup_count"] == 2
+    assert sum(hour["number"] for hour in rule_stats["alerts_last_24_hours"]) == 4
+
+
+def test_stats_rollups_backfill(db_session, stats_history):
+    rollups = _rollups(db_session)
+    assert {metric for metric, _, _ in rollups} == {
+        metric.value for metric in RollupMetric
+    }
+
+    db_session.query(StatsRollup).delete()
+    db_session.commit()
+    written = backfill_stats_rollups(db_session)
+    assert written[RollupMetric.ALERTS.value] > 0
+    # the reopened and deleted incidents leave rows with a count of 0 behind
+    assert {key: value for key, value in rollups.items() if value[0]} == _rollups(
+        db_session
+    )
+
+    # a range only recomputes its own hours
+    backfill_stats_rollups(
+        db_session,
+        tenant_id=SINGLE_TENANT_UUID,
+        lower=stats_history - timedelta(hours=3),
+        upper=stats_history,
+    )
+    assert {key: value for key, value in rollups.items() if value[0]} == _rollups(
+        db_session
+    )
+
+
+def test_stats_rollups_follow_incident_start_time(db_session, create_alert):
+    now = datetime.utcnow()
+    incident = _incident(now - timedelta(hours=1), hours_to_resolve=2)
+    db_session.add(incident)
+    db_session.commit()
+    for fingerprint, hours_ago in [("early", 5), ("late", 3)]:
+        create_alert(fingerprint, AlertStatus.FIRING, now - timedelta(hours=hours_ago))
+    timestamp_filter = TimeStampFilter(
+        lower_timestamp=now - timedelta(hours=24), upper_timestamp=now
+    )
+
+    def mttr() -> list[float]:
+        return [
+            row["mttr"]
+            for row in calc_incidents_mttr(SINGLE_TENANT_UUID, timestamp_filter)
+            if row["mttr"]
+        ]
+
+    def raw_mttr() -> list[float]:
+        with patch("keep.api.core.stats_rollups.STATS_ROLLUPS_ENABLED", False):
+            return mttr()
+
+    # the incident starts with its first alert
+    add_alerts_to_incident(
+        SINGLE_TENANT_UUID, incident, ["early", "late"], session=db_session
+    )
+    assert [round(value, 6) for value in raw_mttr()] == [6]
+    assert mttr() == raw_mttr()
+
+    remove_alerts_to_incident_by_incident_id(SINGLE_TENANT_UUID, incident.id, ["early"])
+    assert [round(value, 6) for value in raw_mttr()] == [4]
+    assert mttr() == raw_mttr()
@@ -1,6 +1,7 @@
 from datetime import datetime
 import uuid
 import pytest
+from unittest.mock import patch
 from sqlmodel import select
 
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
@@ -387,3 +388,250 @@ def test_import_to_db(db_session):
         assert len(dependencies) == 1
         assert dependencies[0].service_id == 1
         assert dependencies[0].depends_on_service_id == 2
+
+
+def test_process_topology_syncs_incrementally(db_session):
+    from keep.api.models.db.topology import TopologyServiceInDto
+    from keep.api.tasks.process_topology_task import process_topology
+
+    application_id = uuid.uuid4()
+
+    def pulled_service(name, dependencies=None, team="team"):
+        return TopologyServiceInDto(
+            source_provider_id="provider-1",
+            service=name,
+            display_name=name,
+            team=team,
+            dependencies=dependencies or {},
+            application_relations={application_id: "Application"},
+        )
+
+    stats = process_topology(
+        SINGLE_TENANT_UUID,
+        [
+            pulled_service("a", {"b": "http"}),
+            pulled_service("b", {"c": "grpc"}),
+            pulled_service("c"),
+        ],
+        "provider-1",
+        "datadog",
+    )
+    assert (stats.services_inserted, stats.dependencies_inserted) == (3, 2)
+    ids_before = {
+        service.service: service.id
+        for service in db_session.exec(select(TopologyService)).all()
+    }
+
+    # "b" changes, "c" is gone, "d" is new and the b->c dependency goes away with "c"
+    stats = process_topology(
+        SINGLE_TENANT_UUID,
+        [
+            pulled_service("a", {"b": "https"}),
+            pulled_service("b", team="other-team"),
+            pulled_service("d", {"a": "http"}),
+        ],
+        "provider-1",
+        "datadog",
+    )
+    assert (
+        stats.services_inserted,
+        stats.services_updated,
+        stats.services_deleted,
+    ) == (1, 1, 1)
+    assert (
+        stats.dependencies_inserted,
+        stats.dependencies_updated,
+        stats.dependencies_deleted,
+    ) == (1, 1, 0)
+
+    db_session.expire_all()
+    services = {
+        service.service: service
+        for service in db_session.exec(select(TopologyService)).all()
+    }
+    assert set(services) == {"a", "b", "d"}
+    # unchanged and updated services keep their ids
+    assert services["a"].id == ids_before["a"]
+    assert services["b"].id == ids_before["b"]
+    assert services["b"].team == "other-team"
+
+    dependencies = {
+        (dependency.service_id, dependency.depends_on_service_id): dependency.protocol
+        for dependency in db_session.exec(select(TopologyServiceDependency)).all()
+    }
+    assert dependencies == {
+        (services["a"].id, services["b"].id): "https",
+        (services["d"].id, services["a"].id): "http",
+    }
+
+    application = db_session.exec(select(TopologyApplication)).one()
+    assert {service.service for service in application.services} == {"a", "b", "d"}
+
+    # nothing changed, nothing written
+    stats = process_topology(
+        SINGLE_TENANT_UUID,
+        [
+            pulled_service("a", {"b": "https"}),
+            pulled_service("b", team="other-team"),
+            pulled_service("d", {"a": "http"}),
+        ],
+        "provider-1",
+        "datadog",
+    )
+    assert stats.services_inserted + stats.services_updated + stats.services_deleted == 0
+    assert (
+        stats.dependencies_inserted
+        + stats.dependencies_updated
+        + stats.dependencies_deleted
+        == 0
+    )
+
+
+def test_topology_index_lookup_and_invalidation(db_session):
+    from keep.api.models.db.topology import TopologyServiceInDto
+    from keep.api.tasks.process_topology_task import process_topology
+    from keep.topologies.topology_index import get_topology_data_by_dynamic_matcher
+
+    service_1 = create_service(db_session, SINGLE_TENANT_UUID, "1")
+    application = TopologyApplication(
+        tenant_id=SINGLE_TENANT_UUID,
+        name="Test Application",
+        repository="app-repository",
+        services=[service_1],
+    )
+    db_session.add(application)
+    db_session.commit()
+
+    found = get_topology_data_by_dynamic_matcher(
+        SINGLE_TENANT_UUID, {"service": "test_service_1"}
+    )
+    assert found.id == service_1.id
+    assert [app.repository for app in found.applications] == ["app-repository"]
+    assert (
+        get_topology_data_by_dynamic_matcher(
+            SINGLE_TENANT_UUID, {"service": "test_service_1", "team": "other_team"}
+        )
+        is None
+    )
+
+    # served from memory, no query
+    with patch(
+        "keep.topologies.topology_index.TopologyServiceIndex._load"
+    ) as load_index:
+        get_topology_data_by_dynamic_matcher(
+            SINGLE_TENANT_UUID, {"service": "test_service_1"}
+        )
+        load_index.assert_not_called()
+
+    # pulled topology invalidates the index
+    process_topology(
+        SINGLE_TENANT_UUID,
+        [
+            TopologyServiceInDto(
+                source_provider_id="provider-1",
+                service="pulled_service",
+                display_name="Pulled",
+            )
+        ],
+        "provider-1",
+        "datadog",
+    )
+    assert (
+        get_topology_data_by_dynamic_matcher(
+            SINGLE_TENANT_UUID, {"service": "pulled_service"}
+        ).display_name
+        == "Pulled"
+    )
+
+
+def test_topology_processor_processes_changed_alerts_only(db_session, create_alert):
+    from keep.api.models.alert import AlertStatus
+    from keep.api.models.db.alert import Incident, LastAlertToIncident
+    from keep.topologies.topology_processor import TopologyProcessor
+
+    service_1 = create_service(db_session, SINGLE_TENANT_UUID, "1")
+    service_2 = create_service(db_session, SINGLE_TENANT_UUID, "2")
+    for name, service in (("App 1", service_1), ("App 2", service_2)):
+        db_session.add(
+            TopologyApplication(
+                tenant_id=SINGLE_TENANT_UUID, name=name, services=[service]
+            )
+        )
+    db_session.commit()
+    applications = {
+        application.name: application.id
+        for application in db_session.exec(select(TopologyApplication)).all()
+    }
+
+    processor = TopologyProcessor()
+    with patch("keep.topologies.topology_processor.RulesEngine"):
+        # the first run reconciles everything
+        processor._process_tenant(SINGLE_TENANT_UUID)
+
+        create_alert(
+            "fp-1",
+            AlertStatus.FIRING,
+            datetime.utcnow(),
+            {"service": "test_service_1"},
+        )
+        with patch.object(processor, "_reconcile_tenant") as reconcile_tenant:
+            processor._process_tenant(SINGLE_TENANT_UUID)
+            reconcile_tenant.assert_not_called()
+
+        incidents = db_session.exec(select(Incident)).all()
+        assert [incident.incident_application for incident in incidents] == [
+            applications["App 1"]
+        ]
+
+        create_alert(
+            "fp-2",
+            AlertStatus.FIRING,
+            datetime.utcnow(),
+            {"service": "test_service_1"},
+        )
+        processor._process_tenant(SINGLE_TENANT_UUID)
+        linked_fingerprints = db_session.exec(
+            select(LastAlertToIncident.fingerprint).where(
+                LastAlertToIncident.incident_id == incidents[0].id
+            )
+        ).all()
+        assert sorted(linked_fingerprints) == ["fp-1", "fp-2"]
+
+        # no changes, no work
+        with patch(
+            "keep.topologies.topology_processor.get_last_alerts"
+        ) as get_last_alerts:
+            processor._process_tenant(SINGLE_TENANT_UUID)
+            get_last_alerts.assert_not_called()
+
+
+def test_topology_index_matches_like_the_query(db_session):
+    from keep.api.core.db import (
+        get_topology_data_by_dynamic_matcher as query_topology_data,
+    )
+    from keep.topologies.topology_index import get_topology_data_by_dynamic_matcher
+
+    create_service(db_session, SINGLE_TENANT_UUID, "1")
+    service_2 = create_service(db_session, SINGLE_TENANT_UUID, "2")
+    service_2.tags = ["test_tag", "other_tag"]
+    service_2.namespace = "prod"
+    db_session.add(service_2)
+    db_session.commit()
+
+    for matchers_value in [
+        {"service": "test_service_1"},
+        {"service": "TEST_SERVICE_1"},
+        {"team": "test_team"},
+        {"team": "test_team", "namespace": "prod"},
+        {"namespace": None},
+        {"display_name": 2},
+        {"is_manual": False},
+        # the JSON column matches the whole list, not its items
+        {"tags": "test_tag"},
+        {"tags": "other_tag"},
+        {"tags": ["test_tag"]},
+        {"repository": "test_repository", "tags": ["test_tag", "other_tag"]},
+    ]:
+        expected = query_topology_data(SINGLE_TENANT_UUID, matchers_value)
+        found = get_topology_data_by_dynamic_matcher(SINGLE_TENANT_UUID, matchers_value)
+        assert (found and found.id) == (expected and expected.id), matchers_value